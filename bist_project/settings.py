@@ -84,6 +84,34 @@ DATABASES = {
 }
 
 
+# Önbellek
+# Dashboard, analitik ve dağılım önbellekleri Celery çalışanında yazılıp web sürecinde
+# okunduğu için süreçler arası paylaşılan önbellek kullanılır: REDIS_URL verilmişse Redis
+# (redis paketi gerekir), yoksa veritabanı önbelleği. Veritabanı önbelleğinin tablosu
+# migrate ile değil, kurulumda migrate'ten sonra çalıştırılan `manage.py createcachetable`
+# ile oluşturulur (tablo varsa dokunmaz; test çalıştırıcısı kendisi oluşturur).
+# Veritabanı önbelleğinde her yazmada temizlik yapılmasın diye sınır yüksek tutulur;
+# süresi dolan kayıtlar gece clear_expired_cache_task ile silinir.
+REDIS_URL = os.environ.get('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'hisse_takip_cache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 10_000_000,
+            },
+        }
+    }
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -178,8 +206,86 @@ CELERY_BEAT_SCHEDULE = {
         # Alternatif olarak crontab kullanabilirsiniz:
         # 'schedule': crontab(minute='*/15'),  # Her saatin 0, 15, 30, 45. dakikalarında
     },
+    'create-daily-snapshots-nightly': {
+        'task': 'create_daily_snapshots_task',
+        'schedule': crontab(hour=23, minute=0),  # Her gece 23:00'te
+    },
+    'compute-risk-metrics-nightly': {
+        'task': 'compute_risk_metrics_task',
+        'schedule': crontab(hour=23, minute=30),  # Her gece 23:30'da
+    },
+    'dispatch-notifications-every-minute': {
+        'task': 'dispatch_notifications_task',
+        'schedule': 60.0,  # Dakikada bir
+    },
+    'clear-expired-cache-nightly': {
+        'task': 'clear_expired_cache_task',
+        'schedule': crontab(hour=3, minute=0),  # Her gece 03:00'te
+    },
+    'settle-fund-dealing-daily': {
+        'task': 'settle_fund_dealing_task',
+        'schedule': crontab(hour=18, minute=30, day_of_week='mon-fri'),  # İş günleri piyasa kapanışından sonra
+    },
 }
 
+# Performans analitiği ayarları
+ANALYTICS_CACHE_TIMEOUT = 60 * 60  # Hesaplanan ölçütlerin önbellek süresi (saniye)
+ANALYTICS_RISK_FREE_RATE = 0.0  # Sharpe/Sortino için yıllık risksiz faiz oranı (0.45 = %45)
+
+# Yatırımcı hisse dağılımı (look-through) ayarları
+EXPOSURE_CACHE_TIMEOUT = 60 * 60  # Hesaplanan dağılımların önbellek süresi (saniye)
+
+# Yatırımcı dashboard ayarları (fiyat alımı ve işlemlerden sonra toplu yeniden oluşturulur)
+DASHBOARD_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Fon alım/satım emri ayarları
+FUND_DEALING_CUTOFF = '13:30'  # Bu saatten sonraki emirler sonraki iş gününün fiyatından gerçekleşir
+FUND_DEALING_SETTLE_AFTER = '18:30'  # Günün emirleri piyasa kapanışından sonra, bu saatten itibaren gerçekleştirilir
+
+# E-posta ayarları (geliştirmede konsola yazar; üretimde SMTP backend ve EMAIL_HOST ayarlanmalı)
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'BIST Takip <noreply@bist-takip.local>'
+
+# Bildirim ayarları
+NOTIFICATION_DIGEST_SIZE = 50  # Tek özet e-postadaki en fazla bildirim
+NOTIFICATION_USER_RATE = (5, 60 * 60)  # Kullanıcı başına (e-posta, saniye): saatte 5 e-posta
+NOTIFICATION_GLOBAL_RATE = (100, 60)  # Toplam (e-posta, saniye): dakikada 100 e-posta
+NOTIFICATION_MAX_ATTEMPTS = 5  # Bu kadar başarısız denemeden sonra bildirim bırakılır
+NOTIFICATION_RETRY_BACKOFF = 60  # İlk yeniden deneme gecikmesi (saniye), her denemede iki katı
+
+# Süreli alarm koşulları için bellekteki fiyat tamponu ayarları
+TICK_BUFFER_SIZE = 512  # Hisse başına tutulan son fiyat sayısı
+TICK_VOLUME_DAYS = 20  # Hacim artışı alarmında ortalaması alınan gün sayısı
+
+# Fiyat akışı (SSE, /api/stream/) ayarları - ASGI sunucusu ile çalıştırılmalıdır
+STREAM_POLL_SECONDS = 2  # Yeni alım grubu ve işlem değişikliği kontrol aralığı
+STREAM_KEEPALIVE_SECONDS = 15  # Boştaki bağlantılara canlı tutma mesajı aralığı
+
+# Grafik serileri: bu günden uzun hisse aralıkları ham fiyat yerine günlük özetlerden okunur
+CHART_INTRADAY_DAYS = 5
+
+# Fiyat verisi admin sayfası: tarih aralığı filtresinin en fazla gün sayısı
+PRICE_ADMIN_MAX_DAYS = 31
+
+# Arka plan admin işleri: bir Celery görevinde işlenen kayıt sayısı
+ADMIN_JOB_CHUNK_SIZE = 200
+
+# Hisse arama indeksi: diğer işlemlerde eklenen hisseler için sürüm kontrol aralığı (saniye)
+SEARCH_INDEX_CHECK_SECONDS = 5
+
+# Risk ölçütü ayarları
+RISK_WINDOW_DAYS = 252  # Kovaryans penceresi (işlem günü)
+RISK_CONFIDENCE = 0.95  # VaR/CVaR güven düzeyi
+RISK_LEVEL_THRESHOLDS = (15, 30)  # Yıllık oynaklık (%) eşikleri: düşük / orta / yüksek
+
+# Maliyet yöntemi: 'fifo' (ilk giren ilk çıkar) veya 'average' (ortalama maliyet)
+# Değiştirildikten sonra `python manage.py rebuild_lots` çalıştırılmalıdır
+COST_BASIS_METHOD = 'fifo'
+
+# Kıyaslama endeksi ayarları
+BENCHMARK_DEFAULT_CODE = 'XU100'  # Portföyde endeks seçilmemişse kullanılan endeks
+BENCHMARK_COMPARISON_DAYS = 365  # benchmark_comparison için geriye dönük pencere (takvim günü)
+
 # Şu satırları kontrol edin
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
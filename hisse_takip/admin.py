@@ -1,23 +1,349 @@
-from django.contrib import admin
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ChangeList
+from django.db.models import Case, DecimalField, F, FloatField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.html import format_html_join
 from .models import (
-    Stock, PriceData, Portfolio, Position, Transaction, 
-    WatchList, WatchListItem, Alert, PortfolioSnapshot, Investor, Investment, Fund, FundShare
+    Stock, PriceData, DailyPrice, Portfolio, Position, Transaction, 
+    WatchList, WatchListItem, Alert, PortfolioSnapshot, Investor, Investment, Fund, FundShare,
+    FundNav, BenchmarkIndex, BenchmarkValue, RiskMetric, DealingOrder, Notification, IngestBatch, AdminJob
 )
+from .pagination import EstimatedCountPaginator
+from .pricing import latest_price_subquery
+from .recompute import deferred_recompute
+from .timeseries import day_bounds
+
+# Changelist'lerde hesaplanan tutarlar için çıktı alanı
+MONEY = DecimalField(max_digits=20, decimal_places=2)
+CENT = Decimal('0.01')
+
+
+def _money(value):
+    # Hesaplanan ondalıklar SQLite'ta ölçeklenmeden (ör. 49.9500000000000) döner
+    return value.quantize(CENT)
+
+
+def _percentage(amount, base):
+    return amount / base * 100 if base else 0
+
+
+def portfolio_values():
+    """Sorgu ifadesi: portföyün pozisyonlarının son fiyatlarla toplam değeri (alt sorgu)"""
+    values = Position.objects.filter(portfolio=OuterRef('pk')).order_by().annotate(
+        value=F('quantity') * latest_price_subquery()
+    ).values('portfolio').annotate(total=Sum('value')).values('total')
+    return Coalesce(Subquery(values), Value(0), output_field=MONEY)
+
+
+def fund_share_values():
+    """Sorgu ifadesi: yatırımcının fon paylarının güncel toplam değeri (alt sorgu)"""
+    values = FundShare.objects.filter(investor=OuterRef('pk')).order_by().values('investor').annotate(
+        total=Sum(Case(
+            When(fund__total_shares=0, then=Value(0)),
+            # SQLite tam sayı olarak saklanan ondalıkları tam sayı bölmesine sokmasın
+            default=F('shares_count') * F('fund__current_value') / Cast('fund__total_shares', FloatField()),
+            output_field=MONEY,
+        ))
+    ).values('total')
+    return Coalesce(Subquery(values), Value(0), output_field=MONEY)
+
+
+class PortfolioListFilter(admin.RelatedFieldListFilter):
+    """Portföy filtresi; seçenek adları (portföy - kullanıcı) portföy başına kullanıcı sorgusu yapmaz"""
+
+    def field_choices(self, field, request, model_admin):
+        ordering = self.field_admin_ordering(field, request, model_admin) or Portfolio._meta.ordering
+        return [(portfolio.pk, str(portfolio)) for portfolio in Portfolio.objects.select_related('user').order_by(*ordering)]
+
+
+# Fiyat verisi (en büyük tablo) changelist'i: filtreler sadece indeksli aralık sorguları üretir,
+# seçenek listesi için ham tabloda DISTINCT taraması yapılmaz
+PRICE_ADMIN_MAX_DAYS = getattr(settings, 'PRICE_ADMIN_MAX_DAYS', 31)
+# Drill-down'da listelenen en fazla ay
+PRICE_ADMIN_MONTHS = 24
+CURSOR_VAR = 'before'
+
+
+def _date_param(value, name):
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise IncorrectLookupParameters(f"{name} YYYY-AA-GG biçiminde geçerli bir tarih olmalı")
+    return parsed
+
+
+class InputFilter(admin.ListFilter):
+    """Seçenek listesi yerine form alanlarıyla çalışan filtre; `fields`: (parametre, etiket, input tipi)"""
+    template = 'admin/hisse_takip/pricedata/input_filter.html'
+    fields = ()
+    datalist = None
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        for name in self.expected_parameters():
+            if name in params:
+                self.used_parameters[name] = params.pop(name)[-1]
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [name for name, _, _ in self.fields]
+
+    def choices(self, changelist):
+        names = self.expected_parameters()
+        # Filtre değişince imleç sıfırlanır, diğer filtreler ve arama korunur
+        hidden = [
+            (name, value)
+            for name, values in changelist.filter_params.items() if name not in names and name != CURSOR_VAR
+            for value in values
+        ]
+        yield {
+            'fields': [
+                {'name': name, 'label': label, 'type': input_type, 'value': self.used_parameters.get(name, '')}
+                for name, label, input_type in self.fields
+            ],
+            'hidden': hidden,
+            'datalist': self.datalist,
+            'selected': bool(self.used_parameters),
+            'reset_query_string': changelist.get_query_string(remove=[*names, CURSOR_VAR]),
+        }
+
+
+class StockInputFilter(InputFilter):
+    """Hisse kodu filtresi; yazarken arama API'sinden öneri gelir ((hisse, zaman) indeksi kullanılır)"""
+    title = 'Hisse'
+    fields = (('stock', 'Hisse kodu', 'text'),)
+    datalist = 'stock-suggestions'
+
+    def queryset(self, request, queryset):
+        code = self.used_parameters.get('stock', '').strip().upper()
+        if code:
+            return queryset.filter(stock_id=code)
+        return queryset
+
+
+class PriceRangeFilter(InputFilter):
+    """Tarih aralığı filtresi; aralık en fazla PRICE_ADMIN_MAX_DAYS gün olacak şekilde kırpılır"""
+    title = f'Tarih aralığı (en fazla {PRICE_ADMIN_MAX_DAYS} gün)'
+    fields = (('from', 'Başlangıç', 'date'), ('to', 'Bitiş', 'date'))
+
+    def queryset(self, request, queryset):
+        start = _date_param(self.used_parameters.get('from'), 'Başlangıç')
+        end = _date_param(self.used_parameters.get('to'), 'Bitiş')
+        if start is None and end is None:
+            return queryset
+        span = timedelta(days=PRICE_ADMIN_MAX_DAYS - 1)
+        if end is None:
+            end = start + span
+        if start is None or (end - start) > span:
+            start = end - span
+        start_dt, end_dt = day_bounds(start, end)
+        return queryset.filter(timestamp__gte=start_dt, timestamp__lt=end_dt)
+
+
+class PriceDateFilter(admin.ListFilter):
+    """
+    Ay -> gün drill-down. Aylar günlük özetlerin (DailyPrice) ilk ve son tarihinden,
+    seçili ayın günleri o ayın özetlerinden gelir; ham tabloda dates() sorgusu yapılmaz.
+    """
+    title = 'Tarih'
+    parameter_name = 'day'
+
+    def __init__(self, request, params, model, model_admin):
+        super().__init__(request, params, model, model_admin)
+        if self.parameter_name in params:
+            self.used_parameters[self.parameter_name] = params.pop(self.parameter_name)[-1]
+        self.stock = request.GET.get('stock', '').strip().upper()
+
+    def has_output(self):
+        return True
+
+    def expected_parameters(self):
+        return [self.parameter_name]
+
+    def _selection(self):
+        """Seçili değer: ('month', ilk gün, son gün), ('day', gün, gün) veya None"""
+        value = self.used_parameters.get(self.parameter_name)
+        if not value:
+            return None
+        if len(value) == 7:
+            first = _date_param(f"{value}-01", 'Ay')
+            return 'month', first, first.replace(day=calendar.monthrange(first.year, first.month)[1])
+        day = _date_param(value, 'Gün')
+        return 'day', day, day
+
+    def _rollups(self):
+        rollups = DailyPrice.objects.all()
+        if self.stock:
+            rollups = rollups.filter(stock_id=self.stock)
+        return rollups
+
+    def _months(self):
+        dates = self._rollups().values_list('date', flat=True)
+        first, last = dates.order_by('date').first(), dates.order_by('-date').first()
+        if first is None:
+            return []
+        months = []
+        year, month = last.year, last.month
+        while (year, month) >= (first.year, first.month) and len(months) < PRICE_ADMIN_MONTHS:
+            months.append(date(year, month, 1))
+            year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+        return months
+
+    def choices(self, changelist):
+        selection = self._selection()
+        value = self.used_parameters.get(self.parameter_name)
+        yield {
+            'selected': selection is None,
+            'query_string': changelist.get_query_string(remove=[self.parameter_name, CURSOR_VAR]),
+            'display': 'Tümü',
+        }
+        if selection is None:
+            for month in self._months():
+                yield {
+                    'selected': False,
+                    'query_string': changelist.get_query_string({self.parameter_name: month.strftime('%Y-%m')}, [CURSOR_VAR]),
+                    'display': month.strftime('%m.%Y'),
+                }
+            return
+
+        _, first, _ = selection
+        month_start = first.replace(day=1)
+        month_end = month_start.replace(day=calendar.monthrange(month_start.year, month_start.month)[1])
+        yield {
+            'selected': value == month_start.strftime('%Y-%m'),
+            'query_string': changelist.get_query_string({self.parameter_name: month_start.strftime('%Y-%m')}, [CURSOR_VAR]),
+            'display': month_start.strftime('%m.%Y'),
+        }
+        days = self._rollups().filter(date__gte=month_start, date__lte=month_end).order_by('-date').values_list('date', flat=True).distinct()
+        for day in days:
+            yield {
+                'selected': value == day.isoformat(),
+                'query_string': changelist.get_query_string({self.parameter_name: day.isoformat()}, [CURSOR_VAR]),
+                'display': f"— {day.strftime('%d.%m.%Y')}",
+            }
+
+    def queryset(self, request, queryset):
+        selection = self._selection()
+        if selection is None:
+            return queryset
+        _, start, end = selection
+        start_dt, end_dt = day_bounds(start, end)
+        return queryset.filter(timestamp__gte=start_dt, timestamp__lt=end_dt)
+
+
+class PriceDataChangeList(ChangeList):
+    """
+    İmleçli sayfalama: ?before=<id> o kayıttan eski fiyatları getirir. Derin sayfalarda
+    OFFSET ile milyonlarca satır atlanmaz; (zaman, id) sıralaması indeksle yürür.
+    Sayfa numaraları yerine 'en yeni' ve 'daha eski' bağlantıları gösterilir.
+    """
+
+    def get_filters_params(self, params=None):
+        params = super().get_filters_params(params)
+        params.pop(CURSOR_VAR, None)
+        return params
+
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        value = self.params.get(CURSOR_VAR)
+        if not value:
+            return queryset
+        timestamp = PriceData.objects.filter(pk=value).values_list('timestamp', flat=True).first() if value.isdigit() else None
+        if timestamp is None:
+            raise IncorrectLookupParameters(f"Geçersiz imleç: {value}")
+        return queryset.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, pk__lt=int(value)))
+
+    @property
+    def older_query_string(self):
+        rows = list(self.result_list)
+        if len(rows) < self.list_per_page:
+            return None
+        return self.get_query_string({CURSOR_VAR: rows[-1].pk})
+
+    @property
+    def newest_query_string(self):
+        if CURSOR_VAR not in self.filter_params:
+            return None
+        return self.get_query_string(remove=[CURSOR_VAR])
+
+def start_background_action(request, queryset, job_name):
+    """
+    Ağır bir admin eylemini seçili kayıtlar için arka plan işi olarak başlatır ve
+    ilerleme sayfasına yönlendirir (istek kayıt sayısından bağımsız hemen döner).
+    """
+    from .jobs import start_job
+    job = start_job(job_name, queryset.values_list('pk', flat=True), user=request.user)
+    messages.info(request, f"{job.total} kayıt için arka plan işi #{job.pk} başlatıldı.")
+    return redirect('admin:hisse_takip_adminjob_progress', job.pk)
 
 # Mevcut kayıtlar
 @admin.register(Stock)
 class StockAdmin(admin.ModelAdmin):
-    list_display = ['code', 'name']
+    list_display = ['code', 'name', 'sector']
     search_fields = ['code', 'name']
-    list_filter = ['code']
+    list_filter = ['sector']
+
+    def get_search_results(self, request, queryset, search_term):
+        # LIKE taraması yerine Türkçe harf duyarsız bellek içi indeks (önek + bulanık eşleşme)
+        if not search_term.strip():
+            return queryset, False
+        from .search import search_index
+        return queryset.filter(code__in=search_index().search_codes(search_term)), False
 
 @admin.register(PriceData)
 class PriceDataAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/hisse_takip/pricedata/change_list.html'
     list_display = ['stock', 'price', 'change_percentage', 'update_time', 'timestamp', 'is_positive']
-    list_filter = ['stock', 'timestamp', 'update_time']
+    list_filter = [StockInputFilter, PriceRangeFilter, PriceDateFilter]
     search_fields = ['stock__code', 'stock__name']
-    date_hierarchy = 'timestamp'
     readonly_fields = ['timestamp']
+    # Tablo büyük: tam COUNT(*), facet sayımları ve kolon sıralaması yok; sıra imleçle aynı
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    show_facets = admin.ShowFacets.NEVER
+    ordering = ['-timestamp', '-id']
+    sortable_by = []
+
+    def get_changelist(self, request, **kwargs):
+        return PriceDataChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        # Hisse kodu/adı LIKE'ı fiyat tablosuyla join yerine bellek içi hisse indeksinden
+        if not search_term.strip():
+            return queryset, False
+        from .search import search_index
+        return queryset.filter(stock_id__in=search_index().search_codes(search_term)), False
+
+@admin.register(IngestBatch)
+class IngestBatchAdmin(admin.ModelAdmin):
+    list_display = ['id', 'started_at', 'finished_at', 'saved_count', 'total_count']
+    readonly_fields = ['started_at', 'finished_at', 'saved_count', 'total_count']
+
+@admin.register(DailyPrice)
+class DailyPriceAdmin(admin.ModelAdmin):
+    list_display = ['stock', 'date', 'open', 'high', 'low', 'close', 'volume']
+    list_filter = ['date']
+    search_fields = ['stock__code']
+    date_hierarchy = 'date'
+    readonly_fields = ['updated_at']
 
 # Portföy Yönetimi
 @admin.register(Portfolio)
@@ -26,6 +352,18 @@ class PortfolioAdmin(admin.ModelAdmin):
     list_filter = ['is_active', 'created_at', 'investor', 'fund']
     search_fields = ['name', 'description', 'investor__name', 'fund__name']
     date_hierarchy = 'created_at'
+    list_select_related = ['investor', 'user', 'fund']
+    
+    def get_queryset(self, request):
+        # Güncel değer satır başına pozisyon ve fiyat sorgusu yerine tek alt sorguyla hesaplanır
+        return super().get_queryset(request).annotate(current_value=portfolio_values())
+    
+    def total_current_value(self, obj):
+        if hasattr(obj, 'current_value'):
+            return _money(obj.current_value)
+        return obj.total_current_value
+    total_current_value.short_description = 'Güncel Değer'
+    total_current_value.admin_order_field = 'current_value'
     
     # Fieldsets'e fund alanını ekleyelim
     fieldsets = (
@@ -33,7 +371,7 @@ class PortfolioAdmin(admin.ModelAdmin):
             'fields': ('name', 'description', 'user', 'investor', 'fund')
         }),
         ('Finansal Ayarlar', {
-            'fields': ('currency', 'target_return', 'risk_level', 'is_active')
+            'fields': ('currency', 'target_return', 'risk_level', 'benchmark', 'is_active')
         }),
     )
     
@@ -61,15 +399,24 @@ class PortfolioAdmin(admin.ModelAdmin):
             # Yeni fonu güncelle
             if obj.fund:
                 obj.fund.update_value_from_portfolios()
+    
+    def delete_queryset(self, request, queryset):
+        # Silinen işlemlerin pozisyon ve fon hesaplamaları sonda bir kez yapılsın
+        with deferred_recompute() as batch:
+            for fund_id in set(queryset.values_list('fund_id', flat=True)):
+                batch.mark_fund(fund_id)
+            super().delete_queryset(request, queryset)
 
 @admin.register(Position)
 class PositionAdmin(admin.ModelAdmin):
     list_display = ['stock', 'portfolio', 'quantity', 'average_cost', 'current_price', 
-                   'current_value', 'profit_loss', 'profit_loss_percentage', 'is_open']
-    list_filter = ['portfolio', 'is_open']
+                   'current_value', 'profit_loss', 'profit_loss_percentage', 'realized_profit_loss', 'is_open']
+    list_filter = [('portfolio', PortfolioListFilter), 'is_open']
     search_fields = ['stock__code', 'portfolio__name']
     date_hierarchy = 'open_date'
-    readonly_fields = ['current_price', 'current_value', 'profit_loss', 'profit_loss_percentage']
+    list_select_related = ['stock', 'portfolio__user']
+    readonly_fields = ['current_price', 'current_value', 'profit_loss', 'profit_loss_percentage',
+                       'realized_profit_loss', 'unrealized_profit_loss', 'lot_state']
     
     # Pozisyon sayfasında ilgili işlemleri gösterme
     fieldsets = (
@@ -79,24 +426,73 @@ class PositionAdmin(admin.ModelAdmin):
         ('Güncel Durum', {
             'fields': ('current_price', 'current_value', 'profit_loss', 'profit_loss_percentage'),
         }),
+        ('Maliyet Lotları', {
+            'fields': ('realized_profit_loss', 'unrealized_profit_loss', 'lot_state'),
+            'classes': ('collapse',),
+        }),
         ('Ek Bilgiler', {
             'fields': ('target_price', 'stop_loss', 'notes'),
             'classes': ('collapse',),
         }),
     )
     
+    def get_queryset(self, request):
+        # Son fiyat ve ondan türeyen tutarlar satır başına fiyat sorgusu yerine annotate ile gelir
+        return super().get_queryset(request).annotate(
+            latest_price=latest_price_subquery(),
+        ).annotate(
+            latest_value=F('quantity') * F('latest_price'),
+            latest_profit_loss=F('quantity') * F('latest_price') - F('quantity') * F('average_cost'),
+        )
+    
     def current_price(self, obj):
+        if hasattr(obj, 'latest_price'):
+            return obj.latest_price
         return obj.current_price
     current_price.short_description = 'Güncel Fiyat'
+    current_price.admin_order_field = 'latest_price'
     
     def current_value(self, obj):
+        if hasattr(obj, 'latest_value'):
+            return _money(obj.latest_value)
         return obj.current_value
     current_value.short_description = 'Güncel Değer'
+    current_value.admin_order_field = 'latest_value'
+    
+    def profit_loss(self, obj):
+        if hasattr(obj, 'latest_profit_loss'):
+            return _money(obj.latest_profit_loss)
+        return obj.profit_loss
+    profit_loss.short_description = 'Kar/Zarar'
+    profit_loss.admin_order_field = 'latest_profit_loss'
+    
+    def profit_loss_percentage(self, obj):
+        if hasattr(obj, 'latest_profit_loss'):
+            return _percentage(obj.latest_profit_loss, obj.total_cost)
+        # Ekleme formunda henüz miktar ve maliyet yok
+        return obj.profit_loss_percentage if obj.pk else None
+    profit_loss_percentage.short_description = 'Kar/Zarar Yüzdesi'
+    
+    def unrealized_profit_loss(self, obj):
+        if hasattr(obj, 'latest_value'):
+            return _money(obj.latest_value - obj.lot_cost)
+        return obj.unrealized_profit_loss
+    unrealized_profit_loss.short_description = 'Gerçekleşmemiş Kar/Zarar'
+
+class TransactionImportForm(forms.Form):
+    portfolio = forms.ModelChoiceField(queryset=Portfolio.objects.all(), label="Portföy")
+    file = forms.FileField(label="Ekstre Dosyası", help_text="CSV veya XLSX; başlık satırında tarih, hisse, işlem, adet ve fiyat sütunları olmalıdır")
+    encoding = forms.ChoiceField(choices=[('utf-8-sig', 'UTF-8'), ('cp1254', 'Windows Türkçe (cp1254)')],
+                                 initial='utf-8-sig', label="Karakter Kodlaması")
+    create_stocks = forms.BooleanField(required=False, label="Olmayan hisseleri oluştur")
+    skip_invalid = forms.BooleanField(required=False, label="Hatalı satırları atla")
+    dry_run = forms.BooleanField(required=False, label="Sadece doğrula (kaydetme)")
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
-    list_display = ['transaction_type', 'stock', 'portfolio', 'date', 'price', 'quantity', 'total_amount']
-    list_filter = ['transaction_type', 'portfolio', 'stock']
+    change_list_template = 'admin/hisse_takip/transaction/change_list.html'
+    list_display = ['transaction_type', 'stock', 'portfolio', 'date', 'price', 'quantity', 'total_amount', 'realized_profit_loss']
+    list_filter = ['transaction_type', ('portfolio', PortfolioListFilter), 'stock']
     search_fields = ['stock__code', 'portfolio__name']
     date_hierarchy = 'date'
     
@@ -115,30 +511,65 @@ class TransactionAdmin(admin.ModelAdmin):
     
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
-        # İşlem kaydedildiğinde portföy değerini güncelleme
-        from django.utils import timezone
-        from .models import PortfolioSnapshot
+        # İşlem kaydedildiğinde portföyün günlük anlık görüntüsünü güncelle
+        from .snapshots import write_latest_snapshots
+        write_latest_snapshots([obj.portfolio_id])
+    
+    def delete_queryset(self, request, queryset):
+        # Toplu silmede pozisyonlar ve fonlar her biri için bir kez yeniden hesaplansın
+        with deferred_recompute():
+            super().delete_queryset(request, queryset)
+    
+    def get_urls(self):
+        urls = [
+            path('import/', self.admin_site.admin_view(self.import_view), name='hisse_takip_transaction_import'),
+        ]
+        return urls + super().get_urls()
+    
+    def import_view(self, request):
+        """Aracı kurum ekstresini toplu içe aktarma sayfası"""
+        from .importers import StatementError, import_transactions
         
-        # Portföy snap'i oluştur
-        snapshot, created = PortfolioSnapshot.objects.get_or_create(
-            portfolio=obj.portfolio,
-            date=timezone.now().date(),
-            defaults={
-                'total_value': obj.portfolio.total_current_value,
-                'total_cost': obj.portfolio.total_cost,
-                'profit_loss': obj.portfolio.total_profit_loss,
-                'profit_loss_percentage': obj.portfolio.profit_loss_percentage,
-                'benchmark_comparison': None  # Buraya benchmark hesaplaması eklenebilir
-            }
-        )
+        if not self.has_add_permission(request):
+            return redirect('admin:hisse_takip_transaction_changelist')
         
-        if not created:
-            # Eğer günün snapshot'ı zaten varsa güncelle
-            snapshot.total_value = obj.portfolio.total_current_value
-            snapshot.total_cost = obj.portfolio.total_cost
-            snapshot.profit_loss = obj.portfolio.total_profit_loss
-            snapshot.profit_loss_percentage = obj.portfolio.profit_loss_percentage
-            snapshot.save()
+        errors = []
+        if request.method == 'POST':
+            form = TransactionImportForm(request.POST, request.FILES)
+            if form.is_valid():
+                upload = form.cleaned_data['file']
+                try:
+                    result = import_transactions(
+                        upload,
+                        upload.name,
+                        form.cleaned_data['portfolio'],
+                        encoding=form.cleaned_data['encoding'],
+                        create_stocks=form.cleaned_data['create_stocks'],
+                        skip_invalid=form.cleaned_data['skip_invalid'],
+                        dry_run=form.cleaned_data['dry_run'],
+                    )
+                except StatementError as e:
+                    messages.error(request, str(e))
+                    errors = e.errors
+                else:
+                    errors = result.errors
+                    if form.cleaned_data['dry_run']:
+                        messages.info(request, f"Doğrulama: {result}")
+                    else:
+                        messages.success(request, f"İçe aktarma tamamlandı: {result}")
+                        if not errors:
+                            return redirect('admin:hisse_takip_transaction_changelist')
+        else:
+            form = TransactionImportForm()
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Ekstreden İşlem Aktar',
+            'form': form,
+            'errors': errors[:100],
+        }
+        return TemplateResponse(request, 'admin/hisse_takip/transaction/import.html', context)
 
 # İzleme ve Alarmlar
 @admin.register(WatchList)
@@ -157,11 +588,29 @@ class WatchListItemAdmin(admin.ModelAdmin):
 
 @admin.register(Alert)
 class AlertAdmin(admin.ModelAdmin):
-    list_display = ['stock', 'user', 'condition_type', 'threshold_value', 'is_active', 'notification_sent']
+    list_display = ['stock', 'user', 'condition_type', 'threshold_value', 'window_minutes', 'is_active', 'triggered_at',
+                    'notification_sent']
     list_filter = ['condition_type', 'is_active', 'notification_sent', 'user']
     search_fields = ['stock__code', 'user__username']
     date_hierarchy = 'created_at'
 
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'user', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status']
+    search_fields = ['user__username', 'subject', 'message']
+    date_hierarchy = 'created_at'
+    list_select_related = ['user']
+    readonly_fields = ['created_at', 'sent_at', 'attempts', 'last_error']
+    raw_id_fields = ['alert']
+    
+    actions = ['retry_now']
+    
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"{updated} bildirim yeniden gönderim için kuyruğa alındı.")
+    retry_now.short_description = "Seçili bildirimleri hemen yeniden dene"
+
 # Performans Takibi
 @admin.register(PortfolioSnapshot)
 class PortfolioSnapshotAdmin(admin.ModelAdmin):
@@ -183,7 +632,7 @@ class InvestorAdmin(admin.ModelAdmin):
     list_filter = ['risk_profile', 'created_at']
     
     # created_at ve updated_at alanlarını da readonly olarak ekleyeceğiz
-    readonly_fields = ['total_invested', 'created_at', 'updated_at']
+    readonly_fields = ['total_invested', 'look_through_exposure', 'created_at', 'updated_at']
     
     fieldsets = (
         ('Kişisel Bilgiler', {
@@ -192,17 +641,41 @@ class InvestorAdmin(admin.ModelAdmin):
         ('Finansal Bilgiler', {
             'fields': ('total_invested', 'start_date', 'monthly_contribution', 'risk_profile')
         }),
+        ('Hisse Bazında Dağılım', {
+            'fields': ('look_through_exposure',),
+            'classes': ('collapse',),
+        }),
         ('Ek Bilgiler', {
             'fields': ('investment_goal', 'notes', 'created_at', 'updated_at'),
             'classes': ('collapse',),
         }),
     )
     
+    def get_queryset(self, request):
+        # Fon paylarının güncel değeri satır başına pay ve fon sorgusu yerine tek alt sorguyla gelir
+        return super().get_queryset(request).annotate(portfolio_value=fund_share_values())
+    
     def current_portfolio_value(self, obj):
+        if hasattr(obj, 'portfolio_value'):
+            return _money(obj.portfolio_value)
         return obj.current_portfolio_value
     current_portfolio_value.short_description = 'Güncel Portföy Değeri'
+    current_portfolio_value.admin_order_field = 'portfolio_value'
+    
+    def look_through_exposure(self, obj):
+        # Fon payları ve portföyler üzerinden hisse başına etkin adet ve değer
+        rows = obj.look_through_exposure if obj.pk else []
+        if not rows:
+            return '-'
+        return format_html_join(
+            '<br>', '{}: {} adet, {} TL',
+            ((code, f"{quantity:,.4f}", f"{value:,.2f}") for code, quantity, value in rows)
+        )
+    look_through_exposure.short_description = 'Hisse Bazında Dağılım'
     
     def profit_loss_percentage(self, obj):
+        if hasattr(obj, 'portfolio_value'):
+            return f"%{_percentage(obj.portfolio_value - obj.total_invested, obj.total_invested):.2f}"
         return f"%{obj.profit_loss_percentage:.2f}"
     profit_loss_percentage.short_description = 'Kar/Zarar Yüzdesi'
     
@@ -213,19 +686,12 @@ class InvestorAdmin(admin.ModelAdmin):
     actions = ['update_from_transactions', 'recalculate_from_investments']
     
     def update_from_transactions(self, request, queryset):
-        updated = 0
-        for investor in queryset:
-            investor.update_investment_total()
-            updated += 1
-        self.message_user(request, f"{updated} yatırımcının toplam yatırım tutarı işlemlerden yeniden hesaplandı.")
+        # Binlerce yatırımcı seçilebilir; hesaplama Celery'de parçalar halinde yapılır
+        return start_background_action(request, queryset, 'investor_totals_from_transactions')
     update_from_transactions.short_description = "Seçili yatırımcıların toplam yatırımını İŞLEMLERDEN hesapla"
     
     def recalculate_from_investments(self, request, queryset):
-        updated = 0
-        for investor in queryset:
-            investor.update_total_investment()
-            updated += 1
-        self.message_user(request, f"{updated} yatırımcının toplam yatırım tutarı, yatırım girişlerinden yeniden hesaplandı.")
+        return start_background_action(request, queryset, 'investor_totals_from_investments')
     recalculate_from_investments.short_description = "Seçili yatırımcıların toplam yatırımını YATIRIM GİRİŞLERİNDEN hesapla"
 
 @admin.register(Investment)
@@ -259,17 +725,11 @@ class InvestmentAdmin(admin.ModelAdmin):
         # Toplu silme için tüm etkilenen yatırımcıları bul
         investor_ids = set(queryset.values_list('investor_id', flat=True))
         
-        # Nesneleri sil
-        super().delete_queryset(request, queryset)
-        
-        # Etkilenen tüm yatırımcıların toplam yatırımlarını güncelle
-        from .models import Investor
-        for investor_id in investor_ids:
-            try:
-                investor = Investor.objects.get(id=investor_id)
-                investor.update_total_investment()
-            except Exception as e:
-                print(f"Yatırımcı {investor_id} güncellenirken hata: {e}")
+        # Nesneleri sil, etkilenen yatırımcıların toplamları sonda bir kez güncellensin
+        with deferred_recompute() as batch:
+            super().delete_queryset(request, queryset)
+            for investor_id in investor_ids:
+                batch.mark_investor(investor_id, 'investments')
 
 # FundShare için inline admin
 class FundShareInline(admin.TabularInline):
@@ -311,7 +771,7 @@ class FundAdmin(admin.ModelAdmin):
             'fields': ('risk_level', 'target_return')
         }),
         ('Finansal Bilgiler', {
-            'fields': ('initial_value', 'current_value', 'total_shares', 'share_value', 'total_return')
+            'fields': ('initial_value', 'current_value', 'cash', 'total_shares', 'share_value', 'total_return')
         }),
         ('Yönetim', {
             'fields': ('management_fee',)
@@ -338,6 +798,12 @@ class FundAdmin(admin.ModelAdmin):
     
     # Yatırımcı sayfasında yatırımları göster
     inlines = [FundShareInline]
+    
+    actions = ['revalue_from_portfolios']
+    
+    def revalue_from_portfolios(self, request, queryset):
+        return start_background_action(request, queryset, 'fund_values_from_portfolios')
+    revalue_from_portfolios.short_description = "Seçili fonların değerini bağlı portföylerden yeniden hesapla"
 
 # FundShare modelini admin paneline ekle
 @admin.register(FundShare)
@@ -387,4 +853,146 @@ class FundShareAdmin(admin.ModelAdmin):
                 # Burada form.cleaned_data'dan shares_count'u kaldırabiliriz
                 obj.shares_count = old_obj.shares_count
         
-        super().save_model(request, obj, form, change) 
\ No newline at end of file
+        super().save_model(request, obj, form, change)
+    
+    def delete_queryset(self, request, queryset):
+        # Fon toplamları her fon için tek güncelleme ile azaltılsın
+        with deferred_recompute():
+            super().delete_queryset(request, queryset) 
+
+@admin.register(FundNav)
+class FundNavAdmin(admin.ModelAdmin):
+    list_display = ['fund', 'date', 'nav', 'share_value', 'total_shares', 'updated_at']
+    list_filter = ['fund']
+    search_fields = ['fund__name']
+    date_hierarchy = 'date'
+    readonly_fields = ['updated_at']
+
+@admin.register(BenchmarkIndex)
+class BenchmarkIndexAdmin(admin.ModelAdmin):
+    list_display = ['code', 'name', 'is_active']
+    list_filter = ['is_active']
+    search_fields = ['code', 'name']
+    filter_horizontal = ['constituents']
+
+@admin.register(BenchmarkValue)
+class BenchmarkValueAdmin(admin.ModelAdmin):
+    list_display = ['index', 'date', 'value']
+    list_filter = ['index']
+    date_hierarchy = 'date'
+
+@admin.register(RiskMetric)
+class RiskMetricAdmin(admin.ModelAdmin):
+    list_display = ['date', 'portfolio', 'fund', 'value', 'volatility', 'parametric_var', 'historical_var',
+                    'historical_cvar', 'risk_level']
+    list_filter = ['risk_level', 'fund']
+    search_fields = ['portfolio__name', 'fund__name']
+    date_hierarchy = 'date'
+    list_select_related = ['portfolio', 'fund']
+
+
+@admin.register(DealingOrder)
+class DealingOrderAdmin(admin.ModelAdmin):
+    list_display = ['placed_at', 'investor', 'fund', 'order_type', 'amount', 'shares', 'dealing_date', 'status',
+                    'price', 'settled_shares', 'settled_amount']
+    list_filter = ['status', 'order_type', 'fund', 'dealing_date']
+    search_fields = ['investor__name', 'fund__name', 'note']
+    date_hierarchy = 'dealing_date'
+    list_select_related = ['investor', 'fund']
+    readonly_fields = ['price', 'settled_shares', 'settled_amount', 'settled_at']
+    
+    fieldsets = (
+        ('Emir Bilgileri', {
+            'fields': ('investor', 'fund', 'order_type', 'amount', 'shares', 'placed_at', 'dealing_date')
+        }),
+        ('Gerçekleşme', {
+            'fields': ('status', 'price', 'settled_shares', 'settled_amount', 'settled_at', 'note')
+        }),
+    )
+    
+    actions = ['settle_selected_funds', 'cancel_orders']
+    
+    def settle_selected_funds(self, request, queryset):
+        from .dealing import settle_dealing
+        fund_ids = set(queryset.filter(status='pending').values_list('fund_id', flat=True))
+        results = settle_dealing(fund_ids=fund_ids)
+        settled = sum(result.settled for result in results)
+        rejected = sum(result.rejected for result in results)
+        self.message_user(request, f"{len(results)} işlem gününde {settled} emir gerçekleşti, {rejected} emir reddedildi.")
+    settle_selected_funds.short_description = "Seçili emirlerin fonlarında fiyatı kesinleşmiş işlem günlerini gerçekleştir"
+    
+    def cancel_orders(self, request, queryset):
+        cancelled = queryset.filter(status='pending').update(status='cancelled')
+        self.message_user(request, f"{cancelled} bekleyen emir iptal edildi.")
+    cancel_orders.short_description = "Seçili bekleyen emirleri iptal et"
+
+
+@admin.register(AdminJob)
+class AdminJobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'description', 'user', 'status', 'progress_display', 'created_at', 'finished_at']
+    list_filter = ['status', 'name']
+    list_select_related = ['user']
+    date_hierarchy = 'created_at'
+    exclude = ['object_ids']
+    readonly_fields = ['name', 'description', 'user', 'chunk_size', 'total', 'processed', 'status', 'error',
+                       'created_at', 'started_at', 'finished_at']
+    
+    actions = ['cancel', 'resume']
+    
+    def has_add_permission(self, request):
+        # İşler admin eylemlerinden başlatılır
+        return False
+    
+    def progress_display(self, obj):
+        return f"{obj.processed}/{obj.total} (%{obj.progress})"
+    progress_display.short_description = 'İlerleme'
+    
+    def cancel(self, request, queryset):
+        from .jobs import cancel_jobs
+        cancelled = cancel_jobs(queryset)
+        self.message_user(request, f"{cancelled} iş iptal edildi; çalışan işler o anki parçayı bitirip duracak.")
+    cancel.short_description = "Seçili işleri iptal et"
+    
+    def resume(self, request, queryset):
+        from .jobs import resume_jobs
+        resumed = resume_jobs(queryset)
+        self.message_user(request, f"{resumed} iş kaldığı yerden yeniden kuyruğa alındı.")
+    resume.short_description = "Seçili başarısız veya takılı işleri devam ettir"
+    
+    def get_urls(self):
+        urls = [
+            path('<int:job_id>/progress/', self.admin_site.admin_view(self.progress_view), name='hisse_takip_adminjob_progress'),
+        ]
+        return urls + super().get_urls()
+    
+    def progress_view(self, request, job_id):
+        """İlerleme sayfası; ?format=json ile sayfanın yokladığı durum bilgisi, POST ile iptal"""
+        job = get_object_or_404(AdminJob, pk=job_id)
+        if not self.has_view_permission(request, job):
+            return redirect('admin:index')
+        
+        if request.method == 'POST' and 'cancel' in request.POST and self.has_change_permission(request, job):
+            from .jobs import cancel_jobs
+            if cancel_jobs(AdminJob.objects.filter(pk=job.pk)):
+                messages.info(request, f"İş #{job.pk} iptal edildi.")
+            return redirect('admin:hisse_takip_adminjob_progress', job.pk)
+        
+        if request.GET.get('format') == 'json':
+            return JsonResponse({
+                'status': job.status,
+                'status_display': job.get_status_display(),
+                'processed': job.processed,
+                'total': job.total,
+                'progress': job.progress,
+                'error': job.error,
+                'active': job.is_active,
+            })
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': f"İş #{job.pk}: {job.description}",
+            'job': job,
+            'can_cancel': job.is_active and self.has_change_permission(request, job),
+        }
+        return TemplateResponse(request, 'admin/hisse_takip/adminjob/progress.html', context)
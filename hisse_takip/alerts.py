@@ -0,0 +1,270 @@
+import logging
+import threading
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+from .models import Alert
+from .notifications import enqueue_alert_notifications
+from .pricing import latest_quotes
+from .ticks import tick_buffers
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+# Tetiklenen alarm: alarm id, hisse, tetikleyen fiyat ve değişim yüzdesi
+TriggeredAlert = namedtuple('TriggeredAlert', ['alert_id', 'stock_id', 'price', 'change_percentage'])
+
+def _kind(condition_type, threshold, window_minutes=None):
+    """
+    Eşik dizisi: 'above'/'below' fiyat, 'percent_up'/'percent_down' günlük değişim yüzdesi.
+
+    Fiyat tamponundan değerlendirilen koşullar (tür, süre) çifti ile ayrılır:
+    ('move_up'/'move_down', dakika), ('volume_spike', None), ('intraday_high'/'intraday_low', None).
+    """
+    if condition_type == 'percent_change':
+        return 'percent_down' if threshold < 0 else 'percent_up'
+    if condition_type == 'move_within':
+        return ('move_down' if threshold < 0 else 'move_up', window_minutes)
+    if condition_type in ('volume_spike', 'intraday_high', 'intraday_low'):
+        return (condition_type, None)
+    return condition_type
+
+
+def _crossed_up(thresholds, previous, current):
+    """previous < eşik <= current aralığındaki eşiklerin dilimi (önceki değer yoksa eşik <= current)"""
+    if previous is None:
+        return 0, np.searchsorted(thresholds, current, side='right')
+    if current <= previous:
+        return 0, 0
+    return np.searchsorted(thresholds, previous, side='right'), np.searchsorted(thresholds, current, side='right')
+
+
+def _crossed_down(thresholds, previous, current):
+    """current <= eşik < previous aralığındaki eşiklerin dilimi (önceki değer yoksa eşik >= current)"""
+    if previous is None:
+        return np.searchsorted(thresholds, current, side='left'), len(thresholds)
+    if current >= previous:
+        return 0, 0
+    return np.searchsorted(thresholds, current, side='left'), np.searchsorted(thresholds, previous, side='left')
+
+
+class AlertIndex:
+    """
+    Aktif, henüz tetiklenmemiş alarmların hisse bazında sıralı eşik dizileri.
+
+    Her hisse için koşul tipine göre (eşik, alarm id) dizileri eşiğe göre sıralı
+    tutulur. Yeni fiyatta tetiklenen alarmlar önceki ve yeni değer arasında ikili
+    arama ile bulunur; maliyet alarm sayısına değil değişen hisse ve tetiklenen
+    alarm sayısına bağlıdır.
+
+    İndeks işlem başına bellekte tutulur ve Alert.updated_at üzerinden sadece
+    değişen hisseler yeniden yüklenerek güncellenir.
+    """
+
+    def __init__(self):
+        self.books = {}            # stock_id -> {kind: (eşikler, alarm id'leri)}
+        self.synced_at = None
+        self.lock = threading.Lock()
+
+    def _load(self, stock_ids=None):
+        """Aktif alarmları (verilen hisseler için) veritabanından yükleyip dizileri kurar"""
+        alerts = Alert.objects.filter(is_active=True, triggered_at__isnull=True)
+        if stock_ids is not None:
+            alerts = alerts.filter(stock_id__in=stock_ids)
+
+        grouped = defaultdict(lambda: defaultdict(list))
+        rows = alerts.values_list('id', 'stock_id', 'condition_type', 'threshold_value', 'window_minutes')
+        for pk, stock_id, condition_type, threshold, window_minutes in rows.iterator():
+            if condition_type == 'move_within' and not window_minutes:
+                continue
+            grouped[stock_id][_kind(condition_type, threshold, window_minutes)].append((float(threshold), pk))
+
+        for stock_id in (stock_ids if stock_ids is not None else list(self.books)):
+            self.books.pop(stock_id, None)
+        for stock_id, kinds in grouped.items():
+            book = {}
+            for kind, rows in kinds.items():
+                rows.sort()
+                book[kind] = (
+                    np.array([threshold for threshold, _ in rows]),
+                    np.array([pk for _, pk in rows], dtype=np.int64),
+                )
+            self.books[stock_id] = book
+        return sum(len(kinds) for kinds in grouped.values())
+
+    def sync(self):
+        """İlk çağrıda tüm alarmları, sonrasında son senkrondan beri değişen hisseleri yükler"""
+        started = timezone.now()
+        if self.synced_at is None:
+            self._load()
+            logger.debug(f"Alarm indeksi kuruldu: {len(self.books)} hisse")
+        else:
+            changed = set(Alert.objects.filter(updated_at__gte=self.synced_at).values_list('stock_id', flat=True))
+            if changed:
+                self._load(changed)
+                logger.debug(f"Alarm indeksi {len(changed)} hisse için güncellendi")
+        self.synced_at = started
+
+    def remove(self, triggered):
+        """Tetiklenen alarmları ilgili hisselerin dizilerinden çıkarır (veritabanına gitmeden)"""
+        by_stock = defaultdict(list)
+        for alert in triggered:
+            by_stock[alert.stock_id].append(alert.alert_id)
+        for stock_id, alert_ids in by_stock.items():
+            book = self.books.get(stock_id)
+            if not book:
+                continue
+            for kind, (thresholds, ids) in list(book.items()):
+                keep = ~np.isin(ids, alert_ids)
+                if not keep.all():
+                    book[kind] = (thresholds[keep], ids[keep])
+
+    def crossed(self, stock_id, previous, current):
+        """
+        Önceki ve yeni (fiyat, değişim yüzdesi) arasında eşiği geçilen alarm id'leri.
+
+        Args:
+            previous: (fiyat, değişim) veya bilinmiyorsa None
+            current: (fiyat, değişim)
+        """
+        book = self.books.get(stock_id)
+        if not book:
+            return []
+
+        previous_price, previous_change = previous if previous is not None else (None, None)
+        price, change = current
+        ranges = (
+            ('above', _crossed_up, previous_price, price),
+            ('below', _crossed_down, previous_price, price),
+            ('percent_up', _crossed_up, previous_change, change),
+            ('percent_down', _crossed_down, previous_change, change),
+        )
+
+        fired = []
+        for kind, crossed, before, after in ranges:
+            if kind not in book or after is None:
+                continue
+            thresholds, ids = book[kind]
+            start, end = crossed(thresholds, before, after)
+            if end > start:
+                fired.extend(ids[start:end].tolist())
+        return fired
+
+    def rolling(self, stock_id, buffer, high, low, moment):
+        """
+        Fiyat tamponundan değerlendirilen koşullarda tetiklenen alarm id'leri.
+
+        Args:
+            buffer: Son fiyatı eklenmiş ticks.TickBuffer
+            high, low: Son fiyattan önceki gün içi en yüksek ve en düşük
+            moment: Son fiyatın zamanı
+        """
+        book = self.books.get(stock_id)
+        if not book:
+            return []
+
+        price = buffer.prices[buffer.head - 1]
+        fired = []
+        for kind, (thresholds, ids) in book.items():
+            if not isinstance(kind, tuple):
+                continue
+            name, window_minutes = kind
+            if name in ('move_up', 'move_down'):
+                window_low, window_high = buffer.extremes(moment - timedelta(minutes=window_minutes))
+                if name == 'move_up' and window_low:
+                    # Süre içindeki en düşükten yükseliş; eşiği hareketten küçük olanlar tetiklenir
+                    move = (price / window_low - 1) * 100
+                    fired.extend(ids[:np.searchsorted(thresholds, move, side='right')].tolist())
+                elif name == 'move_down' and window_high:
+                    move = (price / window_high - 1) * 100
+                    fired.extend(ids[np.searchsorted(thresholds, move, side='left'):].tolist())
+            elif name == 'volume_spike':
+                average = buffer.average_volume
+                if average and buffer.volume:
+                    fired.extend(ids[:np.searchsorted(thresholds, buffer.volume / average, side='right')].tolist())
+            elif name == 'intraday_high':
+                if high is not None and price > high:
+                    fired.extend(ids.tolist())
+            elif name == 'intraday_low':
+                if low is not None and price < low:
+                    fired.extend(ids.tolist())
+        return fired
+
+
+_index = AlertIndex()
+
+
+def alert_index():
+    """İşlem genelinde paylaşılan alarm indeksi"""
+    return _index
+
+
+def evaluate_prices(prices, previous=None, index=None):
+    """
+    Yeni kaydedilen fiyat grubu için eşiği geçilen alarmları bulur, toplu işaretler ve
+    bildirimlerini kuyruğa ekler.
+
+    Args:
+        prices: Yeni PriceData kayıtları (aynı hisse için birden fazla olabilir)
+        previous: {hisse: (fiyat, değişim)} grup öncesi son değerler; verilmezse
+            grubun ilk kaydından önceki son fiyatlar tek sorguda alınır
+
+    Fiyatlar işlenirken hisselerin fiyat tamponları da beslenir; süreli hareket,
+    hacim ve gün içi zirve/dip koşulları geçmiş sorgulanmadan tampondan değerlendirilir.
+
+    Returns:
+        list: TriggeredAlert listesi
+    """
+    if not prices:
+        return []
+    index = index or _index
+
+    # Her hisse için fiyatları zaman sırasıyla işle (önceki -> f1 -> f2 ...)
+    by_stock = defaultdict(list)
+    for price in prices:
+        by_stock[price.stock_id].append(price)
+    first = min(price.timestamp for price in prices)
+    if previous is None:
+        previous = latest_quotes(by_stock.keys(), before=first)
+    buffers = tick_buffers()
+    buffers.warm_up(by_stock.keys(), before=first)
+
+    with index.lock:
+        index.sync()
+        candidates = {}
+        for stock_id, rows in by_stock.items():
+            last = previous.get(stock_id)
+            last = (float(last[0]), float(last[1])) if last is not None else None
+            for row in sorted(rows, key=lambda row: row.timestamp):
+                buffer, high, low = buffers.record(row)
+                if stock_id not in index.books:
+                    continue
+                current = (float(row.price), float(row.change_percentage))
+                fired = index.crossed(stock_id, last, current) + index.rolling(stock_id, buffer, high, low, row.timestamp)
+                for alert_id in fired:
+                    candidates.setdefault(alert_id, TriggeredAlert(alert_id, stock_id, row.price, row.change_percentage))
+                last = current
+
+        if not candidates:
+            return []
+
+        # İndeks başka işlemde değişmiş olabilir; sadece hâlâ aktif olanları işaretle
+        now = timezone.now()
+        active = list(Alert.objects.filter(
+            pk__in=candidates.keys(),
+            is_active=True,
+            triggered_at__isnull=True
+        ).values_list('id', flat=True))
+        # updated_at değiştirilmez: tetiklenenler indeksten zaten çıkarılıyor, diğer işlemlerin
+        # indeksleri ise yukarıdaki aktiflik kontrolüyle tutarlı kalır. Bildirimler kuyruğa
+        # yazılır, gönderim (ve notification_sent) ayrı Celery görevinde yapılır.
+        with transaction.atomic():
+            Alert.objects.filter(pk__in=active).update(triggered_at=now)
+            enqueue_alert_notifications([candidates[alert_id] for alert_id in active])
+        index.remove(candidates.values())
+
+    triggered = [candidates[alert_id] for alert_id in active]
+    logger.info(f"{len(prices)} fiyat için {len(triggered)} alarm tetiklendi")
+    return triggered
@@ -0,0 +1,343 @@
+import logging
+import math
+import warnings
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from .charts import series_generation
+from .models import PortfolioSnapshot, FundNav, Transaction
+from .timeseries import day_bounds, to_local_days
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+# Nakit akışı yönü: alım portföye giriş (+), satım ve temettü çıkış (-)
+FLOW_SIGNS = {'buy': 1.0, 'sell': -1.0, 'dividend': -1.0}
+CACHE_TIMEOUT = getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 60 * 60)
+RISK_FREE_RATE = getattr(settings, 'ANALYTICS_RISK_FREE_RATE', 0.0)  # Yıllık, ondalık (0.45 = %45)
+
+
+# --- Dizi fonksiyonları: satırlar portföy/fon, sütunlar gün; eksik değerler NaN ---
+
+def daily_returns(values, flows=None):
+    """
+    Günlük getirileri hesaplar: (V_t - V_{t-1} - F_t) / V_{t-1}
+
+    flows verilirse t günündeki net para girişi (pozitif = yatırım) getiriden düşülür.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    previous = values[:, :-1]
+    change = values[:, 1:] - previous
+    if flows is not None:
+        change = change - np.asarray(flows, dtype=np.float64)[:, 1:]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.where(previous > 0, change / previous, np.nan)
+    return returns
+
+
+def time_weighted_return(returns):
+    """Zaman ağırlıklı getiri: günlük getirilerin zincirlenmesi"""
+    valid = ~np.isnan(returns)
+    total = np.prod(np.where(valid, 1 + returns, 1.0), axis=1) - 1
+    return np.where(valid.any(axis=1), total, np.nan)
+
+
+def annualized_return(total_return, days):
+    """Dönem getirisini yıllık getiriye çevirir"""
+    days = np.asarray(days, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(days > 0, np.power(1 + total_return, TRADING_DAYS / days) - 1, np.nan)
+
+
+def money_weighted_return(values, flows, day_numbers, iterations=30):
+    """
+    Para ağırlıklı getiri (yıllık iç verim oranı), tüm satırlar için aynı anda
+    vektörel Newton yöntemiyle çözülür.
+
+    Nakit akışları: başlangıç değeri ve ara girişler yatırım (-), son değer
+    getiri (+) kabul edilir.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    flows = np.nan_to_num(np.asarray(flows, dtype=np.float64))
+    valid = ~np.isnan(values)
+    has_data = valid.any(axis=1)
+
+    columns = np.arange(values.shape[1])
+    first = np.where(has_data, np.argmax(valid, axis=1), 0)
+    last = np.where(has_data, values.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1), 0)
+    rows = np.arange(values.shape[0])
+
+    # Nakit akışı matrisi: ilk gün -V0, aradaki günler -F_t, son gün +V_T
+    cash = -flows.copy()
+    cash[(columns[None, :] <= first[:, None]) | (columns[None, :] > last[:, None])] = 0
+    cash[rows, first] = -np.nan_to_num(values[rows, first])
+    cash[rows, last] += np.nan_to_num(values[rows, last])
+
+    years = (np.asarray(day_numbers, dtype=np.float64) - np.asarray(day_numbers, dtype=np.float64)[0]) / 365.0
+    years = years[None, :] - years[first][:, None]
+
+    rate = np.full(values.shape[0], 0.1)
+    active = rows[has_data & (last > first)]
+    for _ in range(iterations):
+        if not active.size:
+            break
+        # Sadece henüz yakınsamamış satırlar için bir Newton adımı
+        base = np.maximum(1 + rate[active], 1e-6)[:, None]
+        discount = np.power(base, -years[active])
+        weighted = cash[active] * discount
+        npv = weighted.sum(axis=1)
+        derivative = np.sum(-years[active] * weighted / base, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            step = np.where(derivative != 0, npv / derivative, 0)
+        rate[active] = np.clip(rate[active] - step, -0.9999, 1e6)
+        active = active[np.abs(step) >= 1e-9]
+
+    return np.where(has_data & (last > first), rate, np.nan)
+
+
+def volatility(returns, periods=TRADING_DAYS):
+    """Yıllıklandırılmış oynaklık (günlük getirilerin standart sapması)"""
+    with warnings.catch_warnings():
+        # Tek gözlemli satırlar NaN döner
+        warnings.simplefilter('ignore', RuntimeWarning)
+        return np.nanstd(returns, axis=1, ddof=1) * math.sqrt(periods)
+
+
+def max_drawdown(returns):
+    """En büyük düşüş: servet eğrisinin önceki zirveye göre en derin kaybı"""
+    wealth = np.cumprod(np.where(np.isnan(returns), 1.0, 1 + returns), axis=1)
+    peak = np.maximum.accumulate(np.maximum(wealth, 1.0), axis=1)
+    drawdown = wealth / peak - 1
+    return np.where(np.isnan(returns).all(axis=1), np.nan, drawdown.min(axis=1, initial=0.0))
+
+
+def sharpe_ratio(returns, risk_free=RISK_FREE_RATE, periods=TRADING_DAYS):
+    """Yıllıklandırılmış Sharpe oranı"""
+    excess = returns - risk_free / periods
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        std = np.nanstd(excess, axis=1, ddof=1)
+        return np.where(std > 0, np.nanmean(excess, axis=1) / std * math.sqrt(periods), np.nan)
+
+
+def sortino_ratio(returns, risk_free=RISK_FREE_RATE, periods=TRADING_DAYS):
+    """Yıllıklandırılmış Sortino oranı (sadece aşağı yönlü sapma)"""
+    excess = returns - risk_free / periods
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        downside = np.sqrt(np.nanmean(np.square(np.minimum(excess, 0)), axis=1))
+        return np.where(downside > 0, np.nanmean(excess, axis=1) / downside * math.sqrt(periods), np.nan)
+
+
+def log_growth(returns):
+    """
+    Günlük getirilerin log büyümesi; eksik günler 0 sayılır.
+
+    %-100 getiri -inf üreterek tüm kümülatif toplamı bozmasın diye getiriler
+    -%100'ün hemen üstünde kırpılır.
+    """
+    return np.log1p(np.maximum(np.nan_to_num(returns), -1 + 1e-12))
+
+
+def rolling_returns(returns, window):
+    """Kayan pencerede zincirlenmiş getiri (satır x (gün - pencere + 1))"""
+    if returns.shape[1] < window:
+        return np.empty((returns.shape[0], 0))
+    cumulative = np.cumsum(np.pad(log_growth(returns), ((0, 0), (1, 0))), axis=1)
+    return np.expm1(cumulative[:, window:] - cumulative[:, :-window])
+
+
+def rolling_volatility(returns, window, periods=TRADING_DAYS):
+    """Kayan pencerede yıllıklandırılmış oynaklık (kümülatif toplamlarla O(gün))"""
+    if returns.shape[1] < window:
+        return np.empty((returns.shape[0], 0))
+    valid = ~np.isnan(returns)
+    filled = np.where(valid, returns, 0.0)
+
+    def window_sum(matrix):
+        cumulative = np.cumsum(np.pad(matrix, ((0, 0), (1, 0))), axis=1)
+        return cumulative[:, window:] - cumulative[:, :-window]
+
+    count = window_sum(valid.astype(np.float64))
+    total = window_sum(filled)
+    squares = window_sum(filled * filled)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        variance = (squares - total * total / count) / (count - 1)
+    variance = np.where(count > 1, np.maximum(variance, 0.0), np.nan)
+    return np.sqrt(variance) * math.sqrt(periods)
+
+
+def compute_metrics(values, flows=None, dates=None, risk_free=RISK_FREE_RATE, rolling_window=None):
+    """
+    Değer matrisinden tüm performans ölçütlerini tek seferde hesaplar.
+
+    Args:
+        values: (satır x gün) değer matrisi
+        flows: (satır x gün) net para girişleri, None ise sıfır
+        dates: datetime64[D] gün dizisi (para ağırlıklı getiri için)
+        rolling_window (int, optional): Kayan pencere uzunluğu (gün)
+
+    Returns:
+        dict: ölçüt adı -> satır bazında NumPy dizisi
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if flows is None:
+        flows = np.zeros_like(values)
+    if dates is None:
+        day_numbers = np.arange(values.shape[1], dtype=np.float64)
+    else:
+        day_numbers = np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+
+    returns = daily_returns(values, flows)
+    observed = np.sum(~np.isnan(returns), axis=1)
+    twr = time_weighted_return(returns)
+
+    metrics = {
+        'time_weighted_return': twr,
+        'annualized_return': annualized_return(twr, observed),
+        'money_weighted_return': money_weighted_return(values, flows, day_numbers),
+        'volatility': volatility(returns),
+        'max_drawdown': max_drawdown(returns),
+        'sharpe_ratio': sharpe_ratio(returns, risk_free),
+        'sortino_ratio': sortino_ratio(returns, risk_free),
+        'observations': observed,
+    }
+    if rolling_window:
+        metrics['rolling_return'] = rolling_returns(returns, rolling_window)
+        metrics['rolling_volatility'] = rolling_volatility(returns, rolling_window)
+    return metrics
+
+
+# --- Seri yükleyiciler ---
+
+def _pivot(rows, width):
+    """(id, tarih, değer...) satırlarını (id x gün) matrislerine çevirir"""
+    ids = sorted({row[0] for row in rows})
+    dates = np.array(sorted({row[1] for row in rows}), dtype='datetime64[D]')
+    id_index = {entity_id: i for i, entity_id in enumerate(ids)}
+
+    matrices = [np.full((len(ids), len(dates)), np.nan) for _ in range(width)]
+    if rows:
+        row_idx = np.array([id_index[row[0]] for row in rows])
+        col_idx = np.searchsorted(dates, np.array([row[1] for row in rows], dtype='datetime64[D]'))
+        for k, matrix in enumerate(matrices):
+            matrix[row_idx, col_idx] = np.array([row[k + 2] for row in rows], dtype=np.float64)
+    return ids, dates, matrices
+
+
+def transaction_flows(portfolio_ids, dates):
+    """
+    Portföylerin işlemlerinden (portföy x gün) net para girişi matrisini kurar.
+
+    Alım fiyat x adet + komisyon + vergi kadar giriş, satım ve temettü fiyat x
+    adet - komisyon - vergi kadar çıkış sayılır; satışta nakit maliyetle değil
+    satış tutarıyla çıktığından kârlı çıkışlar zarar gibi görünmez. Bölünme ve
+    birleşme nakit hareketi değildir. Seri günleri arasına düşen işlemler bir
+    sonraki güne yazılır.
+
+    Returns:
+        ndarray: portfolio_ids sırasında (portföy x gün) matris
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    flows = np.zeros((len(portfolio_ids), len(dates)))
+    if not flows.size:
+        return flows
+
+    # İlk günün akışı getiriye girmez; önceki günlerin işlemleri taranmaz
+    start_dt, end_dt = day_bounds(dates[0].astype(object), dates[-1].astype(object))
+    rows = list(Transaction.objects.filter(
+        portfolio_id__in=portfolio_ids,
+        transaction_type__in=FLOW_SIGNS,
+        date__gte=start_dt,
+        date__lt=end_dt
+    ).values_list('portfolio_id', 'transaction_type', 'quantity', 'price', 'commission', 'tax', 'date'))
+    if not rows:
+        return flows
+
+    row_index = {portfolio_id: i for i, portfolio_id in enumerate(portfolio_ids)}
+    portfolio_idx = np.array([row_index[row[0]] for row in rows])
+    signs = np.array([FLOW_SIGNS[row[1]] for row in rows])
+    amounts = np.array([float(row[2] * row[3]) for row in rows])
+    fees = np.array([float(row[4] + row[5]) for row in rows])
+    day_idx = np.searchsorted(dates, to_local_days([row[6].replace(tzinfo=None) for row in rows]), side='left')
+
+    # Alım: tutar + masraf, satım/temettü: -(tutar - masraf)
+    np.add.at(flows, (portfolio_idx, day_idx), signs * amounts + fees)
+    return flows
+
+
+def portfolio_series(portfolio_ids, start, end):
+    """
+    Portföylerin anlık görüntülerinden değer matrisini, işlemlerinden para
+    girişi matrisini yükler.
+    """
+    rows = list(PortfolioSnapshot.objects.filter(
+        portfolio_id__in=portfolio_ids,
+        date__gte=start,
+        date__lte=end
+    ).values_list('portfolio_id', 'date', 'total_value'))
+
+    ids, dates, (values,) = _pivot(rows, 1)
+    return ids, dates, values, transaction_flows(ids, dates)
+
+
+def fund_series(fund_ids, start, end):
+    """Fonların NAV geçmişinden birim pay değeri matrisini yükler (para girişi etkisiz)"""
+    rows = list(FundNav.objects.filter(
+        fund_id__in=fund_ids,
+        date__gte=start,
+        date__lte=end
+    ).values_list('fund_id', 'date', 'share_value'))
+
+    ids, dates, (values,) = _pivot(rows, 1)
+    return ids, dates, values, np.zeros_like(values)
+
+
+def _cache_key(kind, entity_id, start, end, rolling_window, generation):
+    # Seri nesli anahtarda olduğundan yeni anlık görüntü/NAV yazılınca eski sonuçlar okunmaz
+    return f"analytics:{kind}:{generation}:{entity_id}:{start}:{end}:{rolling_window or 0}"
+
+
+def _to_python(value):
+    """NumPy değerlerini önbelleğe ve şablona uygun Python değerlerine çevirir"""
+    if isinstance(value, np.ndarray):
+        return [None if np.isnan(v) else float(v) for v in value.astype(np.float64)]
+    value = float(value)
+    return None if math.isnan(value) else value
+
+
+def _analytics(kind, loader, entity_ids, start, end, rolling_window=None):
+    """Önbellekte olmayan kayıtları tek toplu çağrıda hesaplar ve önbelleğe yazar"""
+    generation = series_generation()
+    keys = {
+        entity_id: _cache_key(kind, entity_id, start, end, rolling_window, generation) for entity_id in entity_ids
+    }
+    cached = cache.get_many(keys.values())
+    results = {entity_id: cached[key] for entity_id, key in keys.items() if key in cached}
+
+    missing = [entity_id for entity_id in entity_ids if entity_id not in results]
+    if missing:
+        ids, dates, values, flows = loader(missing, start, end)
+        computed = {}
+        if ids:
+            metrics = compute_metrics(values, flows, dates, rolling_window=rolling_window)
+            for i, entity_id in enumerate(ids):
+                computed[keys[entity_id]] = {name: _to_python(array[i]) for name, array in metrics.items()}
+                if rolling_window:
+                    computed[keys[entity_id]]['dates'] = [str(day) for day in dates[rolling_window:]]
+                results[entity_id] = computed[keys[entity_id]]
+        cache.set_many(computed, CACHE_TIMEOUT)
+        logger.debug(f"{len(computed)} {kind} için performans ölçütleri hesaplandı")
+
+    return results
+
+
+def portfolio_analytics(portfolio_ids, start, end, rolling_window=None):
+    """Portföylerin performans ölçütleri: {portfolio_id: {ölçüt: değer}}"""
+    return _analytics('portfolio', portfolio_series, list(portfolio_ids), start, end, rolling_window)
+
+
+def fund_analytics(fund_ids, start, end, rolling_window=None):
+    """Fonların performans ölçütleri: {fund_id: {ölçüt: değer}}"""
+    return _analytics('fund', fund_series, list(fund_ids), start, end, rolling_window)
@@ -0,0 +1,514 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+from datetime import date, timedelta
+from inspect import iscoroutinefunction
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import OuterRef, Q, Subquery
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import condition, require_GET
+from .charts import SERIES, chart_data, series_generation
+from .exposure import current_generation
+from .models import FundShare, Portfolio, Position, PriceData, Stock
+from .pricing import acached_quotes, acurrent_ingest_batch, current_ingest_batch, latest_prices
+from .search import search_stocks
+from .streaming import event_stream
+from .watchlists import awatchlist_codes, quote_deltas
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Yanıtlar alım grubu id'siyle anahtarlandığından süre sadece eski grupların temizlenmesi içindir
+CACHE_TIMEOUT = getattr(settings, 'API_CACHE_TIMEOUT', 15 * 60)
+
+
+class BadRequest(ValueError):
+    """Geçersiz sorgu parametresi"""
+
+
+def _json(data):
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+def _json_response(content, status=200):
+    return HttpResponse(content, status=status, content_type='application/json')
+
+
+def _codes(request, name='codes'):
+    """?codes=THYAO,GARAN parametresinden sıralı hisse kodları (verilmezse None)"""
+    value = request.GET.get(name)
+    if not value:
+        return None
+    return sorted({code.strip().upper() for code in value.split(',') if code.strip()})
+
+
+def _limit(request, default=PAGE_SIZE, maximum=MAX_PAGE_SIZE, name='limit'):
+    try:
+        limit = int(request.GET.get(name, default))
+    except ValueError:
+        raise BadRequest(f"{name} bir tam sayı olmalı")
+    if not 1 <= limit <= maximum:
+        raise BadRequest(f"{name} 1 ile {maximum} arasında olmalı")
+    return limit
+
+
+def _datetime(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise BadRequest(f"{name} ISO 8601 tarih-saat olmalı")
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+def _date(request, name, default):
+    value = request.GET.get(name)
+    if not value:
+        return default
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise BadRequest(f"{name} YYYY-MM-DD biçiminde olmalı")
+
+
+def encode_cursor(*values):
+    return base64.urlsafe_b64encode(_json(values)).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        return json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError):
+        raise BadRequest("Geçersiz cursor")
+
+
+def _next_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+
+def _cached(key, build):
+    """Serileştirilmiş yanıtı önbellekten döndürür, yoksa üretip yazar"""
+    content = cache.get(key)
+    if content is None:
+        content = _json(build())
+        cache.set(key, content, CACHE_TIMEOUT)
+    return _json_response(content)
+
+
+async def _acached(key, build):
+    """_cached'in async karşılığı; build bir coroutine fonksiyonudur"""
+    content = await cache.aget(key)
+    if content is None:
+        content = _json(await build())
+        await cache.aset(key, content, CACHE_TIMEOUT)
+    return _json_response(content)
+
+
+def _query_key(request):
+    return hashlib.md5(request.GET.urlencode().encode()).hexdigest()
+
+
+def api_view(view):
+    """BadRequest hatalarını 400 JSON yanıtına çevirir (hata yanıtlarına ETag eklenmez)"""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            try:
+                return await view(request, *args, **kwargs)
+            except BadRequest as e:
+                return JsonResponse({'error': str(e)}, status=400)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except BadRequest as e:
+            return JsonResponse({'error': str(e)}, status=400)
+    return wrapper
+
+
+def _unauthorized():
+    return JsonResponse({'error': "Giriş yapılmalı"}, status=401)
+
+
+def api_login_required(view):
+    """
+    login_required karşılığı; giriş yapılmamış istek giriş sayfasına
+    yönlendirilmek yerine 401 JSON yanıtı alır. ETag kontrolünden önce
+    uygulanmalıdır, böylece anonim istek 304 de alamaz.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            user = await request.auser()
+            if not user.is_authenticated:
+                return _unauthorized()
+            return await view(request, *args, **kwargs)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return _unauthorized()
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def async_condition(etag_func):
+    """
+    Async view'lar için condition(etag_func=...) karşılığı; ETag fonksiyonu da
+    coroutine'dir (Django'nun condition'ı ETag'i olay döngüsünde senkron hesaplar).
+    """
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag = quote_etag(await etag_func(request, *args, **kwargs))
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                response.headers.setdefault('ETag', etag)
+            return response
+        return inner
+    return decorator
+
+
+async def _abatch_etag(request, *args, **kwargs):
+    return f"b{await acurrent_ingest_batch()}"
+
+
+def _batch_etag(request, *args, **kwargs):
+    # Sadece önbellek okunur; If-None-Match eşleşirse veritabanına gidilmeden 304 döner
+    return f"b{current_ingest_batch()}"
+
+
+def _chart_etag(request, kind, key):
+    # Portföy ve fon serileri fiyat alımı dışında gece anlık görüntü/NAV yazımlarında da değişir
+    if kind == 'stock':
+        return _batch_etag(request)
+    return f"b{current_ingest_batch()}-s{series_generation()}"
+
+
+def _portfolio_etag(request, *args, **kwargs):
+    return f"p{current_ingest_batch()}-{current_generation()}-{request.user.pk}"
+
+
+def _quote_queryset(codes=None):
+    latest = PriceData.objects.filter(stock=OuterRef('pk')).order_by('-timestamp')
+    stocks = Stock.objects.order_by('code')
+    if codes is not None:
+        stocks = stocks.filter(code__in=codes)
+    return stocks.annotate(
+        last_price=Subquery(latest.values('price')[:1]),
+        last_change=Subquery(latest.values('change_percentage')[:1]),
+        last_volume=Subquery(latest.values('volume')[:1]),
+        last_timestamp=Subquery(latest.values('timestamp')[:1]),
+    ).filter(last_price__isnull=False).values_list(
+        'code', 'name', 'last_price', 'last_change', 'last_volume', 'last_timestamp'
+    )
+
+
+def _quote_row(row):
+    code, name, price, change, volume, timestamp = row
+    return {'code': code, 'name': name, 'price': price, 'change_percentage': change, 'volume': volume, 'timestamp': timestamp}
+
+
+def quote_rows(codes=None):
+    """Hisselerin son fiyat kayıtları (kod sırasıyla, tek sorguda)"""
+    return [_quote_row(row) for row in _quote_queryset(codes).iterator()]
+
+
+async def aquote_rows(codes=None):
+    """quote_rows'un async karşılığı"""
+    return [_quote_row(row) async for row in _quote_queryset(codes)]
+
+
+@require_GET
+@api_login_required
+@api_view
+@async_condition(_abatch_etag)
+async def quotes(request):
+    """
+    Son fiyatlar. ?codes=THYAO,GARAN ile hisse seçilebilir.
+
+    Yanıt alım grubu başına bir kez üretilip önbellekte tutulur. Async view'dır;
+    ASGI altında önbellek ve veritabanı beklenirken iş parçacığı tutulmaz.
+    """
+    codes = _codes(request)
+    batch = await acurrent_ingest_batch()
+
+    async def build():
+        return {'batch': batch, 'results': await aquote_rows(codes)}
+
+    return await _acached(f"api:quotes:{batch}:{','.join(codes) if codes else '*'}", build)
+
+
+async def _watchlist_etag(request, *args, **kwargs):
+    user = await request.auser()
+    return f"w{await acurrent_ingest_batch()}-{user.pk}-{_query_key(request)}"
+
+
+@require_GET
+@api_login_required
+@api_view
+@async_condition(_watchlist_etag)
+async def watchlist_deltas(request):
+    """
+    İzleme panosu için değişen fiyatlar: ?since= önceki yanıttaki `since` değeri.
+
+    Hisse listesi ve fiyat haritası önbellekten okunur; yeni alım grubu yoksa
+    If-None-Match ile veritabanına gidilmeden 304 döner. Yüzlerce hisselik pano
+    birkaç saniyede bir yenilenebilir.
+    """
+    since = _datetime(request, 'since')
+    user = await request.auser()
+    batch, codes, quotes = await asyncio.gather(acurrent_ingest_batch(), awatchlist_codes(user.pk), acached_quotes())
+    rows, latest = quote_deltas(codes, quotes, since)
+    return _json_response(_json({
+        'batch': batch,
+        # Zaman tam hassasiyetle yazılır (JSON kodlayıcı milisaniyeye yuvarlar)
+        'since': latest.isoformat() if latest is not None else request.GET.get('since'),
+        'quotes': rows,
+    }))
+
+
+@require_GET
+@api_login_required
+@api_view
+def stock_search(request):
+    """
+    Hisse arama (yazarken öneri): ?q=garan&limit=10. Türkçe harf ve büyük/küçük harf
+    duyarsızdır; kod/ad öneki eşleşmeleri önce, yazım hatalı eşleşmeler sonra gelir.
+    """
+    query = request.GET.get('q', '').strip()
+    if not query:
+        raise BadRequest("q parametresi gerekli")
+    return JsonResponse({'results': search_stocks(query, _limit(request, default=10, maximum=50))})
+
+
+def price_page(codes=None, start=None, end=None, cursor=None, limit=PAGE_SIZE):
+    """
+    (hisse, zaman, id) sırasında fiyat geçmişi sayfası (keyset sayfalama).
+
+    Returns:
+        tuple: (satırlar, sonraki sayfanın cursor'ı veya None)
+    """
+    prices = PriceData.objects.order_by('stock_id', 'timestamp', 'id')
+    if codes is not None:
+        prices = prices.filter(stock_id__in=codes)
+    if start is not None:
+        prices = prices.filter(timestamp__gte=start)
+    if end is not None:
+        prices = prices.filter(timestamp__lt=end)
+    if cursor is not None:
+        try:
+            stock_id, timestamp, pk = cursor
+            timestamp = parse_datetime(timestamp)
+        except (TypeError, ValueError):
+            raise BadRequest("Geçersiz cursor")
+        if timestamp is None:
+            raise BadRequest("Geçersiz cursor")
+        prices = prices.filter(
+            Q(stock_id__gt=stock_id)
+            | Q(stock_id=stock_id, timestamp__gt=timestamp)
+            | Q(stock_id=stock_id, timestamp=timestamp, id__gt=pk)
+        )
+
+    rows = list(prices.values_list(
+        'id', 'stock_id', 'timestamp', 'price', 'change_percentage', 'volume', 'min_price', 'max_price'
+    )[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        # Zaman tam hassasiyetle yazılır (JSON kodlayıcı milisaniyeye yuvarlar)
+        next_cursor = encode_cursor(last[1], last[2].isoformat(), last[0])
+
+    return [
+        {
+            'stock': stock_id, 'timestamp': timestamp, 'price': price, 'change_percentage': change,
+            'volume': volume, 'min_price': low, 'max_price': high,
+        }
+        for _, stock_id, timestamp, price, change, volume, low, high in rows
+    ], next_cursor
+
+
+@require_GET
+@api_login_required
+@api_view
+@condition(etag_func=_batch_etag)
+def price_history(request):
+    """
+    Fiyat geçmişi: ?codes=, ?from=, ?to= (ISO 8601), ?limit= ve önceki yanıttaki ?cursor=.
+    """
+    codes = _codes(request)
+    start, end = _datetime(request, 'from'), _datetime(request, 'to')
+    limit = _limit(request)
+    cursor = decode_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+
+    def build():
+        rows, next_cursor = price_page(codes, start, end, cursor, limit)
+        return {'results': rows, 'next': _next_url(request, next_cursor)}
+
+    return _cached(f"api:prices:{current_ingest_batch()}:{_query_key(request)}", build)
+
+
+CHART_POINTS = 500
+MAX_CHART_POINTS = 5000
+
+
+def _chart_allowed(user, kind, key):
+    """Hisseler herkese, portföyler sahibine, fonlar yöneticilere ve pay sahiplerine açıktır"""
+    if kind == 'stock':
+        return Stock.objects.filter(code=key).exists()
+    if kind == 'portfolio':
+        return Portfolio.objects.filter(pk=key, user=user).exists()
+    return user.is_staff or FundShare.objects.filter(fund_id=key, investor__user=user).exists()
+
+
+@require_GET
+@api_login_required
+@api_view
+@condition(etag_func=_chart_etag)
+def chart(request, kind, key):
+    """
+    Grafik serisi: /api/charts/stock/THYAO/, /api/charts/portfolio/<id>/ veya
+    /api/charts/fund/<id>/ ile ?from=, ?to= (YYYY-MM-DD, varsayılan son bir yıl) ve
+    ?points= (en fazla nokta, varsayılan 500).
+
+    Seri LTTB ile indirgenir; sonuç (seri, aralık, nokta sayısı) için alım grubu
+    başına bir kez hesaplanıp önbellekte tutulur.
+    """
+    if kind not in SERIES:
+        raise BadRequest(f"Geçersiz seri türü: {kind}")
+    if kind == 'stock':
+        key = key.upper()
+    else:
+        try:
+            key = int(key)
+        except ValueError:
+            raise BadRequest("Portföy/fon id'si tam sayı olmalı")
+    end = _date(request, 'to', timezone.localdate())
+    start = _date(request, 'from', end - timedelta(days=365))
+    if start > end:
+        raise BadRequest("from, to'dan sonra olamaz")
+    points = _limit(request, CHART_POINTS, MAX_CHART_POINTS, name='points')
+
+    if not _chart_allowed(request.user, kind, key):
+        return JsonResponse({'error': "Seri bulunamadı"}, status=404)
+    generation = current_ingest_batch() if kind == 'stock' else f"{current_ingest_batch()}-{series_generation()}"
+    cache_key = f"api:chart:{generation}:{kind}:{key}:{start}:{end}:{points}"
+    return _cached(cache_key, lambda: chart_data(kind, key, start, end, points))
+
+
+def portfolio_valuations(portfolios):
+    """
+    Portföylerin pozisyon bazında güncel değerleri; pozisyonlar ve fiyatlar tek sorguda alınır.
+
+    Args:
+        portfolios: {id, name, currency} sözlükleri
+    """
+    positions = list(Position.objects.filter(
+        portfolio_id__in=[portfolio['id'] for portfolio in portfolios],
+        quantity__gt=0
+    ).order_by('portfolio_id', 'stock_id').values_list('portfolio_id', 'stock_id', 'quantity', 'average_cost'))
+    prices = latest_prices({stock_id for _, stock_id, _, _ in positions})
+
+    by_portfolio = {portfolio['id']: [] for portfolio in portfolios}
+    for portfolio_id, stock_id, quantity, average_cost in positions:
+        price = prices.get(stock_id)
+        by_portfolio[portfolio_id].append({
+            'stock': stock_id,
+            'quantity': quantity,
+            'average_cost': average_cost,
+            'price': price,
+            'value': quantity * price if price is not None else None,
+        })
+
+    results = []
+    for portfolio in portfolios:
+        rows = by_portfolio[portfolio['id']]
+        value = sum(row['value'] or 0 for row in rows)
+        cost = sum(row['quantity'] * row['average_cost'] for row in rows)
+        results.append({
+            **portfolio,
+            'market_value': value,
+            'cost': cost,
+            'profit_loss': value - cost,
+            'profit_loss_percentage': round((value - cost) / cost * 100, 2) if cost else 0,
+            'positions': rows,
+        })
+    return results
+
+
+@require_GET
+@api_login_required
+@api_view
+@condition(etag_func=_portfolio_etag)
+def portfolios(request):
+    """Kullanıcının portföy değerlemeleri; ?limit= ve ?cursor= (portföy id'si) ile sayfalanır"""
+    limit = _limit(request)
+    cursor = decode_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+    owned = Portfolio.objects.filter(user=request.user).order_by('id')
+    if cursor is not None:
+        if not isinstance(cursor, list) or len(cursor) != 1 or not isinstance(cursor[0], int):
+            raise BadRequest("Geçersiz cursor")
+        owned = owned.filter(id__gt=cursor[0])
+
+    rows = list(owned.values('id', 'name', 'currency')[:limit + 1])
+    next_cursor = encode_cursor(rows[limit - 1]['id']) if len(rows) > limit else None
+    return JsonResponse({
+        'results': portfolio_valuations(rows[:limit]),
+        'next': _next_url(request, next_cursor),
+    })
+
+
+@require_GET
+@api_login_required
+async def stream(request):
+    """
+    Fiyat ve portföy değeri akışı (Server-Sent Events): ?stocks=THYAO,GARAN ve/veya
+    ?portfolios=1,2 (sadece kullanıcının kendi portföyleri).
+
+    Bağlantılar olay döngüsünde bekler, iş parçacığı tutmaz; ASGI sunucusu
+    (bist_project.asgi) ile çalıştırılmalıdır.
+    """
+    stocks = _codes(request, 'stocks') or []
+    try:
+        portfolio_ids = sorted({int(pk) for pk in request.GET.get('portfolios', '').split(',') if pk.strip()})
+    except ValueError:
+        return JsonResponse({'error': "portfolios virgülle ayrılmış id listesi olmalı"}, status=400)
+    if not stocks and not portfolio_ids:
+        return JsonResponse({'error': "stocks veya portfolios parametresi gerekli"}, status=400)
+
+    if portfolio_ids:
+        user = await request.auser()
+        owned = await sync_to_async(list)(
+            Portfolio.objects.filter(user=user, pk__in=portfolio_ids).values_list('id', flat=True)
+        )
+        if len(owned) != len(portfolio_ids):
+            return JsonResponse({'error': "Portföy bulunamadı"}, status=404)
+
+    response = StreamingHttpResponse(event_stream(stocks, portfolio_ids), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Ters vekil sunucuların yanıtı tamponlamasını engelle
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,214 @@
+import logging
+from datetime import timedelta
+from decimal import Decimal
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from .models import BenchmarkIndex, BenchmarkValue, Portfolio, PortfolioSnapshot, PriceData
+from .analytics import daily_returns, log_growth
+from .timeseries import daily_closes
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+DEFAULT_CODE = getattr(settings, 'BENCHMARK_DEFAULT_CODE', 'XU100')
+COMPARISON_DAYS = getattr(settings, 'BENCHMARK_COMPARISON_DAYS', 365)
+
+
+def save_benchmark_values(rows, batch_size=1000):
+    """Endeks değerlerini (endeks, tarih) çiftine göre toplu olarak ekler veya günceller"""
+    BenchmarkValue.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['index', 'date'],
+        update_fields=['value'],
+    )
+    return len(rows)
+
+
+def benchmark_levels(codes, dates):
+    """
+    Endeks değerlerini verilen günlere hizalar (as-of birleştirme).
+
+    Her gün için o güne kadar (dahil) bilinen son endeks değeri kullanılır;
+    birleştirme tüm endeksler için tek sorgu ve searchsorted ile yapılır.
+
+    Returns:
+        ndarray: (endeks x gün) değer matrisi, değer yoksa NaN
+    """
+    codes = list(codes)
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    levels = np.full((len(codes), len(dates)), np.nan)
+    if not codes or not len(dates):
+        return levels
+
+    code_index = {code: i for i, code in enumerate(codes)}
+    rows = list(BenchmarkValue.objects.filter(
+        index_id__in=codes,
+        date__lte=dates[-1].astype(object)
+    ).order_by('index_id', 'date').values_list('index_id', 'date', 'value'))
+    if not rows:
+        return levels
+
+    row_codes = np.array([code_index[code] for code, _, _ in rows])
+    row_dates = np.array([day for _, day, _ in rows], dtype='datetime64[D]')
+    row_values = np.array([value for _, _, value in rows], dtype=np.float64)
+
+    # Her endeksin satırları ardışık ve tarih sıralı
+    starts = np.searchsorted(row_codes, np.arange(len(codes)), side='left')
+    ends = np.searchsorted(row_codes, np.arange(len(codes)), side='right')
+    for i in range(len(codes)):
+        series_dates = row_dates[starts[i]:ends[i]]
+        if not series_dates.size:
+            continue
+        position = np.searchsorted(series_dates, dates, side='right') - 1
+        known = position >= 0
+        levels[i, known] = row_values[starts[i]:ends[i]][position[known]]
+    return levels
+
+
+def comparison_matrix(values, flows, dates, row_codes, window_days=COMPARISON_DAYS):
+    """
+    Portföylerin kayan pencere getirisini kıyaslama endekslerinin aynı pencere
+    getirisiyle karşılaştırır.
+
+    Args:
+        values: (portföy x gün) değer matrisi
+        flows: (portföy x gün) net para girişi (analytics.transaction_flows)
+        dates: datetime64[D] gün dizisi
+        row_codes: her portföy satırının kıyaslama endeksi kodu
+        window_days (int): Karşılaştırma penceresi (takvim günü)
+
+    Returns:
+        ndarray: (portföy x gün) yüzde puan farkı, hesaplanamazsa NaN
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    if not len(dates):
+        return np.empty(values.shape)
+
+    # Zaman ağırlıklı getiri: log büyümelerin kümülatif toplamı (%-100 günler kırpılır)
+    values = np.asarray(values, dtype=np.float64)
+    returns = daily_returns(values, flows)
+    cumulative = np.cumsum(np.pad(log_growth(returns), ((0, 0), (1, 0))), axis=1)
+
+    # Pencere başlangıcı: penceredeki ilk gün veya portföyün ilk değerli günü
+    window_start = np.searchsorted(dates, dates - np.timedelta64(window_days, 'D'), side='left')
+    first_active = np.argmax(~np.isnan(values), axis=1)
+    anchor = np.maximum(window_start[None, :], first_active[:, None])
+    rows = np.arange(values.shape[0])[:, None]
+    portfolio_return = np.expm1(cumulative - cumulative[rows, anchor])
+
+    codes = sorted(set(row_codes))
+    code_index = {code: i for i, code in enumerate(codes)}
+    levels = benchmark_levels(codes, dates)[[code_index[code] for code in row_codes]]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        benchmark_return = levels / levels[rows, anchor] - 1
+
+    comparison = (portfolio_return - benchmark_return) * 100
+    comparison[np.isnan(values)] = np.nan
+    return comparison
+
+
+def portfolio_benchmark_codes(portfolio_ids):
+    """Portföylerin kıyaslama endeksi kodlarını döndürür (tanımsızsa varsayılan)"""
+    return {
+        portfolio_id: code or DEFAULT_CODE
+        for portfolio_id, code in Portfolio.objects.filter(pk__in=portfolio_ids).values_list('id', 'benchmark_id')
+    }
+
+
+def _decimal(value):
+    """Yüzde puan farkını DecimalField'a uygun değere çevirir"""
+    if value is None or np.isnan(value):
+        return None
+    return Decimal(f"{np.clip(value, -999999.99, 999999.99):.2f}")
+
+
+def attach_comparisons(snapshots, values, flows, dates, portfolio_ids):
+    """
+    Hesaplanmış (portföy x gün) matrislerden anlık görüntülerin
+    benchmark_comparison alanını tek seferde doldurur.
+    """
+    codes = portfolio_benchmark_codes(portfolio_ids)
+    comparison = comparison_matrix(values, flows, dates, [codes.get(p, DEFAULT_CODE) for p in portfolio_ids])
+    row_index = {portfolio_id: i for i, portfolio_id in enumerate(portfolio_ids)}
+    day_index = {day.astype(object): j for j, day in enumerate(np.asarray(dates, dtype='datetime64[D]'))}
+    for snapshot in snapshots:
+        snapshot.benchmark_comparison = _decimal(comparison[row_index[snapshot.portfolio_id], day_index[snapshot.date]])
+    return snapshots
+
+
+def update_benchmark_comparisons(day=None, portfolio_ids=None, window_days=COMPARISON_DAYS):
+    """
+    Verilen günün anlık görüntülerinin benchmark_comparison alanını tüm
+    portföyler için tek toplu hesaplamayla günceller.
+    """
+    from .analytics import portfolio_series
+    from .snapshots import save_snapshots
+
+    day = day or timezone.localdate()
+    if portfolio_ids is None:
+        portfolio_ids = list(PortfolioSnapshot.objects.filter(date=day).values_list('portfolio_id', flat=True))
+    if not portfolio_ids:
+        return 0
+
+    ids, dates, values, flows = portfolio_series(portfolio_ids, day - timedelta(days=window_days), day)
+    if not ids or np.datetime64(day, 'D') not in dates:
+        return 0
+
+    snapshots = list(PortfolioSnapshot.objects.filter(portfolio_id__in=ids, date=day))
+    attach_comparisons(snapshots, values, flows, dates, ids)
+    return save_snapshots(snapshots, update_fields=['benchmark_comparison'])
+
+
+def build_custom_benchmark(index, start=None, end=None):
+    """
+    Bileşenleri olan özel endeksin günlük değer serisini oluşturur.
+
+    Endeks, bileşenlerin eşit ağırlıklı günlük getirisiyle zincirlenir. start
+    verilirse önceki son kayıtlı değerden devam edilir, yoksa 100'den başlar.
+    """
+    codes = list(index.constituents.values_list('code', flat=True))
+    if not codes:
+        return 0
+
+    end = end or timezone.localdate()
+    anchor = None
+    if start is not None:
+        anchor = index.values.filter(date__lt=start).order_by('-date').first()
+    if anchor is not None:
+        first_day = anchor.date
+    else:
+        first = PriceData.objects.filter(stock_id__in=codes).order_by('timestamp').values_list('timestamp', flat=True).first()
+        if first is None:
+            return 0
+        first_day = timezone.localtime(first).date()
+
+    series = daily_closes(codes, first_day, end)
+    if not len(series.dates):
+        return 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = series.closes[:, 1:] / series.closes[:, :-1] - 1
+    valid = ~np.isnan(returns)
+    mean_return = np.where(valid.any(axis=0), np.nansum(returns, axis=0) / np.maximum(valid.sum(axis=0), 1), 0.0)
+
+    base = float(anchor.value) if anchor is not None else 100.0
+    levels = base * np.cumprod(np.r_[1.0, 1 + mean_return])
+
+    rows = [
+        BenchmarkValue(index=index, date=day.astype(object), value=Decimal(f"{level:.4f}"))
+        for day, level in zip(series.dates, levels)
+        if anchor is None or day.astype(object) > anchor.date
+    ]
+    return save_benchmark_values(rows)
+
+
+def update_custom_benchmarks(days=7):
+    """Bileşenli tüm aktif özel endekslerin son günlerini yeniden hesaplar"""
+    start = timezone.localdate() - timedelta(days=days)
+    total = 0
+    for index in BenchmarkIndex.objects.filter(is_active=True, constituents__isnull=False).distinct():
+        total += build_custom_benchmark(index, start=start)
+    return total
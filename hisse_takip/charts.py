@@ -0,0 +1,140 @@
+import logging
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from .models import DailyPrice, FundNav, PortfolioSnapshot, PriceData
+from .timeseries import day_bounds
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+# Bu günden uzun hisse aralıkları günlük özetlerden (DailyPrice) okunur
+INTRADAY_DAYS = getattr(settings, 'CHART_INTRADAY_DAYS', 5)
+# Portföy anlık görüntüleri veya fon NAV'ları her yazıldığında artan nesil
+SERIES_GENERATION_KEY = 'charts:series:generation'
+
+
+def series_generation():
+    """Günlük portföy/fon serilerinin nesli; anlık görüntü ve NAV yazımlarında artar"""
+    cache.add(SERIES_GENERATION_KEY, 1, None)
+    return cache.get(SERIES_GENERATION_KEY, 1)
+
+
+def invalidate_series():
+    """Önbellekteki portföy/fon grafik serilerini ve performans ölçütlerini geçersiz kılar (nesil artırılır)"""
+    try:
+        cache.incr(SERIES_GENERATION_KEY)
+    except ValueError:
+        cache.add(SERIES_GENERATION_KEY, 1, None)
+
+
+def lttb(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets ile seriyi en fazla `threshold` noktaya indirger.
+
+    İlk ve son nokta korunur; aradaki noktalar eşit kovalara bölünür ve her kovadan,
+    önceki seçilen nokta ile sonraki kovanın ortalamasıyla en büyük üçgeni oluşturan
+    nokta seçilir. Zirve ve dipler ortalama almaya göre çok daha iyi korunur.
+
+    Args:
+        x: Artan sayısal eksen (ör. epoch saniye) dizisi
+        y: Değer dizisi
+        threshold: En fazla nokta sayısı
+
+    Returns:
+        np.ndarray: Seçilen noktaların sıra numaraları
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # İç noktalar [1, n-1) aralığında threshold-2 kovaya bölünür
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Sonraki kovanın ortalaması (son kova için son nokta)
+        next_start, next_end = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def stock_series(code, start, end):
+    """
+    Hissenin fiyat serisi. Aralık INTRADAY_DAYS'ten uzunsa ve günlük özetler varsa
+    günlük kapanışlar, aksi halde ham fiyatlar okunur.
+
+    Returns:
+        tuple: (zamanlar datetime64, değerler float, kaynak 'daily' veya 'raw')
+    """
+    if (end - start).days >= INTRADAY_DAYS:
+        rows = list(DailyPrice.objects.filter(
+            stock_id=code, date__gte=start, date__lte=end
+        ).order_by('date').values_list('date', 'close'))
+        if rows:
+            return np.array([day for day, _ in rows], dtype='datetime64[D]'), np.array([close for _, close in rows], dtype=np.float64), 'daily'
+
+    start_dt, end_dt = day_bounds(start, end)
+    times, values = [], []
+    rows = PriceData.objects.filter(
+        stock_id=code, timestamp__gte=start_dt, timestamp__lt=end_dt
+    ).order_by('timestamp').values_list('timestamp', 'price')
+    for timestamp, price in rows.iterator(chunk_size=10000):
+        # Zaman damgaları UTC olarak gelir, NumPy için saat dilimi bilgisini at
+        times.append(timestamp.replace(tzinfo=None))
+        values.append(price)
+    return np.array(times, dtype='datetime64[s]'), np.array(values, dtype=np.float64), 'raw'
+
+
+def _daily_series(queryset, field, start, end):
+    rows = list(queryset.filter(date__gte=start, date__lte=end).order_by('date').values_list('date', field))
+    return np.array([day for day, _ in rows], dtype='datetime64[D]'), np.array([value for _, value in rows], dtype=np.float64), 'daily'
+
+
+def portfolio_series(portfolio_id, start, end):
+    """Portföyün günlük anlık görüntü değerleri"""
+    return _daily_series(PortfolioSnapshot.objects.filter(portfolio_id=portfolio_id), 'total_value', start, end)
+
+
+def fund_series(fund_id, start, end):
+    """Fonun günlük birim pay değerleri"""
+    return _daily_series(FundNav.objects.filter(fund_id=fund_id), 'share_value', start, end)
+
+
+SERIES = {
+    'stock': stock_series,
+    'portfolio': portfolio_series,
+    'fund': fund_series,
+}
+
+
+def chart_data(kind, key, start, end, points):
+    """
+    Grafik verisi: seri en fazla `points` noktaya LTTB ile indirgenir.
+
+    Returns:
+        dict: series, key, source, total (indirgeme öncesi nokta sayısı) ve
+            points ([zaman, değer] listesi; günlük serilerde YYYY-MM-DD, ham
+            fiyatlarda UTC ISO 8601)
+    """
+    times, values, source = SERIES[kind](key, start, end)
+    total = len(values)
+    selected = lttb(times.astype('datetime64[s]').astype(np.float64), values, points)
+    times, values = times[selected], values[selected]
+
+    labels = np.datetime_as_string(times) if source == 'daily' else np.char.add(np.datetime_as_string(times, unit='s'), 'Z')
+    return {
+        'series': kind,
+        'key': key,
+        'source': source,
+        'total': total,
+        'points': [[label, value] for label, value in zip(labels.tolist(), values.tolist())],
+    }
@@ -3,8 +3,10 @@ from decimal import Decimal
 from django.db import transaction
 from django.utils import timezone
 from django.conf import settings
-from .models import Stock, PriceData
+from .models import IngestBatch, Stock, PriceData
+from .pricing import latest_quotes, publish_ingest_batch
 from .api_client import CollectAPIClient
+from .signals import prices_ingested
 import decimal
 
 # Loglama ayarları
@@ -39,9 +41,14 @@ def fetch_and_save_bist_data(api_key=None):
     successful_count = 0
     total_count = len(stocks_data)
     skipped_count = 0
+    saved_prices = []
     
     logger.info(f"Toplam {total_count} hisse verisi işlenecek")
     
+    # Alarm değerlendirmesi için grup öncesi son fiyatları tek sorguda al
+    previous = latest_quotes()
+    batch = IngestBatch.objects.create(total_count=total_count)
+    
     # Tüm kayıtlar için tek bir transaction kullan
     with transaction.atomic():
         for stock_data in stocks_data:
@@ -92,7 +99,7 @@ def fetch_and_save_bist_data(api_key=None):
                     continue
                 
                 # Yeni bir fiyat verisi oluştur
-                PriceData.objects.create(
+                price_data = PriceData.objects.create(
                     stock=stock,
                     price=price,
                     change_percentage=change_percentage,
@@ -101,6 +108,7 @@ def fetch_and_save_bist_data(api_key=None):
                     max_price=max_price,
                     update_time=update_time
                 )
+                saved_prices.append(price_data)
                 
                 successful_count += 1
                 
@@ -108,4 +116,15 @@ def fetch_and_save_bist_data(api_key=None):
                 logger.error(f"Hisse verisi kaydedilirken hata: {e}, Veri: {stock_data}")
     
     logger.info(f"{successful_count}/{total_count} hisse verisi başarıyla kaydedildi, {skipped_count} tekrarlanan veri atlandı")
+    
+    IngestBatch.objects.filter(pk=batch.pk).update(finished_at=timezone.now(), saved_count=successful_count)
+    if successful_count:
+        # Yeni fiyat geldiyse API önbellekleri ve ETag'ler yeni gruba geçer
+        publish_ingest_batch(batch.pk)
+    
+    # Fiyatlara bağlı hesaplamaları tetikle (NAV vb.), hatalar veri kaydını etkilemesin
+    for receiver, response in prices_ingested.send_robust(sender=PriceData, prices=saved_prices, previous=previous):
+        if isinstance(response, Exception):
+            logger.error(f"Fiyat sonrası işlem hatası ({receiver.__name__}): {response}")
+    
     return successful_count, total_count 
\ No newline at end of file
@@ -0,0 +1,294 @@
+import logging
+from collections import namedtuple
+from datetime import time, timedelta
+from decimal import Decimal, ROUND_DOWN
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import DealingOrder, Fund, FundNav, FundShare, Position
+from .nav import compute_fund_navs, save_fund_navs
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+# Bu saatten sonra verilen emirler bir sonraki iş gününün fiyatından gerçekleşir
+CUTOFF = getattr(settings, 'FUND_DEALING_CUTOFF', '13:30')
+# İşlem günü bu saatten (piyasa kapanışı sonrası) önce gerçekleştirilmez; kapanış fiyatı henüz belli değildir
+SETTLE_AFTER = getattr(settings, 'FUND_DEALING_SETTLE_AFTER', '18:30')
+SHARE_PRECISION = Decimal('0.01')
+AMOUNT_PRECISION = Decimal('0.01')
+PRICE_PRECISION = Decimal('0.000001')
+BATCH_SIZE = 1000
+ORDER_UPDATE_FIELDS = ['status', 'price', 'settled_shares', 'settled_amount', 'settled_at', 'note']
+
+# Bir fonun bir işlem günündeki toplu gerçekleşme sonucu
+DealingResult = namedtuple('DealingResult', [
+    'fund_id', 'dealing_date', 'price', 'settled', 'rejected', 'net_shares', 'net_amount',
+])
+
+
+def _parse_time(value):
+    hour, minute = value.split(':')
+    return time(int(hour), int(minute))
+
+
+def _cutoff_time():
+    return _parse_time(CUTOFF)
+
+
+def next_dealing_day(day):
+    """Sonraki iş günü (hafta sonları atlanır)"""
+    day += timedelta(days=1)
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+def dealing_date_for(moment=None):
+    """Emir zamanına göre işlem (fiyatlama) günü: kesim saatinden sonra veya hafta sonu ise sonraki iş günü"""
+    moment = moment or timezone.now()
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    day = moment.date()
+    if day.weekday() >= 5 or moment.time() >= _cutoff_time():
+        return next_dealing_day(day)
+    return day
+
+
+def last_settleable_day(moment=None):
+    """
+    Gerçekleştirilebilecek son işlem günü: piyasa kapanışından (SETTLE_AFTER) sonra
+    bugün, öncesinde dün. Böylece bugünün emirleri gün içi fiyattan fiyatlanmaz.
+    """
+    moment = moment or timezone.now()
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    day = moment.date()
+    if moment.time() >= _parse_time(SETTLE_AFTER):
+        return day
+    return day - timedelta(days=1)
+
+
+def place_order(fund, investor, order_type, amount=None, shares=None, placed_at=None):
+    """
+    Katılma/ayrılma emrini kuyruğa ekler. Fon ve paylar emir anında değişmez;
+    emir işlem gününün toplu gerçekleşmesinde fiyatlanır.
+
+    Raises:
+        ValueError: Emir tipi veya tutar/pay bilgisi geçersizse
+    """
+    if order_type == 'subscription':
+        if not amount or amount <= 0:
+            raise ValueError("Katılma emri için pozitif tutar gerekli")
+        shares = None
+    elif order_type == 'redemption':
+        if not (shares and shares > 0) and not (amount and amount > 0):
+            raise ValueError("Ayrılma emri için pozitif pay adedi veya tutar gerekli")
+    else:
+        raise ValueError(f"Geçersiz emir tipi: {order_type}")
+
+    placed_at = placed_at or timezone.now()
+    return DealingOrder.objects.create(
+        fund=fund,
+        investor=investor,
+        order_type=order_type,
+        amount=amount,
+        shares=shares,
+        placed_at=placed_at,
+        dealing_date=dealing_date_for(placed_at),
+    )
+
+
+def has_assets(fund):
+    """Fonun değeri, nakdi veya bağlı portföylerinde açık pozisyonu var mı"""
+    if fund.current_value or fund.cash:
+        return True
+    return Position.objects.filter(portfolio__fund=fund, quantity__gt=0).exists()
+
+
+def cutoff_price(fund, day):
+    """
+    Fonun işlem günü birim pay fiyatı.
+
+    Günün NAV kaydı o günün kapanışları ve işlem öncesi pay adediyle hesaplanıp
+    kaydedilir. O gün fiyat yoksa son NAV kaydı, o da yoksa fonun güncel değeri
+    kullanılır. Payı ve varlığı olmayan fon 1 TL'den açılır (FundShare ile aynı
+    kural); payı olmadığı halde pozisyonu veya nakdi olan fon fiyatlanamaz,
+    yoksa ilk katılan mevcut varlıkları bedelsiz almış olur.
+
+    Returns:
+        Decimal | None: Fiyat belirlenemezse None
+    """
+    if fund.total_shares <= 0:
+        return None if has_assets(fund) else Decimal('1')
+
+    rows = [row for row in compute_fund_navs(day, day, [fund.pk]) if row.date == day]
+    if rows:
+        save_fund_navs(rows)
+        if rows[0].share_value > 0:
+            return rows[0].share_value
+
+    last = FundNav.objects.filter(
+        fund=fund,
+        date__lte=day,
+        share_value__gt=0
+    ).order_by('-date').values_list('share_value', flat=True).first()
+    if last:
+        return last
+
+    if fund.current_value > 0:
+        return (fund.current_value / fund.total_shares).quantize(PRICE_PRECISION)
+    return None
+
+
+def _reject(order, note):
+    order.status = 'rejected'
+    order.note = note
+
+
+def settle_fund(fund_id, day, now=None):
+    """
+    Fonun işlem günündeki bekleyen emirlerini tek fiyattan, tek transaction içinde gerçekleştirir.
+
+    Fon, emirler ve ilgili paylar kilitlenir; tüm emirler aynı birim fiyattan
+    pay adedine çevrilir, paylar toplu yazılır ve fon toplamları tek güncellemeyle
+    değişir. Bu yüzden FundShare sinyalleri çalışmaz.
+
+    Returns:
+        DealingResult | None: Bekleyen emir yoksa veya fiyat belirlenemezse None
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        fund = Fund.objects.select_for_update().get(pk=fund_id)
+        orders = list(DealingOrder.objects.select_for_update().filter(
+            fund_id=fund_id,
+            status='pending',
+            dealing_date=day
+        ).order_by('placed_at', 'id'))
+        if not orders:
+            return None
+
+        price = cutoff_price(fund, day)
+        if price is None:
+            reason = "payı olmayan fonun varlıkları var" if fund.total_shares <= 0 else "fiyat bulunamadı"
+            logger.warning(f"{fund.name} için {day} fiyatı belirlenemedi ({reason}), {len(orders)} emir bekletiliyor")
+            return None
+
+        holdings = {
+            share.investor_id: share
+            for share in FundShare.objects.select_for_update().filter(
+                fund_id=fund_id,
+                investor_id__in={order.investor_id for order in orders}
+            )
+        }
+        net_shares = net_amount = initial_delta = Decimal('0')
+        settled = rejected = 0
+
+        for order in orders:
+            holding = holdings.get(order.investor_id)
+            if order.order_type == 'subscription':
+                units = (order.amount / price).quantize(SHARE_PRECISION, rounding=ROUND_DOWN)
+                if units <= 0:
+                    _reject(order, "Tutar bir paydan az")
+                    rejected += 1
+                    continue
+                cash = (units * price).quantize(AMOUNT_PRECISION)
+                if holding is None:
+                    holding = holdings[order.investor_id] = FundShare(
+                        fund_id=fund_id,
+                        investor_id=order.investor_id,
+                        shares_count=Decimal('0'),
+                        initial_investment=Decimal('0'),
+                        entry_date=day,
+                    )
+                holding.shares_count += units
+                holding.initial_investment += cash
+                net_shares += units
+                net_amount += cash
+                initial_delta += cash
+            else:
+                available = holding.shares_count if holding is not None else Decimal('0')
+                units = order.shares or (order.amount / price).quantize(SHARE_PRECISION, rounding=ROUND_DOWN)
+                if units <= 0 or units > available:
+                    _reject(order, f"Yetersiz pay (mevcut: {available})")
+                    rejected += 1
+                    continue
+                cash = (units * price).quantize(AMOUNT_PRECISION, rounding=ROUND_DOWN)
+                # Satılan payların maliyeti orantılı olarak düşülür
+                cost = (holding.initial_investment * units / available).quantize(AMOUNT_PRECISION)
+                holding.shares_count -= units
+                holding.initial_investment -= cost
+                net_shares -= units
+                net_amount -= cash
+                initial_delta -= cost
+
+            order.status = 'settled'
+            order.price = price
+            order.settled_shares = units
+            order.settled_amount = cash
+            order.settled_at = now
+            settled += 1
+
+        # Yeni ve değişen paylar ile emir sonuçları tek upsert ile yazılır
+        # (bulk_update'in CASE ifadeleri binlerce satırda çok yavaş)
+        for holding in holdings.values():
+            holding.last_updated = now
+        FundShare.objects.bulk_create(
+            holdings.values(),
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['fund', 'investor'],
+            update_fields=['shares_count', 'initial_investment', 'last_updated'],
+        )
+        DealingOrder.objects.bulk_create(
+            orders,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['id'],
+            update_fields=ORDER_UPDATE_FIELDS,
+        )
+        Fund.objects.filter(pk=fund_id).update(
+            total_shares=max(Decimal('0'), fund.total_shares + net_shares),
+            current_value=max(Decimal('0'), fund.current_value + net_amount),
+            # Katılma tutarı hisseye yatırılana kadar fon nakdinde durur
+            cash=fund.cash + net_amount,
+            initial_value=max(Decimal('0'), fund.initial_value + initial_delta),
+            updated_at=now,
+        )
+
+        # Toplu yazmalar sinyal göndermez, yatırımcı dağılımlarını işlem bitince geçersiz kıl
+        from .exposure import invalidate_exposures
+        from .read_models import schedule_rebuild
+        transaction.on_commit(invalidate_exposures)
+        schedule_rebuild(fund_ids=[fund_id])
+
+    logger.info(
+        f"{fund.name} {day} işlem günü: {settled} emir {price} fiyatından gerçekleşti, {rejected} emir reddedildi "
+        f"(net pay: {net_shares}, net tutar: {net_amount})"
+    )
+    return DealingResult(fund_id, day, price, settled, rejected, net_shares, net_amount)
+
+
+def settle_dealing(day=None, fund_ids=None):
+    """
+    İşlem günü gelmiş tüm bekleyen emirleri fon ve gün bazında toplu gerçekleştirir.
+
+    Geciken günler tarih sırasıyla işlenir; böylece her gün bir önceki günün
+    pay adetleriyle fiyatlanır. Gün verilmezse last_settleable_day kullanılır,
+    verilen gün de ondan sonraya taşamaz.
+
+    Returns:
+        list: DealingResult listesi
+    """
+    day = min(day or last_settleable_day(), last_settleable_day())
+    pending = DealingOrder.objects.filter(status='pending', dealing_date__lte=day)
+    if fund_ids is not None:
+        pending = pending.filter(fund_id__in=fund_ids)
+    periods = pending.values_list('dealing_date', 'fund_id').distinct().order_by('dealing_date', 'fund_id')
+
+    results = []
+    for dealing_date, fund_id in list(periods):
+        result = settle_fund(fund_id, dealing_date)
+        if result is not None:
+            results.append(result)
+    return results
@@ -0,0 +1,208 @@
+import logging
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from .models import FundShare, Fund, Investor, Portfolio, Position
+from .pricing import latest_prices
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+CACHE_TIMEOUT = getattr(settings, 'EXPOSURE_CACHE_TIMEOUT', 60 * 60)
+GENERATION_KEY = 'exposure:generation'
+
+# Seyrek matrisler (satır, sütun, değer) dizileri olarak tutulur (COO biçimi)
+_EMPTY = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+
+
+def _coo(rows, cols, values):
+    return (
+        np.asarray(rows, dtype=np.int64),
+        np.asarray(cols, dtype=np.int64),
+        np.asarray(values, dtype=np.float64),
+    )
+
+
+def _sum_duplicates(rows, cols, values):
+    """Aynı (satır, sütun) hücresine düşen değerleri toplar"""
+    if not len(rows):
+        return _EMPTY
+    width = int(cols.max()) + 1
+    keys, inverse = np.unique(rows * width + cols, return_inverse=True)
+    return keys // width, keys % width, np.bincount(inverse, weights=values)
+
+
+def _concat(*matrices):
+    return _sum_duplicates(*(np.concatenate(parts) for parts in zip(*matrices)))
+
+
+def _multiply(left, right):
+    """
+    İki seyrek matrisin çarpımı.
+
+    Sağ matris satıra göre sıralanır; soldaki her hücre, sütununa karşılık gelen
+    sağ satırın tüm hücreleriyle eşleştirilip çarpılır ve aynı hücreler toplanır.
+    """
+    left_rows, left_cols, left_values = left
+    right_rows, right_cols, right_values = right
+    if not len(left_rows) or not len(right_rows):
+        return _EMPTY
+
+    order = np.argsort(right_rows, kind='stable')
+    right_rows, right_cols, right_values = right_rows[order], right_cols[order], right_values[order]
+
+    start = np.searchsorted(right_rows, left_cols, side='left')
+    counts = np.searchsorted(right_rows, left_cols, side='right') - start
+    total = int(counts.sum())
+    if not total:
+        return _EMPTY
+
+    # Her sol hücre için sağ satır aralığındaki indeksler
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    matched = np.repeat(start, counts) + offsets
+    return _sum_duplicates(
+        np.repeat(left_rows, counts),
+        right_cols[matched],
+        np.repeat(left_values, counts) * right_values[matched]
+    )
+
+
+def ownership_matrix(investor_ids=None):
+    """
+    (yatırımcı x portföy) etkin sahiplik oranları.
+
+    Fona bağlı olmayan portföyler sahibine tam olarak sayılır; fon portföyleri
+    (yatırımcı x fon) pay oranları ile (fon x portföy) üyelik matrisinin
+    çarpımıyla yatırımcılara dağıtılır.
+    """
+    direct = Portfolio.objects.filter(investor__isnull=False, fund__isnull=True)
+    shares = FundShare.objects.filter(shares_count__gt=0)
+    if investor_ids is not None:
+        direct = direct.filter(investor_id__in=investor_ids)
+        shares = shares.filter(investor_id__in=investor_ids)
+
+    direct_rows = list(direct.values_list('investor_id', 'id'))
+    share_rows = list(shares.values_list('investor_id', 'fund_id', 'shares_count'))
+    fund_ids = {fund_id for _, fund_id, _ in share_rows}
+    total_shares = dict(Fund.objects.filter(pk__in=fund_ids, total_shares__gt=0).values_list('id', 'total_shares'))
+    share_rows = [row for row in share_rows if row[1] in total_shares]
+    members = list(Portfolio.objects.filter(fund_id__in=total_shares.keys()).values_list('fund_id', 'id'))
+
+    owns = _coo(
+        [investor_id for investor_id, _ in direct_rows],
+        [portfolio_id for _, portfolio_id in direct_rows],
+        np.ones(len(direct_rows))
+    )
+    fractions = _coo(
+        [investor_id for investor_id, _, _ in share_rows],
+        [fund_id for _, fund_id, _ in share_rows],
+        [float(count / total_shares[fund_id]) for _, fund_id, count in share_rows]
+    )
+    membership = _coo(
+        [fund_id for fund_id, _ in members],
+        [portfolio_id for _, portfolio_id in members],
+        np.ones(len(members))
+    )
+    return _concat(owns, _multiply(fractions, membership))
+
+
+def holdings_matrix(portfolio_ids):
+    """
+    (portföy x hisse) adet matrisi.
+
+    Returns:
+        tuple: (hisse kodu listesi, seyrek adet matrisi)
+    """
+    rows = list(Position.objects.filter(
+        portfolio_id__in=portfolio_ids,
+        quantity__gt=0
+    ).values_list('portfolio_id', 'stock_id', 'quantity'))
+
+    stocks = sorted({stock_id for _, stock_id, _ in rows})
+    stock_index = {code: i for i, code in enumerate(stocks)}
+    return stocks, _coo(
+        [portfolio_id for portfolio_id, _, _ in rows],
+        [stock_index[stock_id] for _, stock_id, _ in rows],
+        [float(quantity) for _, _, quantity in rows]
+    )
+
+
+def compute_exposures(investor_ids=None):
+    """
+    Yatırımcıların fon ve portföyler üzerinden hisse bazında etkin pozisyonları.
+
+    Tüm yatırımcılar için (yatırımcı x portföy) sahiplik matrisi ile (portföy x hisse)
+    adet matrisi tek bir seyrek çarpımla birleştirilir.
+
+    Returns:
+        dict: investor_id -> [(hisse kodu, etkin adet, güncel değer)] (değere göre azalan)
+    """
+    ownership = ownership_matrix(investor_ids)
+    stocks, holdings = holdings_matrix(np.unique(ownership[1]).tolist())
+    investors, columns, quantities = _multiply(ownership, holdings)
+
+    prices = latest_prices(stocks)
+    price_vector = np.array([float(prices.get(code, 0)) for code in stocks])
+    values = quantities * price_vector[columns] if len(columns) else quantities
+
+    exposures = {investor_id: [] for investor_id in (investor_ids or ())}
+    if len(investors):
+        # Yatırımcıya göre, yatırımcı içinde değere göre azalan sırala ve gruplara böl
+        order = np.lexsort((-values, investors))
+        investors, columns = investors[order], columns[order]
+        codes = np.array(stocks, dtype=object)[columns].tolist()
+        rows = list(zip(codes, quantities[order].tolist(), values[order].tolist()))
+        bounds = np.flatnonzero(np.diff(investors)) + 1
+        starts = [0] + bounds.tolist()
+        ends = bounds.tolist() + [len(rows)]
+        for investor_id, start, end in zip(investors[starts].tolist(), starts, ends):
+            exposures[investor_id] = rows[start:end]
+
+    logger.debug(f"{len(exposures)} yatırımcı için hisse bazında dağılım hesaplandı")
+    return exposures
+
+
+def _generation():
+    cache.add(GENERATION_KEY, 1, None)
+    return cache.get(GENERATION_KEY, 1)
+
+
+def current_generation():
+    """Dağılım önbelleğinin güncel nesli; işlem, pay, portföy veya fiyat değiştiğinde artar"""
+    return _generation()
+
+
+def invalidate_exposures():
+    """Önbellekteki tüm dağılımları geçersiz kılar (anahtar nesli artırılır)"""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.add(GENERATION_KEY, 1, None)
+
+
+def investor_exposures(investor_ids=None):
+    """
+    Yatırımcıların hisse bazında dağılımları; önbellekte olmayanlar tek seferde hesaplanır.
+
+    Args:
+        investor_ids: Sadece bu yatırımcılar (None ise tümü)
+
+    Returns:
+        dict: investor_id -> [(hisse kodu, etkin adet, güncel değer)]
+    """
+    everyone = investor_ids is None
+    if everyone:
+        investor_ids = Investor.objects.values_list('id', flat=True)
+    investor_ids = list(investor_ids)
+    generation = _generation()
+    keys = {investor_id: f"exposure:{generation}:{investor_id}" for investor_id in investor_ids}
+    cached = cache.get_many(keys.values())
+    results = {investor_id: cached[key] for investor_id, key in keys.items() if key in cached}
+
+    missing = [investor_id for investor_id in investor_ids if investor_id not in results]
+    if missing:
+        # Hiçbiri önbellekte yoksa yatırımcı filtresi olmadan tek seferde hesapla
+        computed = compute_exposures(missing if results or not everyone else None)
+        cache.set_many({keys[investor_id]: computed.get(investor_id, []) for investor_id in missing}, CACHE_TIMEOUT)
+        results.update((investor_id, computed.get(investor_id, [])) for investor_id in missing)
+    return results
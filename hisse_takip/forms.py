@@ -10,7 +10,7 @@ from decimal import Decimal
 class PortfolioForm(forms.ModelForm):
     class Meta:
         model = Portfolio
-        fields = ['name', 'description', 'investor', 'fund', 'currency', 'target_return', 'risk_level', 'is_active']
+        fields = ['name', 'description', 'investor', 'fund', 'currency', 'target_return', 'risk_level', 'benchmark', 'is_active']
         widgets = {
             'description': forms.Textarea(attrs={'rows': 3}),
             'target_return': forms.NumberInput(attrs={'step': '0.01'}),
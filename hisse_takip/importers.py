@@ -0,0 +1,340 @@
+import csv
+import io
+import logging
+import os
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from django.utils import timezone
+from .models import Stock, Transaction
+from .recompute import deferred_recompute, transaction_cash
+from .search import invalidate_search_index
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 5000
+MAX_ERRORS = 100
+
+# Türkçe karakterleri ASCII karşılıklarına indirger (başlık ve işlem tipi eşleştirmesi için)
+_FOLD = str.maketrans('çğıöşüÇĞİÖŞÜI', 'cgiosuCGIOSUI')
+
+# Ekstre sütun adları (katlanmış, küçük harf) -> Transaction alanı
+COLUMN_ALIASES = {
+    'date': 'date', 'tarih': 'date', 'islem tarihi': 'date', 'zaman': 'date',
+    'code': 'stock', 'stock': 'stock', 'symbol': 'stock', 'hisse': 'stock', 'sembol': 'stock',
+    'menkul': 'stock', 'kod': 'stock', 'hisse kodu': 'stock',
+    'type': 'transaction_type', 'islem': 'transaction_type', 'islem tipi': 'transaction_type',
+    'yon': 'transaction_type', 'al/sat': 'transaction_type',
+    'quantity': 'quantity', 'adet': 'quantity', 'miktar': 'quantity', 'lot': 'quantity',
+    'price': 'price', 'fiyat': 'price', 'islem fiyati': 'price',
+    'commission': 'commission', 'komisyon': 'commission',
+    'tax': 'tax', 'vergi': 'tax', 'bsmv': 'tax',
+    'notes': 'notes', 'aciklama': 'notes', 'not': 'notes',
+}
+
+TYPE_ALIASES = {
+    'buy': 'buy', 'alis': 'buy', 'al': 'buy', 'a': 'buy', 'b': 'buy',
+    'sell': 'sell', 'satis': 'sell', 'sat': 'sell', 's': 'sell',
+    'dividend': 'dividend', 'temettu': 'dividend',
+    'split': 'split', 'bolunme': 'split',
+    'merger': 'merger', 'birlesme': 'merger',
+    'rights': 'rights', 'bedelsiz': 'rights', 'ruchan': 'rights', 'bedelsiz/ruchan': 'rights',
+}
+
+DATE_FORMATS = [
+    '%d.%m.%Y %H:%M:%S', '%d.%m.%Y %H:%M', '%d.%m.%Y',
+    '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d',
+    '%d/%m/%Y %H:%M:%S', '%d/%m/%Y %H:%M', '%d/%m/%Y',
+]
+
+REQUIRED_COLUMNS = {'date', 'stock', 'transaction_type', 'quantity', 'price'}
+
+
+class StatementError(Exception):
+    """Ekstre okunamadığında veya satırlar geçersiz olduğunda fırlatılır"""
+
+    def __init__(self, message, errors=None):
+        super().__init__(message)
+        self.errors = errors or []
+
+
+class ImportResult:
+    """İçe aktarma sonucu"""
+
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.duplicates = 0
+        self.new_stocks = set()    # Oluşturulan (deneme modunda oluşturulacak) hisse kodları
+        self.errors = []    # (satır no, mesaj)
+        self.first_date = None
+
+    def __str__(self):
+        if self.dry_run:
+            return (f"{self.rows} satır okundu, {self.created} işlem eklenecek, "
+                    f"{len(self.new_stocks)} hisse oluşturulacak, {self.duplicates} tekrar atlanacak, "
+                    f"{len(self.errors)} hata (hiçbir kayıt yazılmadı)")
+        return (f"{self.rows} satır okundu, {self.created} işlem eklendi, "
+                f"{len(self.new_stocks)} hisse oluşturuldu, {self.duplicates} tekrar atlandı, "
+                f"{len(self.errors)} hata")
+
+
+def _fold(value):
+    return str(value).translate(_FOLD).strip().lower()
+
+
+def _decimal(value):
+    """Sayı veya Türkçe biçimli metni (1.234,56) Decimal'e çevirir"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float, Decimal)):
+        return Decimal(str(value))
+    text = str(value).replace('TL', '').replace(' ', '').strip()
+    if ',' in text:
+        text = text.replace('.', '').replace(',', '.')
+    return Decimal(text)
+
+
+def _datetime(value):
+    """Tarih değerini saat dilimli datetime'a çevirir"""
+    if isinstance(value, datetime):
+        moment = value
+    elif hasattr(value, 'year'):
+        moment = datetime(value.year, value.month, value.day)
+    else:
+        text = str(value).strip()
+        for fmt in DATE_FORMATS:
+            try:
+                moment = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Tarih biçimi tanınmadı: {text}")
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def _csv_rows(fileobj, encoding):
+    """CSV dosyasını satır satır okur; ayırıcı (, ; sekme) ilk satırdan tespit edilir"""
+    if isinstance(fileobj, io.TextIOBase):
+        stream = fileobj
+    else:
+        # Django UploadedFile nesnelerinde alttaki ikili dosya kullanılır
+        stream = io.TextIOWrapper(getattr(fileobj, 'file', fileobj), encoding=encoding, newline='')
+    sample = stream.readline()
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    yield next(csv.reader([sample], dialect))
+    yield from csv.reader(stream, dialect)
+
+
+def _xlsx_rows(fileobj):
+    """XLSX dosyasının ilk sayfasını satır satır okur (openpyxl gerekir)"""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise StatementError("XLSX dosyaları için openpyxl kurulu olmalıdır (pip install openpyxl)")
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_statement(fileobj, filename, encoding='utf-8-sig'):
+    """
+    Ekstreyi akış halinde okur ve (satır no, alan sözlüğü) çiftleri üretir.
+
+    Başlık satırındaki sütunlar COLUMN_ALIASES ile Transaction alanlarına eşlenir.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        rows = _xlsx_rows(fileobj)
+    elif extension in ('.csv', '.txt', ''):
+        rows = _csv_rows(fileobj, encoding)
+    else:
+        raise StatementError(f"Desteklenmeyen dosya türü: {extension}")
+
+    header = next(rows, None)
+    if header is None:
+        raise StatementError("Dosya boş")
+
+    columns = {}
+    for index, name in enumerate(header):
+        field = COLUMN_ALIASES.get(_fold(name or ''))
+        if field and field not in columns:
+            columns[field] = index
+
+    missing = REQUIRED_COLUMNS - columns.keys()
+    if missing:
+        raise StatementError(f"Eksik sütun(lar): {', '.join(sorted(missing))}")
+
+    for line, row in enumerate(rows, start=2):
+        if not row or all(cell in (None, '') for cell in row):
+            continue
+        yield line, {field: row[index] if index < len(row) else None for field, index in columns.items()}
+
+
+def parse_row(values):
+    """
+    Ekstre satırını doğrular ve Transaction alanlarına çevirir.
+
+    Raises:
+        ValueError: Satır geçersizse
+    """
+    transaction_type = TYPE_ALIASES.get(_fold(values['transaction_type'] or ''))
+    if transaction_type is None:
+        raise ValueError(f"Bilinmeyen işlem tipi: {values['transaction_type']}")
+
+    try:
+        quantity = _decimal(values['quantity'])
+        price = _decimal(values['price'])
+        commission = _decimal(values.get('commission')) or Decimal('0')
+        tax = _decimal(values.get('tax')) or Decimal('0')
+    except InvalidOperation:
+        raise ValueError("Sayısal alan okunamadı")
+
+    if quantity is None or quantity <= 0:
+        raise ValueError("Miktar pozitif bir değer olmalıdır")
+    if price is None or price <= 0:
+        raise ValueError("Fiyat pozitif bir değer olmalıdır")
+
+    code = str(values['stock'] or '').strip().upper()
+    if not code:
+        raise ValueError("Hisse kodu boş")
+
+    return {
+        'date': _datetime(values['date']),
+        'stock_id': code,
+        'transaction_type': transaction_type,
+        'quantity': quantity.quantize(Decimal('0.01')),
+        'price': price.quantize(Decimal('0.01')),
+        'commission': commission.quantize(Decimal('0.01')),
+        'tax': tax.quantize(Decimal('0.01')),
+        'notes': str(values['notes']).strip() if values.get('notes') else None,
+    }
+
+
+def _duplicate_key(portfolio_id, date, stock_id, transaction_type, quantity, price):
+    return (portfolio_id, date, stock_id, transaction_type, quantity, price)
+
+
+def _write_batch(portfolio, parsed, result, batch, create_stocks, skip_duplicates):
+    """Doğrulanmış satırları hisse kontrolü ve tekrar elemesiyle toplu olarak kaydeder"""
+    codes = {row['stock_id'] for _, row in parsed}
+    known = set(Stock.objects.filter(code__in=codes).values_list('code', flat=True)) | (codes & result.new_stocks)
+    if create_stocks and codes - known:
+        missing = codes - known
+        if batch is not None:
+            Stock.objects.bulk_create([Stock(code=code, name=code) for code in missing], ignore_conflicts=True)
+            # bulk_create post_save göndermez
+            invalidate_search_index()
+        # Deneme modunda veya hatalı satır bulunmuşsa hisseler yazılmaz, sadece sayılır
+        result.new_stocks |= missing
+        known = codes
+
+    existing = set()
+    if skip_duplicates:
+        dates = [row['date'] for _, row in parsed]
+        existing = set(
+            _duplicate_key(*values) for values in Transaction.objects.filter(
+                portfolio=portfolio,
+                stock_id__in=codes,
+                date__gte=min(dates),
+                date__lte=max(dates)
+            ).values_list('portfolio_id', 'date', 'stock_id', 'transaction_type', 'quantity', 'price')
+        )
+
+    transactions = []
+    for line, row in parsed:
+        if row['stock_id'] not in known:
+            result.errors.append((line, f"Bilinmeyen hisse kodu: {row['stock_id']}"))
+            continue
+        key = _duplicate_key(portfolio.pk, row['date'], row['stock_id'], row['transaction_type'],
+                             row['quantity'], row['price'])
+        if key in existing:
+            result.duplicates += 1
+            continue
+        existing.add(key)
+        transactions.append(Transaction(portfolio=portfolio, investor_id=portfolio.investor_id, **row))
+
+    if batch is None:
+        # Deneme modu veya hatalı satır bulunmuş: eklenecek işlemler sadece sayılır
+        result.created += len(transactions)
+        return
+
+    Transaction.objects.bulk_create(transactions)
+    result.created += len(transactions)
+    for transaction in transactions:
+        batch.mark_position(portfolio.pk, transaction.stock_id)
+        batch.add_portfolio_cash_delta(portfolio.pk, transaction_cash(
+            transaction.transaction_type, transaction.quantity, transaction.price,
+            transaction.commission, transaction.tax
+        ))
+        if result.first_date is None or transaction.date < result.first_date:
+            result.first_date = transaction.date
+
+
+def import_transactions(fileobj, filename, portfolio, batch_size=BATCH_SIZE, encoding='utf-8-sig',
+                        create_stocks=False, skip_duplicates=True, skip_invalid=False, dry_run=False):
+    """
+    Aracı kurum ekstresini (CSV/XLSX) akış halinde okuyup portföye işlem olarak ekler.
+
+    Satırlar batch_size'lık gruplar halinde doğrulanır ve bulk_create ile yazılır;
+    sinyaller tetiklenmez. Pozisyonlar, lotlar, yatırımcı toplamı ve fon değeri
+    deferred_recompute ile sonunda etkilenen her kayıt için bir kez hesaplanır.
+    Tüm içe aktarma tek transaction'dır: skip_invalid verilmemişse herhangi bir
+    hatalı satırda hiçbir işlem kaydedilmez.
+
+    Raises:
+        StatementError: Dosya okunamazsa veya (skip_invalid=False iken) hatalı satır varsa
+    """
+    result = ImportResult(dry_run)
+
+    def process(batch):
+        parsed = []
+        for line, values in iter_statement(fileobj, filename, encoding):
+            result.rows += 1
+            try:
+                parsed.append((line, parse_row(values)))
+            except ValueError as e:
+                result.errors.append((line, str(e)))
+
+            if len(result.errors) >= MAX_ERRORS and not skip_invalid:
+                break
+            if len(parsed) >= batch_size:
+                flush(parsed, batch)
+                parsed = []
+        if parsed:
+            flush(parsed, batch)
+
+    def flush(parsed, batch):
+        # Hatalı satır bulunduysa ve atlanmayacaksa geri kalan satırlar sadece doğrulanır
+        if result.errors and not skip_invalid:
+            batch = None
+        _write_batch(portfolio, parsed, result, batch, create_stocks, skip_duplicates)
+
+    if dry_run:
+        # Sadece doğrulama: hisse ve tekrar kontrolü yapılır, kayıt yazılmaz
+        skip_invalid = True
+        process(None)
+        return result
+
+    with deferred_recompute() as batch:
+        process(batch)
+        if result.errors and not skip_invalid:
+            raise StatementError(f"{len(result.errors)} satır hatalı, hiçbir işlem kaydedilmedi", result.errors)
+        if result.created and portfolio.investor_id:
+            batch.mark_investor(portfolio.investor_id, 'transactions')
+
+    if result.first_date is not None:
+        # İçe aktarılan geçmiş için günlük anlık görüntüleri yeniden oluştur
+        from .snapshots import backfill_snapshots
+        backfill_snapshots(timezone.localtime(result.first_date).date(), portfolio_ids=[portfolio.pk])
+
+    logger.info(f"{filename} içe aktarıldı ({portfolio}): {result}")
+    return result
@@ -0,0 +1,149 @@
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import AdminJob
+from .recompute import deferred_recompute
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+# Bir Celery görevinde işlenen kayıt sayısı; her parça kendi transaction'ında çalışır
+CHUNK_SIZE = getattr(settings, 'ADMIN_JOB_CHUNK_SIZE', 200)
+
+# İş adı -> (açıklama, parça işleyici)
+JOBS = {}
+
+
+def register_job(name, description):
+    """Kayıt id listesi alan parça işleyicisini arka plan işi olarak kaydeder"""
+    def decorator(handler):
+        JOBS[name] = (description, handler)
+        return handler
+    return decorator
+
+
+@register_job('investor_totals_from_transactions', "Yatırımcı toplam yatırımlarını işlemlerden hesapla")
+def recompute_investors_from_transactions(investor_ids):
+    with deferred_recompute() as batch:
+        for investor_id in investor_ids:
+            batch.mark_investor(investor_id, 'transactions')
+
+
+@register_job('investor_totals_from_investments', "Yatırımcı toplam yatırımlarını yatırım girişlerinden hesapla")
+def recompute_investors_from_investments(investor_ids):
+    with deferred_recompute() as batch:
+        for investor_id in investor_ids:
+            batch.mark_investor(investor_id, 'investments')
+
+
+@register_job('fund_values_from_portfolios', "Fon değerlerini bağlı portföylerden yeniden hesapla")
+def revalue_funds(fund_ids):
+    with deferred_recompute() as batch:
+        for fund_id in fund_ids:
+            batch.mark_fund(fund_id)
+
+
+def enqueue(job_id):
+    """İşin sıradaki parçasını Celery kuyruğuna gönderir"""
+    from .tasks import run_admin_job_task
+    try:
+        run_admin_job_task.delay(job_id)
+    except Exception as e:
+        # İş durumu korunur; admin'den "devam ettir" ile yeniden kuyruğa alınabilir
+        logger.error(f"Arka plan işi #{job_id} kuyruğa gönderilemedi: {str(e)}")
+        AdminJob.objects.filter(pk=job_id).update(error=f"Kuyruğa gönderilemedi: {str(e)}")
+
+
+def start_job(name, object_ids, user=None, chunk_size=None):
+    """
+    Arka plan işi oluşturur; transaction tamamlanınca ilk parça kuyruğa gönderilir.
+
+    Args:
+        name: JOBS'ta kayıtlı iş adı
+        object_ids: İşlenecek kayıt id'leri
+        user: Başlatan kullanıcı
+        chunk_size: Görev başına kayıt sayısı (varsayılan CHUNK_SIZE)
+
+    Returns:
+        AdminJob: Oluşturulan iş
+    """
+    description, _ = JOBS[name]
+    object_ids = list(object_ids)
+    job = AdminJob.objects.create(
+        name=name,
+        description=description,
+        user=user,
+        object_ids=object_ids,
+        total=len(object_ids),
+        chunk_size=chunk_size or CHUNK_SIZE,
+    )
+    transaction.on_commit(lambda: enqueue(job.pk))
+    logger.info(f"Arka plan işi #{job.pk} oluşturuldu: {description} ({len(object_ids)} kayıt)")
+    return job
+
+
+def run_next_chunk(job_id):
+    """
+    İşin sıradaki parçasını çalıştırır.
+
+    Parça ve ilerleme aynı transaction'da yazılır; iş satırı kilitlenip durumu ve
+    ilerlemesi yeniden kontrol edildiğinden iptal edilmiş iş devam etmez, aynı
+    parçayı iki çalışan (ör. görevin yeniden teslimi) işlemez.
+
+    Returns:
+        bool: Kuyruğa alınacak sonraki parça var mı
+    """
+    job = AdminJob.objects.filter(pk=job_id).first()
+    if job is None or not job.is_active:
+        return False
+    if job.name not in JOBS:
+        AdminJob.objects.filter(pk=job_id).update(
+            status='failed', error=f"Tanımsız iş: {job.name}", finished_at=timezone.now()
+        )
+        return False
+
+    if job.status == 'pending':
+        AdminJob.objects.filter(pk=job_id, status='pending').update(status='running', started_at=timezone.now())
+
+    _, handler = JOBS[job.name]
+    chunk = job.object_ids[job.processed:job.processed + job.chunk_size]
+    processed = job.processed + len(chunk)
+    try:
+        with transaction.atomic():
+            current = AdminJob.objects.select_for_update().filter(
+                pk=job_id, status='running', processed=job.processed
+            ).exists()
+            if not current:
+                return False
+            handler(chunk)
+            AdminJob.objects.filter(pk=job_id).update(processed=processed, error='')
+    except Exception as e:
+        logger.exception(f"Arka plan işi #{job_id} başarısız: {str(e)}")
+        AdminJob.objects.filter(pk=job_id, status='running').update(
+            status='failed', error=str(e), finished_at=timezone.now()
+        )
+        return False
+
+    if processed >= job.total:
+        AdminJob.objects.filter(pk=job_id, status='running').update(status='done', finished_at=timezone.now())
+        logger.info(f"Arka plan işi #{job_id} tamamlandı: {job.description} ({job.total} kayıt)")
+        return False
+    return True
+
+
+def cancel_jobs(queryset):
+    """Bekleyen veya çalışan işleri iptal eder; çalışan iş o anki parçayı bitirip durur"""
+    return queryset.filter(status__in=['pending', 'running']).update(status='cancelled', finished_at=timezone.now())
+
+
+def resume_jobs(queryset):
+    """
+    Başarısız veya takılı kalmış (çalışanı ölmüş) işleri kaldıkları parçadan
+    yeniden kuyruğa alır.
+    """
+    job_ids = list(queryset.filter(status__in=['pending', 'running', 'failed']).values_list('pk', flat=True))
+    AdminJob.objects.filter(pk__in=job_ids, status='failed').update(status='running', error='', finished_at=None)
+    for job_id in job_ids:
+        transaction.on_commit(lambda job_id=job_id: enqueue(job_id))
+    return len(job_ids)
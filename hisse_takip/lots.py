@@ -0,0 +1,263 @@
+import logging
+from collections import defaultdict, deque, namedtuple
+from datetime import date as date_cls
+from decimal import Decimal
+from django.conf import settings
+from django.utils import timezone
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+COST_BASIS_METHODS = ('fifo', 'average')
+STATE_PRECISION = Decimal('0.00000001')
+
+# Akış sonucu: satım işlemi id -> gerçekleşen K/Z, (portföy, yıl) -> toplam, (portföy, hisse) -> LotBook,
+# satım işlemi id -> kayıtlı K/Z (değişmeyenleri tekrar yazmamak için)
+RealizedGains = namedtuple('RealizedGains', ['per_sell', 'per_year', 'books', 'stored'])
+
+
+def cost_basis_method():
+    """Ayarlardaki maliyet yöntemini döndürür (fifo | average)"""
+    method = getattr(settings, 'COST_BASIS_METHOD', 'fifo')
+    if method not in COST_BASIS_METHODS:
+        raise ValueError(f"Geçersiz maliyet yöntemi: {method}")
+    return method
+
+
+class LotBook:
+    """
+    Bir pozisyonun açık lotlarını tutar.
+
+    Lotlar [adet, birim maliyet, alış tarihi] listeleri olarak bir deque içinde
+    alış sırasıyla saklanır. FIFO yönteminde satışlar en eski lottan düşülür;
+    ortalama maliyet yönteminde tüm alışlar tek lotta birleştirilir.
+    """
+
+    __slots__ = ('method', 'lots', 'realized')
+
+    def __init__(self, method='fifo', lots=None, realized=Decimal('0')):
+        self.method = method
+        self.lots = deque(lots or ())
+        self.realized = realized
+
+    @property
+    def quantity(self):
+        return sum((lot[0] for lot in self.lots), Decimal('0'))
+
+    @property
+    def cost(self):
+        return sum((lot[0] * lot[1] for lot in self.lots), Decimal('0'))
+
+    @property
+    def average_cost(self):
+        quantity = self.quantity
+        return self.cost / quantity if quantity else Decimal('0')
+
+    def buy(self, quantity, price, day):
+        if quantity <= 0:
+            return
+        if self.method == 'average' and self.lots:
+            lot = self.lots[0]
+            total = lot[0] + quantity
+            lot[1] = (lot[0] * lot[1] + quantity * price) / total
+            lot[0] = total
+        else:
+            self.lots.append([quantity, price, day])
+
+    def sell(self, quantity, price, fees=Decimal('0')):
+        """Satışı lotlardan düşer ve gerçekleşen kar/zararı döndürür"""
+        remaining = quantity
+        basis = Decimal('0')
+        lots = self.lots
+        while remaining > 0 and lots:
+            lot = lots[0]
+            if lot[0] <= remaining:
+                basis += lot[0] * lot[1]
+                remaining -= lot[0]
+                lots.popleft()
+            else:
+                basis += remaining * lot[1]
+                lot[0] -= remaining
+                remaining = Decimal('0')
+
+        # Eldekinden fazla satış maliyetsiz kabul edilmez, sadece eldeki kısım hesaplanır
+        sold = quantity - remaining
+        gain = sold * price - basis - fees
+        self.realized += gain
+        return gain
+
+    def rescale(self, ratio):
+        """Bölünme (ratio > 1) veya birleşmede (ratio < 1) lot adet ve maliyetlerini ölçekler"""
+        if not ratio:
+            return
+        for lot in self.lots:
+            lot[0] *= ratio
+            lot[1] /= ratio
+
+    def apply(self, transaction_type, quantity, price, commission=Decimal('0'), tax=Decimal('0'), day=None):
+        """
+        İşlemi lotlara uygular (apply_transaction ile aynı işlem tipleri).
+
+        Returns:
+            Decimal | None: Satım işlemlerinde gerçekleşen kar/zarar
+        """
+        quantity, price, commission, tax = (_decimal(value) for value in (quantity, price, commission, tax))
+        if transaction_type == 'buy':
+            self.buy(quantity, price, day)
+        elif transaction_type == 'sell':
+            return self.sell(quantity, price, commission + tax)
+        elif transaction_type == 'split':
+            self.rescale(price)
+        elif transaction_type == 'merge':
+            self.rescale(1 / price if price else 0)
+        return None
+
+    def to_state(self):
+        """Lotları JSONField'a yazılabilir listeye çevirir"""
+        return [
+            [str(quantity.quantize(STATE_PRECISION)), str(cost.quantize(STATE_PRECISION)),
+             day.isoformat() if day else None]
+            for quantity, cost, day in self.lots
+        ]
+
+    @classmethod
+    def from_state(cls, state, method='fifo', realized=Decimal('0')):
+        """JSONField'daki listeden lot defteri oluşturur"""
+        lots = [
+            [Decimal(quantity), Decimal(cost), date_cls.fromisoformat(day) if day else None]
+            for quantity, cost, day in state or ()
+        ]
+        return cls(method, lots, realized)
+
+
+def _decimal(value):
+    """Kaydedilmemiş işlemlerdeki int/float değerleri Decimal'e çevirir"""
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value or 0))
+
+
+def _local_day(moment):
+    """İşlem zamanını yerel güne çevirir"""
+    if timezone.is_aware(moment):
+        return timezone.localtime(moment).date()
+    return moment.date() if hasattr(moment, 'date') else moment
+
+
+def realized_gains(portfolio_ids=None, method=None, keys=None):
+    """
+    İşlem geçmişini tarih sırasıyla tek geçişte tarayarak lotları kurar ve
+    her satışın ve her (portföy, yıl) çiftinin gerçekleşen kar/zararını hesaplar.
+
+    Args:
+        portfolio_ids: Sadece bu portföyler (None ise tümü)
+        method: 'fifo' | 'average' (varsayılan COST_BASIS_METHOD ayarı)
+        keys: Sadece bu (portföy, hisse) çiftleri
+
+    Returns:
+        RealizedGains
+    """
+    from .models import Transaction
+
+    method = method or cost_basis_method()
+    rows = Transaction.objects.order_by('date', 'id')
+    if keys is not None:
+        portfolio_ids = {portfolio_id for portfolio_id, _ in keys}
+        rows = rows.filter(stock_id__in={stock_id for _, stock_id in keys})
+    if portfolio_ids is not None:
+        rows = rows.filter(portfolio_id__in=portfolio_ids)
+
+    books = {}
+    per_sell = {}
+    stored = {}
+    per_year = defaultdict(Decimal)
+    values = rows.values_list('id', 'portfolio_id', 'stock_id', 'transaction_type', 'quantity', 'price',
+                              'commission', 'tax', 'date', 'realized_profit_loss')
+    for pk, portfolio_id, stock_id, transaction_type, quantity, price, commission, tax, moment, saved in values.iterator(chunk_size=10000):
+        key = (portfolio_id, stock_id)
+        if keys is not None and key not in keys:
+            continue
+        book = books.get(key)
+        if book is None:
+            book = books[key] = LotBook(method)
+
+        day = _local_day(moment)
+        gain = book.apply(transaction_type, quantity, price, commission, tax, day)
+        if gain is not None:
+            per_sell[pk] = gain
+            stored[pk] = saved
+            per_year[(portfolio_id, day.year)] += gain
+
+    return RealizedGains(per_sell, dict(per_year), books, stored)
+
+
+def save_realized(per_sell, stored=None, batch_size=1000):
+    """
+    Satım işlemlerinin gerçekleşen kar/zararını toplu olarak yazar.
+
+    stored verilirse sadece kayıtlı değeri değişen işlemler güncellenir.
+    """
+    from .models import Transaction
+
+    stored = stored or {}
+    transactions = []
+    for pk, gain in per_sell.items():
+        gain = gain.quantize(Decimal('0.01'))
+        if stored.get(pk) != gain:
+            transactions.append(Transaction(pk=pk, realized_profit_loss=gain))
+
+    Transaction.objects.bulk_update(transactions, ['realized_profit_loss'], batch_size=batch_size)
+    return len(transactions)
+
+
+def rebuild_lots(portfolio_ids=None, method=None):
+    """
+    Pozisyonların lot durumunu ve gerçekleşen kar/zararını işlem geçmişinden
+    yeniden oluşturur ve pozisyonlarla birlikte saklar.
+    """
+    from .models import Position
+
+    gains = realized_gains(portfolio_ids, method)
+    positions = Position.objects.all()
+    if portfolio_ids is not None:
+        positions = positions.filter(portfolio_id__in=portfolio_ids)
+
+    to_update = []
+    for position in positions.only('id', 'portfolio_id', 'stock_id'):
+        book = gains.books.get((position.portfolio_id, position.stock_id))
+        position.lot_state = book.to_state() if book else []
+        position.realized_profit_loss = book.realized.quantize(Decimal('0.01')) if book else Decimal('0')
+        to_update.append(position)
+
+    Position.objects.bulk_update(to_update, ['lot_state', 'realized_profit_loss'], batch_size=1000)
+    saved = save_realized(gains.per_sell, gains.stored)
+    logger.info(f"{len(to_update)} pozisyonun lotları ve {saved} satışın kar/zararı güncellendi")
+    return gains
+
+
+def apply_to_position(position, transaction, method=None):
+    """
+    Tarih sırasında en sona eklenen işlemi pozisyonun saklı lotlarına uygular
+    (tüm geçmişi yeniden taramadan). Satışta işlemin kar/zararını döndürür.
+
+    Lot durumu hiç kurulmamışsa (null; ör. lot_state alanı eklenmeden önce açılmış
+    pozisyon) lotlar bir kez bu işlem dahil geçmişten kurulur. Sıfıra kapanmış
+    pozisyonun durumu boş listedir ve yeniden açılışta geçmiş taranmaz.
+    """
+    method = method or cost_basis_method()
+    if position.lot_state is None:
+        key = (position.portfolio_id, position.stock_id)
+        gains = realized_gains(method=method, keys={key})
+        book = gains.books.get(key, LotBook(method))
+        position.lot_state = book.to_state()
+        position.realized_profit_loss = book.realized.quantize(Decimal('0.01'))
+        return gains.per_sell.get(transaction.pk)
+
+    book = LotBook.from_state(position.lot_state, method, Decimal(position.realized_profit_loss or 0))
+    gain = book.apply(
+        transaction.transaction_type, transaction.quantity, transaction.price,
+        transaction.commission, transaction.tax, _local_day(transaction.date)
+    )
+    position.lot_state = book.to_state()
+    position.realized_profit_loss = book.realized.quantize(Decimal('0.01'))
+    return gain
@@ -0,0 +1,48 @@
+import logging
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ...nav import backfill_fund_navs
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Fonların günlük NAV ve birim pay değeri geçmişini fiyat verilerinden tek geçişte yeniden oluşturur'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            type=str,
+            help='Başlangıç tarihi (YYYY-MM-DD, varsayılan: ilk fiyat verisinin tarihi)'
+        )
+        
+        parser.add_argument(
+            '--end',
+            type=str,
+            help='Bitiş tarihi (YYYY-MM-DD, varsayılan: bugün)'
+        )
+        
+        parser.add_argument(
+            '--fund',
+            type=int,
+            action='append',
+            dest='funds',
+            help='Sadece belirtilen fon(lar) için hesapla (birden fazla kez verilebilir)'
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(f"Geçersiz tarih: {e}")
+        
+        start_time = timezone.now()
+        self.stdout.write("Fon NAV geçmişi hesaplanıyor...")
+        
+        saved = backfill_fund_navs(start, end, options['funds'])
+        
+        duration = (timezone.now() - start_time).total_seconds()
+        self.stdout.write(
+            self.style.SUCCESS(f"{saved} NAV kaydı oluşturuldu/güncellendi. Süre: {duration:.2f} saniye")
+        )
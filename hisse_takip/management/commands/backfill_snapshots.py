@@ -0,0 +1,48 @@
+import logging
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ...snapshots import backfill_snapshots
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Portföylerin günlük anlık görüntülerini işlem geçmişi ve günlük kapanışlardan tek geçişte yeniden oluşturur'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            type=str,
+            help='Başlangıç tarihi (YYYY-MM-DD, varsayılan: ilk işlemin tarihi)'
+        )
+        
+        parser.add_argument(
+            '--end',
+            type=str,
+            help='Bitiş tarihi (YYYY-MM-DD, varsayılan: bugün)'
+        )
+        
+        parser.add_argument(
+            '--portfolio',
+            type=int,
+            action='append',
+            dest='portfolios',
+            help='Sadece belirtilen portföy(ler) için hesapla (birden fazla kez verilebilir)'
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(f"Geçersiz tarih: {e}")
+        
+        start_time = timezone.now()
+        self.stdout.write("Portföy anlık görüntüleri hesaplanıyor...")
+        
+        saved = backfill_snapshots(start, end, options['portfolios'])
+        
+        duration = (timezone.now() - start_time).total_seconds()
+        self.stdout.write(
+            self.style.SUCCESS(f"{saved} anlık görüntü oluşturuldu/güncellendi. Süre: {duration:.2f} saniye")
+        )
@@ -0,0 +1,66 @@
+import time
+import numpy as np
+from django.core.management.base import BaseCommand
+from ...analytics import compute_metrics
+
+class Command(BaseCommand):
+    help = 'Performans analitiği hesaplamalarının sentetik veri üzerindeki sürelerini ölçer'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--portfolios',
+            type=int,
+            default=500,
+            help='Sentetik portföy sayısı (varsayılan: 500)'
+        )
+
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=252 * 5,
+            help='Gün sayısı (varsayılan: 1260, ~5 yıl)'
+        )
+
+        parser.add_argument(
+            '--window',
+            type=int,
+            default=63,
+            help='Kayan pencere uzunluğu (varsayılan: 63)'
+        )
+
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Tekrar sayısı (varsayılan: 5)'
+        )
+
+    def handle(self, *args, **options):
+        portfolios = options['portfolios']
+        days = options['days']
+        window = options['window']
+        repeat = options['repeat']
+
+        # Rastgele yürüyüş değer serileri ve ara sıra para girişleri
+        rng = np.random.default_rng(42)
+        returns = rng.normal(0.0005, 0.015, size=(portfolios, days))
+        values = 100000 * np.cumprod(1 + returns, axis=1)
+        flows = np.where(rng.random((portfolios, days)) < 0.02, rng.normal(5000, 1000, (portfolios, days)), 0)
+        values += np.cumsum(flows, axis=1)
+        dates = np.datetime64('2020-01-01') + np.arange(days)
+
+        self.stdout.write(f"{portfolios} portföy x {days} gün, pencere {window}, {repeat} tekrar")
+
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            compute_metrics(values, flows, dates, rolling_window=window)
+            timings.append(time.perf_counter() - start)
+
+        best = min(timings)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"En iyi: {best * 1000:.1f} ms, ortalama: {np.mean(timings) * 1000:.1f} ms "
+                f"({best / portfolios * 1e6:.1f} µs / portföy)"
+            )
+        )
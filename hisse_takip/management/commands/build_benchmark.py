@@ -0,0 +1,36 @@
+import logging
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from ...benchmarks import build_custom_benchmark
+from ...models import BenchmarkIndex
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Bileşenleri tanımlı özel kıyaslama endeksinin değer serisini fiyat geçmişinden oluşturur'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('code', type=str, help='Endeks kodu')
+        
+        parser.add_argument(
+            '--start',
+            type=str,
+            help='Bu tarihten itibaren yeniden hesapla (YYYY-MM-DD, varsayılan: tüm geçmiş)'
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            index = BenchmarkIndex.objects.get(code=options['code'].upper())
+        except BenchmarkIndex.DoesNotExist:
+            raise CommandError(f"Endeks bulunamadı: {options['code']}")
+        
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+        except ValueError as e:
+            raise CommandError(f"Geçersiz tarih: {e}")
+        
+        if not index.constituents.exists():
+            raise CommandError(f"{index.code} endeksinin bileşeni yok")
+        
+        saved = build_custom_benchmark(index, start=start)
+        self.stdout.write(self.style.SUCCESS(f"{index.code} için {saved} endeks değeri oluşturuldu/güncellendi"))
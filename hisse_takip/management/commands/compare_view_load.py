@@ -0,0 +1,205 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from importlib import import_module
+import numpy as np
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand, CommandError
+from django.shortcuts import render
+from django.test.utils import override_settings
+from django.urls import include, path
+from django.views.decorators.http import condition, require_GET
+from ...api import _batch_etag, _cached, _codes, api_login_required, api_view, quote_rows
+from ...pricing import cached_quotes, current_ingest_batch
+from ...read_models import get_dashboard
+from ...views import _portfolio_summaries
+from ...watchlists import board, board_rows
+
+
+# Karşılaştırma için async view'ların senkron sürümleri: aynı sorgular sırayla,
+# istek süresince bir iş parçacığı tutularak çalışır
+
+@login_required
+def sync_investor_dashboard(request):
+    investor = getattr(request.user, 'investor', None)
+    context = {'investor': investor, 'portfolios': list(_portfolio_summaries(request.user))}
+    if investor is not None:
+        context.update(get_dashboard(investor.pk))
+    return render(request, 'hisse_takip/investor_dashboard.html', context)
+
+
+@login_required
+def sync_watchlist(request):
+    return render(request, 'hisse_takip/watchlist.html', board(list(board_rows(request.user)), cached_quotes()))
+
+
+@require_GET
+@api_login_required
+@api_view
+@condition(etag_func=_batch_etag)
+def sync_quotes(request):
+    codes = _codes(request)
+    key = f"api:quotes:{current_ingest_batch()}:{','.join(codes) if codes else '*'}"
+    return _cached(key, lambda: {'batch': current_ingest_batch(), 'results': quote_rows(codes)})
+
+
+# Ölçüm sırasında kullanılan URL yapılandırması (uygulama URL'leri + senkron sürümler)
+urlpatterns = [
+    path('sync/investor/', sync_investor_dashboard),
+    path('sync/stocks/watchlist/', sync_watchlist),
+    path('sync/api/quotes/', sync_quotes),
+    path('', include('bist_project.urls')),
+]
+
+# Görünüm -> (async yol, senkron yol)
+VIEWS = {
+    'dashboard': ('/investor/', '/sync/investor/'),
+    'watchlist': ('/stocks/watchlist/', '/sync/stocks/watchlist/'),
+    'quotes': ('/api/quotes/', '/sync/api/quotes/'),
+}
+
+
+async def _request(app, path, query, cookie):
+    """ASGI uygulamasına tek GET isteği gönderir, durum kodunu döndürür"""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'cookie', cookie)],
+        'client': ('127.0.0.1', 0),
+        'server': ('localhost', 80),
+    }
+    received = False
+    status = None
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # İstemci bağlantıyı kesmez; yanıt bitince handler bekleyen görevi iptal eder
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await app(scope, receive, send)
+    return status
+
+
+async def _load(app, path, query, cookie, total, concurrency):
+    """`concurrency` eşzamanlı istemciyle toplam `total` istek gönderir"""
+    pending = iter(range(total))
+    latencies = []
+    statuses = Counter()
+    peak_threads = threading.active_count()
+
+    async def client():
+        nonlocal peak_threads
+        for _ in pending:
+            start = time.perf_counter()
+            statuses[await _request(app, path, query, cookie)] += 1
+            latencies.append(time.perf_counter() - start)
+            peak_threads = max(peak_threads, threading.active_count())
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        'rps': total / elapsed,
+        'p50': np.percentile(latencies, 50) * 1000,
+        'p95': np.percentile(latencies, 95) * 1000,
+        'threads': peak_threads,
+        'statuses': dict(statuses),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Sık okunan async view\'ları senkron sürümleriyle ASGI altında eşzamanlı yük ile karşılaştırır'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'username',
+            help='İstekleri gönderecek kullanıcı (yatırımcı kaydı, portföy ve izleme listesi olan)'
+        )
+
+        parser.add_argument(
+            '--views',
+            nargs='+',
+            choices=sorted(VIEWS),
+            default=sorted(VIEWS),
+            help='Karşılaştırılacak görünümler (varsayılan: hepsi)'
+        )
+
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Görünüm ve sürüm başına istek sayısı (varsayılan: 1000)'
+        )
+
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=50,
+            help='Eşzamanlı istemci sayısı (varsayılan: 50)'
+        )
+
+        parser.add_argument(
+            '--query',
+            default='',
+            help='İsteklere eklenecek sorgu dizesi (ör. codes=THYAO,GARAN)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"Kullanıcı bulunamadı: {options['username']}")
+
+        # Oturum açmış kullanıcı çerezi
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'django.contrib.auth.backends.ModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        cookie = f"{settings.SESSION_COOKIE_NAME}={session.session_key}".encode()
+
+        self.stdout.write(
+            f"{options['requests']} istek x {options['concurrency']} eşzamanlı istemci, kullanıcı {user.username}"
+        )
+        try:
+            with override_settings(ROOT_URLCONF=__name__, ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'localhost']):
+                asyncio.run(self._compare(cookie, options))
+        finally:
+            session.delete()
+
+    async def _compare(self, cookie, options):
+        app = get_asgi_application()
+        for name in options['views']:
+            for mode, view_path in zip(('async', 'sync'), VIEWS[name]):
+                # Isınma: önbellekler ve ilk sorgular ölçüme girmesin
+                status = await _request(app, view_path, options['query'], cookie)
+                if status != 200:
+                    self.stdout.write(self.style.WARNING(f"{name} ({mode}): ısınma isteği {status} döndü"))
+
+                result = await _load(app, view_path, options['query'], cookie, options['requests'], options['concurrency'])
+                self.stdout.write(
+                    f"{name:<10} {mode:<6} {result['rps']:8.1f} istek/sn  "
+                    f"p50 {result['p50']:7.1f} ms  p95 {result['p95']:7.1f} ms  "
+                    f"en fazla {result['threads']} iş parçacığı  {result['statuses']}"
+                )
+        self.stdout.write(self.style.SUCCESS("Karşılaştırma tamamlandı"))
@@ -0,0 +1,52 @@
+import logging
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ...risk import CONFIDENCE, WINDOW, compute_risk_metrics
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Portföy ve fonların VaR/CVaR ve oynaklık ölçütlerini kovaryans penceresinden hesaplar'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=str,
+            help='Hesaplama günü (YYYY-MM-DD, varsayılan: bugün)'
+        )
+        
+        parser.add_argument(
+            '--window',
+            type=int,
+            default=WINDOW,
+            help=f'Kovaryans penceresi, işlem günü (varsayılan: {WINDOW})'
+        )
+        
+        parser.add_argument(
+            '--confidence',
+            type=float,
+            default=CONFIDENCE,
+            help=f'VaR/CVaR güven düzeyi (varsayılan: {CONFIDENCE})'
+        )
+        
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Kayıtlı pencereyi kullanmadan getiri penceresini sıfırdan kur'
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError as e:
+            raise CommandError(f"Geçersiz tarih: {e}")
+        
+        if not 0.5 < options['confidence'] < 1:
+            raise CommandError("Güven düzeyi 0.5 ile 1 arasında olmalıdır")
+        
+        start_time = timezone.now()
+        saved = compute_risk_metrics(day, options['window'], options['confidence'], options['full'])
+        
+        duration = (timezone.now() - start_time).total_seconds()
+        self.stdout.write(self.style.SUCCESS(f"{saved} risk ölçütü hesaplandı. Süre: {duration:.2f} saniye"))
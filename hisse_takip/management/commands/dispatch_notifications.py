@@ -0,0 +1,41 @@
+import logging
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from ...notifications import BATCH_SIZE, dispatch_notifications
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Bildirim kuyruğundaki bekleyen bildirimleri kullanıcı bazında özet e-postalarla gönderir'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Bir turda alınacak en fazla bildirim (varsayılan: {BATCH_SIZE})'
+        )
+        
+        parser.add_argument(
+            '--drain',
+            action='store_true',
+            help='Gönderilecek bildirim kalmayana veya sınıra takılana kadar tekrar et'
+        )
+    
+    def handle(self, *args, **options):
+        start_time = timezone.now()
+        emails = sent = failed = deferred = 0
+        while True:
+            result = dispatch_notifications(batch_size=options['batch_size'])
+            emails += result.emails
+            sent += result.sent
+            failed += result.failed
+            deferred += result.deferred
+            if not options['drain'] or not result.emails:
+                break
+        
+        duration = (timezone.now() - start_time).total_seconds()
+        self.stdout.write(self.style.SUCCESS(
+            f"{emails} e-posta ile {sent} bildirim gönderildi, {failed} başarısız, {deferred} ertelendi. "
+            f"Süre: {duration:.2f} saniye"
+        ))
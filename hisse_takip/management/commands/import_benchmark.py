@@ -0,0 +1,53 @@
+import csv
+import logging
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from django.core.management.base import BaseCommand, CommandError
+from ...benchmarks import save_benchmark_values
+from ...models import BenchmarkIndex, BenchmarkValue
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Kıyaslama endeksinin (XU100, XU030 vb.) günlük değerlerini CSV dosyasından içe aktarır'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('code', type=str, help='Endeks kodu (örn. XU100)')
+        parser.add_argument('file', type=str, help='"date,value" sütunlarını içeren CSV dosyası')
+        
+        parser.add_argument(
+            '--name',
+            type=str,
+            help='Endeks yoksa oluşturulurken kullanılacak ad (varsayılan: endeks kodu)'
+        )
+    
+    def handle(self, *args, **options):
+        code = options['code'].upper()
+        index, created = BenchmarkIndex.objects.get_or_create(
+            code=code,
+            defaults={'name': options['name'] or code}
+        )
+        if created:
+            self.stdout.write(f"{code} endeksi oluşturuldu")
+        
+        rows = []
+        try:
+            with open(options['file'], newline='', encoding='utf-8-sig') as handle:
+                for line, record in enumerate(csv.DictReader(handle), start=2):
+                    try:
+                        # Türkçe ondalık ayırıcı (1.234,56) da kabul edilir
+                        raw = record['value'].strip()
+                        if ',' in raw:
+                            raw = raw.replace('.', '').replace(',', '.')
+                        rows.append(BenchmarkValue(
+                            index=index,
+                            date=date.fromisoformat(record['date'].strip()),
+                            value=Decimal(raw),
+                        ))
+                    except (KeyError, ValueError, InvalidOperation) as e:
+                        raise CommandError(f"{line}. satır okunamadı: {e}")
+        except OSError as e:
+            raise CommandError(f"Dosya açılamadı: {e}")
+        
+        saved = save_benchmark_values(rows)
+        self.stdout.write(self.style.SUCCESS(f"{code} için {saved} endeks değeri içe aktarıldı"))
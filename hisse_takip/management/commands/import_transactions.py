@@ -0,0 +1,94 @@
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ...importers import BATCH_SIZE, StatementError, import_transactions
+from ...models import Portfolio
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Aracı kurum ekstresindeki (CSV/XLSX) işlemleri portföye toplu olarak aktarır'
+    
+    def add_arguments(self, parser):
+        parser.add_argument('file', type=str, help='Ekstre dosyası (.csv veya .xlsx)')
+        
+        parser.add_argument(
+            '--portfolio',
+            type=int,
+            required=True,
+            help='İşlemlerin ekleneceği portföy ID'
+        )
+        
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help=f'Doğrulama ve kayıt grup boyutu (varsayılan: {BATCH_SIZE})'
+        )
+        
+        parser.add_argument(
+            '--encoding',
+            type=str,
+            default='utf-8-sig',
+            help='CSV karakter kodlaması (varsayılan: utf-8-sig, Windows ekstreleri için cp1254)'
+        )
+        
+        parser.add_argument(
+            '--create-stocks',
+            action='store_true',
+            help='Sistemde olmayan hisse kodlarını oluştur'
+        )
+        
+        parser.add_argument(
+            '--allow-duplicates',
+            action='store_true',
+            help='Aynı tarih, hisse, tip, miktar ve fiyattaki mevcut işlemleri atlama'
+        )
+        
+        parser.add_argument(
+            '--skip-invalid',
+            action='store_true',
+            help='Hatalı satırları atlayıp geçerli satırları kaydet'
+        )
+        
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Kaydetmeden sadece doğrula'
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            portfolio = Portfolio.objects.get(pk=options['portfolio'])
+        except Portfolio.DoesNotExist:
+            raise CommandError(f"Portföy bulunamadı: {options['portfolio']}")
+        
+        start_time = timezone.now()
+        self.stdout.write(f"{options['file']} dosyası {portfolio} portföyüne aktarılıyor...")
+        
+        try:
+            with open(options['file'], 'rb') as handle:
+                result = import_transactions(
+                    handle,
+                    options['file'],
+                    portfolio,
+                    batch_size=options['batch_size'],
+                    encoding=options['encoding'],
+                    create_stocks=options['create_stocks'],
+                    skip_duplicates=not options['allow_duplicates'],
+                    skip_invalid=options['skip_invalid'],
+                    dry_run=options['dry_run'],
+                )
+        except OSError as e:
+            raise CommandError(f"Dosya açılamadı: {e}")
+        except StatementError as e:
+            for line, message in e.errors:
+                self.stderr.write(f"  {line}. satır: {message}")
+            raise CommandError(str(e))
+        
+        for line, message in result.errors:
+            self.stderr.write(f"  {line}. satır: {message}")
+        
+        duration = (timezone.now() - start_time).total_seconds()
+        prefix = "Deneme: " if options['dry_run'] else ""
+        self.stdout.write(self.style.SUCCESS(f"{prefix}{result}. Süre: {duration:.2f} saniye"))
@@ -0,0 +1,59 @@
+import logging
+import time
+from django.core.management.base import BaseCommand, CommandError
+from ...exposure import compute_exposures, investor_exposures
+from ...models import Investor
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Yatırımcıların fon ve portföyler üzerinden hisse bazında etkin pozisyonlarını gösterir'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--investor',
+            type=int,
+            action='append',
+            help='Sadece bu yatırımcı(lar) (id, birden fazla verilebilir)'
+        )
+        
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Yatırımcı başına en büyük kaç hisse gösterilsin (varsayılan: 10)'
+        )
+        
+        parser.add_argument(
+            '--refresh',
+            action='store_true',
+            help='Önbelleği kullanmadan yeniden hesapla'
+        )
+    
+    def handle(self, *args, **options):
+        investor_ids = options['investor']
+        if investor_ids:
+            missing = set(investor_ids) - set(Investor.objects.filter(pk__in=investor_ids).values_list('id', flat=True))
+            if missing:
+                raise CommandError(f"Yatırımcı bulunamadı: {', '.join(map(str, sorted(missing)))}")
+        
+        start = time.perf_counter()
+        if options['refresh']:
+            exposures = compute_exposures(investor_ids)
+        else:
+            exposures = investor_exposures(investor_ids)
+        elapsed = time.perf_counter() - start
+        
+        investors = Investor.objects.in_bulk(exposures.keys())
+        for investor_id, rows in exposures.items():
+            if not rows:
+                continue
+            total = sum(value for _, _, value in rows)
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{investors.get(investor_id, investor_id)}: {total:,.2f} TL"))
+            for code, quantity, value in rows[:options['top']]:
+                share = value / total * 100 if total else 0
+                self.stdout.write(f"  {code}: {quantity:,.4f} adet, {value:,.2f} TL ({share:.2f}%)")
+        
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(exposures)} yatırımcının dağılımı {elapsed * 1000:.1f} ms'de hazırlandı")
+        )
@@ -0,0 +1,51 @@
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ...lots import COST_BASIS_METHODS, rebuild_lots, realized_gains
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Pozisyonların açık lotlarını ve satışların gerçekleşen kar/zararını işlem geçmişinden yeniden oluşturur'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--portfolio',
+            type=int,
+            action='append',
+            dest='portfolios',
+            help='Sadece belirtilen portföy(ler) için hesapla (birden fazla kez verilebilir)'
+        )
+        
+        parser.add_argument(
+            '--method',
+            type=str,
+            choices=COST_BASIS_METHODS,
+            help='Maliyet yöntemi (varsayılan: COST_BASIS_METHOD ayarı)'
+        )
+        
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Kaydetmeden sadece yıllık gerçekleşen kar/zararı göster'
+        )
+    
+    def handle(self, *args, **options):
+        start_time = timezone.now()
+        
+        if options['dry_run']:
+            gains = realized_gains(options['portfolios'], options['method'])
+        else:
+            if options['method']:
+                raise CommandError("--method sadece --dry-run ile kullanılabilir; kalıcı yöntem COST_BASIS_METHOD ayarıdır")
+            gains = rebuild_lots(options['portfolios'])
+        
+        for (portfolio_id, year), gain in sorted(gains.per_year.items()):
+            self.stdout.write(f"Portföy {portfolio_id} - {year}: {gain:,.2f} TL")
+        
+        duration = (timezone.now() - start_time).total_seconds()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(gains.books)} pozisyon, {len(gains.per_sell)} satış işlendi. Süre: {duration:.2f} saniye"
+            )
+        )
@@ -0,0 +1,63 @@
+import logging
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from ...models import Transaction, Position, Portfolio, Investor
+from ...recompute import deferred_recompute
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Pozisyonları, fon değerlerini ve yatırımcı toplamlarını işlem geçmişinden toplu olarak yeniden hesaplar'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--portfolio',
+            type=int,
+            action='append',
+            dest='portfolios',
+            help='Sadece belirtilen portföy(ler)i hesapla (birden fazla kez verilebilir)'
+        )
+
+        parser.add_argument(
+            '--investor-source',
+            choices=['transactions', 'investments'],
+            default='transactions',
+            help='Yatırımcı toplamlarının kaynağı (varsayılan: transactions)'
+        )
+
+    def handle(self, *args, **options):
+        start_time = timezone.now()
+        portfolio_ids = options['portfolios']
+        investor_source = options['investor_source']
+
+        portfolios = Portfolio.objects.all()
+        transactions = Transaction.objects.all()
+        positions = Position.objects.all()
+        if portfolio_ids:
+            portfolios = portfolios.filter(pk__in=portfolio_ids)
+            transactions = transactions.filter(portfolio_id__in=portfolio_ids)
+            positions = positions.filter(portfolio_id__in=portfolio_ids)
+
+        with deferred_recompute() as batch:
+            # İşlemi veya pozisyonu olan tüm (portföy, hisse) çiftleri
+            keys = set(transactions.values_list('portfolio_id', 'stock_id').distinct())
+            keys.update(positions.values_list('portfolio_id', 'stock_id'))
+            for portfolio_id, stock_id in keys:
+                batch.mark_position(portfolio_id, stock_id)
+
+            for fund_id in portfolios.exclude(fund__isnull=True).values_list('fund_id', flat=True).distinct():
+                batch.mark_fund(fund_id)
+
+            investor_ids = portfolios.exclude(investor__isnull=True).values_list('investor_id', flat=True).distinct()
+            if not portfolio_ids and investor_source == 'investments':
+                investor_ids = Investor.objects.values_list('id', flat=True)
+            for investor_id in investor_ids:
+                batch.mark_investor(investor_id, investor_source)
+
+        duration = (timezone.now() - start_time).total_seconds()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(batch.positions)} pozisyon, {len(batch.funds)} fon ve {len(batch.investors)} yatırımcı "
+                f"yeniden hesaplandı. Süre: {duration:.2f} saniye"
+            )
+        )
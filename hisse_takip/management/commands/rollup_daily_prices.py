@@ -0,0 +1,58 @@
+import logging
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ...models import PriceData
+from ...rollups import rebuild_daily_prices
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Hisselerin günlük fiyat özetlerini (DailyPrice) ham fiyat verilerinden yeniden oluşturur'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            type=str,
+            help='Başlangıç tarihi (YYYY-MM-DD, varsayılan: ilk fiyat verisinin tarihi)'
+        )
+        
+        parser.add_argument(
+            '--end',
+            type=str,
+            help='Bitiş tarihi (YYYY-MM-DD, varsayılan: bugün)'
+        )
+        
+        parser.add_argument(
+            '--stock',
+            type=str,
+            action='append',
+            dest='stocks',
+            help='Sadece belirtilen hisse(ler) için hesapla (birden fazla kez verilebilir)'
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            start = date.fromisoformat(options['start']) if options['start'] else None
+            end = date.fromisoformat(options['end']) if options['end'] else None
+        except ValueError as e:
+            raise CommandError(f"Geçersiz tarih: {e}")
+        
+        if start is None:
+            first = PriceData.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+            if first is None:
+                self.stdout.write("Fiyat verisi yok")
+                return
+            start = timezone.localtime(first).date()
+        
+        stocks = [code.upper() for code in options['stocks']] if options['stocks'] else None
+        
+        start_time = timezone.now()
+        self.stdout.write("Günlük fiyat özetleri hesaplanıyor...")
+        
+        saved = rebuild_daily_prices(start, end, stocks)
+        
+        duration = (timezone.now() - start_time).total_seconds()
+        self.stdout.write(
+            self.style.SUCCESS(f"{saved} günlük özet oluşturuldu/güncellendi. Süre: {duration:.2f} saniye")
+        )
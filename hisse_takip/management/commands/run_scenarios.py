@@ -0,0 +1,89 @@
+import logging
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from ...models import Fund, Investor, Portfolio
+from ...scenarios import evaluate, impact_percentage, load_book, parse_scenario, shock_matrix
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'Fiyat şoku senaryolarının tüm portföy, fon ve yatırımcılara etkisini hesaplar'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--scenario',
+            nargs=2,
+            action='append',
+            default=[],
+            metavar=('AD', 'TANIM'),
+            help='Senaryo adı ve şokları, örn. "Banka düşüşü" "sector=Bankacılık:-10, THYAO:-5" '
+                 '(hedefler: all, hisse kodu, sector=<ad>, index=<endeks kodu>; değerler yüzde)'
+        )
+        
+        parser.add_argument(
+            '--random',
+            type=int,
+            default=0,
+            help='Ek olarak bu sayıda rastgele senaryo üret (süre ölçümü için)'
+        )
+        
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Her senaryo için en çok etkilenen kaç kayıt gösterilsin (varsayılan: 10)'
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            scenarios = [parse_scenario(name, spec) for name, spec in options['scenario']]
+        except ValueError as e:
+            raise CommandError(str(e))
+        
+        if not scenarios and not options['random']:
+            raise CommandError("En az bir --scenario veya --random verilmelidir")
+        
+        start = time.perf_counter()
+        book = load_book()
+        loaded = time.perf_counter()
+        
+        shocks = shock_matrix(book.stocks, scenarios)
+        names = [scenario.name for scenario in scenarios]
+        if options['random']:
+            # Her senaryoda hisse başına bağımsız normal dağılımlı şoklar
+            rng = np.random.default_rng(42)
+            shocks = np.hstack([shocks, rng.normal(0, 0.05, size=(len(book.stocks), options['random']))])
+            names += [f"Rastgele {k + 1}" for k in range(options['random'])]
+        
+        result = evaluate(book, shocks, names)
+        evaluated = time.perf_counter()
+        
+        levels = [
+            ('Portföy', Portfolio, result.portfolio_ids, result.portfolio_values, result.portfolio_impact),
+            ('Fon', Fund, result.fund_ids, result.fund_values, result.fund_impact),
+            ('Yatırımcı', Investor, result.investor_ids, result.investor_values, result.investor_impact),
+        ]
+        
+        # Sadece adlandırılmış senaryoların ayrıntısını yazdır
+        for k, name in enumerate(result.names[:len(options['scenario'])]):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+            for label, model, ids, values, impact in levels:
+                if not ids:
+                    continue
+                percentage = impact_percentage(values, impact)[:, k]
+                worst = np.argsort(impact[:, k])[:options['top']]
+                objects = model.objects.in_bulk([ids[i] for i in worst])
+                self.stdout.write(f"  {label} toplam etki: {impact[:, k].sum():,.2f} TL")
+                for i in worst:
+                    self.stdout.write(
+                        f"    {objects.get(ids[i], ids[i])}: {impact[i, k]:,.2f} TL ({percentage[i]:.2f}%)"
+                    )
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{len(names)} senaryo x {len(result.portfolio_ids)} portföy, {len(result.fund_ids)} fon, "
+                f"{len(result.investor_ids)} yatırımcı. Yükleme: {(loaded - start) * 1000:.1f} ms, "
+                f"değerleme: {(evaluated - loaded) * 1000:.1f} ms"
+            )
+        )
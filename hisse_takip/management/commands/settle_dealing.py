@@ -0,0 +1,44 @@
+import logging
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from ...dealing import settle_dealing
+
+logger = logging.getLogger(__name__)
+
+class Command(BaseCommand):
+    help = 'İşlem günü gelmiş fon katılma/ayrılma emirlerini fon ve gün bazında toplu gerçekleştirir'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--date',
+            type=str,
+            help='Bu güne kadarki işlem günlerini gerçekleştir (YYYY-MM-DD, varsayılan: kapanıştan sonra bugün, önce dün)'
+        )
+        
+        parser.add_argument(
+            '--fund',
+            type=int,
+            action='append',
+            help='Sadece bu fon(lar) (id, birden fazla verilebilir)'
+        )
+    
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['date']) if options['date'] else None
+        except ValueError as e:
+            raise CommandError(f"Geçersiz tarih: {e}")
+        
+        start_time = timezone.now()
+        results = settle_dealing(day, options['fund'])
+        
+        for result in results:
+            self.stdout.write(
+                f"Fon {result.fund_id} - {result.dealing_date}: {result.settled} emir {result.price} fiyatından, "
+                f"{result.rejected} ret, net pay {result.net_shares}, net tutar {result.net_amount}"
+            )
+        
+        duration = (timezone.now() - start_time).total_seconds()
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(results)} işlem günü gerçekleştirildi. Süre: {duration:.2f} saniye")
+        )
@@ -1,34 +1,70 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.shortcuts import redirect
 from django.urls import reverse
 from django.conf import settings
 from django.contrib import messages
 
 class LoginRedirectMiddleware:
+    # ASGI altında async view'ların iş parçacığına geri itilmemesi için iki modda da çalışır
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
-    def __call__(self, request):
+    def _redirect(self, request, user):
         # Temel URL kontrolü
-        if request.path == '/' and request.user.is_authenticated:
+        if request.path == '/' and user.is_authenticated:
             # Kullanıcı giriş yapmışsa ana sayfada yönlendir
             return redirect('hisse_takip:investor_dashboard')
-        
+
         # Korumalı sayfalara erişim kontrolü
-        if request.path.startswith('/investor/') and not request.user.is_authenticated:
+        if request.path.startswith('/investor/') and not user.is_authenticated:
             # Login sayfasına yönlendir
             return redirect(f"{settings.LOGIN_URL}?next={request.path}")
-        
+        return None
+
+    def _needs_investor_check(self, request):
         # Investor kontrol - Eğer kullanıcı giriş yapmış ama yatırımcı değilse
-        if request.user.is_authenticated and request.path.startswith('/investor/'):
-            if not hasattr(request.user, 'investor') or not request.user.investor:
-                # Mesaj ekle
-                if not hasattr(request, '_messages'):
-                    messages.warning(
-                        request, 
-                        "Yatırımcı hesabınız bulunmamaktadır. Lütfen yönetici ile iletişime geçin."
-                    )
-                # Yönlendirme yapmayıp devam edelim (view'da zaten kontrol var)
-        
+        # (yol önce kontrol edilir; API isteklerinde kullanıcı gereksiz yere yüklenmesin;
+        # mesaj sadece mesaj altyapısı yokken eklendiğinden sorgu da o durumda yapılır)
+        return request.path.startswith('/investor/') and not hasattr(request, '_messages')
+
+    def _warn_no_investor(self, request):
+        messages.warning(
+            request,
+            "Yatırımcı hesabınız bulunmamaktadır. Lütfen yönetici ile iletişime geçin."
+        )
+        # Yönlendirme yapmayıp devam edelim (view'da zaten kontrol var)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        if request.path == '/' or request.path.startswith('/investor/'):
+            response = self._redirect(request, request.user)
+            if response is not None:
+                return response
+            if self._needs_investor_check(request) and request.user.is_authenticated:
+                if not hasattr(request.user, 'investor') or not request.user.investor:
+                    self._warn_no_investor(request)
+
         # Diğer middleware'lere geçiş
         response = self.get_response(request)
-        return response 
\ No newline at end of file
+        return response
+
+    async def __acall__(self, request):
+        if request.path == '/' or request.path.startswith('/investor/'):
+            user = await request.auser()
+            response = self._redirect(request, user)
+            if response is not None:
+                return response
+            if self._needs_investor_check(request) and user.is_authenticated:
+                from .models import Investor
+                if not await Investor.objects.filter(user=user).aexists():
+                    self._warn_no_investor(request)
+
+        return await self.get_response(request)
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0003_alter_investor_user_delete_userprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FundNav',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tarih')),
+                ('nav', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Net Varlık Değeri')),
+                ('share_value', models.DecimalField(decimal_places=6, max_digits=15, verbose_name='Birim Pay Değeri')),
+                ('total_shares', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Toplam Pay Adedi')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncelleme Zamanı')),
+                ('fund', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='nav_history', to='hisse_takip.fund', verbose_name='Fon')),
+            ],
+            options={
+                'verbose_name': 'Fon Değer Geçmişi',
+                'verbose_name_plural': 'Fon Değer Geçmişi',
+                'ordering': ['fund', '-date'],
+                'unique_together': {('fund', 'date')},
+            },
+        ),
+    ]
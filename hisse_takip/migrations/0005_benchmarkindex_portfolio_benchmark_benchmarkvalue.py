@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0004_fundnav'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BenchmarkIndex',
+            fields=[
+                ('code', models.CharField(max_length=20, primary_key=True, serialize=False, verbose_name='Endeks Kodu')),
+                ('name', models.CharField(max_length=100, verbose_name='Endeks Adı')),
+                ('description', models.TextField(blank=True, null=True, verbose_name='Açıklama')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Aktif')),
+                ('constituents', models.ManyToManyField(blank=True, help_text='Özel endeksler için; değer bileşenlerin eşit ağırlıklı günlük getirisinden hesaplanır', related_name='benchmarks', to='hisse_takip.stock', verbose_name='Bileşenler')),
+            ],
+            options={
+                'verbose_name': 'Kıyaslama Endeksi',
+                'verbose_name_plural': 'Kıyaslama Endeksleri',
+                'ordering': ['code'],
+            },
+        ),
+        migrations.AddField(
+            model_name='portfolio',
+            name='benchmark',
+            field=models.ForeignKey(blank=True, help_text='Boş bırakılırsa varsayılan endeks (BENCHMARK_DEFAULT_CODE) kullanılır', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='portfolios', to='hisse_takip.benchmarkindex', verbose_name='Kıyaslama Endeksi'),
+        ),
+        migrations.CreateModel(
+            name='BenchmarkValue',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tarih')),
+                ('value', models.DecimalField(decimal_places=4, max_digits=15, verbose_name='Değer')),
+                ('index', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='values', to='hisse_takip.benchmarkindex', verbose_name='Endeks')),
+            ],
+            options={
+                'verbose_name': 'Kıyaslama Endeksi Değeri',
+                'verbose_name_plural': 'Kıyaslama Endeksi Değerleri',
+                'ordering': ['index', '-date'],
+                'unique_together': {('index', 'date')},
+            },
+        ),
+    ]
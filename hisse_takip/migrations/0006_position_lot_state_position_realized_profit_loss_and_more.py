@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0005_benchmarkindex_portfolio_benchmark_benchmarkvalue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='position',
+            name='lot_state',
+            field=models.JSONField(blank=True, default=list, help_text='[adet, birim maliyet, alış tarihi] listesi (COST_BASIS_METHOD ile hesaplanır)', verbose_name='Açık Lotlar'),
+        ),
+        migrations.AddField(
+            model_name='position',
+            name='realized_profit_loss',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=15, verbose_name='Gerçekleşen Kar/Zarar'),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='realized_profit_loss',
+            field=models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=15, null=True, verbose_name='Gerçekleşen Kar/Zarar'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0006_position_lot_state_position_realized_profit_loss_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='sector',
+            field=models.CharField(blank=True, db_index=True, max_length=50, null=True, verbose_name='Sektör'),
+        ),
+    ]
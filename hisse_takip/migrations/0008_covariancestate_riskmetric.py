@@ -0,0 +1,56 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0007_stock_sector'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CovarianceState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('window', models.PositiveIntegerField(unique=True, verbose_name='Pencere (işlem günü)')),
+                ('date', models.DateField(verbose_name='Son Gün')),
+                ('stocks', models.JSONField(default=list, verbose_name='Hisseler')),
+                ('dates', models.JSONField(default=list, verbose_name='Penceredeki Günler')),
+                ('returns', models.BinaryField(verbose_name='Getiri Matrisi')),
+                ('last_closes', models.BinaryField(verbose_name='Son Kapanışlar')),
+                ('return_sums', models.BinaryField(verbose_name='Getiri Toplamları')),
+                ('product_sums', models.BinaryField(verbose_name='Çarpım Toplamları')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncelleme Zamanı')),
+            ],
+            options={
+                'verbose_name': 'Kovaryans Durumu',
+                'verbose_name_plural': 'Kovaryans Durumları',
+            },
+        ),
+        migrations.CreateModel(
+            name='RiskMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tarih')),
+                ('value', models.DecimalField(decimal_places=2, max_digits=15, verbose_name='Değer')),
+                ('confidence', models.DecimalField(decimal_places=3, max_digits=4, verbose_name='Güven Düzeyi')),
+                ('volatility', models.DecimalField(decimal_places=2, max_digits=8, null=True, verbose_name='Yıllık Oynaklık (%)')),
+                ('parametric_var', models.DecimalField(decimal_places=2, max_digits=15, null=True, verbose_name='Parametrik VaR (1 gün)')),
+                ('parametric_cvar', models.DecimalField(decimal_places=2, max_digits=15, null=True, verbose_name='Parametrik CVaR (1 gün)')),
+                ('historical_var', models.DecimalField(decimal_places=2, max_digits=15, null=True, verbose_name='Tarihsel VaR (1 gün)')),
+                ('historical_cvar', models.DecimalField(decimal_places=2, max_digits=15, null=True, verbose_name='Tarihsel CVaR (1 gün)')),
+                ('risk_level', models.CharField(blank=True, choices=[('low', 'Düşük Risk'), ('medium', 'Orta Risk'), ('high', 'Yüksek Risk')], max_length=10, null=True, verbose_name='Hesaplanan Risk Seviyesi')),
+                ('fund', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='risk_metrics', to='hisse_takip.fund', verbose_name='Fon')),
+                ('portfolio', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='risk_metrics', to='hisse_takip.portfolio', verbose_name='Portföy')),
+            ],
+            options={
+                'verbose_name': 'Risk Ölçütü',
+                'verbose_name_plural': 'Risk Ölçütleri',
+                'ordering': ['-date'],
+                'indexes': [models.Index(fields=['portfolio', 'date'], name='hisse_takip_portfol_51dcce_idx'), models.Index(fields=['fund', 'date'], name='hisse_takip_fund_id_b70918_idx')],
+            },
+        ),
+    ]
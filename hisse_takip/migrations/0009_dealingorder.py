@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:53
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0008_covariancestate_riskmetric'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DealingOrder',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_type', models.CharField(choices=[('subscription', 'Katılma (Alım)'), ('redemption', 'Ayrılma (Geri Satım)')], max_length=12, verbose_name='Emir Tipi')),
+                ('amount', models.DecimalField(blank=True, decimal_places=2, help_text='Katılmada zorunlu; ayrılmada pay adedi yerine verilebilir', max_digits=15, null=True, verbose_name='Tutar')),
+                ('shares', models.DecimalField(blank=True, decimal_places=2, help_text='Ayrılmada satılacak pay adedi', max_digits=15, null=True, verbose_name='Pay Adedi')),
+                ('status', models.CharField(choices=[('pending', 'Bekliyor'), ('settled', 'Gerçekleşti'), ('rejected', 'Reddedildi'), ('cancelled', 'İptal Edildi')], default='pending', max_length=10, verbose_name='Durum')),
+                ('placed_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Emir Zamanı')),
+                ('dealing_date', models.DateField(blank=True, help_text='Boş bırakılırsa emir zamanı ve kesim saatine göre belirlenir', verbose_name='İşlem Günü')),
+                ('price', models.DecimalField(blank=True, decimal_places=6, editable=False, max_digits=15, null=True, verbose_name='Birim Pay Fiyatı')),
+                ('settled_shares', models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=15, null=True, verbose_name='Gerçekleşen Pay')),
+                ('settled_amount', models.DecimalField(blank=True, decimal_places=2, editable=False, max_digits=15, null=True, verbose_name='Gerçekleşen Tutar')),
+                ('settled_at', models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Gerçekleşme Zamanı')),
+                ('note', models.CharField(blank=True, default='', max_length=200, verbose_name='Not')),
+                ('fund', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dealing_orders', to='hisse_takip.fund', verbose_name='Fon')),
+                ('investor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='dealing_orders', to='hisse_takip.investor', verbose_name='Yatırımcı')),
+            ],
+            options={
+                'verbose_name': 'Fon Emri',
+                'verbose_name_plural': 'Fon Emirleri',
+                'ordering': ['-placed_at'],
+                'indexes': [models.Index(fields=['fund', 'status', 'dealing_date'], name='hisse_takip_fund_id_d2863d_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-19 13:55
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0009_dealingorder'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Güncelleme Tarihi'),
+        ),
+        migrations.AddIndex(
+            model_name='alert',
+            index=models.Index(fields=['stock', 'is_active', 'triggered_at'], name='hisse_takip_stock_i_3d3b3b_idx'),
+        ),
+    ]
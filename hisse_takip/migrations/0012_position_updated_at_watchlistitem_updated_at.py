@@ -0,0 +1,23 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0011_notification'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='position',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Güncelleme Tarihi'),
+        ),
+        migrations.AddField(
+            model_name='watchlistitem',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Güncelleme Tarihi'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0012_position_updated_at_watchlistitem_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alert',
+            name='window_minutes',
+            field=models.PositiveIntegerField(blank=True, help_text='Süre içinde yüzde hareket alarmı için geriye bakılan süre', null=True, verbose_name='Süre (dakika)'),
+        ),
+        migrations.AlterField(
+            model_name='alert',
+            name='condition_type',
+            field=models.CharField(choices=[('above', 'Üzerinde'), ('below', 'Altında'), ('percent_change', 'Günlük Yüzde Değişim'), ('move_within', 'Süre İçinde Yüzde Hareket'), ('volume_spike', 'Hacim Artışı (Ortalamanın Katı)'), ('intraday_high', 'Yeni Gün İçi Zirve'), ('intraday_low', 'Yeni Gün İçi Dip')], max_length=15, verbose_name='Koşul Tipi'),
+        ),
+        migrations.AlterField(
+            model_name='alert',
+            name='threshold_value',
+            field=models.DecimalField(decimal_places=2, help_text='Fiyat (TL), yüzde veya hacim katı; gün içi zirve/dip alarmlarında kullanılmaz', max_digits=10, verbose_name='Eşik Değeri'),
+        ),
+    ]
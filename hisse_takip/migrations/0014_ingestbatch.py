@@ -0,0 +1,29 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0013_alert_window_minutes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngestBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Başlangıç')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Bitiş')),
+                ('saved_count', models.PositiveIntegerField(default=0, verbose_name='Kaydedilen Fiyat')),
+                ('total_count', models.PositiveIntegerField(default=0, verbose_name='Gelen Fiyat')),
+            ],
+            options={
+                'verbose_name': 'Fiyat Alım Grubu',
+                'verbose_name_plural': 'Fiyat Alım Grupları',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0014_ingestbatch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyPrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Tarih')),
+                ('open', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Açılış')),
+                ('high', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='En Yüksek')),
+                ('low', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='En Düşük')),
+                ('close', models.DecimalField(decimal_places=2, max_digits=10, verbose_name='Kapanış')),
+                ('volume', models.DecimalField(blank=True, decimal_places=2, max_digits=20, null=True, verbose_name='İşlem Hacmi')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncelleme Zamanı')),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_prices', to='hisse_takip.stock', verbose_name='Hisse')),
+            ],
+            options={
+                'verbose_name': 'Günlük Fiyat',
+                'verbose_name_plural': 'Günlük Fiyatlar',
+                'ordering': ['stock', '-date'],
+                'unique_together': {('stock', 'date')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0015_dailyprice'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='dailyprice',
+            index=models.Index(fields=['date'], name='hisse_takip_date_fc479a_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0016_dailyprice_date_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AdminJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, verbose_name='İş')),
+                ('description', models.CharField(max_length=200, verbose_name='Açıklama')),
+                ('object_ids', models.JSONField(default=list, verbose_name='Kayıtlar')),
+                ('chunk_size', models.PositiveIntegerField(default=200, verbose_name='Parça Boyutu')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Toplam')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='İşlenen')),
+                ('status', models.CharField(choices=[('pending', 'Bekliyor'), ('running', 'Çalışıyor'), ('done', 'Tamamlandı'), ('failed', 'Başarısız'), ('cancelled', 'İptal Edildi')], default='pending', max_length=10, verbose_name='Durum')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Hata')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Oluşturma Tarihi')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Başlangıç')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Bitiş')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Güncelleme Zamanı')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='admin_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Başlatan')),
+            ],
+            options={
+                'verbose_name': 'Arka Plan İşi',
+                'verbose_name_plural': 'Arka Plan İşleri',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    0006 öncesinde açılmış pozisyonların lotları artık migration içinde kurulmaz;
+    0022 bu pozisyonları lot durumu kurulmamış (null) olarak işaretler ve ilk
+    işlemlerinde geçmişten kurulur. Hepsini hemen kurmak için kurulumdan sonra
+    `manage.py rebuild_lots` çalıştırılır.
+    """
+
+    dependencies = [
+        ('hisse_takip', '0017_adminjob'),
+    ]
+
+    operations = []
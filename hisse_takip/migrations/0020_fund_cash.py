@@ -0,0 +1,18 @@
+# Generated by Django 5.1.7 on 2026-10-19 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0018_rebuild_position_lots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fund',
+            name='cash',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Katılma/ayrılma emirleriyle değişir; hisseye yatırılan tutar buradan düşülmelidir', max_digits=15, verbose_name='Nakit'),
+        ),
+    ]
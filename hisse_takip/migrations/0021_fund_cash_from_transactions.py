@@ -0,0 +1,53 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:07
+
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def debit_invested_cash(apps, schema_editor):
+    """
+    Katılmalardan sonra fon portföylerinde yapılan alım/satımların nakit etkisini
+    fon nakdine işler; ilk emir gerçekleşmeden önceki işlemler nakit dışı
+    paradan yapıldığından dokunulmaz.
+    """
+    DealingOrder = apps.get_model('hisse_takip', 'DealingOrder')
+    Fund = apps.get_model('hisse_takip', 'Fund')
+    Transaction = apps.get_model('hisse_takip', 'Transaction')
+
+    first_settled = DealingOrder.objects.filter(status='settled').values('fund_id').annotate(first=Min('settled_at'))
+    for row in first_settled:
+        trades = Transaction.objects.filter(
+            portfolio__fund_id=row['fund_id'],
+            date__gte=row['first']
+        ).values_list('transaction_type', 'quantity', 'price', 'commission', 'tax')
+
+        delta = Decimal('0')
+        for transaction_type, quantity, price, commission, tax in trades.iterator():
+            if transaction_type == 'buy':
+                delta -= quantity * price + commission + tax
+            elif transaction_type in ('sell', 'dividend'):
+                delta += quantity * price - commission - tax
+        if delta:
+            fund = Fund.objects.get(pk=row['fund_id'])
+            # Güncel değer pozisyonlar + nakit olduğundan aynı fark ondan da düşülür
+            fund.cash += delta
+            fund.current_value = max(Decimal('0'), fund.current_value + delta)
+            fund.save(update_fields=['cash', 'current_value'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0020_fund_cash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='fund',
+            name='cash',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Katılma/ayrılma emirleri ve fon portföylerindeki alım/satım işlemleriyle değişir', max_digits=15, verbose_name='Nakit'),
+        ),
+        migrations.RunPython(debit_invested_cash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-19 15:11
+
+from django.db import migrations, models
+from django.db.models import Exists, OuterRef
+
+
+def mark_unbuilt_lots(apps, schema_editor):
+    """
+    Lot durumu boş olup işlemi bulunan pozisyonlar kurulmamış (null) sayılır;
+    kapanmış olanlar da bir kez geçmişten kurulur, sonrasında boş liste kapalı demektir.
+    """
+    Position = apps.get_model('hisse_takip', 'Position')
+    Transaction = apps.get_model('hisse_takip', 'Transaction')
+
+    trades = Transaction.objects.filter(portfolio_id=OuterRef('portfolio_id'), stock_id=OuterRef('stock_id'))
+    Position.objects.filter(lot_state=[]).filter(Exists(trades)).update(lot_state=None)
+
+
+def unmark_unbuilt_lots(apps, schema_editor):
+    Position = apps.get_model('hisse_takip', 'Position')
+    Position.objects.filter(lot_state__isnull=True).update(lot_state=[])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hisse_takip', '0021_fund_cash_from_transactions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='position',
+            name='lot_state',
+            field=models.JSONField(blank=True, default=list, help_text='[adet, birim maliyet, alış tarihi] listesi (COST_BASIS_METHOD ile hesaplanır); null ise lotlar henüz işlem geçmişinden kurulmamıştır', null=True, verbose_name='Açık Lotlar'),
+        ),
+        migrations.RunPython(mark_unbuilt_lots, unmark_unbuilt_lots),
+    ]
@@ -1,15 +1,18 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.db import transaction
 from django.db.models import Sum
 from django.db import connection
 from decimal import Decimal
+from django.utils import timezone
 
 # Stock modeli - temel hisse senedi bilgileri
 class Stock(models.Model):
     code = models.CharField(max_length=10, primary_key=True, verbose_name="Hisse Kodu")
     name = models.CharField(max_length=100, verbose_name="Şirket Adı")
     icon = models.URLField(max_length=255, blank=True, null=True, verbose_name="Hisse İkonu URL")
+    sector = models.CharField(max_length=50, blank=True, null=True, db_index=True, verbose_name="Sektör")
     
     def __str__(self):
         return f"{self.code} - {self.name}"
@@ -47,6 +50,29 @@ class PriceData(models.Model):
         """Fiyat değişimi pozitif mi?"""
         return self.change_percentage >= 0
 
+# Günlük fiyat özeti - fiyat alımında güncellenir; grafikler ve uzun aralıklar ham veriye gitmez
+class DailyPrice(models.Model):
+    stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='daily_prices', verbose_name="Hisse")
+    date = models.DateField(verbose_name="Tarih")
+    open = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Açılış")
+    high = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="En Yüksek")
+    low = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="En Düşük")
+    close = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Kapanış")
+    volume = models.DecimalField(max_digits=20, decimal_places=2, blank=True, null=True, verbose_name="İşlem Hacmi")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Güncelleme Zamanı")
+
+    def __str__(self):
+        return f"{self.stock_id} - {self.date}: {self.close}"
+
+    class Meta:
+        verbose_name = "Günlük Fiyat"
+        verbose_name_plural = "Günlük Fiyatlar"
+        ordering = ['stock', '-date']
+        unique_together = ['stock', 'date']  # Her hisse için günde bir kayıt
+        indexes = [
+            models.Index(fields=['date']),  # Admin tarih drill-down'ı (ilk/son gün)
+        ]
+
 # Portföy modeli - kullanıcının oluşturduğu yatırım portföyü
 class Portfolio(models.Model):
     RISK_CHOICES = [
@@ -68,6 +94,9 @@ class Portfolio(models.Model):
     currency = models.CharField(max_length=3, default="TRY", verbose_name="Para Birimi")
     target_return = models.DecimalField(max_digits=6, decimal_places=2, blank=True, null=True, verbose_name="Hedef Getiri (%)")
     risk_level = models.CharField(max_length=10, choices=RISK_CHOICES, default='medium', verbose_name="Risk Seviyesi")
+    benchmark = models.ForeignKey('BenchmarkIndex', on_delete=models.SET_NULL, verbose_name="Kıyaslama Endeksi",
+                                  null=True, blank=True, related_name="portfolios",
+                                  help_text="Boş bırakılırsa varsayılan endeks (BENCHMARK_DEFAULT_CODE) kullanılır")
     
     def __str__(self):
         return f"{self.name} - {self.user.username}"
@@ -118,6 +147,11 @@ class Position(models.Model):
     is_open = models.BooleanField(default=True, verbose_name="Açık Pozisyon mu?")
     target_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Hedef Fiyat")
     stop_loss = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Zarar Kesme")
+    realized_profit_loss = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Gerçekleşen Kar/Zarar")
+    lot_state = models.JSONField(default=list, blank=True, null=True, verbose_name="Açık Lotlar",
+                                 help_text="[adet, birim maliyet, alış tarihi] listesi (COST_BASIS_METHOD ile hesaplanır); "
+                                           "null ise lotlar henüz işlem geçmişinden kurulmamıştır")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Güncelleme Tarihi")
     
     def __str__(self):
         return f"{self.stock.code} - {self.quantity} adet"
@@ -151,6 +185,18 @@ class Position(models.Model):
         """Pozisyonun kar/zararını hesaplar"""
         return self.current_value - self.total_cost
     
+    @property
+    def lot_cost(self):
+        """Açık lotların toplam maliyeti (lot durumu yoksa ortalama maliyetten)"""
+        if not self.lot_state:
+            return self.total_cost
+        return sum((Decimal(quantity) * Decimal(cost) for quantity, cost, _ in self.lot_state), Decimal('0'))
+    
+    @property
+    def unrealized_profit_loss(self):
+        """Açık lotların güncel fiyattan gerçekleşmemiş kar/zararı"""
+        return self.current_value - self.lot_cost
+    
     @property
     def profit_loss_percentage(self):
         """Pozisyonun kar/zarar yüzdesini hesaplar"""
@@ -181,6 +227,8 @@ class Transaction(models.Model):
     commission = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Komisyon")
     tax = models.DecimalField(max_digits=10, decimal_places=2, default=0, verbose_name="Vergi")
     notes = models.TextField(blank=True, null=True, verbose_name="Notlar")
+    realized_profit_loss = models.DecimalField(max_digits=15, decimal_places=2, blank=True, null=True,
+                                               editable=False, verbose_name="Gerçekleşen Kar/Zarar")
     
     def __str__(self):
         return f"{self.get_transaction_type_display()} - {self.stock.code} - {self.quantity} adet"
@@ -203,13 +251,26 @@ class Transaction(models.Model):
         # Eğer investor değeri belirtilmemişse, portföyün investor değerini al
         if not self.investor and self.portfolio and self.portfolio.investor:
             self.investor = self.portfolio.investor
+
+        # Düzenlenen işlemin eski nakit etkisi bağlı fonun nakdinden geri alınır (sinyallerde)
+        self._previous_cash = None
+        if not self._state.adding and self.pk:
+            self._previous_cash = Transaction.objects.filter(pk=self.pk).values_list(
+                'portfolio_id', 'transaction_type', 'quantity', 'price', 'commission', 'tax'
+            ).first()
             
         # İşlemi kaydet
         super().save(*args, **kwargs)
         
         # Yatırımcının toplam yatırım tutarını güncelle
         if self.investor:
-            self.investor.update_investment_total()
+            from .recompute import current_batch
+            batch = current_batch()
+            if batch is not None:
+                # Toplu işlem sırasında yatırımcı bir kez güncellenecek
+                batch.mark_investor(self.investor_id, 'transactions')
+            else:
+                self.investor.update_investment_total()
 
 # İzleme Listesi
 class WatchList(models.Model):
@@ -233,6 +294,7 @@ class WatchListItem(models.Model):
     target_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True, verbose_name="Hedef Fiyat")
     notes = models.TextField(blank=True, null=True, verbose_name="Notlar")
     added_at = models.DateTimeField(auto_now_add=True, verbose_name="Eklenme Tarihi")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Güncelleme Tarihi")
     
     def __str__(self):
         return f"{self.stock.code} - {self.watchlist.name}"
@@ -248,26 +310,42 @@ class Alert(models.Model):
     CONDITION_TYPES = [
         ('above', 'Üzerinde'),
         ('below', 'Altında'),
-        ('percent_change', 'Yüzde Değişim'),
+        ('percent_change', 'Günlük Yüzde Değişim'),
+        ('move_within', 'Süre İçinde Yüzde Hareket'),
+        ('volume_spike', 'Hacim Artışı (Ortalamanın Katı)'),
+        ('intraday_high', 'Yeni Gün İçi Zirve'),
+        ('intraday_low', 'Yeni Gün İçi Dip'),
     ]
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='alerts', verbose_name="Kullanıcı")
     stock = models.ForeignKey(Stock, on_delete=models.CASCADE, related_name='alerts', verbose_name="Hisse Senedi")
     condition_type = models.CharField(max_length=15, choices=CONDITION_TYPES, verbose_name="Koşul Tipi")
-    threshold_value = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Eşik Değeri")
+    threshold_value = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Eşik Değeri",
+                                          help_text="Fiyat (TL), yüzde veya hacim katı; gün içi zirve/dip alarmlarında kullanılmaz")
+    window_minutes = models.PositiveIntegerField(blank=True, null=True, verbose_name="Süre (dakika)",
+                                                 help_text="Süre içinde yüzde hareket alarmı için geriye bakılan süre")
     is_active = models.BooleanField(default=True, verbose_name="Aktif mi?")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Oluşturma Tarihi")
     triggered_at = models.DateTimeField(blank=True, null=True, verbose_name="Tetiklenme Tarihi")
     notification_sent = models.BooleanField(default=False, verbose_name="Bildirim Gönderildi mi?")
+    updated_at = models.DateTimeField(auto_now=True, db_index=True, verbose_name="Güncelleme Tarihi")
     
     def __str__(self):
         condition = self.get_condition_type_display()
         return f"{self.stock.code} {condition} {self.threshold_value}"
     
+    def clean(self):
+        """Süreli hareket alarmında süre zorunludur"""
+        if self.condition_type == 'move_within' and not self.window_minutes:
+            raise ValidationError({'window_minutes': "Süre içinde yüzde hareket alarmı için süre girilmelidir"})
+    
     class Meta:
         verbose_name = "Alarm"
         verbose_name_plural = "Alarmlar"
         ordering = ['user', 'stock__code', '-created_at']
+        indexes = [
+            models.Index(fields=['stock', 'is_active', 'triggered_at']),
+        ]
 
 # Portföy Anlık Görüntüsü - tarihe göre portföy değerini saklar
 class PortfolioSnapshot(models.Model):
@@ -347,6 +425,17 @@ class Investor(models.Model):
         """Yatırımcının tüm fon paylarının güncel toplam değeri"""
         return sum(share.current_value for share in self.fund_shares.all())
     
+    @property
+    def look_through_exposure(self):
+        """Fon ve portföyler üzerinden hisse bazında etkin pozisyonlar [(hisse, adet, değer)]"""
+        from .exposure import investor_exposures
+        return investor_exposures([self.pk])[self.pk]
+    
+    @property
+    def look_through_value(self):
+        """Hisse bazında dağılımdan hesaplanan güncel toplam değer"""
+        return sum(value for _, _, value in self.look_through_exposure)
+    
     @property
     def profit_loss(self):
         """Yatırımcının toplam kar/zarar miktarı"""
@@ -425,6 +514,13 @@ class Investment(models.Model):
         # Önce kaydı oluşturalım, sonra toplam yatırımı güncelleyelim
         super().save(*args, **kwargs)
         
+        from .recompute import current_batch
+        batch = current_batch()
+        if batch is not None:
+            # Toplu işlem sırasında yatırımcı bir kez güncellenecek
+            batch.mark_investor(self.investor_id, 'investments')
+            return
+        
         # Veritabanı işleminin tamamlanması için bir transaction kullanıyoruz
         transaction.on_commit(lambda: self.update_investor_total())
     
@@ -435,6 +531,13 @@ class Investment(models.Model):
         # Kaydı sil
         result = super().delete(*args, **kwargs)
         
+        from .recompute import current_batch
+        batch = current_batch()
+        if batch is not None:
+            # Toplu işlem sırasında yatırımcı bir kez güncellenecek
+            batch.mark_investor(investor_id, 'investments')
+            return result
+        
         # Silme işlemi tamamlandıktan sonra yatırımcıyı doğrudan güncelle
         try:
             from .models import Investor
@@ -494,6 +597,8 @@ class Fund(models.Model):
     # Fon değerleri
     initial_value = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Başlangıç Değeri")
     current_value = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Güncel Değer")
+    cash = models.DecimalField(max_digits=15, decimal_places=2, default=0, verbose_name="Nakit",
+                               help_text="Katılma/ayrılma emirleri ve fon portföylerindeki alım/satım işlemleriyle değişir")
     
     # Zaman damgaları
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Oluşturulma Zamanı")
@@ -538,8 +643,8 @@ class Fund(models.Model):
 
     def update_value_from_portfolios(self):
         """Fon değerini bağlı portföylerin değerlerini toplayarak günceller"""
-        # Bağlı tüm portföylerin değerlerini topla
-        total_portfolio_value = sum(portfolio.total_current_value for portfolio in self.portfolios.all())
+        # Bağlı tüm portföylerin değerlerini ve yatırılmamış nakdi topla
+        total_portfolio_value = sum(portfolio.total_current_value for portfolio in self.portfolios.all()) + self.cash
         
         # Güncel değeri güncelle (ama pay değerini korumak için bir hesaplama yap)
         if self.total_shares > 0:
@@ -646,4 +751,253 @@ class FundShare(models.Model):
         """Kar/zarar yüzdesi"""
         if self.initial_investment > 0:
             return (self.profit_loss / self.initial_investment) * 100
-        return 0 
\ No newline at end of file
+        return 0 
+
+# Fon Değer Geçmişi - fonun günlük net varlık değeri ve birim pay değeri
+class FundNav(models.Model):
+    fund = models.ForeignKey(Fund, on_delete=models.CASCADE, related_name='nav_history', verbose_name="Fon")
+    date = models.DateField(verbose_name="Tarih")
+    nav = models.DecimalField(max_digits=15, decimal_places=2, verbose_name="Net Varlık Değeri")
+    share_value = models.DecimalField(max_digits=15, decimal_places=6, verbose_name="Birim Pay Değeri")
+    total_shares = models.DecimalField(max_digits=15, decimal_places=2, verbose_name="Toplam Pay Adedi")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Güncelleme Zamanı")
+    
+    def __str__(self):
+        return f"{self.fund.name} - {self.date}: {self.share_value}"
+    
+    class Meta:
+        verbose_name = "Fon Değer Geçmişi"
+        verbose_name_plural = "Fon Değer Geçmişi"
+        ordering = ['fund', '-date']
+        unique_together = ['fund', 'date']  # Her fon için günde bir kayıt
+
+
+# Kıyaslama Endeksi - XU100, XU030 veya hisselerden oluşan özel endeks
+class BenchmarkIndex(models.Model):
+    code = models.CharField(max_length=20, primary_key=True, verbose_name="Endeks Kodu")
+    name = models.CharField(max_length=100, verbose_name="Endeks Adı")
+    description = models.TextField(blank=True, null=True, verbose_name="Açıklama")
+    constituents = models.ManyToManyField(Stock, blank=True, related_name='benchmarks', verbose_name="Bileşenler",
+                                          help_text="Özel endeksler için; değer bileşenlerin eşit ağırlıklı günlük getirisinden hesaplanır")
+    is_active = models.BooleanField(default=True, verbose_name="Aktif")
+    
+    def __str__(self):
+        return f"{self.code} - {self.name}"
+    
+    class Meta:
+        verbose_name = "Kıyaslama Endeksi"
+        verbose_name_plural = "Kıyaslama Endeksleri"
+        ordering = ['code']
+
+# Kıyaslama Endeksi Değeri - endeksin günlük kapanış değeri
+class BenchmarkValue(models.Model):
+    index = models.ForeignKey(BenchmarkIndex, on_delete=models.CASCADE, related_name='values', verbose_name="Endeks")
+    date = models.DateField(verbose_name="Tarih")
+    value = models.DecimalField(max_digits=15, decimal_places=4, verbose_name="Değer")
+    
+    def __str__(self):
+        return f"{self.index_id} - {self.date}: {self.value}"
+    
+    class Meta:
+        verbose_name = "Kıyaslama Endeksi Değeri"
+        verbose_name_plural = "Kıyaslama Endeksi Değerleri"
+        ordering = ['index', '-date']
+        unique_together = ['index', 'date']  # Her endeks için günde bir değer
+
+
+# Kovaryans Durumu - risk hesapları için kayan pencere getiri matrisi ve toplamları
+class CovarianceState(models.Model):
+    window = models.PositiveIntegerField(unique=True, verbose_name="Pencere (işlem günü)")
+    date = models.DateField(verbose_name="Son Gün")
+    stocks = models.JSONField(default=list, verbose_name="Hisseler")
+    dates = models.JSONField(default=list, verbose_name="Penceredeki Günler")
+    returns = models.BinaryField(verbose_name="Getiri Matrisi")
+    last_closes = models.BinaryField(verbose_name="Son Kapanışlar")
+    return_sums = models.BinaryField(verbose_name="Getiri Toplamları")
+    product_sums = models.BinaryField(verbose_name="Çarpım Toplamları")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Güncelleme Zamanı")
+    
+    def __str__(self):
+        return f"{self.window} gün - {self.date} ({len(self.stocks)} hisse)"
+    
+    class Meta:
+        verbose_name = "Kovaryans Durumu"
+        verbose_name_plural = "Kovaryans Durumları"
+
+# Risk Ölçütü - portföy veya fonun günlük risk hesaplaması
+class RiskMetric(models.Model):
+    portfolio = models.ForeignKey(Portfolio, on_delete=models.CASCADE, related_name='risk_metrics',
+                                  null=True, blank=True, verbose_name="Portföy")
+    fund = models.ForeignKey(Fund, on_delete=models.CASCADE, related_name='risk_metrics',
+                             null=True, blank=True, verbose_name="Fon")
+    date = models.DateField(verbose_name="Tarih")
+    value = models.DecimalField(max_digits=15, decimal_places=2, verbose_name="Değer")
+    confidence = models.DecimalField(max_digits=4, decimal_places=3, verbose_name="Güven Düzeyi")
+    volatility = models.DecimalField(max_digits=8, decimal_places=2, null=True, verbose_name="Yıllık Oynaklık (%)")
+    parametric_var = models.DecimalField(max_digits=15, decimal_places=2, null=True, verbose_name="Parametrik VaR (1 gün)")
+    parametric_cvar = models.DecimalField(max_digits=15, decimal_places=2, null=True, verbose_name="Parametrik CVaR (1 gün)")
+    historical_var = models.DecimalField(max_digits=15, decimal_places=2, null=True, verbose_name="Tarihsel VaR (1 gün)")
+    historical_cvar = models.DecimalField(max_digits=15, decimal_places=2, null=True, verbose_name="Tarihsel CVaR (1 gün)")
+    risk_level = models.CharField(max_length=10, choices=Portfolio.RISK_CHOICES, null=True, blank=True,
+                                  verbose_name="Hesaplanan Risk Seviyesi")
+    
+    def __str__(self):
+        return f"{self.portfolio or self.fund} - {self.date}"
+    
+    class Meta:
+        verbose_name = "Risk Ölçütü"
+        verbose_name_plural = "Risk Ölçütleri"
+        ordering = ['-date']
+        indexes = [
+            models.Index(fields=['portfolio', 'date']),
+            models.Index(fields=['fund', 'date']),
+        ]
+
+
+# Fon Alım/Satım Emri - katılma ve ayrılma talepleri kesim saatine göre işlem gününe
+# atanır ve o günün birim pay değerinden toplu olarak gerçekleştirilir
+class DealingOrder(models.Model):
+    ORDER_TYPES = [
+        ('subscription', 'Katılma (Alım)'),
+        ('redemption', 'Ayrılma (Geri Satım)'),
+    ]
+    
+    STATUS_CHOICES = [
+        ('pending', 'Bekliyor'),
+        ('settled', 'Gerçekleşti'),
+        ('rejected', 'Reddedildi'),
+        ('cancelled', 'İptal Edildi'),
+    ]
+    
+    fund = models.ForeignKey(Fund, on_delete=models.CASCADE, related_name='dealing_orders', verbose_name="Fon")
+    investor = models.ForeignKey(Investor, on_delete=models.CASCADE, related_name='dealing_orders', verbose_name="Yatırımcı")
+    order_type = models.CharField(max_length=12, choices=ORDER_TYPES, verbose_name="Emir Tipi")
+    amount = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True, verbose_name="Tutar",
+                                 help_text="Katılmada zorunlu; ayrılmada pay adedi yerine verilebilir")
+    shares = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True, verbose_name="Pay Adedi",
+                                 help_text="Ayrılmada satılacak pay adedi")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Durum")
+    placed_at = models.DateTimeField(default=timezone.now, verbose_name="Emir Zamanı")
+    dealing_date = models.DateField(blank=True, verbose_name="İşlem Günü",
+                                    help_text="Boş bırakılırsa emir zamanı ve kesim saatine göre belirlenir")
+    
+    # Gerçekleşme bilgileri
+    price = models.DecimalField(max_digits=15, decimal_places=6, null=True, blank=True, editable=False,
+                                verbose_name="Birim Pay Fiyatı")
+    settled_shares = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True, editable=False,
+                                         verbose_name="Gerçekleşen Pay")
+    settled_amount = models.DecimalField(max_digits=15, decimal_places=2, null=True, blank=True, editable=False,
+                                         verbose_name="Gerçekleşen Tutar")
+    settled_at = models.DateTimeField(null=True, blank=True, editable=False, verbose_name="Gerçekleşme Zamanı")
+    note = models.CharField(max_length=200, blank=True, default='', verbose_name="Not")
+    
+    def __str__(self):
+        return f"{self.investor.name} - {self.fund.name} {self.get_order_type_display()} ({self.dealing_date})"
+    
+    class Meta:
+        verbose_name = "Fon Emri"
+        verbose_name_plural = "Fon Emirleri"
+        ordering = ['-placed_at']
+        indexes = [
+            models.Index(fields=['fund', 'status', 'dealing_date']),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if not self.dealing_date:
+            from .dealing import dealing_date_for
+            self.dealing_date = dealing_date_for(self.placed_at)
+        super().save(*args, **kwargs)
+
+
+# Bildirim Kuyruğu - tetiklenen alarmların gönderilmeyi bekleyen bildirimleri;
+# Celery görevi kullanıcı bazında özet e-postalar halinde gönderir
+class Notification(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Bekliyor'),
+        ('sent', 'Gönderildi'),
+        ('failed', 'Başarısız'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications', verbose_name="Kullanıcı")
+    alert = models.ForeignKey(Alert, on_delete=models.SET_NULL, null=True, blank=True, related_name='notifications',
+                              verbose_name="Alarm")
+    subject = models.CharField(max_length=200, verbose_name="Konu")
+    message = models.TextField(verbose_name="Mesaj")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Durum")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Deneme Sayısı")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Sonraki Deneme")
+    last_error = models.TextField(blank=True, default='', verbose_name="Son Hata")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Oluşturma Tarihi")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Gönderilme Tarihi")
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.subject} ({self.get_status_display()})"
+    
+    class Meta:
+        verbose_name = "Bildirim"
+        verbose_name_plural = "Bildirimler"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+# Fiyat Alım Grubu - her veri çekme işleminin kaydı; son grubun id'si API yanıtlarının
+# ETag değeri olarak kullanılır
+class IngestBatch(models.Model):
+    started_at = models.DateTimeField(default=timezone.now, verbose_name="Başlangıç")
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name="Bitiş")
+    saved_count = models.PositiveIntegerField(default=0, verbose_name="Kaydedilen Fiyat")
+    total_count = models.PositiveIntegerField(default=0, verbose_name="Gelen Fiyat")
+    
+    def __str__(self):
+        return f"#{self.pk} {self.started_at.strftime('%Y-%m-%d %H:%M')} ({self.saved_count}/{self.total_count})"
+    
+    class Meta:
+        verbose_name = "Fiyat Alım Grubu"
+        verbose_name_plural = "Fiyat Alım Grupları"
+        ordering = ['-started_at']
+
+# Arka Plan Admin İşi - ağır admin eylemleri Celery'de parçalar halinde çalışır;
+# ilerleme ve iptal bu kayıt üzerinden izlenir
+class AdminJob(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Bekliyor'),
+        ('running', 'Çalışıyor'),
+        ('done', 'Tamamlandı'),
+        ('failed', 'Başarısız'),
+        ('cancelled', 'İptal Edildi'),
+    ]
+    
+    name = models.CharField(max_length=50, verbose_name="İş")
+    description = models.CharField(max_length=200, verbose_name="Açıklama")
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='admin_jobs',
+                             verbose_name="Başlatan")
+    object_ids = models.JSONField(default=list, verbose_name="Kayıtlar")
+    chunk_size = models.PositiveIntegerField(default=200, verbose_name="Parça Boyutu")
+    total = models.PositiveIntegerField(default=0, verbose_name="Toplam")
+    processed = models.PositiveIntegerField(default=0, verbose_name="İşlenen")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Durum")
+    error = models.TextField(blank=True, default='', verbose_name="Hata")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Oluşturma Tarihi")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Başlangıç")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Bitiş")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Güncelleme Zamanı")
+    
+    def __str__(self):
+        return f"#{self.pk} {self.description} ({self.get_status_display()})"
+    
+    @property
+    def progress(self):
+        """Tamamlanma yüzdesi"""
+        if not self.total:
+            return 100 if self.status == 'done' else 0
+        return round(self.processed / self.total * 100)
+    
+    @property
+    def is_active(self):
+        return self.status in ('pending', 'running')
+    
+    class Meta:
+        verbose_name = "Arka Plan İşi"
+        verbose_name_plural = "Arka Plan İşleri"
+        ordering = ['-created_at']
@@ -0,0 +1,187 @@
+import logging
+import threading
+from collections import defaultdict, namedtuple
+import numpy as np
+from django.utils import timezone
+from .alerts import _crossed_down, _crossed_up
+from .models import Position, WatchListItem
+from .pricing import latest_quotes
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+# Fiyatın geçtiği seviye: tür ('stop_loss', 'target_price', 'watch_target'),
+# pozisyon/izleme öğesi id, hisse, seviye ve geçen fiyat
+LevelEvent = namedtuple('LevelEvent', ['kind', 'object_id', 'stock_id', 'level', 'price'])
+
+# Tür -> (model, seviye alanı, geçiş yönleri)
+LEVELS = {
+    'stop_loss': (Position, 'stop_loss', (_crossed_down,)),
+    'target_price': (Position, 'target_price', (_crossed_up,)),
+    # İzleme hedefi alım veya satım hedefi olabilir; iki yönde de geçiş sayılır
+    'watch_target': (WatchListItem, 'target_price', (_crossed_up, _crossed_down)),
+}
+
+
+class LevelIndex:
+    """
+    Pozisyonların zarar kesme/hedef fiyatları ile izleme listesi hedeflerinin
+    hisse bazında sıralı seviye dizileri.
+
+    AlertIndex ile aynı yapıdadır: her hisse için tür başına (seviye, id) dizileri
+    tutulur, önceki ve yeni fiyat arasında geçilen seviyeler ikili aramayla bulunur.
+    Maliyet pozisyon sayısına değil değişen hisse ve geçilen seviye sayısına bağlıdır.
+
+    Kapanan pozisyonlar da indekste kalır (toplu yeniden hesaplama updated_at'i
+    değiştirmez); açıklık kontrolü olay üretilirken veritabanında yapılır.
+    """
+
+    def __init__(self):
+        self.books = {}            # stock_id -> {tür: (seviyeler, id'ler)}
+        self.synced_at = None
+        self.lock = threading.Lock()
+
+    def _rows(self, kind, stock_ids=None):
+        model, field, _ = LEVELS[kind]
+        rows = model.objects.filter(**{f'{field}__isnull': False})
+        if stock_ids is not None:
+            rows = rows.filter(stock_id__in=stock_ids)
+        return rows
+
+    def _load(self, stock_ids=None):
+        """Seviyeleri (verilen hisseler için) veritabanından yükleyip dizileri kurar"""
+        grouped = defaultdict(lambda: defaultdict(list))
+        for kind, (_, field, _) in LEVELS.items():
+            for pk, stock_id, level in self._rows(kind, stock_ids).values_list('id', 'stock_id', field).iterator():
+                grouped[stock_id][kind].append((float(level), pk))
+
+        for stock_id in (stock_ids if stock_ids is not None else list(self.books)):
+            self.books.pop(stock_id, None)
+        for stock_id, kinds in grouped.items():
+            book = {}
+            for kind, rows in kinds.items():
+                rows.sort()
+                book[kind] = (
+                    np.array([level for level, _ in rows]),
+                    np.array([pk for _, pk in rows], dtype=np.int64),
+                )
+            self.books[stock_id] = book
+
+    def sync(self):
+        """İlk çağrıda tüm seviyeleri, sonrasında son senkrondan beri değişen hisseleri yükler"""
+        started = timezone.now()
+        if self.synced_at is None:
+            self._load()
+            logger.debug(f"Seviye indeksi kuruldu: {len(self.books)} hisse")
+        else:
+            changed = set()
+            for model in (Position, WatchListItem):
+                changed.update(model.objects.filter(updated_at__gte=self.synced_at).values_list('stock_id', flat=True))
+            if changed:
+                self._load(changed)
+                logger.debug(f"Seviye indeksi {len(changed)} hisse için güncellendi")
+        self.synced_at = started
+
+    def crossed(self, stock_id, previous, current):
+        """
+        Önceki fiyattan yeni fiyata geçerken aşılan seviyeler.
+
+        Önceki fiyat bilinmiyorsa geçiş sayılmaz; sadece geçişler olay üretir,
+        fiyat seviyenin ötesinde kaldıkça aynı olay tekrarlanmaz.
+
+        Returns:
+            list: (tür, id, seviye) listesi
+        """
+        book = self.books.get(stock_id)
+        if not book or previous is None:
+            return []
+
+        hits = []
+        for kind, (levels, ids) in book.items():
+            for crossed in LEVELS[kind][2]:
+                start, end = crossed(levels, previous, current)
+                if end > start:
+                    hits.extend(zip([kind] * (end - start), ids[start:end].tolist(), levels[start:end].tolist()))
+        return hits
+
+
+_index = LevelIndex()
+
+
+def level_index():
+    """İşlem genelinde paylaşılan seviye indeksi"""
+    return _index
+
+
+def _current_levels(keys):
+    """
+    (tür, id) anahtarlarının veritabanındaki güncel seviyeleri. İndeks başka işlemde
+    değişmiş olabilir; kapanmış pozisyonlar ve silinmiş kayıtlar sonuçta yer almaz.
+    """
+    by_kind = defaultdict(set)
+    for kind, pk in keys:
+        by_kind[kind].add(pk)
+
+    current = {}
+    for kind, pks in by_kind.items():
+        model, field, _ = LEVELS[kind]
+        rows = model.objects.filter(pk__in=pks, **{f'{field}__isnull': False})
+        if model is Position:
+            rows = rows.filter(is_open=True, quantity__gt=0)
+        current.update(((kind, pk), float(level)) for pk, level in rows.values_list('id', field))
+    return current
+
+
+def check_prices(prices, previous=None, index=None):
+    """
+    Yeni kaydedilen fiyat grubunda zarar kesme, hedef fiyat ve izleme hedefi
+    geçişlerini bulur ve levels_crossed sinyali ile yayınlar.
+
+    Args:
+        prices: Yeni PriceData kayıtları (aynı hisse için birden fazla olabilir)
+        previous: {hisse: (fiyat, değişim)} grup öncesi son değerler; verilmezse
+            grubun ilk kaydından önceki son fiyatlar tek sorguda alınır
+
+    Returns:
+        list: LevelEvent listesi
+    """
+    if not prices:
+        return []
+    index = index or _index
+
+    by_stock = defaultdict(list)
+    for price in prices:
+        by_stock[price.stock_id].append(price)
+
+    with index.lock:
+        index.sync()
+        by_stock = {stock_id: rows for stock_id, rows in by_stock.items() if stock_id in index.books}
+        if not by_stock:
+            return []
+        if previous is None:
+            first = min(price.timestamp for rows in by_stock.values() for price in rows)
+            previous = latest_quotes(by_stock.keys(), before=first)
+
+        candidates = {}
+        for stock_id, rows in by_stock.items():
+            last = previous.get(stock_id)
+            last = float(last[0]) if last is not None else None
+            for row in sorted(rows, key=lambda row: row.timestamp):
+                current = float(row.price)
+                for kind, pk, level in index.crossed(stock_id, last, current):
+                    candidates.setdefault((kind, pk), LevelEvent(kind, pk, stock_id, level, row.price))
+                last = current
+
+    if not candidates:
+        return []
+
+    levels = _current_levels(candidates.keys())
+    events = [event for key, event in candidates.items() if levels.get(key) == event.level]
+    if events:
+        from .signals import levels_crossed
+        for receiver, response in levels_crossed.send_robust(sender=LevelEvent, events=events):
+            if isinstance(response, Exception):
+                logger.error(f"Seviye geçişi işlenirken hata ({receiver.__name__}): {response}")
+
+    logger.info(f"{len(prices)} fiyat için {len(events)} seviye geçişi bulundu")
+    return events
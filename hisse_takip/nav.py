@@ -0,0 +1,222 @@
+import logging
+from decimal import Decimal
+import numpy as np
+from django.utils import timezone
+from .charts import invalidate_series
+from .models import Fund, FundNav, Portfolio, Position, PriceData, Transaction
+from .pricing import latest_prices
+from .recompute import transaction_cash
+from .snapshots import daily_holdings, holding_history
+from .timeseries import daily_closes, day_bounds, to_local_days
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+NAV_UPDATE_FIELDS = ['nav', 'share_value', 'total_shares', 'updated_at']
+
+
+def fund_holdings(fund_ids=None):
+    """
+    Aktif fonların güncel pozisyonlarından hisse bazında toplam adetlerini matris olarak döndürür.
+
+    Pozisyonu olmayan (sadece nakit tutan) fonlar da sıfır satırla listelenir.
+
+    Returns:
+        tuple: (fon id listesi, hisse kodu listesi, (fon x hisse) adet matrisi)
+    """
+    funds = Fund.objects.filter(is_active=True)
+    if fund_ids is not None:
+        funds = funds.filter(pk__in=fund_ids)
+    funds = sorted(funds.values_list('id', flat=True))
+    rows = list(Position.objects.filter(portfolio__fund_id__in=funds).values_list(
+        'portfolio__fund_id', 'stock_id', 'quantity'
+    ))
+
+    stocks = sorted({stock_id for _, stock_id, _ in rows})
+    fund_index = {fund_id: i for i, fund_id in enumerate(funds)}
+    stock_index = {code: i for i, code in enumerate(stocks)}
+
+    holdings = np.zeros((len(funds), len(stocks)))
+    if rows:
+        np.add.at(
+            holdings,
+            ([fund_index[f] for f, _, _ in rows], [stock_index[s] for _, s, _ in rows]),
+            np.array([q for _, _, q in rows], dtype=np.float64)
+        )
+    return funds, stocks, holdings
+
+
+def dealing_history(fund_ids, dates):
+    """
+    Fonların her gün geçerli pay adedi ve nakdini (fon x gün) matrisler olarak döndürür.
+
+    Güncel pay adedi ve nakitten o gün ve sonrasında gerçekleşen emirlerin net
+    payı ve tutarı geri alınır; böylece her gün, o günün emirleri gerçekleşmeden
+    önceki durumla fiyatlanır (cutoff_price ile aynı kural). Fon portföylerinde
+    günden sonra yapılan alım/satımların nakit etkisi de geri alınır (o günün
+    işlemleri, adetler gibi, gün sonuna dahildir). Emir dışında doğrudan yapılan
+    FundShare değişikliklerinin tarihi tutulmadığından güncel değerlere dahil kalır.
+
+    Returns:
+        tuple: (pay adedi matrisi, nakit matrisi)
+    """
+    from .models import DealingOrder
+
+    fund_index = {fund_id: i for i, fund_id in enumerate(fund_ids)}
+    current = {
+        fund_id: (total_shares, cash)
+        for fund_id, total_shares, cash in Fund.objects.filter(pk__in=fund_ids).values_list('id', 'total_shares', 'cash')
+    }
+    base = np.array([[float(value) for value in current.get(fund_id, (0, 0))] for fund_id in fund_ids]).reshape(-1, 2)
+    shares = np.repeat(base[:, :1], len(dates), axis=1)
+    cash = np.repeat(base[:, 1:], len(dates), axis=1)
+    if not len(dates):
+        return shares, cash
+
+    orders = DealingOrder.objects.filter(
+        fund_id__in=fund_ids,
+        status='settled',
+        dealing_date__gte=dates[0].astype(object)
+    ).values_list('fund_id', 'dealing_date', 'order_type', 'settled_shares', 'settled_amount')
+    for fund_id, dealing_date, order_type, units, amount in orders:
+        sign = 1.0 if order_type == 'subscription' else -1.0
+        # Emir gününe kadar (o gün dahil) olan günlerde bu pay ve nakit henüz yoktu
+        upto = np.searchsorted(dates, np.datetime64(dealing_date, 'D'), side='right')
+        shares[fund_index[fund_id], :upto] -= sign * float(units or 0)
+        cash[fund_index[fund_id], :upto] -= sign * float(amount or 0)
+
+    # İlk gün ve öncesindeki işlemler tüm seriye dahildir
+    _, first_day_end = day_bounds(dates[0].astype(object), dates[0].astype(object))
+    rows = list(Transaction.objects.filter(
+        portfolio__fund_id__in=fund_ids,
+        date__gte=first_day_end
+    ).values_list('portfolio__fund_id', 'transaction_type', 'quantity', 'price', 'commission', 'tax', 'date'))
+    if rows:
+        trade_days = to_local_days([row[-1].replace(tzinfo=None) for row in rows])
+        upto = np.searchsorted(dates, trade_days, side='left')
+        for (fund_id, *values, _), end in zip(rows, upto):
+            # İşlem gününden önceki günlerde bu nakit hareketi henüz olmamıştı
+            cash[fund_index[fund_id], :end] -= float(transaction_cash(*values))
+    return np.maximum(shares, 0.0), cash
+
+
+def _nav_rows(fund_ids, dates, navs, shares):
+    """(fon x gün) NAV ve pay adedi matrislerinden FundNav nesneleri üretir"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        unit = np.where(shares > 0, navs / shares, 0.0)
+
+    rows = []
+    for i, fund_id in enumerate(fund_ids):
+        for j, day in enumerate(dates):
+            if np.isnan(navs[i, j]):
+                continue
+            rows.append(FundNav(
+                fund_id=fund_id,
+                date=day,
+                nav=Decimal(f"{navs[i, j]:.2f}"),
+                share_value=Decimal(f"{unit[i, j]:.6f}"),
+                total_shares=Decimal(f"{shares[i, j]:.2f}"),
+            ))
+    return rows
+
+
+def save_fund_navs(rows, batch_size=1000):
+    """NAV kayıtlarını (fon, tarih) çiftine göre toplu olarak ekler veya günceller"""
+    FundNav.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['fund', 'date'],
+        update_fields=NAV_UPDATE_FIELDS,
+    )
+    # bulk_create sinyal göndermez
+    invalidate_series()
+    return len(rows)
+
+
+def compute_fund_navs(start, end, fund_ids=None):
+    """
+    Fonların günlük NAV ve birim pay değeri serisini hesaplar.
+
+    Fona bağlı portföylerin her gün elde tuttuğu adetler işlem geçmişinden
+    (snapshots.holding_history ile aynı şekilde) kurulur, günlük kapanışlarla
+    çarpılıp fon bazında toplanır ve o günkü nakit eklenir. Birim pay değeri o
+    gün geçerli pay adedine (dealing_history) bölünerek bulunur; ilk işlemden ve
+    ilk katılmadan önceki günler için kayıt üretilmez.
+
+    Returns:
+        list: Kaydedilmemiş FundNav nesneleri
+    """
+    portfolios = Portfolio.objects.filter(fund__isnull=False)
+    if fund_ids is not None:
+        portfolios = portfolios.filter(fund_id__in=fund_ids)
+    portfolio_fund = dict(portfolios.values_list('id', 'fund_id'))
+
+    pairs, (pair_idx, event_days, quantities, _) = holding_history(list(portfolio_fund), end)
+    if not pairs:
+        return []
+
+    stocks = sorted({stock_id for _, stock_id in pairs})
+    stock_index = {code: i for i, code in enumerate(stocks)}
+    series = daily_closes(stocks, start, end)
+    dates = series.dates
+    if not len(dates):
+        return []
+
+    held, = daily_holdings(len(pairs), dates, pair_idx, event_days, quantities)
+    active = ~np.isnan(held)
+    pair_stock = np.array([stock_index[stock_id] for _, stock_id in pairs])
+    # Fiyatı henüz olmayan hisseler değersiz kabul edilir
+    values = np.nan_to_num(held) * np.nan_to_num(series.closes[pair_stock], nan=0.0)
+
+    # Çiftleri fon bazında topla
+    funds = sorted({portfolio_fund[portfolio_id] for portfolio_id, _ in pairs})
+    fund_index = {fund_id: i for i, fund_id in enumerate(funds)}
+    pair_fund = np.array([fund_index[portfolio_fund[portfolio_id]] for portfolio_id, _ in pairs])
+    navs = np.zeros((len(funds), len(dates)))
+    np.add.at(navs, pair_fund, values)
+    fund_active = np.zeros((len(funds), len(dates)), dtype=bool)
+    np.logical_or.at(fund_active, pair_fund, active)
+
+    # Katılmalardan gelen ve henüz yatırılmamış nakit de fonun varlığıdır
+    shares, cash = dealing_history(funds, dates)
+    navs += cash
+    navs[~(fund_active | (cash != 0))] = np.nan
+
+    day_objects = [day.astype(object) for day in dates]
+    return _nav_rows(funds, day_objects, navs, shares)
+
+
+def backfill_fund_navs(start=None, end=None, fund_ids=None):
+    """Verilen aralık için NAV geçmişini tek geçişte yeniden oluşturur"""
+    if start is None:
+        first = PriceData.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+        if first is None:
+            return 0
+        start = timezone.localtime(first).date()
+    if end is None:
+        end = timezone.localdate()
+
+    rows = compute_fund_navs(start, end, fund_ids)
+    saved = save_fund_navs(rows)
+    logger.info(f"{start} - {end} aralığı için {saved} fon NAV kaydı oluşturuldu")
+    return saved
+
+
+def update_latest_fund_navs(fund_ids=None):
+    """Son fiyatlar ve fon nakdiyle bugünün NAV kaydını tüm aktif fonlar için günceller"""
+    funds, stocks, holdings = fund_holdings(fund_ids)
+    if not funds:
+        return 0
+
+    prices = latest_prices(stocks)
+    price_vector = np.array([float(prices.get(code, 0)) for code in stocks])
+    current = {
+        fund_id: (total_shares, cash)
+        for fund_id, total_shares, cash in Fund.objects.filter(pk__in=funds).values_list('id', 'total_shares', 'cash')
+    }
+    shares = np.array([[float(current[fund_id][0])] for fund_id in funds])
+    cash = np.array([float(current[fund_id][1]) for fund_id in funds])
+    navs = (holdings @ price_vector + cash)[:, None]
+    rows = _nav_rows(funds, [timezone.localdate()], navs, shares)
+    return save_fund_navs(rows)
@@ -0,0 +1,283 @@
+import logging
+from collections import defaultdict, namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from .models import Alert, Notification, Position, WatchListItem
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+DIGEST_SIZE = getattr(settings, 'NOTIFICATION_DIGEST_SIZE', 50)
+# (e-posta sayısı, saniye): kullanıcı başına ve toplam gönderim sınırları
+USER_RATE = getattr(settings, 'NOTIFICATION_USER_RATE', (5, 60 * 60))
+GLOBAL_RATE = getattr(settings, 'NOTIFICATION_GLOBAL_RATE', (100, 60))
+MAX_ATTEMPTS = getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+# İlk yeniden deneme gecikmesi (saniye), her denemede iki katına çıkar
+RETRY_BACKOFF = getattr(settings, 'NOTIFICATION_RETRY_BACKOFF', 60)
+RETRY_BACKOFF_MAX = 6 * 60 * 60
+# Dağıtıcının aldığı kayıtları diğer çalışanlardan sakladığı süre (saniye)
+CLAIM_SECONDS = 5 * 60
+BATCH_SIZE = 1000
+
+# Bir dağıtım turunun sonucu
+DispatchResult = namedtuple('DispatchResult', ['emails', 'sent', 'failed', 'deferred'])
+
+
+def enqueue_alert_notifications(triggered):
+    """
+    Tetiklenen alarmlar için bildirim kuyruğuna toplu kayıt ekler.
+
+    Args:
+        triggered: alerts.TriggeredAlert listesi
+
+    Returns:
+        int: Eklenen bildirim sayısı
+    """
+    if not triggered:
+        return 0
+
+    by_alert = {alert.alert_id: alert for alert in triggered}
+    labels = dict(Alert.CONDITION_TYPES)
+    rows = Alert.objects.filter(pk__in=by_alert.keys()).values_list(
+        'id', 'user_id', 'stock_id', 'condition_type', 'threshold_value', 'window_minutes'
+    )
+
+    notifications = []
+    for pk, user_id, stock_id, condition_type, threshold, window_minutes in rows:
+        fired = by_alert[pk]
+        condition = labels.get(condition_type, condition_type)
+        if condition_type == 'move_within':
+            condition = f"{window_minutes} dakikada %{threshold} hareket"
+        elif condition_type not in ('intraday_high', 'intraday_low'):
+            condition = f"{condition} {threshold}"
+        notifications.append(Notification(
+            user_id=user_id,
+            alert_id=pk,
+            subject=f"{stock_id} alarmı tetiklendi",
+            message=f"{stock_id} {condition}: fiyat {fired.price} TL (günlük %{fired.change_percentage})",
+        ))
+    Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+    return len(notifications)
+
+
+def enqueue_level_notifications(events):
+    """
+    Zarar kesme, hedef fiyat ve izleme hedefi geçişleri için pozisyonun/izleme
+    listesinin sahibine bildirim ekler.
+
+    Args:
+        events: monitors.LevelEvent listesi
+
+    Returns:
+        int: Eklenen bildirim sayısı
+    """
+    if not events:
+        return 0
+
+    position_ids = [event.object_id for event in events if event.kind != 'watch_target']
+    item_ids = [event.object_id for event in events if event.kind == 'watch_target']
+    positions = {
+        pk: (user_id, name)
+        for pk, user_id, name in Position.objects.filter(pk__in=position_ids).values_list(
+            'id', 'portfolio__user_id', 'portfolio__name'
+        )
+    }
+    items = {
+        pk: (user_id, name)
+        for pk, user_id, name in WatchListItem.objects.filter(pk__in=item_ids).values_list(
+            'id', 'watchlist__user_id', 'watchlist__name'
+        )
+    }
+    labels = {
+        'stop_loss': "zarar kesme seviyesinin altına indi",
+        'target_price': "hedef fiyata ulaştı",
+        'watch_target': "izleme hedefine ulaştı",
+    }
+
+    notifications = []
+    for event in events:
+        owner = (items if event.kind == 'watch_target' else positions).get(event.object_id)
+        if owner is None:
+            continue
+        user_id, name = owner
+        notifications.append(Notification(
+            user_id=user_id,
+            subject=f"{event.stock_id} {labels[event.kind]}",
+            message=f"{event.stock_id} ({name}) {labels[event.kind]}: seviye {event.level:.2f}, fiyat {event.price} TL",
+        ))
+    Notification.objects.bulk_create(notifications, batch_size=BATCH_SIZE)
+    return len(notifications)
+
+
+def _window(name, period, now):
+    """Sabit pencere sayacının önbellek anahtarı ve pencerenin bitiş zamanı"""
+    window = int(now.timestamp()) // period
+    reset_at = datetime.fromtimestamp((window + 1) * period, tz=dt_timezone.utc)
+    return f"notifications:rate:{name}:{window}", reset_at
+
+
+def _consume(key, period):
+    cache.add(key, 0, period)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, period)
+
+
+def _backoff(attempts):
+    return timedelta(seconds=min(RETRY_BACKOFF * 2 ** attempts, RETRY_BACKOFF_MAX))
+
+
+def _claim(now, batch_size):
+    """
+    Gönderim zamanı gelmiş bildirimleri kısa bir transaction içinde sahiplenir.
+
+    Kilitli satırlar atlanır ve sahiplenilenlerin sonraki denemesi ileri alınır;
+    böylece birden fazla çalışan aynı bildirimi göndermez, çöken çalışanın
+    kayıtları süre dolunca tekrar alınır.
+    """
+    with transaction.atomic():
+        claimed = list(Notification.objects.select_for_update(skip_locked=True).filter(
+            status='pending',
+            next_attempt_at__lte=now
+        ).order_by('next_attempt_at', 'id').only('id', 'user_id', 'alert_id', 'subject', 'message', 'attempts')[:batch_size])
+        Notification.objects.filter(pk__in=[n.pk for n in claimed]).update(
+            next_attempt_at=now + timedelta(seconds=CLAIM_SECONDS)
+        )
+    return claimed
+
+
+def _digest(user, notifications):
+    """Kullanıcının bildirimlerinden tek özet e-posta oluşturur"""
+    if len(notifications) == 1:
+        subject = notifications[0].subject
+    else:
+        subject = f"{len(notifications)} alarm bildirimi"
+    body = "\n".join(notification.message for notification in notifications)
+    return EmailMessage(f"BIST Takip: {subject}", body, to=[user.email])
+
+
+def dispatch_notifications(now=None, batch_size=BATCH_SIZE):
+    """
+    Bekleyen bildirimleri kullanıcı bazında özet e-postalar halinde gönderir.
+
+    Kullanıcı başına ve toplam gönderim sınırları önbellekteki pencere
+    sayaçlarıyla uygulanır; sınıra takılan bildirimler pencere bitimine ertelenir.
+    Gönderilemeyen özetlerin bildirimleri üstel artan gecikmeyle yeniden denenir,
+    MAX_ATTEMPTS denemeden sonra başarısız sayılır; e-posta adresi olmayan
+    kullanıcıların bildirimleri hemen başarısız sayılır.
+
+    Returns:
+        DispatchResult
+    """
+    now = now or timezone.now()
+    global_limit, global_period = GLOBAL_RATE
+    user_limit, user_period = USER_RATE
+    global_key, global_reset = _window('global', global_period, now)
+    budget = global_limit - cache.get(global_key, 0)
+    if budget <= 0:
+        return DispatchResult(0, 0, 0, 0)
+
+    claimed = _claim(now, batch_size)
+    if not claimed:
+        return DispatchResult(0, 0, 0, 0)
+
+    by_user = defaultdict(list)
+    for notification in claimed:
+        by_user[notification.user_id].append(notification)
+    users = User.objects.in_bulk(by_user.keys())
+
+    digests = []                     # (e-posta, bildirimler, kullanıcı sayaç anahtarı)
+    deferred = defaultdict(list)     # yeni deneme zamanı -> bildirim id'leri
+    failed = defaultdict(list)       # hata -> bildirimler
+    undeliverable = []               # yeniden denemenin anlamı olmayan (e-postasız kullanıcı) bildirimler
+    for user_id, notifications in by_user.items():
+        user = users.get(user_id)
+        if user is None or not user.email:
+            undeliverable.extend(notifications)
+            continue
+
+        user_key, user_reset = _window(f"user:{user_id}", user_period, now)
+        allowed = user_limit - cache.get(user_key, 0)
+        chunks = [notifications[i:i + DIGEST_SIZE] for i in range(0, len(notifications), DIGEST_SIZE)]
+        for k, chunk in enumerate(chunks):
+            if budget <= 0:
+                deferred[global_reset].extend(n.pk for n in chunk)
+            elif k >= allowed:
+                deferred[user_reset].extend(n.pk for n in chunk)
+            else:
+                digests.append((_digest(user, chunk), chunk, user_key))
+                budget -= 1
+
+    sent = []
+    emails = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # Sunucuya bağlanılamazsa tüm özetler yeniden denenmek üzere başarısız sayılır
+        logger.warning(f"E-posta sunucusuna bağlanılamadı: {e}")
+        for _, chunk, _ in digests:
+            failed[str(e)[:500] or e.__class__.__name__].extend(chunk)
+        digests = []
+    try:
+        for email, chunk, user_key in digests:
+            try:
+                connection.send_messages([email])
+            except Exception as e:
+                logger.warning(f"Bildirim e-postası gönderilemedi ({email.to[0]}): {e}")
+                failed[str(e)[:500] or e.__class__.__name__].extend(chunk)
+                continue
+            sent.extend(chunk)
+            emails += 1
+            _consume(user_key, user_period)
+            _consume(global_key, global_period)
+    finally:
+        connection.close()
+
+    with transaction.atomic():
+        if sent:
+            Notification.objects.filter(pk__in=[n.pk for n in sent]).update(
+                status='sent', sent_at=now, last_error=''
+            )
+            Alert.objects.filter(pk__in={n.alert_id for n in sent if n.alert_id}).update(notification_sent=True)
+
+        for retry_at, ids in deferred.items():
+            Notification.objects.filter(pk__in=ids).update(next_attempt_at=retry_at)
+
+        # E-posta adresi olmayan kullanıcının bildirimleri yeniden denenmeden bırakılır
+        if undeliverable:
+            Notification.objects.filter(pk__in=[n.pk for n in undeliverable]).update(
+                attempts=F('attempts') + 1,
+                status='failed',
+                last_error="Kullanıcının e-posta adresi yok",
+            )
+
+        # Başarısızlar deneme sayısına göre gruplanıp tek güncellemeyle ertelenir
+        failures = len(undeliverable)
+        for error, notifications in failed.items():
+            by_attempts = defaultdict(list)
+            for notification in notifications:
+                by_attempts[notification.attempts + 1].append(notification.pk)
+            for attempts, ids in by_attempts.items():
+                final = attempts >= MAX_ATTEMPTS
+                Notification.objects.filter(pk__in=ids).update(
+                    attempts=attempts,
+                    status='failed' if final else 'pending',
+                    next_attempt_at=now + _backoff(attempts),
+                    last_error=error,
+                )
+                failures += len(ids)
+
+    result = DispatchResult(emails, len(sent), failures, sum(len(ids) for ids in deferred.values()))
+    logger.info(
+        f"Bildirim dağıtımı: {result.emails} e-posta ile {result.sent} bildirim gönderildi, "
+        f"{result.failed} başarısız, {result.deferred} ertelendi"
+    )
+    return result
@@ -0,0 +1,55 @@
+import json
+import logging
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Büyük tablolar için sayfalayıcı.
+
+    COUNT(*) milyonlarca satırı taramasın diye en fazla `exact_limit` satıra kadar
+    kesin sayım yapılır (LIMIT'li alt sorgu). Daha fazlası için PostgreSQL'de
+    planlayıcının satır tahmini kullanılır; diğer veritabanlarında sayı
+    "exact_limit+" olarak gösterilir.
+    """
+    exact_limit = 10000
+    estimated = False
+
+    @cached_property
+    def count(self):
+        counted = self.object_list.order_by()[:self.exact_limit + 1].count()
+        if counted <= self.exact_limit:
+            return counted
+        self.estimated = True
+        return max(counted, self._planner_estimate())
+
+    @property
+    def count_label(self):
+        """Şablonlar için sayı: kesin, yaklaşık (~) veya alt sınır (+)"""
+        if not self.estimated:
+            return str(self.count)
+        if self.count > self.exact_limit + 1:
+            return f"~{self.count}"
+        return f"{self.exact_limit}+"
+
+    def _planner_estimate(self):
+        queryset = self.object_list.order_by()
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return 0
+        sql, params = queryset.query.sql_with_params()
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+        except Exception as e:
+            logger.warning(f"Satır sayısı tahmini alınamadı: {str(e)}")
+            return 0
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]['Plan']['Plan Rows'])
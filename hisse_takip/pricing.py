@@ -0,0 +1,136 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import DecimalField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from .models import IngestBatch, Stock, PriceData
+
+INGEST_BATCH_KEY = 'ingest:batch'
+# Fiyat haritası alım grubu id'siyle anahtarlandığından süre sadece eski grupların temizlenmesi içindir
+QUOTES_CACHE_TIMEOUT = getattr(settings, 'API_CACHE_TIMEOUT', 15 * 60)
+
+
+def latest_prices(stock_ids=None, before=None):
+    """
+    Hisselerin son fiyatlarını tek sorguda döndürür.
+
+    Args:
+        stock_ids (iterable, optional): Hisse kodları. None ise tüm hisseler.
+        before (datetime, optional): Verilirse bu andan önceki son fiyat alınır.
+
+    Returns:
+        dict: {hisse_kodu: Decimal fiyat} (fiyatı olmayan hisseler dahil edilmez)
+    """
+    latest = PriceData.objects.filter(stock=OuterRef('pk')).order_by('-timestamp')
+    if before is not None:
+        latest = latest.filter(timestamp__lt=before)
+    stocks = Stock.objects.all()
+    if stock_ids is not None:
+        stocks = stocks.filter(code__in=list(stock_ids))
+
+    rows = stocks.annotate(
+        last_price=Subquery(latest.values('price')[:1])
+    ).values_list('code', 'last_price')
+
+    return {code: price for code, price in rows if price is not None}
+
+
+def latest_price_subquery(stock='stock'):
+    """
+    Sorgu ifadesi: `stock` alanındaki hissenin son fiyatı (fiyatı yoksa 0).
+
+    Satır başına fiyat sorgusu yerine annotate ile kullanılır, ör.
+    Position.objects.annotate(latest_price=latest_price_subquery()).
+    """
+    latest = PriceData.objects.filter(stock=OuterRef(stock)).order_by('-timestamp').values('price')[:1]
+    return Coalesce(Subquery(latest), Value(0), output_field=DecimalField(max_digits=10, decimal_places=2))
+
+
+def latest_quotes(stock_ids=None, before=None):
+    """
+    Hisselerin son fiyat ve günlük değişim yüzdelerini tek sorguda döndürür.
+
+    Returns:
+        dict: {hisse_kodu: (Decimal fiyat, Decimal değişim yüzdesi)}
+    """
+    latest = PriceData.objects.filter(stock=OuterRef('pk')).order_by('-timestamp')
+    if before is not None:
+        latest = latest.filter(timestamp__lt=before)
+    stocks = Stock.objects.all()
+    if stock_ids is not None:
+        stocks = stocks.filter(code__in=list(stock_ids))
+
+    rows = stocks.annotate(
+        last_price=Subquery(latest.values('price')[:1]),
+        last_change=Subquery(latest.values('change_percentage')[:1])
+    ).values_list('code', 'last_price', 'last_change')
+
+    return {code: (price, change) for code, price, change in rows if price is not None}
+
+
+def current_ingest_batch():
+    """
+    Yeni fiyat kaydeden son alım grubunun id'si (hiç yoksa 0).
+
+    Önbellekten okunur; önbellek boşsa veritabanından bir kez alınıp yazılır.
+    """
+    batch_id = cache.get(INGEST_BATCH_KEY)
+    if batch_id is None:
+        batch_id = IngestBatch.objects.filter(saved_count__gt=0).order_by('-id').values_list('id', flat=True).first() or 0
+        cache.set(INGEST_BATCH_KEY, batch_id, None)
+    return batch_id
+
+
+async def acurrent_ingest_batch():
+    """current_ingest_batch'in async karşılığı (async view'lar için)"""
+    batch_id = await cache.aget(INGEST_BATCH_KEY)
+    if batch_id is None:
+        batch_id = await IngestBatch.objects.filter(saved_count__gt=0).order_by('-id').values_list('id', flat=True).afirst() or 0
+        await cache.aset(INGEST_BATCH_KEY, batch_id, None)
+    return batch_id
+
+
+def publish_ingest_batch(batch_id):
+    """Alım grubunu güncel grup olarak duyurur (API ETag'leri değişir)"""
+    cache.set(INGEST_BATCH_KEY, batch_id, None)
+
+
+def _quote_map_rows():
+    latest = PriceData.objects.filter(stock=OuterRef('pk')).order_by('-timestamp')
+    return Stock.objects.annotate(
+        last_price=Subquery(latest.values('price')[:1]),
+        last_change=Subquery(latest.values('change_percentage')[:1]),
+        last_volume=Subquery(latest.values('volume')[:1]),
+        last_timestamp=Subquery(latest.values('timestamp')[:1]),
+    ).filter(last_price__isnull=False).values_list('code', 'last_price', 'last_change', 'last_volume', 'last_timestamp')
+
+
+def _quote_map(rows):
+    return {code: (price, change, volume, timestamp) for code, price, change, volume, timestamp in rows}
+
+
+def cached_quotes():
+    """
+    Tüm hisselerin son (fiyat, değişim, hacim, zaman) değerleri.
+
+    Alım grubu başına bir kez tek sorguyla hesaplanıp önbellekte tutulur; izleme
+    panoları gibi sık okunan sayfalar hisse başına fiyat sorgusu yapmaz.
+
+    Returns:
+        dict: {hisse_kodu: (fiyat, değişim yüzdesi, hacim, zaman)}
+    """
+    key = f"quotes:{current_ingest_batch()}"
+    quotes = cache.get(key)
+    if quotes is None:
+        quotes = _quote_map(_quote_map_rows().iterator())
+        cache.set(key, quotes, QUOTES_CACHE_TIMEOUT)
+    return quotes
+
+
+async def acached_quotes():
+    """cached_quotes'un async karşılığı"""
+    key = f"quotes:{await acurrent_ingest_batch()}"
+    quotes = await cache.aget(key)
+    if quotes is None:
+        quotes = _quote_map([row async for row in _quote_map_rows()])
+        await cache.aset(key, quotes, QUOTES_CACHE_TIMEOUT)
+    return quotes
@@ -0,0 +1,192 @@
+import logging
+import threading
+import weakref
+from collections import defaultdict
+from decimal import Decimal
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .models import FundShare, Investor
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+# Fiyatlar en geç her alımda yeniden hesaplandığından süre sadece güvenlik payıdır
+CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 24 * 60 * 60)
+BATCH_SIZE = 1000
+
+_pending = threading.local()
+
+
+def dashboard_key(investor_id):
+    return f"dashboard:investor:{investor_id}"
+
+
+def _empty_dashboard():
+    return {
+        'fund_shares': [],
+        'total_current_value': Decimal('0'),
+        'total_initial_investment': Decimal('0'),
+        'total_profit_loss': Decimal('0'),
+        'total_profit_percentage': Decimal('0'),
+    }
+
+
+def _share_rows(investor_ids=None):
+    shares = FundShare.objects.order_by('investor_id', 'fund__name')
+    if investor_ids is not None:
+        shares = shares.filter(investor_id__in=investor_ids)
+    return shares.values_list(
+        'investor_id', 'fund_id', 'fund__name', 'shares_count', 'initial_investment',
+        'fund__current_value', 'fund__total_shares'
+    )
+
+
+def _assemble_dashboards(rows, investor_ids=None):
+    """_share_rows satırlarını yatırımcı bazında dashboard sözlüklerine çevirir"""
+    grouped = defaultdict(list)
+    for investor_id, fund_id, fund_name, shares_count, initial, fund_value, total_shares in rows:
+        share_value = fund_value / total_shares if total_shares else Decimal('0')
+        current_value = shares_count * share_value if total_shares else Decimal('0')
+        profit_loss = current_value - initial
+        grouped[investor_id].append({
+            'fund_id': fund_id,
+            'fund_name': fund_name,
+            'shares_count': shares_count,
+            'share_value': share_value,
+            'current_value': current_value,
+            'initial_investment': initial,
+            'profit_loss': profit_loss,
+            'profit_loss_percentage': profit_loss / initial * 100 if initial > 0 else Decimal('0'),
+        })
+
+    dashboards = {}
+    for investor_id in (investor_ids if investor_ids is not None else grouped.keys()):
+        dashboard = _empty_dashboard()
+        fund_shares = grouped.get(investor_id, [])
+        total_current = sum((row['current_value'] for row in fund_shares), Decimal('0'))
+        total_initial = sum((row['initial_investment'] for row in fund_shares), Decimal('0'))
+        dashboard.update(
+            fund_shares=fund_shares,
+            total_current_value=total_current,
+            total_initial_investment=total_initial,
+            total_profit_loss=total_current - total_initial,
+            total_profit_percentage=(total_current - total_initial) / total_initial * 100 if total_initial > 0 else Decimal('0'),
+        )
+        dashboards[investor_id] = dashboard
+    return dashboards
+
+
+def build_dashboards(investor_ids=None):
+    """
+    Yatırımcı dashboard'larını tek sorguyla hesaplar.
+
+    Satırlar FundShare.current_value/profit_loss ile aynı hesaplanır (fonun güncel
+    değeri / toplam pay adedi), ancak fon bilgisi aynı sorguda alınır.
+
+    Returns:
+        dict: investor_id -> dashboard sözlüğü (fund_shares satırları ve toplamlar)
+    """
+    return _assemble_dashboards(_share_rows(investor_ids).iterator(), investor_ids)
+
+
+def rebuild_dashboards(investor_ids=None):
+    """
+    Dashboard'ları toplu hesaplayıp önbelleğe yazar.
+
+    Args:
+        investor_ids: Sadece bu yatırımcılar (None ise tüm yatırımcılar)
+
+    Returns:
+        int: Yazılan dashboard sayısı
+    """
+    if investor_ids is None:
+        investor_ids = Investor.objects.values_list('id', flat=True)
+    investor_ids = list(investor_ids)
+
+    written = 0
+    for start in range(0, len(investor_ids), BATCH_SIZE):
+        dashboards = build_dashboards(investor_ids[start:start + BATCH_SIZE])
+        # Veritabanı önbelleğinde her anahtar ayrı commit edilmesin diye grup tek transaction'da yazılır
+        with transaction.atomic():
+            cache.set_many({dashboard_key(investor_id): data for investor_id, data in dashboards.items()}, CACHE_TIMEOUT)
+        written += len(dashboards)
+    logger.info(f"{written} yatırımcı dashboard'u yeniden oluşturuldu")
+    return written
+
+
+def get_dashboard(investor_id):
+    """Yatırımcının dashboard'u; önbellekte yoksa hesaplanıp yazılır"""
+    dashboard = cache.get(dashboard_key(investor_id))
+    if dashboard is None:
+        dashboard = build_dashboards([investor_id])[investor_id]
+        cache.set(dashboard_key(investor_id), dashboard, CACHE_TIMEOUT)
+    return dashboard
+
+
+async def aget_dashboard(investor_id):
+    """get_dashboard'un async karşılığı; önbellek ve sorgu iş parçacığı tutmadan beklenir"""
+    key = dashboard_key(investor_id)
+    dashboard = await cache.aget(key)
+    if dashboard is None:
+        rows = [row async for row in _share_rows([investor_id])]
+        dashboard = _assemble_dashboards(rows, [investor_id])[investor_id]
+        await cache.aset(key, dashboard, CACHE_TIMEOUT)
+    return dashboard
+
+
+def enqueue_full_rebuild():
+    """Tüm dashboard'ların yeniden oluşturulmasını Celery görevine bırakır (fiyat alımını bekletmez)"""
+    from .tasks import rebuild_dashboards_task
+    try:
+        rebuild_dashboards_task.delay()
+    except Exception as e:
+        # Kuyruk yoksa dashboard'lar süre dolunca veya sonraki alımda yenilenir
+        logger.error(f"Dashboard yeniden oluşturma görevi kuyruğa gönderilemedi: {str(e)}")
+
+
+class _Batch:
+    """Bir transaction içinde biriken dashboard yenileme istekleri; commit sonrası bir kez çalışır"""
+
+    def __init__(self):
+        self.everyone = False
+        self.investor_ids = set()
+        self.fund_ids = set()
+
+    def __call__(self):
+        if getattr(_pending, 'batch', None) is not None and _pending.batch() is self:
+            del _pending.batch
+        if self.everyone:
+            enqueue_full_rebuild()
+            return
+        investor_ids = set(self.investor_ids)
+        if self.fund_ids:
+            investor_ids |= set(
+                FundShare.objects.filter(fund_id__in=self.fund_ids).values_list('investor_id', flat=True)
+            )
+        if investor_ids:
+            rebuild_dashboards(investor_ids)
+
+
+def schedule_rebuild(investor_ids=None, fund_ids=None):
+    """
+    Dashboard'ların transaction sonunda toplu yeniden oluşturulmasını ister.
+
+    Aynı transaction içindeki istekler birleştirilip tek seferde işlenir; hiçbir
+    id verilmezse tüm yatırımcılar Celery görevinde yeniden oluşturulur. Transaction
+    dışında hemen çalışır.
+    """
+    # Toplu istek yalnızca zayıf referansla tutulur; transaction geri alınınca
+    # Django on_commit listesini boşaltır ve eski istekler kendiliğinden düşer
+    ref = getattr(_pending, 'batch', None)
+    batch = ref() if ref is not None else None
+    scheduled = batch is not None
+    if not scheduled:
+        batch = _Batch()
+    if investor_ids is None and fund_ids is None:
+        batch.everyone = True
+    batch.investor_ids.update(investor_ids or ())
+    batch.fund_ids.update(fund_ids or ())
+    if not scheduled:
+        _pending.batch = weakref.ref(batch)
+        transaction.on_commit(batch)
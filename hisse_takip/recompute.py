@@ -0,0 +1,366 @@
+import logging
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+from django.db import transaction as db_transaction
+from django.utils import timezone
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+# Aktif erteleme grubu (thread ve asyncio görevleri için ayrı tutulur)
+_current_batch = ContextVar('hisse_takip_recompute_batch', default=None)
+
+
+def apply_transaction(position, transaction_type, quantity, price):
+    """Tek bir işlemi pozisyonun miktar ve ortalama maliyetine uygular"""
+    if transaction_type == 'buy':
+        # Alım işlemi
+        new_total_cost = (position.quantity * position.average_cost) + (quantity * price)
+        new_quantity = position.quantity + quantity
+
+        if new_quantity > 0:
+            # Yeni ortalama maliyet hesapla
+            position.average_cost = new_total_cost / new_quantity
+
+        position.quantity = new_quantity
+        position.is_open = True  # Pozisyon açık
+
+    elif transaction_type == 'sell':
+        # Satım işlemi
+        position.quantity -= quantity
+
+        # Eğer tüm hisseler satıldıysa pozisyonu kapat
+        if position.quantity <= 0:
+            position.quantity = Decimal('0')
+            position.is_open = False  # Pozisyon kapalı
+
+    elif transaction_type == 'dividend':
+        # Temettü işlemi - pozisyonu değiştirmez, sadece portföy değerini etkiler
+        pass
+
+    elif transaction_type == 'split':
+        # Hisse bölünmesi - miktarı artırır, ortalama maliyeti düşürür
+        split_ratio = price  # Bölünme oranı
+        position.quantity *= split_ratio
+        position.average_cost /= split_ratio
+
+    elif transaction_type == 'merge':
+        # Hisse birleşmesi - miktarı azaltır, ortalama maliyeti artırır
+        merge_ratio = price  # Birleşme oranı
+        position.quantity /= merge_ratio
+        position.average_cost *= merge_ratio
+
+    return position
+
+
+def transaction_cash(transaction_type, quantity, price, commission=0, tax=0):
+    """
+    İşlemin portföyün bağlı olduğu fonun nakdine etkisi.
+
+    Alım fiyat x adet + komisyon + vergi kadar nakdi azaltır; satım ve temettü
+    fiyat x adet - komisyon - vergi kadar artırır. Bölünme gibi işlemler nakit
+    hareketi değildir.
+    """
+    amount = quantity * price
+    if transaction_type == 'buy':
+        return -(amount + commission + tax)
+    if transaction_type in ('sell', 'dividend'):
+        return amount - commission - tax
+    return Decimal('0')
+
+
+class RecomputeBatch:
+    """Ertelenmiş yeniden hesaplama sırasında etkilenen kayıtları toplar"""
+
+    def __init__(self):
+        self.positions = set()        # (portfolio_id, stock_id)
+        self.portfolios = set()       # Bağlı fonu güncellenecek portföyler
+        self.funds = set()            # Değeri portföylerden yeniden hesaplanacak fonlar
+        self.investors = {}           # investor_id -> 'transactions' | 'investments'
+        self.fund_share_deltas = defaultdict(lambda: [Decimal('0'), Decimal('0'), Decimal('0')])
+        self.fund_cash_deltas = defaultdict(Decimal)       # fund_id -> nakit farkı
+        self.portfolio_cash_deltas = defaultdict(Decimal)  # portfolio_id -> bağlı fonun nakit farkı
+
+    def mark_position(self, portfolio_id, stock_id):
+        """Pozisyonu işlemlerden yeniden hesaplanmak üzere işaretler"""
+        self.positions.add((portfolio_id, stock_id))
+        self.portfolios.add(portfolio_id)
+
+    def mark_portfolio(self, portfolio_id):
+        """Portföyün bağlı olduğu fonu güncellenmek üzere işaretler"""
+        if portfolio_id:
+            self.portfolios.add(portfolio_id)
+
+    def mark_fund(self, fund_id):
+        """Fonu portföy değerlerinden yeniden hesaplanmak üzere işaretler"""
+        if fund_id:
+            self.funds.add(fund_id)
+
+    def mark_investor(self, investor_id, source='transactions'):
+        """Yatırımcının toplam yatırımını yeniden hesaplanmak üzere işaretler"""
+        if investor_id:
+            self.investors[investor_id] = source
+
+    def add_fund_share_delta(self, fund_id, initial_value=0, current_value=0, total_shares=0):
+        """Fon payı değişikliğinden doğan fon toplam farklarını biriktirir"""
+        delta = self.fund_share_deltas[fund_id]
+        delta[0] += initial_value
+        delta[1] += current_value
+        delta[2] += total_shares
+
+    def add_fund_cash_delta(self, fund_id, amount):
+        """Fon nakdindeki değişikliği biriktirir"""
+        if fund_id:
+            self.fund_cash_deltas[fund_id] += amount
+            self.funds.add(fund_id)
+
+    def add_portfolio_cash_delta(self, portfolio_id, amount):
+        """Portföy işleminden doğan nakit değişikliğini bağlı fon için biriktirir"""
+        if portfolio_id:
+            self.portfolio_cash_deltas[portfolio_id] += amount
+            self.portfolios.add(portfolio_id)
+
+    def flush(self):
+        """Toplanan tüm kayıtları her biri için tek seferde yeniden hesaplar"""
+        self._rebuild_positions()
+        self._resolve_portfolio_funds()
+        self._apply_fund_share_deltas()
+        self._apply_fund_cash_deltas()
+        self._recompute_funds()
+        self._recompute_investors()
+
+        # Toplu yazmalar sinyal göndermez, yatırımcı dağılımlarını burada geçersiz kıl
+        if self.positions or self.fund_share_deltas:
+            from .exposure import invalidate_exposures
+            invalidate_exposures()
+        fund_ids = self.funds | set(self.fund_share_deltas)
+        if fund_ids:
+            from .read_models import schedule_rebuild
+            schedule_rebuild(fund_ids=fund_ids)
+
+        logger.info(
+            f"Toplu yeniden hesaplama: {len(self.positions)} pozisyon, {len(self.funds)} fon, "
+            f"{len(self.investors)} yatırımcı"
+        )
+
+    def _rebuild_positions(self):
+        """İşaretli pozisyonları işlem geçmişinden yeniden oluşturur"""
+        if not self.positions:
+            return
+
+        from .models import Position, Transaction
+        from .lots import LotBook, cost_basis_method, save_realized
+
+        portfolio_ids = {portfolio_id for portfolio_id, _ in self.positions}
+        stock_ids = {stock_id for _, stock_id in self.positions}
+
+        # Tüm işlemleri tek sorguda al ve pozisyona göre grupla
+        grouped = defaultdict(list)
+        rows = Transaction.objects.filter(
+            portfolio_id__in=portfolio_ids,
+            stock_id__in=stock_ids
+        ).order_by('date', 'id').values_list('id', 'portfolio_id', 'stock_id', 'transaction_type', 'quantity', 'price',
+                                             'commission', 'tax', 'date', 'realized_profit_loss')
+
+        stored = {}
+        for pk, portfolio_id, stock_id, transaction_type, quantity, price, commission, tax, date, saved in rows.iterator():
+            key = (portfolio_id, stock_id)
+            if key in self.positions:
+                grouped[key].append((pk, transaction_type, quantity, price, commission, tax, date))
+                if transaction_type == 'sell':
+                    stored[pk] = saved
+
+        existing = {
+            (position.portfolio_id, position.stock_id): position
+            for position in Position.objects.filter(portfolio_id__in=portfolio_ids, stock_id__in=stock_ids)
+        }
+
+        method = cost_basis_method()
+        realized = {}
+        to_create, to_update, to_delete = [], [], []
+        for key in self.positions:
+            transactions = grouped.get(key)
+            position = existing.get(key)
+
+            if not transactions:
+                # Eğer başka işlem kalmadıysa pozisyonu sil
+                if position is not None:
+                    to_delete.append(position.pk)
+                continue
+
+            first_date = transactions[0][-1]
+            if position is None:
+                position = Position(portfolio_id=key[0], stock_id=key[1])
+                to_create.append(position)
+            else:
+                to_update.append(position)
+
+            # Pozisyonu sıfırla ve tüm işlemleri sırayla uygula
+            position.quantity = Decimal('0')
+            position.average_cost = Decimal('0')
+            position.is_open = True
+            position.open_date = first_date.date() if hasattr(first_date, 'date') else first_date
+
+            book = LotBook(method)
+            for pk, transaction_type, quantity, price, commission, tax, date in transactions:
+                apply_transaction(position, transaction_type, quantity, price)
+                gain = book.apply(transaction_type, quantity, price, commission, tax, timezone.localtime(date).date())
+                if gain is not None:
+                    realized[pk] = gain
+
+            position.lot_state = book.to_state()
+            position.realized_profit_loss = book.realized.quantize(Decimal('0.01'))
+
+        if to_delete:
+            Position.objects.filter(pk__in=to_delete).delete()
+        if to_create:
+            Position.objects.bulk_create(to_create)
+        if to_update:
+            Position.objects.bulk_update(to_update, ['quantity', 'average_cost', 'open_date', 'is_open',
+                                                     'lot_state', 'realized_profit_loss'])
+        if realized:
+            save_realized(realized, stored)
+
+    def _resolve_portfolio_funds(self):
+        """İşaretli portföylerin bağlı fonlarını tek sorguda bulur"""
+        if not self.portfolios:
+            return
+
+        from .models import Portfolio
+
+        links = Portfolio.objects.filter(
+            pk__in=self.portfolios,
+            fund__isnull=False
+        ).values_list('id', 'fund_id')
+        for portfolio_id, fund_id in links:
+            self.funds.add(fund_id)
+            if portfolio_id in self.portfolio_cash_deltas:
+                self.fund_cash_deltas[fund_id] += self.portfolio_cash_deltas[portfolio_id]
+
+    def _apply_fund_share_deltas(self):
+        """Biriken fon payı farklarını her fona tek güncelleme ile uygular"""
+        if not self.fund_share_deltas:
+            return
+
+        from .models import Fund
+
+        funds = list(Fund.objects.filter(pk__in=self.fund_share_deltas.keys()))
+        for fund in funds:
+            initial_delta, current_delta, shares_delta = self.fund_share_deltas[fund.pk]
+            # Negatife düşmesini önle
+            fund.initial_value = max(Decimal('0'), fund.initial_value + initial_delta)
+            fund.current_value = max(Decimal('0'), fund.current_value + current_delta)
+            fund.total_shares = max(Decimal('0'), fund.total_shares + shares_delta)
+
+        Fund.objects.bulk_update(funds, ['initial_value', 'current_value', 'total_shares'])
+
+    def _apply_fund_cash_deltas(self):
+        """Biriken nakit farklarını her fona tek güncelleme ile uygular (fon değeri sonra hesaplanır)"""
+        if not self.fund_cash_deltas:
+            return
+
+        from django.db.models import F
+        from .models import Fund
+
+        for fund_id, amount in self.fund_cash_deltas.items():
+            if amount:
+                Fund.objects.filter(pk=fund_id).update(cash=F('cash') + amount)
+
+    def _recompute_funds(self):
+        """İşaretli fonların değerini bağlı portföylerin pozisyonları ve fon nakdinden hesaplar"""
+        if not self.funds:
+            return
+
+        from .models import Fund, Position
+        from .pricing import latest_prices
+
+        rows = list(Position.objects.filter(
+            portfolio__fund_id__in=self.funds
+        ).values_list('portfolio__fund_id', 'stock_id', 'quantity'))
+        prices = latest_prices({stock_id for _, stock_id, _ in rows})
+
+        totals = defaultdict(Decimal)
+        for fund_id, stock_id, quantity in rows:
+            totals[fund_id] += quantity * prices.get(stock_id, 0)
+
+        funds = list(Fund.objects.filter(pk__in=self.funds))
+        for fund in funds:
+            fund.current_value = totals.get(fund.pk, Decimal('0')) + fund.cash
+
+        Fund.objects.bulk_update(funds, ['current_value'])
+
+    def _recompute_investors(self):
+        """İşaretli yatırımcıların toplam yatırımını tek sorguyla hesaplar"""
+        if not self.investors:
+            return
+
+        from django.db.models import Sum
+        from .models import Investor, Investment, Transaction
+
+        from_transactions = [i for i, source in self.investors.items() if source == 'transactions']
+        from_investments = [i for i, source in self.investors.items() if source == 'investments']
+        totals = {investor_id: Decimal('0') for investor_id in self.investors}
+
+        # İşlemlerden hesaplanan toplamlar (Investor.update_investment_total ile aynı kural)
+        rows = Transaction.objects.filter(
+            portfolio__investor_id__in=from_transactions
+        ).values_list('portfolio__investor_id', 'transaction_type', 'price', 'quantity', 'commission', 'tax')
+        for investor_id, transaction_type, price, quantity, commission, tax in rows.iterator():
+            if transaction_type == 'buy':
+                totals[investor_id] += (price * quantity) + commission + tax
+            elif transaction_type == 'sell':
+                totals[investor_id] -= (price * quantity) - commission - tax
+
+        # Yatırım girişlerinden hesaplanan toplamlar (Investor.update_total_investment ile aynı kural)
+        rows = Investment.objects.filter(
+            investor_id__in=from_investments
+        ).values('investor_id').annotate(total=Sum('amount')).values_list('investor_id', 'total')
+        for investor_id, total in rows:
+            totals[investor_id] = total or Decimal('0')
+
+        investors = list(Investor.objects.filter(pk__in=totals.keys()))
+        for investor in investors:
+            investor.total_invested = totals[investor.pk]
+
+        Investor.objects.bulk_update(investors, ['total_invested'])
+
+
+def current_batch():
+    """Aktif erteleme grubunu döndürür, yoksa None"""
+    return _current_batch.get()
+
+
+@contextmanager
+def deferred_recompute():
+    """
+    Toplu işlemler için satır bazlı yeniden hesaplamaları erteler.
+
+    Blok içinde sinyaller pozisyon, fon ve yatırımcı hesaplamalarını hemen yapmak
+    yerine etkilenen kayıtları toplar; blok başarıyla bittiğinde her kayıt tek
+    seferde yeniden hesaplanır. Blok tek bir veritabanı transaction'ı içinde çalışır.
+    İç içe kullanımda dıştaki gruba katılır.
+
+    Kullanım:
+        with deferred_recompute() as batch:
+            queryset.delete()
+            batch.mark_investor(investor_id, 'investments')
+    """
+    batch = _current_batch.get()
+    if batch is not None:
+        yield batch
+        return
+
+    batch = RecomputeBatch()
+    token = _current_batch.set(batch)
+    try:
+        with db_transaction.atomic():
+            yield batch
+            # Hesaplama sırasında yapılan kayıtlar tekrar ertelenmesin
+            _current_batch.reset(token)
+            token = None
+            batch.flush()
+    finally:
+        if token is not None:
+            _current_batch.reset(token)
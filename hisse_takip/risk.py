@@ -0,0 +1,261 @@
+import io
+import logging
+import math
+from datetime import date as date_cls, timedelta
+from decimal import Decimal
+from statistics import NormalDist
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .models import CovarianceState, RiskMetric, Stock
+from .scenarios import load_book
+from .timeseries import daily_closes
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+TRADING_DAYS = 252
+WINDOW = getattr(settings, 'RISK_WINDOW_DAYS', TRADING_DAYS)
+CONFIDENCE = getattr(settings, 'RISK_CONFIDENCE', 0.95)
+# Yıllık oynaklık (%) eşikleri: altı düşük, arası orta, üstü yüksek risk
+LEVEL_THRESHOLDS = getattr(settings, 'RISK_LEVEL_THRESHOLDS', (15, 30))
+
+
+def _pack(array):
+    buffer = io.BytesIO()
+    np.save(buffer, array, allow_pickle=False)
+    return buffer.getvalue()
+
+
+def _unpack(data):
+    return np.load(io.BytesIO(bytes(data)), allow_pickle=False)
+
+
+def _returns(closes, previous=None):
+    """(hisse x gün) kapanışlardan (gün x hisse) getiri matrisi; fiyatı olmayan hisse için 0"""
+    if previous is not None:
+        closes = np.hstack([previous[:, None], closes])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = closes[:, 1:] / closes[:, :-1] - 1
+    return np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0).T
+
+
+class ReturnWindow:
+    """
+    Son `window` işlem gününün getiri matrisi ve kovaryans için gereken toplamlar.
+
+    Toplamlar (Σr ve Σrrᵀ) her gün pencereye giren günler eklenip çıkan günler
+    düşülerek güncellenir; kovaryans bu toplamlardan O(hisse²) ile elde edilir.
+    """
+
+    def __init__(self, window, stocks, dates, returns, last_closes, return_sums=None, product_sums=None):
+        self.window = window
+        self.stocks = list(stocks)
+        self.dates = list(dates)
+        self.returns = returns
+        self.last_closes = last_closes
+        self.return_sums = returns.sum(axis=0) if return_sums is None else return_sums
+        self.product_sums = returns.T @ returns if product_sums is None else product_sums
+
+    @classmethod
+    def build(cls, stocks, end, window=WINDOW):
+        """Pencereyi fiyat geçmişinden sıfırdan kurar"""
+        # İşlem günü penceresini karşılayacak kadar takvim günü geriye git
+        start = end - timedelta(days=int(window * 7 / 5) + 30)
+        series = daily_closes(stocks, start, end)
+        returns = _returns(series.closes)[-window:]
+        dates = [str(day) for day in series.dates[1:]][-window:]
+        last = series.closes[:, -1] if len(series.dates) else np.full(len(stocks), np.nan)
+        return cls(window, series.stock_ids, dates, returns, last)
+
+    def advance(self, end):
+        """
+        Son günden sonraki yeni günleri pencereye ekler, pencereden taşanları çıkarır.
+
+        Returns:
+            int: Eklenen gün sayısı
+        """
+        last_day = date_cls.fromisoformat(self.dates[-1]) if self.dates else end
+        series = daily_closes(self.stocks, last_day + timedelta(days=1), end)
+        if not len(series.dates):
+            return 0
+
+        new = _returns(series.closes, self.last_closes)
+        self.returns = np.vstack([self.returns, new])
+        self.dates += [str(day) for day in series.dates]
+        self.return_sums += new.sum(axis=0)
+        self.product_sums += new.T @ new
+
+        overflow = len(self.dates) - self.window
+        if overflow > 0:
+            dropped = self.returns[:overflow]
+            self.return_sums -= dropped.sum(axis=0)
+            self.product_sums -= dropped.T @ dropped
+            self.returns = self.returns[overflow:]
+            self.dates = self.dates[overflow:]
+
+        self.last_closes = np.where(np.isnan(series.closes[:, -1]), self.last_closes, series.closes[:, -1])
+        return len(series.dates)
+
+    @property
+    def mean(self):
+        return self.return_sums / max(len(self.dates), 1)
+
+    @property
+    def covariance(self):
+        """Örneklem kovaryans matrisi (hisse x hisse)"""
+        count = len(self.dates)
+        if count < 2:
+            return np.zeros((len(self.stocks), len(self.stocks)))
+        mean = self.mean
+        return (self.product_sums - count * np.outer(mean, mean)) / (count - 1)
+
+    @classmethod
+    def load(cls, window=WINDOW):
+        state = CovarianceState.objects.filter(window=window).first()
+        if state is None:
+            return None
+        return cls(
+            window, state.stocks, state.dates,
+            _unpack(state.returns), _unpack(state.last_closes),
+            _unpack(state.return_sums), _unpack(state.product_sums),
+        )
+
+    def save(self):
+        CovarianceState.objects.update_or_create(
+            window=self.window,
+            defaults={
+                'date': date_cls.fromisoformat(self.dates[-1]) if self.dates else timezone.localdate(),
+                'stocks': self.stocks,
+                'dates': self.dates,
+                'returns': _pack(self.returns),
+                'last_closes': _pack(self.last_closes),
+                'return_sums': _pack(self.return_sums),
+                'product_sums': _pack(self.product_sums),
+            }
+        )
+
+
+def return_window(end=None, window=WINDOW, full=False):
+    """
+    Kayıtlı getiri penceresini güne kadar ilerletir; hisse listesi değiştiyse
+    veya full=True ise pencereyi sıfırdan kurar.
+    """
+    end = end or timezone.localdate()
+    stocks = sorted(Stock.objects.values_list('code', flat=True))
+
+    state = None if full else ReturnWindow.load(window)
+    if state is not None and state.stocks == stocks:
+        added = state.advance(end)
+        logger.info(f"Getiri penceresi {added} gün ilerletildi ({len(state.dates)} gün)")
+    else:
+        state = ReturnWindow.build(stocks, end, window)
+        logger.info(f"Getiri penceresi sıfırdan kuruldu: {len(stocks)} hisse, {len(state.dates)} gün")
+    state.save()
+    return state
+
+
+def risk_measures(exposures, returns, mean, covariance, confidence=CONFIDENCE):
+    """
+    Pozisyon değer satırları (varlık x hisse, TL) için 1 günlük risk ölçütleri.
+
+    Parametrik ölçütler normal dağılım varsayımıyla E Σ Eᵀ köşegeninden, tarihsel
+    ölçütler pencere günlerinin kar/zarar dağılımından (E Rᵀ) hesaplanır.
+    Kayıplar pozitif TL olarak döner.
+
+    Returns:
+        dict: sigma, parametric_var, parametric_cvar, historical_var, historical_cvar
+    """
+    expected = exposures @ mean
+    sigma = np.sqrt(np.maximum(((exposures @ covariance) * exposures).sum(axis=1), 0))
+
+    z = NormalDist().inv_cdf(confidence)
+    tail_density = math.exp(-z * z / 2) / math.sqrt(2 * math.pi)
+    parametric_var = z * sigma - expected
+    parametric_cvar = sigma * tail_density / (1 - confidence) - expected
+
+    count = returns.shape[0]
+    if count:
+        pnl = np.sort(exposures @ returns.T, axis=1)
+        cutoff = max(int(math.floor((1 - confidence) * count)), 1)
+        historical_var = -pnl[:, cutoff - 1]
+        historical_cvar = -pnl[:, :cutoff].mean(axis=1)
+    else:
+        historical_var = historical_cvar = np.full(exposures.shape[0], np.nan)
+
+    return {
+        'sigma': sigma,
+        'parametric_var': parametric_var,
+        'parametric_cvar': parametric_cvar,
+        'historical_var': historical_var,
+        'historical_cvar': historical_cvar,
+    }
+
+
+def risk_level(volatility):
+    """Yıllık oynaklığı (%) Portfolio/Fund risk seviyesine eşler"""
+    if volatility is None or np.isnan(volatility):
+        return None
+    low, high = LEVEL_THRESHOLDS
+    if volatility < low:
+        return 'low'
+    return 'medium' if volatility < high else 'high'
+
+
+def _decimal(value):
+    if value is None or np.isnan(value):
+        return None
+    return Decimal(f"{value:.2f}")
+
+
+def compute_risk_metrics(day=None, window=WINDOW, confidence=CONFIDENCE, full=False):
+    """
+    Tüm portföy ve fonlar için risk ölçütlerini tek seferde hesaplayıp kaydeder.
+
+    Kovaryans penceresi kayıtlı durumdan güne ilerletilir; pozisyon değer matrisi
+    senaryo motorundaki yükleme ile alınır ve fonlar portföylerinin toplamı ile nakitleridir.
+    """
+    day = day or timezone.localdate()
+    state = return_window(day, window, full)
+    book = load_book()
+    if not book.portfolio_ids:
+        return 0
+
+    # Pozisyon sütunlarını pencere hisse sırasına hizala (pencere tüm hisseleri kapsar)
+    stock_index = {code: i for i, code in enumerate(state.stocks)}
+    exposures = np.zeros((len(book.portfolio_ids), len(state.stocks)))
+    exposures[:, [stock_index[code] for code in book.stocks]] = book.values
+    exposures = np.vstack([exposures, book.membership @ exposures])
+
+    measures = risk_measures(exposures, state.returns, state.mean, state.covariance, confidence)
+    # Fon nakdi riske maruz değildir ama fon değerine ve yüzde oynaklığın paydasına girer
+    values = exposures.sum(axis=1)
+    values[len(book.portfolio_ids):] += book.fund_cash
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volatility = np.where(values > 0, measures['sigma'] / values * math.sqrt(TRADING_DAYS) * 100, np.nan)
+
+    owners = [('portfolio_id', portfolio_id) for portfolio_id in book.portfolio_ids]
+    owners += [('fund_id', fund_id) for fund_id in book.fund_ids]
+    rows = [
+        RiskMetric(
+            date=day,
+            value=_decimal(values[i]),
+            confidence=Decimal(str(confidence)),
+            volatility=_decimal(volatility[i]),
+            parametric_var=_decimal(measures['parametric_var'][i]),
+            parametric_cvar=_decimal(measures['parametric_cvar'][i]),
+            historical_var=_decimal(measures['historical_var'][i]),
+            historical_cvar=_decimal(measures['historical_cvar'][i]),
+            risk_level=risk_level(volatility[i]),
+            **{field: owner_id},
+        )
+        for i, (field, owner_id) in enumerate(owners)
+    ]
+
+    with transaction.atomic():
+        RiskMetric.objects.filter(date=day).delete()
+        RiskMetric.objects.bulk_create(rows, batch_size=1000)
+
+    logger.info(f"{day} için {len(rows)} risk ölçütü hesaplandı ({len(state.dates)} günlük pencere)")
+    return len(rows)
@@ -0,0 +1,151 @@
+import logging
+from datetime import timedelta, timezone as dt_timezone
+from decimal import Decimal
+import numpy as np
+from django.utils import timezone
+from .models import DailyPrice, PriceData
+from .timeseries import day_bounds, to_local_days
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+ROLLUP_UPDATE_FIELDS = ['open', 'high', 'low', 'close', 'volume', 'updated_at']
+# Yeniden oluşturmada bellekte tutulan gün sayısı (dakikalık veride ~500 fiyat x hisse x gün)
+CHUNK_DAYS = 7
+
+
+def _decimal(value, places=2):
+    return Decimal(f"{value:.{places}f}")
+
+
+def rollup(rows):
+    """
+    Fiyat satırlarını (hisse, yerel gün) bazında açılış/en yüksek/en düşük/kapanış/hacim özetine indirger.
+
+    Açılış günün ilk, kapanış son fiyatıdır; en yüksek/düşük veri kaynağının gün içi
+    değerlerini de kapsar. Hacim kümülatif olduğundan günün en büyük değeri alınır.
+
+    Args:
+        rows: (hisse, zaman, fiyat, hacim, en yüksek, en düşük) satırları
+
+    Returns:
+        list: DailyPrice nesneleri (kaydedilmemiş)
+    """
+    codes, timestamps, prices, volumes, highs, lows = [], [], [], [], [], []
+    for stock_id, timestamp, price, volume, high, low in rows:
+        codes.append(stock_id)
+        # Zaman damgaları UTC olarak gelir, NumPy için saat dilimi bilgisini at
+        timestamps.append(timestamp.astimezone(dt_timezone.utc).replace(tzinfo=None))
+        prices.append(price)
+        volumes.append(volume if volume is not None else np.nan)
+        highs.append(high if high is not None else np.nan)
+        lows.append(low if low is not None else np.nan)
+    if not codes:
+        return []
+
+    stocks, stock_idx = np.unique(np.array(codes), return_inverse=True)
+    moments = np.array(timestamps, dtype='datetime64[s]')
+    local_days = to_local_days(timestamps)
+    days, day_idx = np.unique(local_days, return_inverse=True)
+    values = np.array(prices, dtype=np.float64)
+
+    key = stock_idx * len(days) + day_idx
+    order = np.lexsort((moments, key))
+    key = key[order]
+    values = values[order]
+    starts = np.flatnonzero(np.r_[True, key[1:] != key[:-1]])
+    ends = np.r_[starts[1:], len(key)] - 1
+
+    high = np.fmax(np.maximum.reduceat(values, starts), np.fmax.reduceat(np.array(highs, dtype=np.float64)[order], starts))
+    low = np.fmin(np.minimum.reduceat(values, starts), np.fmin.reduceat(np.array(lows, dtype=np.float64)[order], starts))
+    volume = np.fmax.reduceat(np.array(volumes, dtype=np.float64)[order], starts)
+
+    result = []
+    for i, group in enumerate(key[starts]):
+        result.append(DailyPrice(
+            stock_id=str(stocks[group // len(days)]),
+            date=days[group % len(days)].astype(object),
+            open=_decimal(values[starts[i]]),
+            high=_decimal(high[i]),
+            low=_decimal(low[i]),
+            close=_decimal(values[ends[i]]),
+            volume=_decimal(volume[i]) if not np.isnan(volume[i]) else None,
+        ))
+    return result
+
+
+def save_daily_prices(rows, batch_size=1000):
+    """Günlük özetleri (hisse, tarih) çiftine göre toplu olarak ekler veya günceller"""
+    DailyPrice.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['stock', 'date'],
+        update_fields=ROLLUP_UPDATE_FIELDS,
+    )
+    return len(rows)
+
+
+def update_daily_prices(prices):
+    """
+    Yeni fiyat grubunu günlük özetlere işler (fiyat alımından sonra).
+
+    Grubun özeti aynı günün kayıtlı özetiyle birleştirilir: açılış korunur, en yüksek/düşük
+    genişletilir, kapanış ve hacim yeni gruptan alınır. Tek okuma ve tek toplu yazma yapılır.
+
+    Args:
+        prices: Yeni PriceData kayıtları
+
+    Returns:
+        int: Güncellenen günlük özet sayısı
+    """
+    rows = rollup(
+        (price.stock_id, price.timestamp, price.price, price.volume, price.max_price, price.min_price)
+        for price in prices
+    )
+    if not rows:
+        return 0
+
+    existing = {
+        (row.stock_id, row.date): row
+        for row in DailyPrice.objects.filter(
+            stock_id__in={row.stock_id for row in rows},
+            date__in={row.date for row in rows}
+        )
+    }
+    for row in rows:
+        stored = existing.get((row.stock_id, row.date))
+        if stored is not None:
+            row.open = stored.open
+            row.high = max(row.high, stored.high)
+            row.low = min(row.low, stored.low)
+            if row.volume is None:
+                row.volume = stored.volume
+    return save_daily_prices(rows)
+
+
+def rebuild_daily_prices(start, end=None, stock_ids=None):
+    """
+    Verilen tarih aralığındaki günlük özetleri ham fiyatlardan yeniden oluşturur.
+
+    Fiyatlar CHUNK_DAYS günlük parçalar halinde okunur; bellek kullanımı aralığın
+    uzunluğuna bağlı değildir.
+
+    Returns:
+        int: Yazılan günlük özet sayısı
+    """
+    end = end or timezone.localdate()
+    saved = 0
+    chunk_start = start
+    while chunk_start <= end:
+        chunk_end = min(chunk_start + timedelta(days=CHUNK_DAYS - 1), end)
+        start_dt, end_dt = day_bounds(chunk_start, chunk_end)
+        prices = PriceData.objects.filter(timestamp__gte=start_dt, timestamp__lt=end_dt)
+        if stock_ids is not None:
+            prices = prices.filter(stock_id__in=stock_ids)
+        rows = prices.values_list('stock_id', 'timestamp', 'price', 'volume', 'max_price', 'min_price')
+        saved += save_daily_prices(rollup(rows.iterator(chunk_size=10000)))
+        chunk_start = chunk_end + timedelta(days=1)
+
+    logger.info(f"{start} - {end} aralığı için {saved} günlük fiyat özeti oluşturuldu")
+    return saved
@@ -0,0 +1,222 @@
+import logging
+from collections import namedtuple
+import numpy as np
+from .models import BenchmarkIndex, FundShare, Fund, Portfolio, Position, Stock
+from .pricing import latest_prices
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+# Senaryo: ad ve şok listesi [(hedef, getiri)]; hedef 'all', hisse kodu,
+# ('sector', ad) veya ('index', endeks kodu); getiri ondalık (-0.10 = %10 düşüş)
+Scenario = namedtuple('Scenario', ['name', 'shocks'])
+
+# Değerleme için bir kez yüklenen matrisler: pozisyon değerleri (portföy x hisse),
+# fon üyeliği (fon x portföy), fon nakdi, yatırımcı sahipliği (yatırımcı x portföy) ve fon payları (yatırımcı x fon)
+ScenarioBook = namedtuple('ScenarioBook', [
+    'portfolio_ids', 'stocks', 'values',
+    'fund_ids', 'membership', 'fund_cash',
+    'investor_ids', 'owns', 'fractions',
+])
+
+# Her seviye için: id listesi, mevcut değer vektörü, (id x senaryo) TL etki matrisi
+ScenarioResult = namedtuple('ScenarioResult', [
+    'names',
+    'portfolio_ids', 'portfolio_values', 'portfolio_impact',
+    'fund_ids', 'fund_values', 'fund_impact',
+    'investor_ids', 'investor_values', 'investor_impact',
+])
+
+
+def portfolio_holdings(portfolio_ids=None):
+    """
+    Pozisyonlardan (portföy x hisse) adet matrisini kurar.
+
+    Returns:
+        tuple: (portföy id listesi, hisse kodu listesi, adet matrisi)
+    """
+    positions = Position.objects.filter(quantity__gt=0)
+    if portfolio_ids is not None:
+        positions = positions.filter(portfolio_id__in=portfolio_ids)
+    rows = list(positions.values_list('portfolio_id', 'stock_id', 'quantity'))
+
+    portfolios = sorted({portfolio_id for portfolio_id, _, _ in rows})
+    stocks = sorted({stock_id for _, stock_id, _ in rows})
+    portfolio_index = {portfolio_id: i for i, portfolio_id in enumerate(portfolios)}
+    stock_index = {code: i for i, code in enumerate(stocks)}
+
+    holdings = np.zeros((len(portfolios), len(stocks)))
+    if rows:
+        np.add.at(
+            holdings,
+            ([portfolio_index[p] for p, _, _ in rows], [stock_index[s] for _, s, _ in rows]),
+            np.array([q for _, _, q in rows], dtype=np.float64)
+        )
+    return portfolios, stocks, holdings
+
+
+def price_vector(stocks):
+    """Hisselerin son fiyatlarını hisse sırasına göre vektör olarak döndürür (fiyatı yoksa 0)"""
+    prices = latest_prices(stocks)
+    return np.array([float(prices.get(code, 0)) for code in stocks])
+
+
+def shock_matrix(stocks, scenarios):
+    """
+    Senaryoların şoklarını (hisse x senaryo) getiri matrisine çevirir.
+
+    Sektör ve endeks hedefleri tüm senaryolar için tek sorguda çözülür. Aynı
+    hisseye birden fazla şok denk gelirse sonradan yazılan geçerlidir; bu sayede
+    'all' ile genel bir düşüş verip tek tek hisseleri ayrıca ezmek mümkündür.
+    """
+    stock_index = {code: i for i, code in enumerate(stocks)}
+    sectors = {target[1] for scenario in scenarios for target, _ in scenario.shocks if isinstance(target, tuple) and target[0] == 'sector'}
+    indexes = {target[1] for scenario in scenarios for target, _ in scenario.shocks if isinstance(target, tuple) and target[0] == 'index'}
+
+    members = {}
+    if sectors:
+        for code, sector in Stock.objects.filter(code__in=stocks, sector__in=sectors).values_list('code', 'sector'):
+            members.setdefault(('sector', sector), []).append(stock_index[code])
+    if indexes:
+        through = BenchmarkIndex.constituents.through.objects.filter(benchmarkindex_id__in=indexes, stock_id__in=stocks)
+        for index_code, code in through.values_list('benchmarkindex_id', 'stock_id'):
+            members.setdefault(('index', index_code), []).append(stock_index[code])
+
+    shocks = np.zeros((len(stocks), len(scenarios)))
+    for k, scenario in enumerate(scenarios):
+        for target, change in scenario.shocks:
+            if target == 'all':
+                shocks[:, k] = change
+            elif isinstance(target, tuple):
+                shocks[members.get(target, []), k] = change
+            elif target in stock_index:
+                shocks[stock_index[target], k] = change
+    return shocks
+
+
+def parse_scenario(name, spec):
+    """
+    'sector=Bankacılık:-10, THYAO:-5, all:-2' biçimindeki tanımdan senaryo oluşturur
+    (yüzde değerler).
+    """
+    shocks = []
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        target, _, change = part.rpartition(':')
+        if not target:
+            raise ValueError(f"Geçersiz şok tanımı: {part}")
+        target = target.strip()
+        if '=' in target:
+            kind, _, value = target.partition('=')
+            if kind not in ('sector', 'index'):
+                raise ValueError(f"Geçersiz şok hedefi: {kind}")
+            target = (kind, value.strip() if kind == 'sector' else value.strip().upper())
+        elif target.lower() != 'all':
+            target = target.upper()
+        else:
+            target = 'all'
+        shocks.append((target, float(change) / 100))
+    return Scenario(name, shocks)
+
+
+def _fund_matrix(portfolio_ids):
+    """(fon x portföy) üyelik matrisi ve fonların nakit vektörü"""
+    links = list(Portfolio.objects.filter(pk__in=portfolio_ids, fund__isnull=False).values_list('id', 'fund_id'))
+    fund_ids = sorted({fund_id for _, fund_id in links})
+    fund_index = {fund_id: i for i, fund_id in enumerate(fund_ids)}
+    portfolio_index = {portfolio_id: j for j, portfolio_id in enumerate(portfolio_ids)}
+
+    matrix = np.zeros((len(fund_ids), len(portfolio_ids)))
+    for portfolio_id, fund_id in links:
+        matrix[fund_index[fund_id], portfolio_index[portfolio_id]] = 1.0
+
+    cash = np.zeros(len(fund_ids))
+    for fund_id, amount in Fund.objects.filter(pk__in=fund_ids).values_list('id', 'cash'):
+        cash[fund_index[fund_id]] = float(amount)
+    return fund_ids, matrix, cash
+
+
+def _investor_matrices(portfolio_ids, fund_ids):
+    """
+    Yatırımcıların portföy ve fonlardaki paylarını matris olarak döndürür.
+
+    Fona bağlı olmayan portföyler doğrudan sahibine (Portfolio.investor) tam
+    olarak, fonlar ise yatırımcılara pay adedi / fon toplam pay oranında dağıtılır.
+    """
+    direct = list(Portfolio.objects.filter(
+        pk__in=portfolio_ids,
+        investor__isnull=False,
+        fund__isnull=True
+    ).values_list('investor_id', 'id'))
+    shares = list(FundShare.objects.filter(fund_id__in=fund_ids).values_list('investor_id', 'fund_id', 'shares_count'))
+    total_shares = dict(Fund.objects.filter(pk__in=fund_ids).values_list('id', 'total_shares'))
+
+    investor_ids = sorted({investor_id for investor_id, _ in direct} | {investor_id for investor_id, _, _ in shares})
+    investor_index = {investor_id: i for i, investor_id in enumerate(investor_ids)}
+    portfolio_index = {portfolio_id: j for j, portfolio_id in enumerate(portfolio_ids)}
+    fund_index = {fund_id: j for j, fund_id in enumerate(fund_ids)}
+
+    owns = np.zeros((len(investor_ids), len(portfolio_ids)))
+    for investor_id, portfolio_id in direct:
+        owns[investor_index[investor_id], portfolio_index[portfolio_id]] = 1.0
+
+    fractions = np.zeros((len(investor_ids), len(fund_ids)))
+    for investor_id, fund_id, count in shares:
+        total = total_shares.get(fund_id) or 0
+        if total > 0:
+            fractions[investor_index[investor_id], fund_index[fund_id]] += float(count / total)
+    return investor_ids, owns, fractions
+
+
+def load_book(portfolio_ids=None):
+    """Senaryo değerlemesi için pozisyon, fiyat ve sahiplik matrislerini yükler"""
+    portfolios, stocks, holdings = portfolio_holdings(portfolio_ids)
+    fund_ids, membership, fund_cash = _fund_matrix(portfolios)
+    investor_ids, owns, fractions = _investor_matrices(portfolios, fund_ids)
+    return ScenarioBook(
+        portfolios, stocks, holdings * price_vector(stocks),
+        fund_ids, membership, fund_cash,
+        investor_ids, owns, fractions,
+    )
+
+
+def evaluate(book, shocks, names=None):
+    """
+    Şok matrisini (hisse x senaryo) yüklenmiş portföylere uygular.
+
+    Pozisyon değer matrisi V (portföy x hisse) şok matrisiyle çarpılarak portföy
+    etkisi bulunur; fon ve yatırımcı etkileri üyelik/pay matrisleriyle aynı
+    şekilde matris çarpımıyla toplanır. Fon nakdi değere eklenir, şoklanmaz.
+
+    Returns:
+        ScenarioResult: Değerler ve etkiler TL cinsinden
+    """
+    portfolio_values = book.values.sum(axis=1)
+    portfolio_impact = book.values @ shocks
+
+    fund_values = book.membership @ portfolio_values + book.fund_cash
+    fund_impact = book.membership @ portfolio_impact
+
+    investor_values = book.owns @ portfolio_values + book.fractions @ fund_values
+    investor_impact = book.owns @ portfolio_impact + book.fractions @ fund_impact
+
+    return ScenarioResult(
+        names or [f"Senaryo {k + 1}" for k in range(shocks.shape[1])],
+        book.portfolio_ids, portfolio_values, portfolio_impact,
+        book.fund_ids, fund_values, fund_impact,
+        book.investor_ids, investor_values, investor_impact,
+    )
+
+
+def run_scenarios(scenarios, portfolio_ids=None):
+    """Senaryoları tüm portföy, fon ve yatırımcılar için tek seferde değerler"""
+    book = load_book(portfolio_ids)
+    return evaluate(book, shock_matrix(book.stocks, scenarios), [scenario.name for scenario in scenarios])
+
+
+def impact_percentage(values, impact):
+    """TL etkisini mevcut değere göre yüzdeye çevirir (değer yoksa NaN)"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(values[:, None] > 0, impact / values[:, None] * 100, np.nan)
@@ -0,0 +1,231 @@
+import logging
+import re
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .models import Stock
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'search:stocks:version'
+# Diğer işlemlerde eklenen hisseler için sürüm kontrol aralığı (saniye)
+CHECK_SECONDS = getattr(settings, 'SEARCH_INDEX_CHECK_SECONDS', 5)
+# Bulanık eşleşme için en düşük trigram benzerliği (Dice katsayısı)
+FUZZY_THRESHOLD = 0.4
+
+# Python'un lower()'ı İ -> i̇ (noktalı birleşik) ve I -> i yapar; Türkçede İ -> i, I -> ı
+_TURKISH_LOWER = str.maketrans({'I': 'ı', 'İ': 'i'})
+_WORDS = re.compile(r'[^\W_]+')
+
+
+def fold(text):
+    """
+    Arama için katlanmış metin: Türkçe küçük harf, ardından aksanlar atılır
+    (ç->c, ğ->g, ı->i, ö->o, ş->s, ü->u). 'İŞBANK', 'işbank' ve 'isbank' aynı anahtara iner.
+    """
+    text = unicodedata.normalize('NFKD', text.translate(_TURKISH_LOWER).lower())
+    return ''.join(char for char in text if not unicodedata.combining(char)).replace('ı', 'i')
+
+
+def _words(text):
+    return _WORDS.findall(text)
+
+
+def _trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class StockSearchIndex:
+    """
+    Hisse kodu ve şirket adı üzerinde bellek içi arama indeksi.
+
+    Kod ve ad kelimeleri katlanıp sıralı bir kelime dizisinde tutulur; önek araması
+    bu dizide ikili aramayla yapılır (önek ağacıyla aynı sonuç, ek düğüm nesnesi
+    olmadan). Önek eşleşmesi yetmediğinde kelime trigramları üzerinden yazım hatalarına
+    dayanıklı bulanık eşleşme yapılır. Sorgular veritabanına gitmez.
+    """
+
+    def __init__(self):
+        self.stocks = []           # (kod, ad, sektör)
+        self.folded_codes = []
+        self.folded_names = []
+        self.tokens = []           # sıralı katlanmış kelimeler
+        self.postings = []         # kelime -> hisse sıra numaraları
+        self.token_grams = []      # kelime -> trigram sayısı
+        self.grams = {}            # trigram -> kelime sıra numaraları
+        self.by_code = {}
+        self.version = None
+        self.checked_at = None
+        self.lock = threading.Lock()
+
+    def build(self, rows=None):
+        """İndeksi (kod, ad, sektör) satırlarından veya veritabanından kurar"""
+        if rows is None:
+            rows = Stock.objects.order_by('code').values_list('code', 'name', 'sector')
+        stocks = list(rows)
+
+        postings = defaultdict(set)
+        folded_codes, folded_names = [], []
+        for position, (code, name, _) in enumerate(stocks):
+            folded_code, folded_name = fold(code), fold(name or '')
+            folded_codes.append(folded_code)
+            folded_names.append(folded_name)
+            for token in {folded_code, *_words(folded_name)}:
+                postings[token].add(position)
+
+        tokens = sorted(postings)
+        grams = defaultdict(list)
+        token_grams = []
+        for token_id, token in enumerate(tokens):
+            token_trigrams = _trigrams(token)
+            token_grams.append(len(token_trigrams))
+            for gram in token_trigrams:
+                grams[gram].append(token_id)
+
+        self.stocks = stocks
+        self.folded_codes = folded_codes
+        self.folded_names = folded_names
+        self.tokens = tokens
+        self.postings = [tuple(sorted(postings[token])) for token in tokens]
+        self.token_grams = token_grams
+        self.grams = dict(grams)
+        self.by_code = {code: position for position, (code, _, _) in enumerate(stocks)}
+        logger.debug(f"Hisse arama indeksi kuruldu: {len(stocks)} hisse, {len(tokens)} kelime")
+
+    def sync(self):
+        """
+        İlk aramada indeksi kurar; sonra en fazla CHECK_SECONDS'ta bir önbellekteki
+        sürüme bakar, yeni hisse eklendiyse yeniden kurar.
+        """
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < CHECK_SECONDS:
+            return
+        with self.lock:
+            if self.checked_at is not None and now - self.checked_at < CHECK_SECONDS:
+                return
+            version = cache.get(VERSION_KEY, 0)
+            if self.checked_at is None or version != self.version:
+                self.build()
+                self.version = version
+            self.checked_at = now
+
+    def reset(self):
+        """Sonraki aramada sürüm kontrolünü zorlar"""
+        self.checked_at = None
+
+    def name_changed(self, code, name):
+        """İndeks kurulmuşsa hissenin adı indekstekinden farklı mı (kurulmamışsa False)"""
+        position = self.by_code.get(code)
+        return self.checked_at is not None and position is not None and self.stocks[position][1] != name
+
+    def _prefix(self, word):
+        """Kelimeyle başlayan kelimeleri içeren hisseler"""
+        start = bisect_left(self.tokens, word)
+        end = bisect_left(self.tokens, word + '\uffff', start)
+        matched = set()
+        for token_id in range(start, end):
+            matched.update(self.postings[token_id])
+        return matched
+
+    def _fuzzy(self, word):
+        """Trigram benzerliği eşiği geçen kelimeleri içeren hisseler: {sıra: benzerlik}"""
+        word_trigrams = _trigrams(word)
+        shared = defaultdict(int)
+        for gram in word_trigrams:
+            for token_id in self.grams.get(gram, ()):
+                shared[token_id] += 1
+
+        scores = {}
+        for token_id, count in shared.items():
+            similarity = 2 * count / (len(word_trigrams) + self.token_grams[token_id])
+            if similarity >= FUZZY_THRESHOLD:
+                for position in self.postings[token_id]:
+                    scores[position] = max(scores.get(position, 0), similarity)
+        return scores
+
+    def _rank(self, position, query):
+        code = self.folded_codes[position]
+        if code == query:
+            return 4
+        if code.startswith(query):
+            return 3
+        if self.folded_names[position].startswith(query):
+            return 2
+        return 1
+
+    def search(self, query, limit=10):
+        """
+        Hisse arar. Her sorgu kelimesi hissenin kodunun veya bir ad kelimesinin
+        önekiyse eşleşir; önce tam kod, kod öneki, ad öneki, sonra diğer kelime
+        eşleşmeleri gelir. Önek sonuçları `limit`i doldurmazsa bulanık eşleşmeler eklenir.
+
+        Args:
+            query: Arama metni (büyük/küçük harf ve Türkçe karakter duyarsız)
+            limit: En fazla sonuç (None ise tümü)
+
+        Returns:
+            list: {code, name, sector, score} sözlükleri (skor: 1-4 önek, 0-1 bulanık)
+        """
+        self.sync()
+        folded = fold(query)
+        words = _words(folded)
+        if not words:
+            return []
+        phrase = ' '.join(words)
+
+        matches = [self._prefix(word) for word in words]
+        scores = {position: self._rank(position, phrase) for position in set.intersection(*matches)}
+
+        if limit is None or len(scores) < limit:
+            # Yazım hatası: önekle eşleşmeyen kelimelerin bulanık benzerliklerinin ortalaması
+            per_word = [
+                dict.fromkeys(prefix, 1.0) if prefix else self._fuzzy(word)
+                for word, prefix in zip(words, matches)
+            ]
+            fuzzy = set.intersection(*(set(candidates) for candidates in per_word)) - scores.keys()
+            for position in fuzzy:
+                # Önek eşleşmeleri 1'den başladığından bulanık skor hep altında kalır
+                scores[position] = min(sum(candidates[position] for candidates in per_word) / len(words), 0.99)
+
+        ordered = sorted(scores.items(), key=lambda item: (-item[1], self.stocks[item[0]][0]))
+        if limit is not None:
+            ordered = ordered[:limit]
+        return [
+            {'code': code, 'name': name, 'sector': sector, 'score': round(score, 2)}
+            for (code, name, sector), score in ((self.stocks[position], score) for position, score in ordered)
+        ]
+
+    def search_codes(self, query, limit=None):
+        return [row['code'] for row in self.search(query, limit)]
+
+
+_index = StockSearchIndex()
+
+
+def search_index():
+    """İşlem genelinde paylaşılan hisse arama indeksi"""
+    return _index
+
+
+def search_stocks(query, limit=10):
+    return _index.search(query, limit)
+
+
+def _publish_version():
+    cache.set(VERSION_KEY, time.time_ns(), None)
+    _index.reset()
+
+
+def invalidate_search_index():
+    """
+    Hisse listesi değişti; transaction tamamlanınca tüm işlemlerin indeksleri
+    (en geç CHECK_SECONDS içinde) yeniden kurulur.
+    """
+    transaction.on_commit(_publish_version)
@@ -1,14 +1,45 @@
+import logging
 from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
+from django.dispatch import receiver, Signal
 from django.utils import timezone
 from decimal import Decimal
 from django.db import transaction as db_transaction
-from .models import Transaction, Position, FundShare, Fund, Portfolio
+from .models import Transaction, Position, FundShare, Fund, FundNav, Portfolio, PortfolioSnapshot, Stock, WatchList, WatchListItem
+from .lots import apply_to_position
+from .recompute import apply_transaction, current_batch, deferred_recompute, transaction_cash
+
+logger = logging.getLogger(__name__)
+
+# Fiyat verisi çekme işlemi tamamlandığında gönderilir
+# Argümanlar: prices (yeni kaydedilen PriceData listesi),
+#             previous (isteğe bağlı, {hisse: (fiyat, değişim yüzdesi)} grup öncesi son değerler)
+prices_ingested = Signal()
+
+# Fiyat bir pozisyonun zarar kesme/hedef fiyatını veya izleme hedefini geçtiğinde gönderilir
+# Argümanlar: events (monitors.LevelEvent listesi)
+levels_crossed = Signal()
 
 @receiver(post_save, sender=Transaction)
 def update_position_on_transaction(sender, instance, created, **kwargs):
     """Bir işlem kaydedildiğinde portföy pozisyonlarını günceller"""
     
+    # Toplu işlem sırasında pozisyonu sona bırak
+    batch = current_batch()
+    if batch is not None:
+        batch.mark_position(instance.portfolio_id, instance.stock_id)
+        return
+    
+    # Düzenlenen veya geriye tarihli işlemde lot sırası değişir, pozisyonu geçmişten yeniden kur
+    later_exists = Transaction.objects.filter(
+        portfolio_id=instance.portfolio_id,
+        stock_id=instance.stock_id,
+        date__gt=instance.date
+    ).exists()
+    if not created or later_exists:
+        with deferred_recompute() as batch:
+            batch.mark_position(instance.portfolio_id, instance.stock_id)
+        return
+    
     # İşlem değişkenleri
     portfolio = instance.portfolio
     stock = instance.stock
@@ -29,109 +60,50 @@ def update_position_on_transaction(sender, instance, created, **kwargs):
         }
     )
     
-    # İşlem tipine göre pozisyonu güncelle
-    if transaction_type == 'buy':
-        # Alım işlemi
-        new_total_cost = (position.quantity * position.average_cost) + (quantity * price)
-        new_quantity = position.quantity + quantity
-        
-        if new_quantity > 0:
-            # Yeni ortalama maliyet hesapla
-            position.average_cost = new_total_cost / new_quantity
-        
-        position.quantity = new_quantity
-        position.is_open = True  # Pozisyon açık
-        
-    elif transaction_type == 'sell':
-        # Satım işlemi
-        position.quantity -= quantity
-        
-        # Eğer tüm hisseler satıldıysa pozisyonu kapat
-        if position.quantity <= 0:
-            position.quantity = Decimal('0')
-            position.is_open = False  # Pozisyon kapalı
-            
-    elif transaction_type == 'dividend':
-        # Temettü işlemi - pozisyonu değiştirmez, sadece portföy değerini etkiler
-        pass
-        
-    elif transaction_type == 'split':
-        # Hisse bölünmesi - miktarı artırır, ortalama maliyeti düşürür
-        split_ratio = price  # Bölünme oranı
-        position.quantity *= split_ratio
-        position.average_cost /= split_ratio
-        
-    elif transaction_type == 'merge':
-        # Hisse birleşmesi - miktarı azaltır, ortalama maliyeti artırır
-        merge_ratio = price  # Birleşme oranı
-        position.quantity /= merge_ratio
-        position.average_cost *= merge_ratio
+    # İşlem tipine göre pozisyonu ve açık lotları güncelle
+    apply_transaction(position, transaction_type, quantity, price)
+    gain = apply_to_position(position, instance)
     
     # Pozisyonu kaydet
     position.save()
+    
+    # Satışın gerçekleşen kar/zararını işleme yaz (save() sinyali tekrar tetiklemesin)
+    if gain is not None:
+        Transaction.objects.filter(pk=instance.pk).update(realized_profit_loss=gain.quantize(Decimal('0.01')))
 
 @receiver(post_delete, sender=Transaction)
 def update_position_on_transaction_delete(sender, instance, **kwargs):
     """Bir işlem silindiğinde, ilgili pozisyonu yeniden hesaplar"""
     
-    portfolio = instance.portfolio
-    stock = instance.stock
-    
-    try:
-        # İlgili pozisyonu bul
-        position = Position.objects.get(portfolio=portfolio, stock=stock)
-        
-        # Pozisyon için tüm işlemleri yeniden hesapla
-        transactions = Transaction.objects.filter(
-            portfolio=portfolio, 
-            stock=stock
-        ).order_by('date')
-        
-        if not transactions.exists():
-            # Eğer başka işlem kalmadıysa pozisyonu sil
-            position.delete()
-            return
-        
-        # Pozisyonu sıfırla
-        position.quantity = Decimal('0')
-        position.average_cost = Decimal('0')
-        position.open_date = transactions.first().date
-        
-        # Tüm işlemleri yeniden hesapla
-        total_cost = Decimal('0')
-        
-        for tx in transactions:
-            if tx.transaction_type == 'buy':
-                # Alım işlemi
-                total_cost += tx.quantity * tx.price
-                position.quantity += tx.quantity
-            elif tx.transaction_type == 'sell':
-                # Satım işlemi
-                position.quantity -= tx.quantity
-            # Diğer işlem tipleri için ek mantık eklenebilir
-        
-        # Ortalama maliyeti hesapla
-        if position.quantity > 0:
-            position.average_cost = total_cost / position.quantity
-            position.is_open = True
-        else:
-            position.is_open = False
-        
-        position.save()
-    
-    except Position.DoesNotExist:
-        # Pozisyon yoksa bir şey yapma
-        pass
+    # Pozisyon, lotlar ve satış kar/zararları kalan işlemlerden yeniden kurulur,
+    # işlemin fon nakdine etkisi geri alınır; toplu silme sırasında dıştaki gruba katılır
+    with deferred_recompute() as batch:
+        batch.mark_position(instance.portfolio_id, instance.stock_id)
+        batch.add_portfolio_cash_delta(instance.portfolio_id, -transaction_cash(
+            instance.transaction_type, instance.quantity, instance.price, instance.commission, instance.tax
+        ))
 
 @receiver(post_save, sender=FundShare)
 def update_fund_on_share_creation(sender, instance, created, **kwargs):
     """Bir fon payı oluşturulduğunda/güncellendiğinde fon değerlerini günceller"""
     
-    if created:  # Yeni bir yatırımcı eklendiğinde
+    batch = current_batch()
+    
+    if created and batch is not None:
+        # Toplu işlem sırasında farkları biriktir, fon bir kez güncellenecek
+        batch.add_fund_share_delta(
+            instance.fund_id,
+            initial_value=instance.initial_investment,
+            current_value=instance.initial_investment,
+            total_shares=instance.shares_count
+        )
+        batch.add_fund_cash_delta(instance.fund_id, instance.initial_investment)
+    elif created:  # Yeni bir yatırımcı eklendiğinde
         fund = instance.fund
-        # Başlangıç değerini ve güncel değeri artır
+        # Başlangıç değerini ve güncel değeri artır; yatırılan tutar fon nakdine girer
         fund.initial_value += instance.initial_investment
         fund.current_value += instance.initial_investment
+        fund.cash += instance.initial_investment
         # Toplam pay adedini artır
         fund.total_shares += instance.shares_count
         fund.save()
@@ -152,12 +124,27 @@ def update_fund_on_share_deletion(sender, instance, **kwargs):
         # Pay değerini hesapla
         share_value = fund.current_value / fund.total_shares
         
+        # Güncel değer, silinen payların güncel değeri kadar azalacak
+        current_share_value = instance.shares_count * share_value
+        
+        batch = current_batch()
+        if batch is not None:
+            # Toplu silme sırasında farkları biriktir, fon bir kez güncellenecek
+            batch.add_fund_share_delta(
+                fund.pk,
+                initial_value=-instance.initial_investment,
+                current_value=-current_share_value,
+                total_shares=-instance.shares_count
+            )
+            batch.add_fund_cash_delta(fund.pk, -current_share_value)
+            return
+        
         # Başlangıç değerini azalt (ama negatife düşmesini önle)
         fund.initial_value = max(Decimal('0'), fund.initial_value - instance.initial_investment)
         
-        # Güncel değeri, silinen payların güncel değeri kadar azalt
-        current_share_value = instance.shares_count * share_value
+        # Güncel değeri azalt; payların karşılığı fon nakdinden ödenir
         fund.current_value = max(Decimal('0'), fund.current_value - current_share_value)
+        fund.cash -= current_share_value
         
         # Toplam pay adedini azalt
         fund.total_shares = max(Decimal('0'), fund.total_shares - instance.shares_count)
@@ -167,20 +154,161 @@ def update_fund_on_share_deletion(sender, instance, **kwargs):
 @receiver(post_save, sender=Portfolio)
 def update_fund_on_portfolio_change(sender, instance, **kwargs):
     """Portföy değiştiğinde bağlı fonu güncelle"""
+    batch = current_batch()
+    if batch is not None:
+        batch.mark_fund(instance.fund_id)
+        return
     if instance.fund:
         instance.fund.update_value_from_portfolios()
 
 @receiver(post_save, sender=Position)
 def update_fund_on_position_change(sender, instance, **kwargs):
     """Pozisyon değiştiğinde bağlı fonu güncelle"""
+    batch = current_batch()
+    if batch is not None:
+        batch.mark_portfolio(instance.portfolio_id)
+        return
     portfolio = instance.portfolio
     if portfolio and portfolio.fund:
         portfolio.fund.update_value_from_portfolios()
 
 @receiver(post_save, sender=Transaction)
 def update_fund_on_transaction(sender, instance, **kwargs):
-    """İşlem yapıldığında bağlı fonu güncelle"""
-    portfolio = instance.portfolio
-    if portfolio and portfolio.fund:
-        # Direkt güncelle
-        portfolio.fund.update_value_from_portfolios() 
\ No newline at end of file
+    """İşlem yapıldığında bağlı fonun nakdini ve değerini güncelle"""
+    previous = getattr(instance, '_previous_cash', None)
+    if current_batch() is None and previous is None and not instance.portfolio.fund_id:
+        return
+
+    # Alım fon nakdinden düşülür, satım ve temettü nakde eklenir; düzenlenen
+    # işlemin eski etkisi geri alınır. Fon değeri toplu hesaplamada nakitle birlikte güncellenir.
+    with deferred_recompute() as batch:
+        batch.add_portfolio_cash_delta(instance.portfolio_id, transaction_cash(
+            instance.transaction_type, instance.quantity, instance.price, instance.commission, instance.tax
+        ))
+        if previous is not None:
+            portfolio_id, *values = previous
+            batch.add_portfolio_cash_delta(portfolio_id, -transaction_cash(*values))
+
+@receiver(prices_ingested)
+def update_fund_navs_on_ingest(sender, prices, **kwargs):
+    """Yeni fiyatlar geldiğinde fonların bugünkü NAV kaydını günceller"""
+    if not prices:
+        return
+    from .nav import update_latest_fund_navs
+    updated = update_latest_fund_navs()
+    logger.info(f"{updated} fonun günlük NAV kaydı güncellendi")
+
+
+@receiver(prices_ingested)
+def update_daily_prices_on_ingest(sender, prices, **kwargs):
+    """Yeni fiyatları hisselerin günlük özetlerine (DailyPrice) işler"""
+    if not prices:
+        return
+    from .rollups import update_daily_prices
+    update_daily_prices(prices)
+
+
+@receiver(prices_ingested)
+def evaluate_alerts_on_ingest(sender, prices, previous=None, **kwargs):
+    """Yeni fiyatlarda eşiği geçilen alarmları tetikler"""
+    if not prices:
+        return
+    from .alerts import evaluate_prices
+    evaluate_prices(prices, previous)
+
+
+@receiver(prices_ingested)
+def check_levels_on_ingest(sender, prices, previous=None, **kwargs):
+    """Yeni fiyatlarda zarar kesme, hedef fiyat ve izleme hedefi geçişlerini arar"""
+    if not prices:
+        return
+    from .monitors import check_prices
+    check_prices(prices, previous)
+
+
+@receiver(levels_crossed)
+def notify_levels_crossed(sender, events, **kwargs):
+    """Seviye geçişleri için sahiplerine bildirim kuyruğa ekler"""
+    from .notifications import enqueue_level_notifications
+    enqueue_level_notifications(events)
+
+
+@receiver(prices_ingested)
+def update_custom_benchmarks_on_ingest(sender, prices, **kwargs):
+    """Yeni fiyatlar geldiğinde bileşenli özel endekslerin son değerlerini günceller"""
+    if not prices:
+        return
+    from .benchmarks import update_custom_benchmarks
+    updated = update_custom_benchmarks()
+    logger.info(f"{updated} özel endeks değeri güncellendi")
+
+
+@receiver(prices_ingested)
+@receiver(post_save, sender=Transaction)
+@receiver(post_delete, sender=Transaction)
+@receiver(post_save, sender=FundShare)
+@receiver(post_delete, sender=FundShare)
+@receiver(post_save, sender=Portfolio)
+@receiver(post_delete, sender=Portfolio)
+def invalidate_exposures_on_change(sender, **kwargs):
+    """Fiyat, işlem, pay veya portföy değiştiğinde yatırımcı hisse dağılımlarını geçersiz kılar"""
+    from .exposure import invalidate_exposures
+    invalidate_exposures()
+
+
+@receiver(prices_ingested)
+def rebuild_dashboards_on_ingest(sender, prices, **kwargs):
+    """Fiyat alımından sonra tüm yatırımcı dashboard'larını Celery görevinde toplu yeniden oluşturur"""
+    if not prices:
+        return
+    from .read_models import schedule_rebuild
+    schedule_rebuild()
+
+
+@receiver(post_save, sender=FundShare)
+@receiver(post_delete, sender=FundShare)
+def rebuild_dashboards_on_share_change(sender, instance, **kwargs):
+    """Fon payı değiştiğinde yatırımcının ve fondaki diğer yatırımcıların dashboard'larını yeniler"""
+    from .read_models import schedule_rebuild
+    schedule_rebuild(investor_ids=[instance.investor_id], fund_ids=[instance.fund_id])
+
+
+@receiver(post_save, sender=Fund)
+def rebuild_dashboards_on_fund_change(sender, instance, **kwargs):
+    """Fon değeri veya pay adedi değiştiğinde fondaki yatırımcıların dashboard'larını yeniler"""
+    from .read_models import schedule_rebuild
+    schedule_rebuild(fund_ids=[instance.pk])
+
+
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+def invalidate_search_index_on_stock_change(sender, instance, created=False, **kwargs):
+    """Yeni, silinen veya adı değişen hisselerde arama indekslerinin yeniden kurulmasını ister"""
+    from .search import invalidate_search_index, search_index
+    # Fiyat alımı her hisseyi yeniden kaydeder; sadece liste veya ad değiştiyse yeniden kurulur
+    if created or kwargs.get('signal') is post_delete or search_index().name_changed(instance.code, instance.name):
+        invalidate_search_index()
+
+
+@receiver(post_save, sender=WatchListItem)
+@receiver(post_delete, sender=WatchListItem)
+def invalidate_watchlist_codes_on_item_change(sender, instance, **kwargs):
+    """İzleme öğesi eklenip silindiğinde panonun önbellekteki hisse listesini siler"""
+    from .watchlists import invalidate_watchlist_codes
+    invalidate_watchlist_codes(instance.watchlist.user_id)
+
+
+@receiver(post_delete, sender=WatchList)
+def invalidate_watchlist_codes_on_list_delete(sender, instance, **kwargs):
+    from .watchlists import invalidate_watchlist_codes
+    invalidate_watchlist_codes(instance.user_id)
+
+
+@receiver(post_save, sender=PortfolioSnapshot)
+@receiver(post_delete, sender=PortfolioSnapshot)
+@receiver(post_save, sender=FundNav)
+@receiver(post_delete, sender=FundNav)
+def invalidate_chart_series_on_change(sender, instance, **kwargs):
+    """Anlık görüntü veya NAV tek tek düzenlendiğinde portföy/fon grafik serilerini geçersiz kılar"""
+    from .charts import invalidate_series
+    invalidate_series()
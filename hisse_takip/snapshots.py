@@ -0,0 +1,217 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+import numpy as np
+from django.utils import timezone
+from .analytics import transaction_flows
+from .benchmarks import COMPARISON_DAYS, attach_comparisons, update_benchmark_comparisons
+from .charts import invalidate_series
+from .models import Portfolio, PortfolioSnapshot, Position, Transaction
+from .pricing import latest_prices
+from .recompute import apply_transaction
+from .timeseries import daily_closes, day_bounds, forward_fill, to_local_days
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_UPDATE_FIELDS = ['total_value', 'total_cost', 'profit_loss', 'profit_loss_percentage']
+BACKFILL_UPDATE_FIELDS = SNAPSHOT_UPDATE_FIELDS + ['benchmark_comparison']
+
+
+def _snapshot(portfolio_id, day, value, cost):
+    """Değer ve maliyetten PortfolioSnapshot nesnesi oluşturur"""
+    profit_loss = value - cost
+    percentage = (profit_loss / cost) * 100 if cost else 0
+    return PortfolioSnapshot(
+        portfolio_id=portfolio_id,
+        date=day,
+        total_value=Decimal(f"{value:.2f}"),
+        total_cost=Decimal(f"{cost:.2f}"),
+        profit_loss=Decimal(f"{profit_loss:.2f}"),
+        profit_loss_percentage=Decimal(f"{percentage:.2f}"),
+    )
+
+
+def save_snapshots(rows, update_fields=None, batch_size=1000):
+    """Anlık görüntüleri (portföy, tarih) çiftine göre toplu olarak ekler veya günceller"""
+    PortfolioSnapshot.objects.bulk_create(
+        rows,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['portfolio', 'date'],
+        update_fields=update_fields or SNAPSHOT_UPDATE_FIELDS,
+    )
+    # bulk_create sinyal göndermez
+    invalidate_series()
+    return len(rows)
+
+
+def holding_history(portfolio_ids, end):
+    """
+    İşlem geçmişini tek geçişte tarayarak her (portföy, hisse) çiftinin
+    her işlemden sonraki adet ve toplam maliyetini çıkarır.
+
+    Returns:
+        tuple: (çift listesi, olay dizileri: çift indeksi, gün, adet, maliyet)
+    """
+    _, end_dt = day_bounds(end, end)
+    rows = Transaction.objects.filter(
+        portfolio_id__in=portfolio_ids,
+        date__lt=end_dt
+    ).order_by('date', 'id').values_list('portfolio_id', 'stock_id', 'transaction_type', 'quantity', 'price', 'date')
+
+    pairs = {}
+    states = []
+    pair_idx, moments, quantities, costs = [], [], [], []
+    for portfolio_id, stock_id, transaction_type, quantity, price, date in rows.iterator(chunk_size=10000):
+        key = (portfolio_id, stock_id)
+        index = pairs.get(key)
+        if index is None:
+            index = pairs[key] = len(states)
+            states.append(SimpleNamespace(quantity=Decimal('0'), average_cost=Decimal('0'), is_open=True))
+
+        state = apply_transaction(states[index], transaction_type, quantity, price)
+        pair_idx.append(index)
+        moments.append(date.replace(tzinfo=None))
+        quantities.append(state.quantity)
+        costs.append(state.quantity * state.average_cost)
+
+    events = (
+        np.array(pair_idx, dtype=np.int64),
+        to_local_days(moments),
+        np.array(quantities, dtype=np.float64),
+        np.array(costs, dtype=np.float64),
+    )
+    return list(pairs), events
+
+
+def daily_holdings(size, dates, pair_idx, event_days, *values):
+    """
+    holding_history olaylarını (çift x gün) matrislerine yerleştirir.
+
+    Aralık öncesi olaylar ilk güne, işlem günü olmayan günlerdeki olaylar bir
+    sonraki işlem gününe sayılır; aynı gündeki işlemlerden sonuncusu geçerlidir.
+    Her matris ileri doldurulur, ilk işlemden önceki günler NaN kalır.
+
+    Returns:
+        list: Her değer dizisi için bir (çift x gün) matris
+    """
+    day_idx = np.searchsorted(dates, event_days, side='left')
+    in_range = day_idx < len(dates)
+    key = pair_idx[in_range] * len(dates) + day_idx[in_range]
+
+    # Olaylar tarih sırasında, kararlı sıralamada her anahtarın sonuncusu alınır
+    order = np.argsort(key, kind='stable')
+    key = key[order]
+    last = np.r_[key[1:] != key[:-1], True] if key.size else np.zeros(0, dtype=bool)
+
+    matrices = []
+    for array in values:
+        matrix = np.full((size, len(dates)), np.nan)
+        matrix.flat[key[last]] = array[in_range][order][last]
+        matrices.append(forward_fill(matrix))
+    return matrices
+
+
+def compute_snapshots(start, end, portfolio_ids=None):
+    """
+    İşlem geçmişinden günlük portföy değer ve maliyet serisini hesaplar.
+
+    Her (portföy, hisse) çifti için günlük adet ve maliyet matrisleri olaylardan
+    ileri doldurularak kurulur, günlük kapanış matrisiyle çarpılır ve portföy
+    bazında toplanır. Kıyaslama farkı (benchmark_comparison) aynı matrislerden
+    tüm portföyler için birlikte hesaplanır; bunun için seri, karşılaştırma
+    penceresi kadar geriden başlatılır.
+
+    Returns:
+        list: Kaydedilmemiş PortfolioSnapshot nesneleri
+    """
+    if portfolio_ids is None:
+        portfolio_ids = list(Portfolio.objects.values_list('id', flat=True))
+
+    pairs, (pair_idx, event_days, quantities, costs) = holding_history(portfolio_ids, end)
+    if not pairs:
+        return []
+
+    stocks = sorted({stock_id for _, stock_id in pairs})
+    stock_index = {code: i for i, code in enumerate(stocks)}
+    series = daily_closes(stocks, start - timedelta(days=COMPARISON_DAYS), end)
+    dates = series.dates
+    if not len(dates):
+        return []
+
+    held, cost = daily_holdings(len(pairs), dates, pair_idx, event_days, quantities, costs)
+    active = ~np.isnan(held)
+    held = np.nan_to_num(held)
+    cost = np.nan_to_num(cost)
+
+    pair_stock = np.array([stock_index[stock_id] for _, stock_id in pairs])
+    closes = np.nan_to_num(series.closes[pair_stock], nan=0.0)
+    values = held * closes
+
+    # Çiftleri portföye göre sırala ve portföy bazında topla
+    pair_portfolio = np.array([portfolio_id for portfolio_id, _ in pairs])
+    order = np.argsort(pair_portfolio, kind='stable')
+    portfolios, starts = np.unique(pair_portfolio[order], return_index=True)
+    portfolio_values = np.add.reduceat(values[order], starts, axis=0)
+    portfolio_costs = np.add.reduceat(cost[order], starts, axis=0)
+    portfolio_active = np.logical_or.reduceat(active[order], starts, axis=0)
+
+    day_objects = [day.astype(object) for day in dates]
+    first_day = np.searchsorted(dates, np.datetime64(start, 'D'), side='left')
+    rows = []
+    for i, portfolio_id in enumerate(portfolios.tolist()):
+        for j in np.flatnonzero(portfolio_active[i, first_day:]) + first_day:
+            rows.append(_snapshot(portfolio_id, day_objects[j], portfolio_values[i, j], portfolio_costs[i, j]))
+
+    values = np.where(portfolio_active, portfolio_values, np.nan)
+    flows = transaction_flows(portfolios.tolist(), dates)
+    return attach_comparisons(rows, values, flows, dates, portfolios.tolist())
+
+
+def backfill_snapshots(start=None, end=None, portfolio_ids=None):
+    """Verilen aralıktaki günlük anlık görüntüleri işlem geçmişinden yeniden oluşturur"""
+    if start is None:
+        first = Transaction.objects.order_by('date').values_list('date', flat=True).first()
+        if first is None:
+            return 0
+        start = timezone.localtime(first).date()
+    if end is None:
+        end = timezone.localdate()
+
+    rows = compute_snapshots(start, end, portfolio_ids)
+    saved = save_snapshots(rows, update_fields=BACKFILL_UPDATE_FIELDS)
+    logger.info(f"{start} - {end} aralığı için {saved} portföy anlık görüntüsü oluşturuldu")
+    return saved
+
+
+def write_latest_snapshots(portfolio_ids=None, day=None):
+    """
+    Güncel pozisyonlar ve son fiyatlarla portföylerin günlük anlık görüntüsünü
+    toplu olarak yazar (aynı günün kaydı varsa güncellenir).
+    """
+    day = day or timezone.localdate()
+    positions = Position.objects.all()
+    portfolios = Portfolio.objects.all()
+    if portfolio_ids is not None:
+        positions = positions.filter(portfolio_id__in=portfolio_ids)
+        portfolios = portfolios.filter(pk__in=portfolio_ids)
+
+    rows = list(positions.values_list('portfolio_id', 'stock_id', 'quantity', 'average_cost'))
+    prices = latest_prices({stock_id for _, stock_id, _, _ in rows})
+
+    values = defaultdict(Decimal)
+    costs = defaultdict(Decimal)
+    for portfolio_id, stock_id, quantity, average_cost in rows:
+        values[portfolio_id] += quantity * prices.get(stock_id, 0)
+        costs[portfolio_id] += quantity * average_cost
+
+    snapshots = [
+        _snapshot(portfolio_id, day, values[portfolio_id], costs[portfolio_id])
+        for portfolio_id in portfolios.values_list('id', flat=True)
+    ]
+    saved = save_snapshots(snapshots)
+    update_benchmark_comparisons(day, [snapshot.portfolio_id for snapshot in snapshots])
+    return saved
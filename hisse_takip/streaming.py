@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from .models import Portfolio
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+# Yeni alım grubu / işlem kontrol aralığı (saniye)
+POLL_SECONDS = getattr(settings, 'STREAM_POLL_SECONDS', 2)
+# Bağlantı kesilmesin diye boş bağlantılara yorum satırı gönderme aralığı (saniye)
+KEEPALIVE_SECONDS = getattr(settings, 'STREAM_KEEPALIVE_SECONDS', 15)
+# Yavaş istemci için bekletilen en fazla olay; dolunca en eski olay atılır
+QUEUE_SIZE = 16
+
+
+def format_event(event, data, event_id=None):
+    """Server-Sent Events mesajı"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
+
+class Subscriber:
+    """Bir akış bağlantısı: abone olduğu hisseler/portföyler ve gönderilmeyi bekleyen olaylar"""
+
+    def __init__(self, stocks=(), portfolios=()):
+        self.stocks = frozenset(stocks)
+        self.portfolios = frozenset(portfolios)
+        self.queue = asyncio.Queue(QUEUE_SIZE)
+
+    def put(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+
+class Hub:
+    """
+    İşlem içi yayın merkezi.
+
+    Her alım grubu için tek yayıncı değişen hisse ve portföyleri bir kez hesaplar;
+    hub bunları hisse/portföy -> abone dizinleri üzerinden sadece ilgili bağlantılara
+    dağıtır. Tüm işlemler olay döngüsü iş parçacığında yapılır, kilit gerekmez.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.by_stock = defaultdict(set)
+        self.by_portfolio = defaultdict(set)
+        self.quotes = {}               # hisse -> son gönderilen fiyat satırı
+        self.values = {}               # portföy id -> son gönderilen değerleme
+        self.batch = None
+        self.generation = None
+        self.publisher = None
+
+    def subscribe(self, stocks=(), portfolios=()):
+        subscriber = Subscriber(stocks, portfolios)
+        self.subscribers.add(subscriber)
+        for code in subscriber.stocks:
+            self.by_stock[code].add(subscriber)
+        for portfolio_id in subscriber.portfolios:
+            self.by_portfolio[portfolio_id].add(subscriber)
+        if self.publisher is None or self.publisher.done():
+            self.publisher = asyncio.get_running_loop().create_task(self._publish_loop())
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self.subscribers.discard(subscriber)
+        for index, keys in ((self.by_stock, subscriber.stocks), (self.by_portfolio, subscriber.portfolios)):
+            for key in keys:
+                index[key].discard(subscriber)
+                if not index[key]:
+                    del index[key]
+
+    def fan_out(self, event, rows, index, key_name, event_id=None):
+        """Değişen satırları abone başına tek mesajda toplayıp kuyruklara ekler"""
+        pending = defaultdict(list)
+        for row in rows:
+            for subscriber in index.get(row[key_name], ()):
+                pending[subscriber].append(row)
+        for subscriber, subscriber_rows in pending.items():
+            subscriber.put(format_event(event, {event: subscriber_rows}, event_id))
+        return len(pending)
+
+    def publish_quotes(self, batch, rows):
+        """Yeni grubun fiyatlarından öncekinden farklı olanları yayınlar"""
+        changed = [row for row in rows if self.quotes.get(row['code']) != row]
+        self.quotes.update((row['code'], row) for row in changed)
+        self.batch = batch
+        delivered = self.fan_out('quotes', changed, self.by_stock, 'code', batch)
+        logger.debug(f"Alım grubu {batch}: {len(changed)} hisse değişti, {delivered} aboneye gönderildi")
+
+    def publish_portfolios(self, rows):
+        changed = [row for row in rows if self.values.get(row['id']) != row]
+        self.values.update((row['id'], row) for row in changed)
+        self.fan_out('portfolios', changed, self.by_portfolio, 'id', self.batch)
+
+    async def _publish_loop(self):
+        """
+        Aboneler varken yeni alım grubunu ve işlem değişikliklerini izler.
+
+        Grup id'si ve dağılım nesli önbellekten okunur; sadece değiştiklerinde
+        fiyatlar ve abone olunan portföylerin değerlemeleri tek seferde hesaplanır.
+        """
+        from .api import quote_rows
+        from .exposure import current_generation
+        from .pricing import current_ingest_batch
+
+        while self.subscribers:
+            try:
+                batch = await sync_to_async(current_ingest_batch)()
+                generation = await sync_to_async(current_generation)()
+                new_batch = batch != self.batch
+                if new_batch:
+                    self.publish_quotes(batch, await sync_to_async(quote_rows)())
+                if self.by_portfolio and (new_batch or generation != self.generation or self._unvalued()):
+                    self.publish_portfolios(await sync_to_async(portfolio_values)(list(self.by_portfolio)))
+                self.generation = generation
+            except Exception as e:
+                logger.error(f"Fiyat akışı yayıncısında hata: {e}")
+            await asyncio.sleep(POLL_SECONDS)
+        # Son abone ayrıldı; sonraki abone yayıncıyı yeniden başlatır
+        self.quotes.clear()
+        self.values.clear()
+        self.batch = self.generation = None
+
+    def _unvalued(self):
+        return any(portfolio_id not in self.values for portfolio_id in self.by_portfolio)
+
+    def snapshot(self, subscriber):
+        """Yeni aboneye gönderilecek son durum mesajları"""
+        messages = []
+        quotes = [self.quotes[code] for code in sorted(subscriber.stocks) if code in self.quotes]
+        if quotes:
+            messages.append(format_event('quotes', {'quotes': quotes}, self.batch))
+        values = [self.values[pk] for pk in sorted(subscriber.portfolios) if pk in self.values]
+        if values:
+            messages.append(format_event('portfolios', {'portfolios': values}, self.batch))
+        return messages
+
+
+def portfolio_values(portfolio_ids):
+    """Portföylerin güncel değerlemeleri (pozisyon ayrıntısı olmadan)"""
+    from .api import portfolio_valuations
+
+    rows = list(Portfolio.objects.filter(pk__in=portfolio_ids).order_by('id').values('id', 'name', 'currency'))
+    return [
+        {key: value for key, value in row.items() if key != 'positions'}
+        for row in portfolio_valuations(rows)
+    ]
+
+
+_hub = Hub()
+
+
+def hub():
+    """İşlem genelinde paylaşılan yayın merkezi"""
+    return _hub
+
+
+async def event_stream(stocks=(), portfolios=()):
+    """
+    Hisse ve portföy olaylarını SSE olarak üretir; boşta kalan bağlantıya düzenli
+    yorum satırı gönderir. Abonelik akış başladığında açılır, istemci ayrıldığında
+    kaldırılır.
+    """
+    center = hub()
+    subscriber = center.subscribe(stocks, portfolios)
+    try:
+        # Yayıncı henüz çalışmadıysa ilk durum yayınlandığında kuyruktan gelir
+        for message in center.snapshot(subscriber):
+            yield message
+        while True:
+            try:
+                yield await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+    finally:
+        center.unsubscribe(subscriber)
@@ -24,4 +24,90 @@ def fetch_bist_data_task():
     successful_count, total_count = fetch_and_save_bist_data(API_KEY)
     
     logger.info(f"Celery görevi tamamlandı: {successful_count}/{total_count} hisse verisi işlendi")
-    return f"{successful_count}/{total_count} hisse işlendi"
\ No newline at end of file
+    return f"{successful_count}/{total_count} hisse işlendi"
+
+@shared_task(name="create_daily_snapshots_task")
+def create_daily_snapshots_task():
+    """
+    Tüm portföyler için günlük anlık görüntüleri toplu olarak yazan Celery görevi
+    """
+    from .snapshots import write_latest_snapshots
+    saved = write_latest_snapshots()
+    
+    logger.info(f"Celery görevi tamamlandı: {saved} portföy anlık görüntüsü yazıldı")
+    return f"{saved} anlık görüntü yazıldı"
+
+@shared_task(name="compute_risk_metrics_task")
+def compute_risk_metrics_task():
+    """
+    Kovaryans penceresini güne ilerletip tüm portföy ve fonların risk ölçütlerini hesaplayan Celery görevi
+    """
+    from .risk import compute_risk_metrics
+    saved = compute_risk_metrics()
+    
+    logger.info(f"Celery görevi tamamlandı: {saved} risk ölçütü hesaplandı")
+    return f"{saved} risk ölçütü hesaplandı"
+
+@shared_task(name="settle_fund_dealing_task")
+def settle_fund_dealing_task():
+    """
+    İşlem günü gelmiş fon katılma/ayrılma emirlerini fon bazında toplu gerçekleştiren Celery görevi
+    """
+    from .dealing import settle_dealing
+    results = settle_dealing()
+    settled = sum(result.settled for result in results)
+    
+    logger.info(f"Celery görevi tamamlandı: {len(results)} fonda {settled} emir gerçekleşti")
+    return f"{settled} emir gerçekleşti"
+
+@shared_task(name="dispatch_notifications_task")
+def dispatch_notifications_task():
+    """
+    Bildirim kuyruğundaki bekleyen bildirimleri kullanıcı bazında özet e-postalarla gönderen Celery görevi
+    """
+    from .notifications import dispatch_notifications
+    result = dispatch_notifications()
+    
+    return f"{result.emails} e-posta ile {result.sent} bildirim gönderildi"
+
+@shared_task(name="run_admin_job_task", acks_late=True)
+def run_admin_job_task(job_id):
+    """
+    Arka plan admin işinin bir parçasını çalıştırıp kalan varsa sıradaki parçayı kuyruğa ekleyen Celery görevi
+    """
+    from .jobs import enqueue, run_next_chunk
+    if run_next_chunk(job_id):
+        enqueue(job_id)
+
+@shared_task(name="rebuild_dashboards_task")
+def rebuild_dashboards_task(investor_ids=None):
+    """
+    Yatırımcı dashboard'larını toplu hesaplayıp önbelleğe yazan Celery görevi (fiyat alımından sonra kuyruğa eklenir)
+    """
+    from .read_models import rebuild_dashboards
+    written = rebuild_dashboards(investor_ids)
+    
+    return f"{written} dashboard yeniden oluşturuldu"
+
+@shared_task(name="clear_expired_cache_task")
+def clear_expired_cache_task():
+    """
+    Veritabanı önbelleğinde süresi dolmuş kayıtları silen Celery görevi (önbellek temizliği kapalıdır)
+    """
+    from django.core.cache import caches
+    from django.core.cache.backends.db import DatabaseCache
+    from django.db import connection
+    from django.utils import timezone
+    if not isinstance(caches['default'], DatabaseCache):
+        return "Veritabanı önbelleği kullanılmıyor"
+    
+    table = connection.ops.quote_name(settings.CACHES['default']['LOCATION'])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE expires < %s",
+            [connection.ops.adapt_datetimefield_value(timezone.now().replace(microsecond=0))]
+        )
+        deleted = cursor.rowcount
+    
+    logger.info(f"Celery görevi tamamlandı: {deleted} süresi dolmuş önbellek kaydı silindi")
+    return f"{deleted} önbellek kaydı silindi"
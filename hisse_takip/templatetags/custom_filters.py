@@ -24,4 +24,22 @@ def multiply(value, arg):
     try:
         return value * arg
     except (TypeError, ValueError):
-        return 0 
\ No newline at end of file
+        return 0 
+
+
+@register.filter
+def percentage(value, digits=2):
+    """Ondalık oranı yüzde olarak biçimlendirir (0.1234 -> 12.34), değer yoksa '-' döndürür"""
+    try:
+        return f"{float(value) * 100:.{int(digits)}f}"
+    except (TypeError, ValueError):
+        return "-"
+
+
+@register.filter
+def number(value, digits=2):
+    """Sayıyı biçimlendirir, değer yoksa '-' döndürür"""
+    try:
+        return f"{float(value):.{int(digits)}f}"
+    except (TypeError, ValueError):
+        return "-"
@@ -1,3 +1,537 @@
-from django.test import TestCase
+import io
+import math
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import numpy as np
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from .alerts import AlertIndex, evaluate_prices
+from .analytics import (
+    compute_metrics, daily_returns, max_drawdown, portfolio_analytics, time_weighted_return, transaction_flows,
+)
+from .benchmarks import comparison_matrix
+from .charts import lttb
+from .dealing import dealing_date_for, last_settleable_day, place_order, settle_fund
+from .importers import import_transactions
+from .lots import LotBook
+from .models import (
+    Alert, BenchmarkIndex, BenchmarkValue, DealingOrder, Fund, FundNav, FundShare, Investor, Notification, Portfolio,
+    PortfolioSnapshot, Position, PriceData, Stock, Transaction,
+)
+from .nav import compute_fund_navs, update_latest_fund_navs
+from .pricing import publish_ingest_batch
+from .read_models import dashboard_key, schedule_rebuild
+from .scenarios import Scenario, run_scenarios
+from .snapshots import backfill_snapshots
+from .ticks import TickBuffer
 
-# Create your tests here.
+
+def _moment(day, hour=10, minute=0):
+    return timezone.make_aware(datetime(day.year, day.month, day.day, hour, minute))
+
+
+def _price(code, price, moment, **fields):
+    """Verilen zamanda fiyat kaydı oluşturur (timestamp alanı auto_now_add olduğundan sonradan yazılır)"""
+    row = PriceData.objects.create(stock_id=code, price=Decimal(price), change_percentage=Decimal('0'), **fields)
+    PriceData.objects.filter(pk=row.pk).update(timestamp=moment)
+    row.timestamp = moment
+    return row
+
+
+class AnalyticsTests(SimpleTestCase):
+    """Performans ölçütleri elle hesaplanmış serilerle karşılaştırılır"""
+
+    def test_time_weighted_return_excludes_flows(self):
+        values = np.array([[100.0, 160.0, 165.0]])
+        flows = np.array([[0.0, 50.0, 0.0]])
+        returns = daily_returns(values, flows)
+        # (160 - 100 - 50) / 100 = 0.1, (165 - 160) / 160 = 0.03125
+        np.testing.assert_allclose(returns, [[0.1, 0.03125]])
+        np.testing.assert_allclose(time_weighted_return(returns), [1.1 * 1.03125 - 1])
+
+    def test_drawdown_and_volatility(self):
+        metrics = compute_metrics(np.array([[100.0, 110.0, 99.0, 99.0]]))
+        np.testing.assert_allclose(metrics['time_weighted_return'], [-0.01])
+        np.testing.assert_allclose(metrics['max_drawdown'], [0.99 / 1.1 - 1])
+        np.testing.assert_allclose(metrics['volatility'], [0.1 * math.sqrt(252)])
+        self.assertEqual(metrics['observations'][0], 3)
+
+    def test_money_weighted_return_over_one_year(self):
+        dates = np.array(['2025-01-01', '2026-01-01'], dtype='datetime64[D]')
+        metrics = compute_metrics(np.array([[100.0, 110.0]]), dates=dates)
+        np.testing.assert_allclose(metrics['money_weighted_return'], [0.1], rtol=1e-6)
+
+    def test_rows_without_data_are_nan(self):
+        self.assertTrue(np.isnan(max_drawdown(np.array([[np.nan, np.nan]])))[0])
+
+
+class PortfolioAnalyticsTests(TestCase):
+    """Portföy ölçütleri anlık görüntüler ve işlem nakit akışlarıyla hesaplanır"""
+
+    def setUp(self):
+        self.portfolio = Portfolio.objects.create(name='Getiri', user=User.objects.create(username='returns'))
+        Stock.objects.create(code='THYAO', name='THY')
+        self.days = [date(2026, 10, 5), date(2026, 10, 6), date(2026, 10, 7)]
+        for day, price in zip(self.days, ('10', '20', '20')):
+            _price('THYAO', price, _moment(day, 17))
+
+    def _trade(self, transaction_type, price, day, commission=0):
+        Transaction.objects.create(portfolio=self.portfolio, stock_id='THYAO', transaction_type=transaction_type,
+                                   quantity=Decimal('100'), price=Decimal(price), commission=Decimal(commission),
+                                   date=_moment(day, 11))
+
+    def test_sale_proceeds_are_outflows(self):
+        self._trade('buy', '10', self.days[0])
+        self._trade('sell', '20', self.days[2], commission=10)
+        flows = transaction_flows([self.portfolio.pk], np.array(self.days, dtype='datetime64[D]'))
+        np.testing.assert_allclose(flows, [[1000.0, 0.0, -1990.0]])
+
+    def test_profitable_full_exit(self):
+        self._trade('buy', '10', self.days[0])
+        self._trade('sell', '20', self.days[2])
+        backfill_snapshots(self.days[0], self.days[-1])
+
+        # Değerler 1000, 2000, 0: %100 kazanç, satış günü getiri 0
+        metrics = portfolio_analytics([self.portfolio.pk], self.days[0], self.days[-1])[self.portfolio.pk]
+        self.assertAlmostEqual(metrics['time_weighted_return'], 1.0)
+        self.assertEqual(metrics['max_drawdown'], 0.0)
+
+    def test_new_snapshots_invalidate_cached_metrics(self):
+        self._trade('buy', '10', self.days[0])
+        backfill_snapshots(self.days[0], self.days[-1])
+        metrics = portfolio_analytics([self.portfolio.pk], self.days[0], self.days[-1])[self.portfolio.pk]
+        self.assertAlmostEqual(metrics['time_weighted_return'], 1.0)
+
+        # Geç gelen kapanış fiyatıyla anlık görüntüler yeniden yazılır
+        _price('THYAO', '30', _moment(self.days[-1], 18))
+        backfill_snapshots(self.days[0], self.days[-1])
+        metrics = portfolio_analytics([self.portfolio.pk], self.days[0], self.days[-1])[self.portfolio.pk]
+        self.assertAlmostEqual(metrics['time_weighted_return'], 2.0)
+
+
+class BenchmarkComparisonTests(TestCase):
+
+    def setUp(self):
+        self.days = [date(2026, 10, 5), date(2026, 10, 6), date(2026, 10, 7)]
+        index = BenchmarkIndex.objects.create(code='XU100', name='BIST 100')
+        BenchmarkValue.objects.bulk_create([BenchmarkValue(index=index, date=day, value=100) for day in self.days])
+
+    def test_profitable_exit_beats_flat_index(self):
+        portfolio = Portfolio.objects.create(name='Kıyas', user=User.objects.create(username='benchmark'))
+        Stock.objects.create(code='THYAO', name='THY')
+        for day, price in zip(self.days, ('10', '20', '20')):
+            _price('THYAO', price, _moment(day, 17))
+        for transaction_type, price, day in (('buy', '10', self.days[0]), ('sell', '20', self.days[2])):
+            Transaction.objects.create(portfolio=portfolio, stock_id='THYAO', transaction_type=transaction_type,
+                                       quantity=Decimal('100'), price=Decimal(price), date=_moment(day, 11))
+
+        backfill_snapshots(self.days[0], self.days[-1])
+        comparison = PortfolioSnapshot.objects.get(portfolio=portfolio, date=self.days[-1]).benchmark_comparison
+        self.assertEqual(comparison, Decimal('100.00'))
+
+    def test_total_loss_day_keeps_window_finite(self):
+        dates = np.array(self.days, dtype='datetime64[D]')
+        values = np.array([[100.0, 0.0, 0.0], [100.0, 110.0, 121.0]])
+        comparison = comparison_matrix(values, np.zeros_like(values), dates, ['XU100', 'XU100'])
+        self.assertTrue(np.isfinite(comparison).all())
+        np.testing.assert_allclose(comparison[:, -1], [-100.0, 21.0], atol=1e-6)
+
+
+class LotBookTests(SimpleTestCase):
+
+    def test_fifo_partial_sell(self):
+        book = LotBook('fifo')
+        book.apply('buy', Decimal('100'), Decimal('10'), day=date(2026, 1, 2))
+        book.apply('buy', Decimal('100'), Decimal('20'), day=date(2026, 1, 3))
+        gain = book.apply('sell', Decimal('150'), Decimal('30'))
+        # 150 x 30 - (100 x 10 + 50 x 20)
+        self.assertEqual(gain, Decimal('2500'))
+        self.assertEqual(book.quantity, Decimal('50'))
+        self.assertEqual(book.average_cost, Decimal('20'))
+
+    def test_average_partial_sell(self):
+        book = LotBook('average')
+        book.apply('buy', Decimal('100'), Decimal('10'))
+        book.apply('buy', Decimal('100'), Decimal('20'))
+        gain = book.apply('sell', Decimal('150'), Decimal('30'), commission=Decimal('5'))
+        self.assertEqual(gain, Decimal('150') * 30 - Decimal('150') * 15 - 5)
+        self.assertEqual(len(book.lots), 1)
+
+    def test_split_rescales_lots(self):
+        book = LotBook('fifo')
+        book.apply('buy', Decimal('100'), Decimal('10'))
+        book.apply('split', Decimal('0'), Decimal('2'))
+        self.assertEqual(book.quantity, Decimal('200'))
+        self.assertEqual(book.apply('sell', Decimal('50'), Decimal('6')), Decimal('50'))
+
+    def test_accepts_int_amounts(self):
+        book = LotBook('fifo')
+        book.apply('buy', 5, 10)
+        self.assertEqual(book.to_state()[0][:2], ['5.00000000', '10.00000000'])
+
+
+@override_settings(COST_BASIS_METHOD='fifo')
+class PositionLotTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='lots')
+        self.portfolio = Portfolio.objects.create(name='Lot', user=self.user)
+        Stock.objects.create(code='THYAO', name='THY')
+
+    def _trade(self, transaction_type, quantity, price, day):
+        transaction = Transaction.objects.create(
+            portfolio=self.portfolio, stock_id='THYAO', transaction_type=transaction_type,
+            quantity=quantity, price=price, date=_moment(day),
+        )
+        transaction.refresh_from_db()
+        return transaction
+
+    def test_sell_realizes_fifo_gain(self):
+        self._trade('buy', 100, 10, date(2026, 1, 2))
+        self._trade('buy', 100, 20, date(2026, 1, 3))
+        sell = self._trade('sell', 150, 30, date(2026, 1, 5))
+        position = Position.objects.get()
+        self.assertEqual(sell.realized_profit_loss, Decimal('2500.00'))
+        self.assertEqual(position.quantity, Decimal('50'))
+        self.assertEqual(position.realized_profit_loss, Decimal('2500.00'))
+
+    def test_missing_lot_state_is_rebuilt(self):
+        self._trade('buy', 100, 10, date(2026, 1, 2))
+        Position.objects.update(lot_state=None, realized_profit_loss=0)
+        sell = self._trade('sell', 50, 12, date(2026, 1, 5))
+        self.assertEqual(sell.realized_profit_loss, Decimal('100.00'))
+        self.assertEqual(Position.objects.get().lot_state[0][0], '50.00000000')
+
+    def test_reopened_position_does_not_replay_history(self):
+        self._trade('buy', 100, 10, date(2026, 1, 2))
+        self._trade('sell', 100, 15, date(2026, 1, 5))
+        self.assertEqual(Position.objects.get().lot_state, [])
+        # Geçmiş taransaydı sinyalsiz değiştirilen ilk alış fiyatı kar/zarara yansırdı
+        Transaction.objects.filter(transaction_type='buy').update(price=1)
+
+        self._trade('buy', 100, 20, date(2026, 1, 6))
+        sell = self._trade('sell', 100, 25, date(2026, 1, 7))
+        self.assertEqual(sell.realized_profit_loss, Decimal('500.00'))
+        self.assertEqual(Position.objects.get().realized_profit_loss, Decimal('1000.00'))
+
+    def test_backdated_trade_replays_history(self):
+        self._trade('buy', 100, 10, date(2026, 1, 2))
+        sell = self._trade('sell', 100, 15, date(2026, 1, 5))
+        self._trade('buy', 100, 5, date(2026, 1, 1))
+        sell.refresh_from_db()
+        # FIFO'da satış artık 1 Ocak lotundan düşülür
+        self.assertEqual(sell.realized_profit_loss, Decimal('1000.00'))
+
+
+class DealingTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='fund')
+        Stock.objects.create(code='THYAO', name='THY')
+        self.fund = Fund.objects.create(name='Fon', creation_date=date(2026, 1, 1))
+        self.holder = Investor.objects.create(name='Eski')
+        self.subscriber = Investor.objects.create(name='Yeni')
+        FundShare.objects.create(fund=self.fund, investor=self.holder, shares_count=Decimal('1000'),
+                                 initial_investment=Decimal('1000'), entry_date=date(2026, 10, 1))
+        portfolio = Portfolio.objects.create(name='Fon Portföyü', user=self.user, fund=self.fund)
+        Transaction.objects.create(portfolio=portfolio, stock_id='THYAO', transaction_type='buy',
+                                   quantity=Decimal('100'), price=Decimal('10'), date=_moment(date(2026, 10, 9)))
+        for day in (date(2026, 10, 12), date(2026, 10, 13)):
+            _price('THYAO', '12', _moment(day, 17))
+
+    def test_dealing_date_follows_cutoff(self):
+        monday = date(2026, 10, 12)
+        self.assertEqual(dealing_date_for(_moment(monday, 13, 29)), monday)
+        self.assertEqual(dealing_date_for(_moment(monday, 13, 30)), date(2026, 10, 13))
+        self.assertEqual(dealing_date_for(_moment(date(2026, 10, 10))), monday)
+
+    def test_settlement_waits_for_close(self):
+        monday = date(2026, 10, 12)
+        self.assertEqual(last_settleable_day(_moment(monday, 14)), date(2026, 10, 11))
+        self.assertEqual(last_settleable_day(_moment(monday, 18, 30)), monday)
+
+    def test_orders_settle_at_nav_price(self):
+        monday = date(2026, 10, 12)
+        subscription = place_order(self.fund, self.subscriber, 'subscription', amount=Decimal('600'),
+                                   placed_at=_moment(monday))
+        redemption = place_order(self.fund, self.holder, 'redemption', shares=Decimal('2000'),
+                                 placed_at=_moment(monday))
+
+        result = settle_fund(self.fund.pk, monday)
+
+        # NAV 100 x 12 = 1200, 1000 pay -> birim fiyat 1.2
+        self.assertEqual(result.price, Decimal('1.2'))
+        self.assertEqual((result.settled, result.rejected), (1, 1))
+        subscription.refresh_from_db()
+        redemption.refresh_from_db()
+        self.assertEqual(subscription.settled_shares, Decimal('500'))
+        self.assertEqual(redemption.status, 'rejected')
+        self.fund.refresh_from_db()
+        self.assertEqual(self.fund.total_shares, Decimal('1500'))
+        self.assertEqual(self.fund.cash, Decimal('600'))
+
+        # Ertesi gün katılma nakdi NAV'a dahildir, birim fiyat düşmez
+        nav = {row.date: row for row in compute_fund_navs(monday, date(2026, 10, 13), [self.fund.pk])}
+        self.assertEqual(nav[monday].total_shares, Decimal('1000.00'))
+        self.assertEqual(nav[date(2026, 10, 13)].nav, Decimal('1800.00'))
+        self.assertEqual(nav[date(2026, 10, 13)].share_value, Decimal('1.200000'))
+
+    def test_invested_cash_is_not_counted_twice(self):
+        monday, tuesday = date(2026, 10, 12), date(2026, 10, 13)
+        place_order(self.fund, self.subscriber, 'subscription', amount=Decimal('600'), placed_at=_moment(monday))
+        settle_fund(self.fund.pk, monday)
+        Transaction.objects.create(portfolio=self.fund.portfolios.get(), stock_id='THYAO', transaction_type='buy',
+                                   quantity=Decimal('50'), price=Decimal('12'), date=_moment(tuesday, 11))
+
+        # Katılma nakdi hisseye yatırıldı: nakit düşer, fon değeri değişmez
+        self.fund.refresh_from_db()
+        self.assertEqual(self.fund.cash, Decimal('0'))
+        self.assertEqual(self.fund.current_value, Decimal('1800'))
+
+        nav = {row.date: row for row in compute_fund_navs(monday, tuesday, [self.fund.pk])}
+        self.assertEqual(nav[monday].nav, Decimal('1200.00'))
+        self.assertEqual(nav[tuesday].nav, Decimal('1800.00'))
+        self.assertEqual(nav[tuesday].share_value, Decimal('1.200000'))
+
+        result = run_scenarios([Scenario('Düşüş', [('all', -0.1)])])
+        self.assertEqual(result.fund_values.tolist(), [1800.0])
+        self.assertEqual(result.fund_impact.tolist(), [[-180.0]])
+
+    def test_cash_only_fund_gets_daily_nav(self):
+        cash_fund = Fund.objects.create(name='Nakit', creation_date=date(2026, 1, 1),
+                                        cash=Decimal('500'), total_shares=Decimal('400'))
+        closed = Fund.objects.create(name='Kapalı', creation_date=date(2026, 1, 1), cash=Decimal('100'),
+                                     is_active=False)
+
+        update_latest_fund_navs()
+        nav = FundNav.objects.get(fund=cash_fund, date=timezone.localdate())
+        self.assertEqual(nav.nav, Decimal('500.00'))
+        self.assertEqual(nav.share_value, Decimal('1.250000'))
+        self.assertFalse(FundNav.objects.filter(fund=closed).exists())
+
+    def test_edited_and_deleted_trades_restore_cash(self):
+        buy = Transaction.objects.create(portfolio=self.fund.portfolios.get(), stock_id='THYAO',
+                                         transaction_type='buy', quantity=Decimal('10'), price=Decimal('12'),
+                                         commission=Decimal('1'), date=_moment(date(2026, 10, 13), 11))
+        self.fund.refresh_from_db()
+        self.assertEqual(self.fund.cash, Decimal('-121'))
+
+        buy.quantity = Decimal('5')
+        buy.save()
+        self.fund.refresh_from_db()
+        self.assertEqual(self.fund.cash, Decimal('-61'))
+
+        buy.delete()
+        self.fund.refresh_from_db()
+        self.assertEqual(self.fund.cash, Decimal('0'))
+
+    def test_fund_without_shares_opens_at_one_only_when_empty(self):
+        monday = date(2026, 10, 12)
+        empty = Fund.objects.create(name='Boş', creation_date=date(2026, 1, 1))
+        place_order(empty, self.subscriber, 'subscription', amount=Decimal('100'), placed_at=_moment(monday))
+        self.assertEqual(settle_fund(empty.pk, monday).price, Decimal('1'))
+
+        # Paylar silinse de pozisyonlar fonda kalır; ilk katılan bunları bedelsiz alamaz
+        FundShare.objects.filter(fund=self.fund).delete()
+        Fund.objects.filter(pk=self.fund.pk).update(total_shares=0)
+        order = place_order(self.fund, self.subscriber, 'subscription', amount=Decimal('100'),
+                            placed_at=_moment(monday))
+        self.assertIsNone(settle_fund(self.fund.pk, monday))
+        self.assertEqual(DealingOrder.objects.get(pk=order.pk).status, 'pending')
+
+    def test_pending_orders_of_other_days_are_untouched(self):
+        order = place_order(self.fund, self.subscriber, 'subscription', amount=Decimal('100'),
+                            placed_at=_moment(date(2026, 10, 12), 15))
+        self.assertIsNone(settle_fund(self.fund.pk, date(2026, 10, 12)))
+        self.assertEqual(DealingOrder.objects.get(pk=order.pk).status, 'pending')
+
+
+class AlertTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='alerts', email='alerts@example.com')
+        Stock.objects.create(code='THYAO', name='THY')
+        self.now = timezone.now().replace(microsecond=0)
+
+    def _alert(self, condition_type, threshold, window_minutes=None):
+        return Alert.objects.create(user=self.user, stock_id='THYAO', condition_type=condition_type,
+                                    threshold_value=Decimal(threshold), window_minutes=window_minutes)
+
+    def test_thresholds_between_previous_and_current_fire(self):
+        index = AlertIndex()
+        crossed = self._alert('above', '105')
+        higher = self._alert('above', '110')
+        below = self._alert('below', '95')
+        index.sync()
+
+        self.assertEqual(index.crossed('THYAO', (100.0, 0.0), (106.0, 0.0)), [crossed.pk])
+        self.assertEqual(index.crossed('THYAO', (106.0, 0.0), (107.0, 0.0)), [])
+        self.assertEqual(index.crossed('THYAO', (100.0, 0.0), (94.0, 0.0)), [below.pk])
+        self.assertNotIn(higher.pk, index.crossed('THYAO', None, (106.0, 0.0)))
+
+    def test_evaluate_prices_triggers_once(self):
+        alert = self._alert('above', '105')
+        index = AlertIndex()
+        prices = [_price('THYAO', '106', self.now)]
+
+        triggered = evaluate_prices(prices, previous={'THYAO': (Decimal('100'), Decimal('0'))}, index=index)
+
+        self.assertEqual([t.alert_id for t in triggered], [alert.pk])
+        alert.refresh_from_db()
+        self.assertIsNotNone(alert.triggered_at)
+        self.assertEqual(Notification.objects.filter(alert=alert).count(), 1)
+        later = [_price('THYAO', '107', self.now + timedelta(minutes=1))]
+        self.assertEqual(evaluate_prices(later, previous={'THYAO': (Decimal('100'), Decimal('0'))}, index=index), [])
+
+
+class RollingAlertTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create(username='alerts', email='alerts@example.com')
+        Stock.objects.create(code='THYAO', name='THY')
+        self.now = timezone.now().replace(microsecond=0)
+
+    def _alert(self, condition_type, threshold, window_minutes=None):
+        return Alert.objects.create(user=self.user, stock_id='THYAO', condition_type=condition_type,
+                                    threshold_value=Decimal(threshold), window_minutes=window_minutes)
+
+    def test_rolling_window_move(self):
+        inside = self._alert('move_within', '3', window_minutes=10)
+        self._alert('move_within', '3', window_minutes=2)
+        index = AlertIndex()
+        index.sync()
+
+        buffer = TickBuffer(size=8)
+        for minutes, price in ((0, 100.0), (5, 98.0), (9, 100.0)):
+            buffer.append(self.now + timedelta(minutes=minutes), price)
+        high, low = buffer.append(self.now + timedelta(minutes=10), 101.0)
+
+        # 10 dakikada en düşük 98 -> %3.06; 2 dakikada en düşük 100 -> %1
+        self.assertEqual(index.rolling('THYAO', buffer, high, low, self.now + timedelta(minutes=10)), [inside.pk])
+        self.assertEqual(buffer.extremes(self.now + timedelta(minutes=6)), (100.0, 101.0))
+
+    def test_ring_buffer_keeps_last_ticks(self):
+        buffer = TickBuffer(size=3)
+        for minutes in range(5):
+            buffer.append(self.now + timedelta(minutes=minutes), 100.0 + minutes)
+        self.assertEqual(buffer.count, 3)
+        self.assertEqual(buffer.extremes(self.now - timedelta(hours=1)), (102.0, 104.0))
+
+
+class ImporterTests(TestCase):
+    STATEMENT = (
+        "Tarih;Hisse;İşlem;Adet;Fiyat\n"
+        "01.10.2026 10:00;THYAO;ALIŞ;10;5\n"
+        "01.10.2026 11:00;YENI;ALIŞ;10;5\n"
+        "02.10.2026 11:00;YENI;SATIŞ;5;6\n"
+    )
+
+    def setUp(self):
+        self.portfolio = Portfolio.objects.create(name='Ekstre', user=User.objects.create(username='import'))
+        Stock.objects.create(code='THYAO', name='THY')
+
+    def _import(self, **options):
+        return import_transactions(io.BytesIO(self.STATEMENT.encode()), 'ekstre.csv', self.portfolio, **options)
+
+    def test_dry_run_writes_nothing(self):
+        result = self._import(create_stocks=True, dry_run=True, batch_size=1)
+        self.assertEqual(result.created, 3)
+        self.assertEqual(result.new_stocks, {'YENI'})
+        self.assertIn("hiçbir kayıt yazılmadı", str(result))
+        self.assertFalse(Stock.objects.filter(code='YENI').exists())
+        self.assertFalse(Transaction.objects.exists())
+
+    def test_import_creates_stocks_and_positions(self):
+        result = self._import(create_stocks=True)
+        self.assertEqual(result.created, 3)
+        self.assertTrue(Stock.objects.filter(code='YENI').exists())
+        self.assertEqual(Position.objects.get(stock_id='YENI').quantity, Decimal('5'))
+        self.assertEqual(self._import().duplicates, 3)
+
+    def test_unknown_stock_is_reported_in_dry_run(self):
+        result = self._import(dry_run=True)
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, _ in result.errors], [3, 4])
+
+
+class LttbTests(SimpleTestCase):
+
+    def test_keeps_bounds_and_extremes(self):
+        x = np.arange(1000, dtype=np.float64)
+        y = np.sin(x / 50)
+        y[500] = 10
+        selected = lttb(x, y, 50)
+        self.assertEqual(len(selected), 50)
+        self.assertEqual((selected[0], selected[-1]), (0, 999))
+        self.assertTrue(np.all(np.diff(selected) > 0))
+        self.assertIn(500, selected)
+
+    def test_short_series_is_returned_whole(self):
+        x = np.arange(10, dtype=np.float64)
+        np.testing.assert_array_equal(lttb(x, x, 10), np.arange(10))
+        np.testing.assert_array_equal(lttb(x, x, 2), np.arange(10))
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class DashboardRebuildTests(TestCase):
+    """Aynı transaction'daki yenileme istekleri commit sonrası tek seferde işlenir"""
+
+    def setUp(self):
+        cache.clear()
+        self.first = Investor.objects.create(name='Birinci')
+        self.second = Investor.objects.create(name='İkinci')
+
+    def test_requests_are_batched_into_one_callback(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            schedule_rebuild(investor_ids=[self.first.pk])
+            schedule_rebuild(investor_ids=[self.second.pk])
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNotNone(cache.get(dashboard_key(self.first.pk)))
+        self.assertIsNotNone(cache.get(dashboard_key(self.second.pk)))
+
+    def test_rolled_back_requests_are_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    schedule_rebuild(investor_ids=[self.first.pk])
+                    raise ValueError
+            except ValueError:
+                pass
+            schedule_rebuild(investor_ids=[self.second.pk])
+        self.assertEqual(len(callbacks), 1)
+        self.assertIsNone(cache.get(dashboard_key(self.first.pk)))
+        self.assertIsNotNone(cache.get(dashboard_key(self.second.pk)))
+
+
+class ApiEtagTests(TestCase):
+
+    def setUp(self):
+        Stock.objects.create(code='THYAO', name='THY')
+        _price('THYAO', '100', timezone.now())
+        publish_ingest_batch(7)
+        self.client.force_login(User.objects.create(username='api'))
+
+    def test_matching_etag_returns_304(self):
+        response = self.client.get('/api/prices/', {'codes': 'THYAO'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"b7"')
+
+        cached = self.client.get('/api/prices/', {'codes': 'THYAO'}, HTTP_IF_NONE_MATCH='"b7"')
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached.content, b'')
+
+    def test_new_batch_changes_etag(self):
+        publish_ingest_batch(8)
+        response = self.client.get('/api/prices/', {'codes': 'THYAO'}, HTTP_IF_NONE_MATCH='"b7"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], '"b8"')
+
+    def test_anonymous_requests_get_401(self):
+        self.client.logout()
+        for url in ('/api/quotes/', '/api/stocks/search/?q=thy', '/api/prices/', '/api/portfolios/'):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH='"b7"')
+            self.assertEqual(response.status_code, 401, url)
+            self.assertEqual(response.json(), {'error': "Giriş yapılmalı"})
@@ -0,0 +1,213 @@
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone as dt_timezone
+import numpy as np
+from django.conf import settings
+from django.db.models import Max
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from .models import PriceData
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+# Hisse başına bellekte tutulan son fiyat sayısı (dakikalık veride bir işlem günü ~500)
+BUFFER_SIZE = getattr(settings, 'TICK_BUFFER_SIZE', 512)
+# Hacim ortalaması için tutulan gün sayısı
+VOLUME_DAYS = getattr(settings, 'TICK_VOLUME_DAYS', 20)
+
+
+def _float(value):
+    return float(value) if value is not None else None
+
+
+class TickBuffer:
+    """
+    Bir hissenin son fiyatları için sabit boyutlu halka tampon ve gün içi özetler.
+
+    Fiyat ve zaman (epoch saniye) dizileri baştan ayrılır, yeni fiyat en eskisinin
+    yerine yazılır. Gün değiştiğinde günün son (kümülatif) hacmi günlük hacim
+    halkasına eklenir, gün içi en yüksek/düşük ve hacim sıfırlanır.
+    """
+
+    def __init__(self, size=BUFFER_SIZE):
+        self.times = np.zeros(size)
+        self.prices = np.zeros(size)
+        self.count = 0
+        self.head = 0
+        self.day = None
+        self.high = None
+        self.low = None
+        self.volume = None
+        self.daily_volumes = deque(maxlen=VOLUME_DAYS)
+
+    def append(self, timestamp, price, volume=None, high=None, low=None):
+        """
+        Yeni fiyatı tampona ekler.
+
+        Returns:
+            tuple: Bu fiyattan önceki (gün içi en yüksek, gün içi en düşük); günün ilk fiyatında (None, None)
+        """
+        day = timezone.localtime(timestamp).date()
+        if day != self.day:
+            if self.day is not None and self.volume:
+                self.daily_volumes.append(self.volume)
+            self.day = day
+            self.high = self.low = self.volume = None
+
+        before = (self.high, self.low)
+        # Veri kaynağının gün içi en yüksek/düşük değerleri tampon başlamadan önceki fiyatları da kapsar
+        highs = [value for value in (self.high, price, high) if value is not None]
+        lows = [value for value in (self.low, price, low) if value is not None]
+        self.high, self.low = max(highs), min(lows)
+        if volume is not None:
+            self.volume = volume
+
+        self.times[self.head] = timestamp.timestamp()
+        self.prices[self.head] = price
+        self.head = (self.head + 1) % len(self.times)
+        self.count = min(self.count + 1, len(self.times))
+        return before
+
+    @property
+    def last_time(self):
+        """Son eklenen fiyatın zamanı (epoch saniye); tampon boşsa None"""
+        if not self.count:
+            return None
+        return self.times[(self.head - 1) % len(self.times)]
+
+    def extremes(self, since):
+        """`since` (datetime) sonrasındaki fiyatların (en düşük, en yüksek) değeri; fiyat yoksa (None, None)"""
+        prices = self.prices[:self.count][self.times[:self.count] >= since.timestamp()]
+        if not prices.size:
+            return None, None
+        return float(prices.min()), float(prices.max())
+
+    @property
+    def average_volume(self):
+        """Tamamlanan son günlerin ortalama işlem hacmi (gün yoksa None)"""
+        if not self.daily_volumes:
+            return None
+        return sum(self.daily_volumes) / len(self.daily_volumes)
+
+
+class TickBuffers:
+    """
+    Hisse kodu -> TickBuffer. Tamponlar fiyat alımında beslenir; bir hisse ilk kez
+    (veya yeni günde ilk kez) görüldüğünde günün önceki fiyatları ve son günlerin
+    hacimleri tek seferde yüklenir. Birden fazla Celery çalışanında her grup tek bir
+    sürece düştüğünden, tamponun görmediği ara fiyatlar her grupta tek sorguyla eklenir.
+    """
+
+    def __init__(self, size=BUFFER_SIZE):
+        self.size = size
+        self.buffers = {}
+        self.lock = threading.Lock()
+
+    def get(self, stock_id):
+        return self.buffers.get(stock_id)
+
+    def warm_up(self, stock_ids, before):
+        """
+        Tamponu olmayan veya son fiyatı önceki bir güne ait hisseler için `before`
+        öncesindeki bugünkü fiyatları ve son VOLUME_DAYS günün kapanış hacimlerini
+        yükler. Güncel tamponlara, son fiyatlarından sonra başka süreçte kaydedilmiş
+        fiyatlar eklenir.
+
+        Returns:
+            int: Tamponu oluşturulan hisse sayısı
+        """
+        with self.lock:
+            today = timezone.localtime(before).replace(hour=0, minute=0, second=0, microsecond=0)
+            missing = []
+            current = []
+            for stock_id in stock_ids:
+                buffer = self.buffers.get(stock_id)
+                if buffer is None or buffer.day != today.date():
+                    missing.append(stock_id)
+                else:
+                    current.append(stock_id)
+
+            self._fill_gaps(current, before)
+            if not missing:
+                return 0
+
+            tz = timezone.get_current_timezone()
+            buffers = {stock_id: TickBuffer(self.size) for stock_id in missing}
+
+            # Hacim kümülatif olduğundan günün en büyük değeri kapanış hacmidir
+            volumes = PriceData.objects.filter(
+                stock_id__in=missing,
+                timestamp__gte=today - timedelta(days=VOLUME_DAYS * 7 // 5 + 7),
+                timestamp__lt=today,
+                volume__gt=0
+            ).annotate(day=TruncDate('timestamp', tzinfo=tz)).values_list('stock_id', 'day').annotate(
+                closing=Max('volume')
+            ).order_by('stock_id', 'day')
+            for stock_id, _, closing in volumes:
+                buffers[stock_id].daily_volumes.append(float(closing))
+
+            ticks = PriceData.objects.filter(
+                stock_id__in=missing,
+                timestamp__gte=today,
+                timestamp__lt=before
+            ).order_by('timestamp').values_list('stock_id', 'timestamp', 'price', 'volume', 'max_price', 'min_price')
+            for stock_id, timestamp, price, volume, high, low in ticks.iterator():
+                buffers[stock_id].append(timestamp, float(price), _float(volume), _float(high), _float(low))
+
+            self.buffers.update(buffers)
+        logger.debug(f"{len(missing)} hisse için fiyat tamponu oluşturuldu")
+        return len(missing)
+
+    def _fill_gaps(self, stock_ids, before):
+        """Tamponların son fiyatından `before` anına kadar kaydedilmiş fiyatları ekler (kilit altında çağrılır)"""
+        last_times = {stock_id: self.buffers[stock_id].last_time for stock_id in stock_ids}
+        last_times = {stock_id: last for stock_id, last in last_times.items() if last is not None}
+        if not last_times:
+            return 0
+
+        since = datetime.fromtimestamp(min(last_times.values()), tz=dt_timezone.utc)
+        ticks = PriceData.objects.filter(
+            stock_id__in=last_times.keys(),
+            timestamp__gt=since,
+            timestamp__lt=before
+        ).order_by('timestamp').values_list('stock_id', 'timestamp', 'price', 'volume', 'max_price', 'min_price')
+
+        filled = 0
+        for stock_id, timestamp, price, volume, high, low in ticks.iterator():
+            if timestamp.timestamp() <= last_times[stock_id]:
+                continue
+            self.buffers[stock_id].append(timestamp, float(price), _float(volume), _float(high), _float(low))
+            filled += 1
+        if filled:
+            logger.debug(f"Fiyat tamponlarına başka süreçte kaydedilmiş {filled} fiyat eklendi")
+        return filled
+
+    def record(self, price_data):
+        """
+        PriceData kaydını hissenin tamponuna ekler.
+
+        Returns:
+            tuple: (tampon, bu fiyattan önceki gün içi en yüksek, en düşük)
+        """
+        with self.lock:
+            buffer = self.buffers.get(price_data.stock_id)
+            if buffer is None:
+                buffer = self.buffers[price_data.stock_id] = TickBuffer(self.size)
+            high, low = buffer.append(
+                price_data.timestamp,
+                float(price_data.price),
+                _float(price_data.volume),
+                _float(price_data.max_price),
+                _float(price_data.min_price),
+            )
+        return buffer, high, low
+
+
+_buffers = TickBuffers()
+
+
+def tick_buffers():
+    """İşlem genelinde paylaşılan fiyat tamponları"""
+    return _buffers
@@ -0,0 +1,113 @@
+from collections import namedtuple
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+import numpy as np
+from django.utils import timezone
+from .models import PriceData
+from .pricing import latest_prices
+
+# Günlük kapanış matrisi: dates (datetime64[D]), stock_ids (liste), closes (hisse x gün)
+DailyCloses = namedtuple('DailyCloses', ['dates', 'stock_ids', 'closes'])
+
+
+def day_bounds(start, end):
+    """Tarih aralığını yerel saat dilimine göre [başlangıç, bitiş) datetime çiftine çevirir"""
+    tz = timezone.get_current_timezone()
+    start_dt = timezone.make_aware(datetime.combine(start, time.min), tz)
+    end_dt = timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz)
+    return start_dt, end_dt
+
+
+def to_local_days(timestamps):
+    """
+    Saat dilimi bilgisi olmayan UTC zaman damgalarını yerel gün numaralarına (datetime64[D]) çevirir.
+
+    Saat dilimi farkı her benzersiz saat için bir kez hesaplanır, böylece
+    milyonlarca kayıt için satır satır dönüşüm yapılmaz.
+    """
+    utc = np.array(timestamps, dtype='datetime64[s]')
+    if utc.size == 0:
+        return utc.astype('datetime64[D]')
+
+    hours, inverse = np.unique(utc.astype('datetime64[h]'), return_inverse=True)
+    tz = timezone.get_current_timezone()
+    offsets = np.array([
+        int(hour.astype(datetime).replace(tzinfo=dt_timezone.utc).astimezone(tz).utcoffset().total_seconds())
+        for hour in hours
+    ], dtype='timedelta64[s]')
+
+    return (utc + offsets[inverse]).astype('datetime64[D]')
+
+
+def forward_fill(matrix):
+    """Her satırdaki NaN değerleri soldaki son geçerli değerle doldurur"""
+    if matrix.size == 0:
+        return matrix
+    valid = ~np.isnan(matrix)
+    index = np.where(valid, np.arange(matrix.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    return matrix[np.arange(matrix.shape[0])[:, None], index]
+
+
+def daily_closes(stock_ids, start, end, days=None):
+    """
+    Hisselerin günlük kapanış fiyatlarını matris olarak döndürür.
+
+    Her günün son fiyatı o günün kapanışı kabul edilir. Fiyatı olmayan günler
+    bir önceki kapanışla doldurulur; aralık başlangıcından önceki son fiyat da
+    ilk gün için kullanılır.
+
+    Args:
+        stock_ids (iterable): Hisse kodları
+        start (date): Başlangıç tarihi (dahil)
+        end (date): Bitiş tarihi (dahil)
+        days (str, optional): 'trading' (varsayılan) sadece veri olan günler,
+            'calendar' aralıktaki tüm takvim günleri
+
+    Returns:
+        DailyCloses: dates, stock_ids ve (hisse x gün) float kapanış matrisi
+    """
+    stock_ids = sorted(set(stock_ids))
+    stock_index = {code: i for i, code in enumerate(stock_ids)}
+    start_dt, end_dt = day_bounds(start, end)
+
+    codes, timestamps, prices = [], [], []
+    rows = PriceData.objects.filter(
+        stock_id__in=stock_ids,
+        timestamp__gte=start_dt,
+        timestamp__lt=end_dt
+    ).values_list('stock_id', 'timestamp', 'price')
+    for code, timestamp, price in rows.iterator(chunk_size=10000):
+        codes.append(stock_index[code])
+        # Zaman damgaları UTC olarak gelir, NumPy için saat dilimi bilgisini at
+        timestamps.append(timestamp.replace(tzinfo=None))
+        prices.append(price)
+
+    stock_idx = np.array(codes, dtype=np.int64)
+    moments = np.array(timestamps, dtype='datetime64[s]')
+    local_days = to_local_days(timestamps)
+    values = np.array(prices, dtype=np.float64)
+
+    if days == 'calendar':
+        dates = np.arange(np.datetime64(start, 'D'), np.datetime64(end, 'D') + 1)
+    else:
+        dates = np.unique(local_days)
+
+    closes = np.full((len(stock_ids), len(dates)), np.nan)
+    if values.size:
+        day_idx = np.searchsorted(dates, local_days)
+        # Her (hisse, gün) çifti için en son zaman damgalı kaydı seç
+        key = stock_idx * len(dates) + day_idx
+        order = np.lexsort((moments, key))
+        key = key[order]
+        last = np.r_[key[1:] != key[:-1], True]
+        closes.flat[key[last]] = values[order][last]
+
+    # Aralık öncesindeki son fiyatla ilk günü doldur
+    if len(dates):
+        previous = latest_prices(stock_ids, before=start_dt)
+        for code, price in previous.items():
+            row = stock_index[code]
+            if np.isnan(closes[row, 0]):
+                closes[row, 0] = float(price)
+
+    return DailyCloses(dates, stock_ids, forward_fill(closes))
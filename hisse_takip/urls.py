@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'hisse_takip'
 
@@ -15,8 +15,9 @@ urlpatterns = [
     
     # Hisse senedi görünümleri
     path('stocks/', views.stock_list, name='stock_list'),
-    path('stocks/<str:code>/', views.stock_detail, name='stock_detail'),
+    # (izleme listesi hisse kodu kalıbından önce eşleşmeli)
     path('stocks/watchlist/', views.watchlist, name='watchlist'),
+    path('stocks/<str:code>/', views.stock_detail, name='stock_detail'),
     
     # İşlem yönetimi
     path('transactions/', views.transaction_list, name='transaction_list'),
@@ -32,4 +33,13 @@ urlpatterns = [
     
     # Yatırımcı Dashboard
     path('investor/', views.investor_dashboard, name='investor_dashboard'),
+    
+    # JSON API (salt okunur)
+    path('api/quotes/', api.quotes, name='api_quotes'),
+    path('api/stocks/search/', api.stock_search, name='api_stock_search'),
+    path('api/prices/', api.price_history, name='api_price_history'),
+    path('api/portfolios/', api.portfolios, name='api_portfolios'),
+    path('api/watchlist/deltas/', api.watchlist_deltas, name='api_watchlist_deltas'),
+    path('api/charts/<str:kind>/<str:key>/', api.chart, name='api_chart'),
+    path('api/stream/', api.stream, name='api_stream'),
 ] 
\ No newline at end of file
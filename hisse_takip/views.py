@@ -1,12 +1,43 @@
+import asyncio
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import User
+from django.db.models import OuterRef, Subquery
 from django.http import HttpResponse
 from django.contrib import messages
-from .models import Portfolio, Stock, Transaction, WatchList, Position, Investor, Fund, FundShare
+from .models import Portfolio, PortfolioSnapshot, Stock, Transaction, WatchList, Position, Investor, Fund, FundShare
 from django.contrib.auth import logout
+from django.utils import timezone
+from datetime import date, timedelta
+from .pricing import acached_quotes
+from .read_models import aget_dashboard
+from .watchlists import board, board_rows
 
 # Create your views here.
 
+async def _alist(queryset):
+    return [row async for row in queryset]
+
+
+async def _load_user(request):
+    """
+    Async view'larda kullanıcıyı ve yatırımcı kaydını önceden yükler.
+
+    request.user tembel yüklenir ve async bağlamda veritabanına gidemez; şablonlar
+    (user.investor dahil) buradan önbelleğe alınan nesneleri kullanır.
+
+    Returns:
+        tuple: (kullanıcı, yatırımcı veya None)
+    """
+    user = await request.auser()
+    investor = None
+    if user.is_authenticated:
+        investor = await Investor.objects.filter(user=user).afirst()
+        User.investor.related.set_cached_value(user, investor)
+    request.user = user
+    return user, investor
+
+
 # Geçici bir şablon sayfası oluşturulana kadar kullanılacak
 def under_construction(request, view_name="Bu sayfa"):
     return HttpResponse(f"""
@@ -51,18 +82,56 @@ def portfolio_edit(request, pk):
 # Hisse Senedi Görünümleri
 @login_required
 def stock_list(request):
-    # İleride burada hisse senetleri listelenecek
-    return under_construction(request, "Hisse Senedi Listesi")
+    """
+    Hisse senetleri ve son fiyatları; ?query= ile Türkçe harf duyarsız arama
+    (bellek içi indeks, LIKE taraması yapılmaz).
+    """
+    from .pricing import latest_quotes
+    from .search import search_stocks
+
+    query = request.GET.get('query', '').strip()
+    if query:
+        stocks = search_stocks(query, limit=50)
+    else:
+        stocks = [
+            {'code': code, 'name': name, 'sector': sector}
+            for code, name, sector in Stock.objects.order_by('code').values_list('code', 'name', 'sector')
+        ]
+
+    quotes = latest_quotes([stock['code'] for stock in stocks])
+    for stock in stocks:
+        stock['price'], stock['change_percentage'] = quotes.get(stock['code'], (None, None))
+    return render(request, 'hisse_takip/stock_list.html', {'query': query, 'stocks': stocks})
 
 @login_required
 def stock_detail(request, code):
-    # İleride burada belirli bir hisse senedinin detayları gösterilecek
-    return under_construction(request, f"Hisse Detayı (Kod: {code})")
+    """
+    Hissenin son fiyatı ve fiyat grafiği. Grafik verisi /api/charts/stock/<kod>/
+    uç noktasından aralığa göre indirgenmiş olarak alınır.
+    """
+    from .pricing import latest_quotes
+
+    stock = get_object_or_404(Stock, code=code.upper())
+    price, change = latest_quotes([stock.code]).get(stock.code, (None, None))
+    return render(request, 'hisse_takip/stock_detail.html', {
+        'stock': stock,
+        'price': price,
+        'change_percentage': change,
+    })
 
 @login_required
-def watchlist(request):
-    # İleride burada kullanıcının izleme listesi gösterilecek
-    return under_construction(request, "İzleme Listesi")
+async def watchlist(request):
+    """
+    İzleme panosu: kullanıcının tüm izleme listesi öğeleri, son fiyat, günlük
+    değişim, hacim ve hedefe uzaklık.
+
+    Öğeler tek sorguyla, fiyatlar alım grubu başına önbelleğe alınan fiyat
+    haritasından gelir; ikisi aynı anda beklenir. Sayfa açıkken fiyatlar
+    /api/watchlist/deltas/ ile güncellenir.
+    """
+    user, _ = await _load_user(request)
+    rows, quotes = await asyncio.gather(_alist(board_rows(user)), acached_quotes())
+    return render(request, 'hisse_takip/watchlist.html', board(rows, quotes))
 
 # İşlem Görünümleri
 @login_required
@@ -81,10 +150,42 @@ def transaction_detail(request, pk):
     return under_construction(request, f"İşlem Detayı (ID: {pk})")
 
 # Rapor Görünümleri
+def _date_range(request, default_days=365):
+    """GET parametrelerinden (start, end) tarih aralığını okur"""
+    try:
+        end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else timezone.localdate()
+        start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else end - timedelta(days=default_days)
+    except ValueError:
+        end = timezone.localdate()
+        start = end - timedelta(days=default_days)
+    return start, end
+
 @login_required
 def performance_report(request):
-    # İleride burada performans raporu gösterilecek
-    return under_construction(request, "Performans Raporu")
+    """
+    Kullanıcının portföylerinin ve yatırım yaptığı fonların performans ölçütlerini gösterir.
+    """
+    from .analytics import portfolio_analytics, fund_analytics
+    
+    start, end = _date_range(request)
+    
+    portfolios = list(Portfolio.objects.filter(user=request.user).only('id', 'name'))
+    portfolio_metrics = portfolio_analytics([p.id for p in portfolios], start, end)
+    
+    funds = []
+    fund_metrics = {}
+    investor = getattr(request.user, 'investor', None)
+    if investor:
+        funds = list(Fund.objects.filter(shares__investor=investor).distinct().only('id', 'name'))
+        fund_metrics = fund_analytics([f.id for f in funds], start, end)
+    
+    context = {
+        'start': start,
+        'end': end,
+        'portfolio_rows': [(p, portfolio_metrics.get(p.id)) for p in portfolios],
+        'fund_rows': [(f, fund_metrics.get(f.id)) for f in funds],
+    }
+    return render(request, 'hisse_takip/performance_report.html', context)
 
 @login_required
 def summary_report(request):
@@ -97,51 +198,47 @@ def settings_view(request):
     # İleride burada ayarlar sayfası gösterilecek
     return under_construction(request, "Ayarlar")
 
-# İleride Yatırımcı Dashboard'u için Görünüm
+def _portfolio_summaries(user):
+    """Kullanıcının portföyleri ve son anlık görüntü değerleri (tek sorgu)"""
+    latest = PortfolioSnapshot.objects.filter(portfolio=OuterRef('pk')).order_by('-date')
+    return Portfolio.objects.filter(user=user).order_by('name').annotate(
+        snapshot_date=Subquery(latest.values('date')[:1]),
+        total_value=Subquery(latest.values('total_value')[:1]),
+        profit_loss=Subquery(latest.values('profit_loss')[:1]),
+        profit_loss_percentage=Subquery(latest.values('profit_loss_percentage')[:1]),
+    ).values('id', 'name', 'currency', 'snapshot_date', 'total_value', 'profit_loss', 'profit_loss_percentage')
+
+
+# Yatırımcı Dashboard'u
 @login_required
-def investor_dashboard(request):
+async def investor_dashboard(request):
     """
     Bir yatırımcının fon paylarını ve portföylerini gösteren dashboard.
+
+    Async view'dır: fon payları (önbellekteki read model) ve portföy anlık
+    görüntüleri birbirinden bağımsız olduğundan aynı anda beklenir.
     """
-    # Kullanıcıya bağlı yatırımcı bilgilerini al
-    if hasattr(request.user, 'investor') and request.user.investor:
-        investor = request.user.investor
-        
-        # Yatırımcının fon paylarını al
-        fund_shares = investor.fund_shares.all()
-        
-        # Toplam değerleri hesapla
-        total_current_value = sum(share.current_value for share in fund_shares)
-        total_initial_investment = sum(share.initial_investment for share in fund_shares)
-        total_profit_loss = total_current_value - total_initial_investment
-        
-        # Yüzde hesaplama (sıfıra bölme kontrolü ile)
-        if total_initial_investment > 0:
-            total_profit_percentage = (total_profit_loss / total_initial_investment) * 100
-        else:
-            total_profit_percentage = 0
-            
-        context = {
-            'investor': investor,
-            'fund_shares': fund_shares,
-            'total_current_value': total_current_value,
-            'total_initial_investment': total_initial_investment,
-            'total_profit_loss': total_profit_loss,
-            'total_profit_percentage': total_profit_percentage,
-        }
-        
-        return render(request, 'hisse_takip/investor_dashboard.html', context)
-    else:
+    user, investor = await _load_user(request)
+    if investor is None:
         # Eğer kullanıcıya bağlı yatırımcı yoksa
         messages.warning(request, "Yatırımcı bilgileriniz bulunamadı. Lütfen yönetici ile iletişime geçin.")
         return render(request, 'hisse_takip/investor_dashboard.html', {
             'fund_shares': [],
+            'portfolios': await _alist(_portfolio_summaries(user)),
             'total_current_value': 0,
             'total_initial_investment': 0,
             'total_profit_loss': 0,
             'total_profit_percentage': 0,
         })
 
+    # Fon payları ve toplamlar fiyat alımı/işlem sonrası önceden hesaplanıp önbellekte tutulur
+    dashboard, portfolios = await asyncio.gather(
+        aget_dashboard(investor.pk),
+        _alist(_portfolio_summaries(user)),
+    )
+    context = {'investor': investor, 'portfolios': portfolios, **dashboard}
+    return render(request, 'hisse_takip/investor_dashboard.html', context)
+
 def home_view(request):
     """
     Ana sayfaya erişen kullanıcılar için yönlendirme view'ı
@@ -0,0 +1,106 @@
+import logging
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from .models import WatchList
+
+# Loglama ayarları
+logger = logging.getLogger(__name__)
+
+# Liste değişince silindiğinden süre sadece güvenlik payıdır
+CODES_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 24 * 60 * 60)
+
+
+def codes_key(user_id):
+    return f"watchlist:codes:{user_id}"
+
+
+def board_rows(user):
+    """
+    Kullanıcının izleme listeleri ve öğeleri tek sorguda; öğesi olmayan listeler
+    hisse alanları boş tek satır olarak gelir.
+    """
+    return WatchList.objects.filter(user=user).order_by('name', 'id', 'items__stock_id').values_list(
+        'id', 'name', 'items__stock_id', 'items__stock__name', 'items__target_price', 'items__notes'
+    )
+
+
+def target_distance(target, price):
+    """Hedefe kalan yüzde (pozitif: fiyatın yükselmesi gerekir)"""
+    if target is None or not price:
+        return None
+    return round((target - price) / price * 100, 2)
+
+
+def board(rows, quotes):
+    """
+    İzleme panosu bağlamı.
+
+    Args:
+        rows: board_rows satırları
+        quotes: {hisse: (fiyat, değişim, hacim, zaman)} (pricing.cached_quotes)
+
+    Returns:
+        dict: watchlists (öğeleriyle) ve panodaki hisse kodları
+    """
+    lists = {}
+    for watchlist_id, name, code, stock_name, target, notes in rows:
+        watchlist = lists.setdefault(watchlist_id, {'id': watchlist_id, 'name': name, 'items': []})
+        if code is None:
+            continue
+        price, change, volume, timestamp = quotes.get(code, (None, None, None, None))
+        watchlist['items'].append({
+            'code': code,
+            'name': stock_name,
+            'price': price,
+            'change_percentage': change,
+            'volume': volume,
+            'timestamp': timestamp,
+            'target_price': target,
+            'target_distance': target_distance(target, price),
+            'notes': notes,
+        })
+    codes = sorted({item['code'] for watchlist in lists.values() for item in watchlist['items']})
+    return {'watchlists': list(lists.values()), 'codes': codes}
+
+
+def _codes_query(user_id):
+    return WatchList.objects.filter(user_id=user_id, items__isnull=False).values_list('items__stock_id', flat=True).distinct()
+
+
+async def awatchlist_codes(user_id):
+    """Kullanıcının izleme listelerindeki hisse kodları (önbellekten; liste değişince silinir)"""
+    key = codes_key(user_id)
+    codes = await cache.aget(key)
+    if codes is None:
+        codes = sorted([code async for code in _codes_query(user_id)])
+        await cache.aset(key, codes, CODES_CACHE_TIMEOUT)
+    return codes
+
+
+def invalidate_watchlist_codes(user_id):
+    """Liste değişikliği transaction tamamlanınca önbellekteki kod listesini siler"""
+    transaction.on_commit(lambda: cache.delete(codes_key(user_id)))
+
+
+def quote_deltas(codes, quotes, since=None):
+    """
+    Panodaki hisselerin `since` (datetime) sonrasında değişen fiyatları.
+
+    Returns:
+        tuple: (satırlar, en son fiyat zamanı veya None)
+    """
+    rows = []
+    latest = None
+    for code in codes:
+        quote = quotes.get(code)
+        if quote is None:
+            continue
+        price, change, volume, timestamp = quote
+        latest = max(latest, timestamp) if latest is not None else timestamp
+        if since is None or timestamp > since:
+            rows.append({
+                'code': code, 'price': price, 'change_percentage': change,
+                'volume': volume, 'timestamp': timestamp,
+            })
+    return rows, latest